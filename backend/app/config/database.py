@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.config.settings import get_settings
+from app.core.prometheus_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
 settings = get_settings()
 
@@ -28,6 +29,7 @@ engine = create_async_engine(
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=3600,
+    poolclass=TimedAsyncAdaptedQueuePool,  # Reports checkout wait to Prometheus
 )
 
 # Create async session factory
@@ -97,6 +99,7 @@ sync_engine = create_engine(
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=3600,
+    poolclass=TimedQueuePool,  # Reports checkout wait to Prometheus
 )
 
 SyncSessionLocal = sessionmaker(
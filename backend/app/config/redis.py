@@ -3,6 +3,7 @@ Redis configuration and connection management.
 Provides async Redis client for caching and session storage.
 """
 from typing import Optional
+import redis as sync_redis
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
 
@@ -13,6 +14,7 @@ settings = get_settings()
 # Global Redis connection pool
 _redis_pool: Optional[ConnectionPool] = None
 _redis_client: Optional[redis.Redis] = None
+_sync_redis_client: Optional[sync_redis.Redis] = None
 
 
 async def init_redis() -> redis.Redis:
@@ -63,6 +65,26 @@ async def get_redis() -> redis.Redis:
     return _redis_client
 
 
+def get_sync_redis() -> sync_redis.Redis:
+    """
+    Get a blocking Redis client for synchronous code (Celery tasks).
+
+    Returns:
+        Redis client (connects lazily on first command)
+    """
+    global _sync_redis_client
+
+    if _sync_redis_client is None:
+        _sync_redis_client = sync_redis.Redis.from_url(
+            settings.REDIS_URL,
+            password=settings.REDIS_PASSWORD,
+            encoding="utf-8",
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+        )
+    return _sync_redis_client
+
+
 async def close_redis():
     """Close Redis connection and cleanup resources."""
     global _redis_pool, _redis_client
@@ -118,16 +118,131 @@ class Settings(BaseSettings):
     ]
     KYC_ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".pdf"]
 
+    # Password Hashing (runs in a process pool off the event loop; a full queue answers 503)
+    PASSWORD_HASH_POOL_ENABLED: bool = True
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Hashes queued or running per API process before rejecting
+
+    # Audit Log Writer (entries queued in memory and inserted in batches; security events stay synchronous)
+    AUDIT_ASYNC_WRITES_ENABLED: bool = True
+    AUDIT_WRITER_BATCH_SIZE: int = 200  # Rows per INSERT; a full batch is flushed at once
+    AUDIT_WRITER_FLUSH_SECONDS: float = 1.0
+    AUDIT_WRITER_MAX_BUFFER: int = 10000  # Entries held in memory while inserts fail before spooling
+    AUDIT_WRITER_SPOOL_PATH: str = "./storage/audit_spool.jsonl"  # Used when neither the DB nor Redis is reachable
+
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
 
+    # Request Metrics (per-route latency histograms, aggregated in memory and flushed to Redis)
+    REQUEST_METRICS_ENABLED: bool = True
+    REQUEST_METRICS_FLUSH_SECONDS: float = 10.0
+    REQUEST_METRICS_MINUTE_RETENTION_HOURS: int = 48  # 1-minute buckets, used for windows up to 6 hours
+    REQUEST_METRICS_HOUR_RETENTION_DAYS: int = 35  # 1-hour buckets, used for longer windows
+
+    # Prometheus Metrics (/metrics; with several worker processes set the PROMETHEUS_MULTIPROC_DIR
+    # environment variable to a per-container dir shared by the workers, empty at start)
+    PROMETHEUS_METRICS_ENABLED: bool = True
+    PROMETHEUS_METRICS_TOKEN: str | None = None  # Bearer token required on /metrics when set
+    CELERY_METRICS_PORT: int = 9808  # Celery worker exposes its metrics here; 0 disables
+    CELERY_METRICS_QUEUES: List[str] = ["celery"]  # Broker queues whose depth is reported
+
     # VPS / Docker Deployment Engine
     # - auto: prefer host Docker via docker-socket-proxy, fallback to DinD if proxy unreachable
     # - proxy: always use host Docker via proxy (builds happen on the host)
     # - dind: always use Docker-in-Docker inside the VPS (builds happen inside the VPS container)
     VPS_DOCKER_ENGINE_MODE: str = "auto"
 
+    # VPS Network Resources (host ports handed out from network_resource_pool)
+    VPS_SSH_PORT_RANGE_START: int = 2222
+    VPS_SSH_PORT_RANGE_END: int = 7999
+    VPS_HTTP_PORT_RANGE_START: int = 8100
+    VPS_HTTP_PORT_RANGE_END: int = 13999
+
+    # Docker-ready VPS images (Docker, compose, sshd and nginx baked into a derivative of each OS image)
+    VPS_DOCKER_READY_IMAGES_ENABLED: bool = True  # Fall back to installing Docker in the container when disabled
+    VPS_DOCKER_READY_REPOSITORY: str = "cloudmanager/docker-ready"
+    VPS_DOCKER_READY_BUILD_TIMEOUT_SECONDS: int = 1200
+
+    # Image Vulnerability Scanning (Trivy runs as async subprocesses; results cached by image and layer digest)
+    IMAGE_SCAN_COMMAND: str = "trivy"
+    IMAGE_SCAN_CONCURRENCY: int = 2  # Scans run at once per process
+    IMAGE_SCAN_TIMEOUT_SECONDS: int = 300
+    IMAGE_SCAN_CACHE_TTL_SECONDS: int = 86400  # The vulnerability DB is refreshed daily
+    IMAGE_SCAN_CACHE_DIR: str = ""  # Shared Trivy cache dir (layer analysis), empty = Trivy default
+
+    # Subscription Progress Events (image pulls publish to Redis; clients follow over SSE)
+    PROGRESS_EVENT_MIN_INTERVAL_SECONDS: float = 0.5  # Routine updates are published at most this often
+    PROGRESS_CHECKPOINT_SECONDS: int = 15  # How often progress is also written to the subscription row
+    PROGRESS_STATE_TTL_SECONDS: int = 86400  # Latest state kept in Redis for late subscribers
+    PROGRESS_SSE_KEEPALIVE_SECONDS: int = 15
+
+    # VPS Metrics Collection
+    METRICS_COLLECTION_CONCURRENCY: int = 16  # Containers sampled in parallel per cycle
+    METRICS_COLLECTION_TIMEOUT_SECONDS: int = 30  # Per-container sampling timeout
+    METRICS_COLLECTION_SHARD_SIZE: int = 50  # Containers per Celery shard task
+    METRICS_PREVIOUS_SAMPLE_MAX_AGE_MINUTES: int = 60  # Older samples are not used for rate calculation
+    STORAGE_USAGE_REFRESH_SECONDS: int = 1800  # Host-side disk usage is re-measured every 30 minutes
+    STORAGE_USAGE_HOST_ROOT: str = ""  # Prefix where host paths are mounted (e.g. "/host"), empty = same namespace
+    CGROUP_MAX_OPEN_FILES: int = 2048  # Cached cgroup stat file descriptors (3 per container)
+
+    # VPS Metrics History (raw 5-minute rows are downsampled into hourly/daily rollups)
+    METRICS_RAW_RETENTION_DAYS: int = 30
+    METRICS_HOURLY_RETENTION_DAYS: int = 180
+    METRICS_DAILY_RETENTION_DAYS: int = 730
+    METRICS_HISTORY_RAW_MAX_HOURS: int = 48  # Longer windows are served from hourly rollups
+    METRICS_HISTORY_HOURLY_MAX_HOURS: int = 744  # Longer windows (> 31 days) are served from daily rollups
+    METRICS_ROLLUP_BACKFILL_HOURS: int = 48  # How far back the first rollup run starts
+    METRICS_PARTITION_INTERVAL_DAYS: int = 1  # Width of container_metrics range partitions (7 = weekly)
+    METRICS_PARTITION_PREMAKE_DAYS: int = 14  # Partitions are created this far ahead of time
+
+    # Docker Stats Streaming (API process keeps one stats stream per running VPS)
+    DOCKER_STATS_STREAM_ENABLED: bool = True
+    DOCKER_STATS_BUFFER_SIZE: int = 60  # Samples kept per container (~1/second)
+    DOCKER_STATS_MAX_AGE_SECONDS: int = 10  # Older samples fall back to a one-shot request
+    DOCKER_STATS_SYNC_INTERVAL_SECONDS: int = 30  # How often running containers are re-listed
+    DOCKER_STATS_MAX_STREAMS: int = 1000
+
+    # Container Events (API process follows Docker events and applies status changes as they happen)
+    CONTAINER_EVENTS_WATCHER_ENABLED: bool = True
+    CONTAINER_EVENTS_SETTLE_SECONDS: float = 3.0  # Events are folded per container for this long before applying
+    CONTAINER_EVENTS_LEASE_SECONDS: int = 30  # Leader lease so only one API worker follows events
+
+    # Docker API access (blocking docker-py calls run on a dedicated thread pool)
+    DOCKER_EXECUTOR_WORKERS: int = 32
+    DOCKER_CALL_TIMEOUT_SECONDS: int = 60  # Default per-call timeout; long builds/deploys opt out
+
+    # Fleet Health (one container list call per refresh; only unhealthy/starting containers are inspected)
+    FLEET_HEALTH_CACHE_TTL_SECONDS: int = 15
+    FLEET_HEALTH_INSPECT_CONCURRENCY: int = 8
+
+    # Container Log Streaming (one Docker log follower per container, fanned out to viewers)
+    LOG_STREAM_BUFFER_LINES: int = 1000  # Recent lines kept per container for new viewers
+    LOG_STREAM_SUBSCRIBER_QUEUE_SIZE: int = 1000  # Undelivered lines per viewer before the oldest are dropped
+    LOG_STREAM_KEEPALIVE_SECONDS: int = 15
+
+    # Web Terminal (exec sockets are driven by the event loop, no threads per session)
+    TERMINAL_OUTPUT_BATCH_SECONDS: float = 0.01  # Shell output within this window goes out as one frame
+    TERMINAL_OUTPUT_MAX_FRAME_BYTES: int = 65536
+    TERMINAL_INPUT_QUEUE_SIZE: int = 256  # Pending input messages before the WebSocket stops being read
+
+    # External nginx proxy (config changes are coalesced into one reload per window)
+    NGINX_PROXY_CONTAINER_NAME: str = "cloudmanager-nginx-proxy"
+    NGINX_RELOAD_DEBOUNCE_SECONDS: float = 1.0
+    NGINX_RELOAD_LOCK_TIMEOUT_SECONDS: int = 30  # Redis lock shared by all API workers
+    NGINX_RELOAD_MAX_ATTEMPTS: int = 3  # Retries on Docker errors (not on failed nginx -t)
+
+    # CoreDNS (zone files are rewritten only when their content hash changes)
+    COREDNS_RELOAD_DEBOUNCE_SECONDS: float = 0.5  # Zone edits within this window share one reload
+    COREDNS_WRITE_CONCURRENCY: int = 16  # Zone files written in parallel on full regeneration
+
+    # VPS Backups (volumes are streamed through the compressor into S3 multipart uploads)
+    VPS_BACKUP_PARALLELISM: int = 4  # Volumes archived at once (worker processes)
+    VPS_BACKUP_CODEC: str = "zstd"  # zstd | pigz | gzip (falls back to gzip if unavailable)
+    VPS_BACKUP_COMPRESSION_LEVEL: int = 3
+    VPS_BACKUP_COMPRESSION_THREADS: int = 2  # Compressor threads per volume (zstd/pigz)
+    VPS_BACKUP_PART_SIZE_MB: int = 16  # S3 multipart part size (minimum 5)
+
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
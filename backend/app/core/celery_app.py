@@ -70,3 +70,7 @@ def configure_beat_schedule():
 # Configure schedule
 configure_beat_schedule()
 
+# Task durations and the worker's /metrics endpoint
+from app.core.prometheus_metrics import register_celery_signals  # noqa: E402
+register_celery_signals()
+
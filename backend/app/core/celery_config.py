@@ -12,13 +12,25 @@ CELERYBEAT_SCHEDULE = {
         "schedule": crontab(minute="*/5"),
     },
 
-    # Reconcile missing VPS containers every 5 minutes (safety net)
+    # Downsample VPS metrics into hourly/daily rollups
+    "rollup-vps-metrics": {
+        "task": "hosting.rollup_metrics",
+        "schedule": crontab(minute=7),
+    },
+
+    # Reconcile VPS containers every 5 minutes (sweep behind the container events watcher)
     "reconcile-vps-containers": {
         "task": "hosting.reconcile_missing_vps_containers",
         "schedule": crontab(minute="*/5"),
         "kwargs": {"limit": 100},
     },
-    
+
+    # Build missing docker-ready VPS base images daily at 12:30 AM UTC
+    "warm-docker-ready-images": {
+        "task": "hosting.warm_docker_ready_images",
+        "schedule": crontab(hour=0, minute=30),
+    },
+
     # Generate recurring invoices daily at midnight UTC
     "generate-vps-invoices": {
         "task": "hosting.generate_recurring_invoices",
@@ -37,6 +49,12 @@ CELERYBEAT_SCHEDULE = {
         "schedule": crontab(hour=3, minute=0),
     },
     
+    # Create container_metrics partitions ahead of time daily at 1 AM UTC
+    "maintain-vps-metrics-partitions": {
+        "task": "hosting.maintain_metrics_partitions",
+        "schedule": crontab(hour=1, minute=0),
+    },
+
     # Cleanup old metrics weekly on Sunday at 4 AM UTC
     "cleanup-vps-metrics": {
         "task": "hosting.cleanup_old_metrics",
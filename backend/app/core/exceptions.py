@@ -111,3 +111,20 @@ class RateLimitException(CloudManagerException):
         super().__init__(
             detail=detail, status_code=status.HTTP_429_TOO_MANY_REQUESTS
         )
+
+
+class ServiceUnavailableException(CloudManagerException):
+    """
+    Exception raised when a service is temporarily overloaded.
+
+    Args:
+        detail: Description of the overload
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            detail=detail,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(retry_after)},
+        )
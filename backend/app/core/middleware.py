@@ -11,6 +11,8 @@ from fastapi import Request, Response, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.core.logging import logger, log_request
+from app.core.prometheus_metrics import observe_request
+from app.core.request_metrics import RequestMetrics, route_template
 from app.config.redis import get_redis
 from app.config.settings import get_settings
 
@@ -20,7 +22,8 @@ settings = get_settings()
 class LoggingMiddleware(BaseHTTPMiddleware):
     """
     Middleware to log all HTTP requests and responses.
-    Adds request ID and tracks execution time.
+    Adds request ID and tracks execution time, which also feeds the
+    per-route latency histograms (see app.core.request_metrics).
     """
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -66,6 +69,12 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             process_time * 1000  # Convert to milliseconds
         )
 
+        route = route_template(request)
+        if settings.REQUEST_METRICS_ENABLED:
+            RequestMetrics.get_instance().record(route, process_time * 1000, response.status_code)
+        if settings.PROMETHEUS_METRICS_ENABLED:
+            observe_request(request.method, route.split(" ", 1)[1], response.status_code, process_time)
+
         return response
 
 
@@ -96,10 +105,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # These endpoints are designed to be polled frequently
         excluded_paths = [
             "/health",
+            "/metrics",
             "/",
         ]
-        # Exclude download-status and stats endpoints (frequent polling)
-        if "/download-status" in request.url.path or "/stats" in request.url.path:
+        # Exclude stats endpoints (frequent polling)
+        if "/stats" in request.url.path:
             try:
                 return await call_next(request)
             except RuntimeError as e:
@@ -0,0 +1,192 @@
+"""
+Password hashing executor.
+
+bcrypt costs 100-300 ms of CPU per hash, so running it inline in an async
+route freezes every other request on that worker. PasswordHasher runs hashes
+and verifications in a small process pool (not limited by the GIL) and
+admits at most PASSWORD_HASH_MAX_PENDING of them per API process at once;
+beyond that, callers get a 503 with Retry-After straight away instead of
+queueing behind a login burst.
+
+Bulk work (batch password migration) is not subject to admission control but
+keeps at most one job per worker in the pool queue, so interactive logins
+wait behind at most one batch hash per worker.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.prometheus_metrics import PASSWORD_HASH_REJECTED
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Worker-side functions: run in the pool processes, which import
+# app.core.security (and its CryptContext) on first use
+
+def _warm_up() -> None:
+    from app.core.security import pwd_context  # noqa: F401
+
+
+def _hash(password: str) -> str:
+    from app.core.security import pwd_context
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    from app.core.security import pwd_context
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    from app.core.security import pwd_context
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Process-wide pool for password hashing with admission control"""
+
+    _instance: Optional["PasswordHasher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        use_processes: Optional[bool] = None,
+    ):
+        """
+        Initialize password hasher
+
+        Args:
+            workers: Pool size (defaults to PASSWORD_HASH_WORKERS)
+            max_pending: Hashes queued or running before callers are rejected
+            use_processes: Process pool (default, PASSWORD_HASH_POOL_ENABLED) or threads
+        """
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.max_pending = max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        self.use_processes = settings.PASSWORD_HASH_POOL_ENABLED if use_processes is None else use_processes
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "PasswordHasher":
+        """Get the process-wide hasher"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that runs threads (Docker executor,
+                # Redis, event loop) can copy held locks into the child
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _submit(self, fn: Callable[..., Any], *args) -> Future:
+        if not self.use_processes:
+            return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        pool = self._get_pool()
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed); replace the pool once
+            logger.warning("Password hashing pool broken, restarting it")
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return self._get_pool().submit(fn, *args)
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.inc()
+            logger.warning(f"Password hashing saturated ({self.max_pending} pending), rejecting request")
+            raise ServiceUnavailableException(
+                "Authentication is temporarily overloaded, please retry shortly", retry_after=1
+            )
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the pool finishes the job, even if the caller goes away
+        future.add_done_callback(lambda _: self._slots.release())
+        return await (asyncio.wrap_future(future) if isinstance(future, Future) else future)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password on the pool.
+
+        Raises:
+            ServiceUnavailableException: If too many hashes are pending
+        """
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password on the pool.
+
+        Raises:
+            ServiceUnavailableException: If too many hashes are pending
+        """
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if its scheme or cost is outdated.
+
+        Returns:
+            (valid, new hash or None) as passlib's CryptContext.verify_and_update
+
+        Raises:
+            ServiceUnavailableException: If too many hashes are pending
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    async def verify_and_update_many(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        verify_and_update for many (plain, hash) pairs in parallel.
+
+        Not subject to admission control; keeps at most one job per worker
+        queued so interactive requests are not starved.
+
+        Returns:
+            Results in input order; a failed pair yields the exception instead
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def one(plain_password: str, hashed_password: str):
+            async with semaphore:
+                future = self._submit(_verify_and_update, plain_password, hashed_password)
+                return await (asyncio.wrap_future(future) if isinstance(future, Future) else future)
+
+        return await asyncio.gather(*(one(plain, hashed) for plain, hashed in pairs), return_exceptions=True)
+
+    def start(self) -> None:
+        """Spawn the worker processes now rather than on the first login"""
+        if self.use_processes:
+            for _ in range(self.workers):
+                self._get_pool().submit(_warm_up)
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
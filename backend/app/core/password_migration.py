@@ -1,14 +1,18 @@
 """
 Password migration utilities.
 
-Handles migration from bcrypt to Argon2 password hashing.
+Handles migration from bcrypt to Argon2 password hashing. "Needs migration"
+means the configured CryptContext marks the stored hash as deprecated or
+under-cost (pwd_context.needs_update). Hashing runs on the PasswordHasher
+process pool, never on the event loop.
 """
-from typing import Optional
+from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select
 
 from app.modules.auth.models import User
-from app.core.security import get_password_hash, verify_password
+from app.core.password_hashing import PasswordHasher
+from app.core.security import get_password_hash_async, pwd_context
 from app.core.logging import logger
 
 
@@ -28,10 +32,9 @@ async def migrate_user_password_on_login(
     Returns:
         True if migration occurred, False otherwise
     """
-    # Check if password is using bcrypt (starts with $2a$, $2b$, or $2y$)
-    if user.password_hash.startswith(("$2a$", "$2b$", "$2y$")):
-        # Rehash with Argon2
-        new_hash = get_password_hash(plain_password)
+    if pwd_context.needs_update(user.password_hash):
+        # Rehash with the current scheme
+        new_hash = await get_password_hash_async(plain_password)
         
         # Update user password hash
         user.password_hash = new_hash
@@ -48,14 +51,21 @@ async def batch_migrate_passwords(
     db: AsyncSession,
     limit: Optional[int] = None,
     dry_run: bool = False,
+    passwords: Optional[Dict[str, str]] = None,
 ) -> dict:
     """
     Batch migrate passwords from bcrypt to Argon2.
 
+    A hash can only be replaced with the plain password, so users without
+    one in `passwords` stay pending and migrate on their next login. Known
+    passwords (e.g. from a credential import) are verified and rehashed in
+    parallel on the hashing pool.
+
     Args:
         db: Database session
         limit: Maximum number of users to migrate (None for all)
         dry_run: If True, don't actually update passwords
+        passwords: Plain passwords by user email, for users that can be rehashed now
 
     Returns:
         Dictionary with migration statistics
@@ -71,30 +81,40 @@ async def batch_migrate_passwords(
         query = query.limit(limit)
     
     result = await db.execute(query)
-    users = result.scalars().all()
-    
+    users = [user for user in result.scalars().all() if pwd_context.needs_update(user.password_hash)]
+    passwords = passwords or {}
+
+    to_rehash = [user for user in users if user.email in passwords]
+    pending = len(users) - len(to_rehash)
     migrated = 0
     failed = 0
-    
-    for user in users:
-        try:
-            # Note: We can't verify the password without the plain text
-            # This function should be called with user consent or during maintenance
-            # For now, we'll just log that migration is needed
-            if not dry_run:
-                # In a real scenario, you'd need the user's password
-                # This is a placeholder - actual migration should happen on next login
-                logger.warning(
-                    f"User {user.email} needs password migration on next login"
-                )
-            migrated += 1
-        except Exception as e:
-            logger.error(f"Failed to migrate password for user {user.email}: {e}")
-            failed += 1
+
+    if to_rehash and not dry_run:
+        results = await PasswordHasher.get_instance().verify_and_update_many(
+            (passwords[user.email], user.password_hash) for user in to_rehash
+        )
+        for user, outcome in zip(to_rehash, results):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to migrate password for user {user.email}: {outcome}")
+                failed += 1
+            elif not outcome[0]:
+                logger.warning(f"Supplied password does not match for user {user.email}, not migrated")
+                failed += 1
+            elif outcome[1]:
+                user.password_hash = outcome[1]
+                migrated += 1
+        if migrated:
+            await db.commit()
+    elif dry_run:
+        migrated = len(to_rehash)
+
+    if pending:
+        logger.info(f"{pending} users need password migration on next login")
     
     return {
         "total_found": len(users),
         "migrated": migrated,
+        "pending": pending,
         "failed": failed,
         "dry_run": dry_run,
     }
@@ -0,0 +1,225 @@
+"""
+Prometheus metrics.
+
+Defines the metrics exposed on /metrics (API) and on CELERY_METRICS_PORT
+(Celery worker): request latency, DB pool checkout wait, Redis round trip,
+Celery task durations and queue depths, Docker API call latency and VPS
+metrics collection cycle time.
+
+uvicorn and Celery run several worker processes, so when
+PROMETHEUS_MULTIPROC_DIR is set every process writes its samples to mmap
+files in that directory and the scrape merges them (prometheus_client
+multiprocess mode). The directory must be per container and empty when the
+container starts; the Celery master clears it before forking its children.
+PROMETHEUS_MULTIPROC_DIR must be set in the environment before
+prometheus_client is first imported, and that is the only ordering
+constraint.
+"""
+import os
+import time
+import shutil
+import logging
+from typing import Dict, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# prometheus_client picks its value storage at import time, from the environment
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Same layout as the /system latency histograms (request_metrics.BUCKETS_MS), in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CYCLE_BUCKETS = (1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+TASK_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REDIS_PING_SECONDS = Histogram(
+    "redis_ping_seconds",
+    "Redis PING round-trip time, sampled on every scrape",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time by task name and final state",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+CELERY_QUEUE_LENGTH = Gauge(
+    "celery_queue_length",
+    "Messages waiting in a Celery broker queue, sampled on every scrape",
+    ["queue"],
+    multiprocess_mode="mostrecent",
+)
+DOCKER_API_DURATION = Histogram(
+    "docker_api_call_seconds",
+    "Blocking Docker SDK call latency by operation and outcome",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+METRICS_CYCLE_DURATION = Histogram(
+    "vps_metrics_collection_cycle_seconds",
+    "VPS metrics collection cycle time (one shard, or the whole fleet)",
+    ["scope"],
+    buckets=CYCLE_BUCKETS,
+)
+METRICS_CYCLE_CONTAINERS = Counter(
+    "vps_metrics_collection_containers_total",
+    "Containers handled by metrics collection cycles, by outcome",
+    ["outcome"],
+)
+
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hash/verify requests rejected with 503 because the hashing pool was saturated",
+)
+
+
+# -----------------------------------------------------------------------------
+# Database pool checkout wait
+# -----------------------------------------------------------------------------
+
+class _TimedCheckoutMixin:
+    """Times _do_get, i.e. waiting for a free pooled connection (or opening one)"""
+
+    metrics_pool_name = "db"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_pool_name).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics_pool_name = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics_pool_name = "async"
+
+
+def registry() -> CollectorRegistry:
+    """Registry to expose: every process's samples in multiprocess mode, else this process's"""
+    if not MULTIPROCESS:
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def render_latest() -> bytes:
+    """Text exposition of all metrics (blocking: reads the multiprocess files)"""
+    return generate_latest(registry())
+
+
+def observe_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(seconds)
+
+
+async def sample_scrape_metrics() -> None:
+    """Refresh the metrics that are sampled when scraped (Redis RTT, queue depths)"""
+    from app.config.redis import get_redis
+    from app.config.settings import get_settings
+
+    settings = get_settings()
+    try:
+        redis = await get_redis()
+        started = time.perf_counter()
+        await redis.ping()
+        REDIS_PING_SECONDS.observe(time.perf_counter() - started)
+
+        pipe = redis.pipeline(transaction=False)
+        for queue in settings.CELERY_METRICS_QUEUES:
+            pipe.llen(queue)
+        for queue, length in zip(settings.CELERY_METRICS_QUEUES, await pipe.execute()):
+            CELERY_QUEUE_LENGTH.labels(queue).set(length)
+    except Exception as e:
+        logger.debug(f"Scrape-time metrics unavailable: {e}")
+
+
+# -----------------------------------------------------------------------------
+# Celery
+# -----------------------------------------------------------------------------
+
+_task_started: Dict[str, Tuple[str, float]] = {}
+
+
+def register_celery_signals() -> None:
+    """Time Celery tasks and serve the worker's metrics on CELERY_METRICS_PORT"""
+    from celery.signals import task_prerun, task_postrun, worker_init, worker_ready, worker_process_shutdown
+
+    @task_prerun.connect(weak=False)
+    def _task_prerun(task_id=None, task=None, **kwargs):
+        _task_started[task_id] = (task.name, time.perf_counter())
+
+    @task_postrun.connect(weak=False)
+    def _task_postrun(task_id=None, state=None, **kwargs):
+        started = _task_started.pop(task_id, None)
+        if started:
+            name, started_at = started
+            CELERY_TASK_DURATION.labels(name, state or "UNKNOWN").observe(time.perf_counter() - started_at)
+
+    @worker_init.connect(weak=False)
+    def _worker_init(**kwargs):
+        # Runs in the master before any child exists: drop a previous run's files
+        directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if directory and os.path.isdir(directory):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    os.unlink(path)
+                else:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    @worker_ready.connect(weak=False)
+    def _worker_ready(**kwargs):
+        from app.config.settings import get_settings
+
+        settings = get_settings()
+        if not settings.PROMETHEUS_METRICS_ENABLED or not settings.CELERY_METRICS_PORT:
+            return
+        if not MULTIPROCESS:
+            logger.warning("PROMETHEUS_MULTIPROC_DIR is not set; Celery metrics only cover the master process")
+        from prometheus_client import start_http_server
+        try:
+            start_http_server(settings.CELERY_METRICS_PORT, registry=registry())
+            logger.info(f"Celery metrics served on :{settings.CELERY_METRICS_PORT}/metrics")
+        except OSError as e:
+            logger.warning(f"Celery metrics server not started: {e}")
+
+    @worker_process_shutdown.connect(weak=False)
+    def _worker_process_shutdown(pid=None, **kwargs):
+        mark_process_dead(pid or os.getpid())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a finished process's live gauges from the multiprocess files"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
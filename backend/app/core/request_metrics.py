@@ -0,0 +1,330 @@
+"""
+Request latency metrics.
+
+LoggingMiddleware records every request's duration into a fixed-bucket
+histogram keyed by route template ("GET /api/v1/users/{user_id}"), not raw
+path, so the number of series stays bounded. Histograms are aggregated in
+memory per minute and flushed to Redis every REQUEST_METRICS_FLUSH_SECONDS
+with HINCRBY, so counts from every worker process add up in the same keys.
+
+Two resolutions are kept:
+
+- metrics:requests:60:<minute>  for REQUEST_METRICS_MINUTE_RETENTION_HOURS
+- metrics:requests:3600:<hour>  for REQUEST_METRICS_HOUR_RETENTION_DAYS
+
+Each key is a hash with "<route>|<field>" fields (count, sum, errors and one
+counter per bucket). Percentiles are interpolated within the bucket that
+holds them, so they are accurate to the bucket layout, not exact.
+"""
+import time
+import asyncio
+import calendar
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.config.redis import get_redis
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Upper bounds of the latency buckets in milliseconds; one more bucket
+# catches everything slower than the last bound
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+MINUTE = 60
+HOUR = 3600
+KEY_PREFIX = "metrics:requests"
+
+# Windows up to this long are read from the per-minute keys
+MINUTE_RESOLUTION_MAX_SPAN = 6 * HOUR
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(request) -> str:
+    """Method plus the matched route's path template, e.g. "GET /api/v1/users/{user_id}"."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or UNMATCHED_ROUTE
+    return f"{request.method} {path}"
+
+
+def _epoch(value: datetime) -> int:
+    """Epoch seconds for a datetime; naive values are taken as UTC"""
+    return calendar.timegm(value.utctimetuple())
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with request and error counts"""
+
+    __slots__ = ("buckets", "count", "sum_ms", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.errors = 0
+
+    def observe(self, duration_ms: float, error: bool = False) -> None:
+        index = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if duration_ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum_ms += duration_ms
+        if error:
+            self.errors += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for i, value in enumerate(other.buckets):
+            self.buckets[i] += value
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.errors += other.errors
+
+    @property
+    def average_ms(self) -> float:
+        return self.sum_ms / self.count if self.count else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Share of requests that failed, in percent"""
+        return self.errors / self.count * 100 if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the q-th percentile (0-100) in milliseconds.
+
+        Linear within the bucket that holds it; requests slower than the last
+        bound are reported as the last bound.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulative = 0
+        for i, value in enumerate(self.buckets):
+            if value and cumulative + value >= rank:
+                if i == len(BUCKETS_MS):
+                    return float(BUCKETS_MS[-1])
+                lower = BUCKETS_MS[i - 1] if i else 0
+                return lower + (BUCKETS_MS[i] - lower) * (rank - cumulative) / value
+            cumulative += value
+        return float(BUCKETS_MS[-1])
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "request_count": self.count,
+            "average_response_time": round(self.average_ms, 2),
+            "p50": round(self.percentile(50), 2),
+            "p95": round(self.percentile(95), 2),
+            "p99": round(self.percentile(99), 2),
+            "error_rate": round(self.error_rate, 2),
+        }
+
+    def fields(self) -> Dict[str, float]:
+        """Redis hash fields for this histogram"""
+        values = {"count": self.count, "sum": self.sum_ms, "errors": self.errors}
+        for i, value in enumerate(self.buckets):
+            if value:
+                values[f"b{i}"] = value
+        return values
+
+    def set_field(self, name: str, value: str) -> None:
+        if name == "count":
+            self.count = int(value)
+        elif name == "sum":
+            self.sum_ms = float(value)
+        elif name == "errors":
+            self.errors = int(value)
+        elif name.startswith("b") and name[1:].isdigit() and int(name[1:]) < len(self.buckets):
+            self.buckets[int(name[1:])] = int(value)
+
+
+class RequestMetrics:
+    """Per-route latency histograms for this process, flushed to Redis"""
+
+    # Process-wide; the middleware of every app instance records here
+    _instance: Optional["RequestMetrics"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, redis_client=None):
+        """
+        Initialize request metrics
+
+        Args:
+            redis_client: Async Redis client (defaults to get_redis())
+        """
+        self._redis = redis_client
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, str], LatencyHistogram] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def get_instance(cls) -> "RequestMetrics":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def record(self, route: str, duration_ms: float, status_code: int, now: Optional[float] = None) -> None:
+        """Add one request to the current minute's histogram for its route"""
+        slot = int(now if now is not None else time.time()) // MINUTE * MINUTE
+        with self._lock:
+            histogram = self._pending.get((slot, route))
+            if histogram is None:
+                histogram = self._pending[(slot, route)] = LatencyHistogram()
+            histogram.observe(duration_ms, error=status_code >= 500)
+
+    async def flush(self) -> int:
+        """
+        Write pending histograms to Redis.
+
+        On failure they are kept and retried with the next flush, as long as
+        they are still inside the per-minute retention.
+
+        Returns:
+            Number of (minute, route) histograms written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        minute_ttl = settings.REQUEST_METRICS_MINUTE_RETENTION_HOURS * HOUR
+        hour_ttl = settings.REQUEST_METRICS_HOUR_RETENTION_DAYS * 24 * HOUR
+        try:
+            redis = self._redis or await get_redis()
+            pipe = redis.pipeline(transaction=False)
+            keys = {}
+            for (slot, route), histogram in pending.items():
+                for resolution, ttl in ((MINUTE, minute_ttl), (HOUR, hour_ttl)):
+                    key = f"{KEY_PREFIX}:{resolution}:{slot // resolution * resolution}"
+                    keys[key] = ttl
+                    for name, value in histogram.fields().items():
+                        if name == "sum":
+                            pipe.hincrbyfloat(key, f"{route}|{name}", value)
+                        else:
+                            pipe.hincrby(key, f"{route}|{name}", value)
+            for key, ttl in keys.items():
+                pipe.expire(key, ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Request metrics flush failed, keeping {len(pending)} histograms: {e}")
+            cutoff = time.time() - minute_ttl
+            with self._lock:
+                for (slot, route), histogram in pending.items():
+                    if slot < cutoff:
+                        continue
+                    current = self._pending.get((slot, route))
+                    if current is None:
+                        self._pending[(slot, route)] = histogram
+                    else:
+                        current.merge(histogram)
+            return 0
+        return len(pending)
+
+    async def _read(self, start: datetime, end: datetime) -> Tuple[int, Dict[int, Dict[str, LatencyHistogram]]]:
+        """Histograms per slot and route for [start, end], at the resolution the window needs"""
+        # Make this process's latest requests visible first
+        await self.flush()
+
+        start_ts, end_ts = _epoch(start), _epoch(end)
+        minute_retained = time.time() - settings.REQUEST_METRICS_MINUTE_RETENTION_HOURS * HOUR
+        if end_ts - start_ts <= MINUTE_RESOLUTION_MAX_SPAN and start_ts >= minute_retained:
+            resolution = MINUTE
+        else:
+            resolution = HOUR
+        slots = list(range(start_ts // resolution * resolution, end_ts + 1, resolution))
+        if not slots:
+            return resolution, {}
+
+        redis = self._redis or await get_redis()
+        pipe = redis.pipeline(transaction=False)
+        for slot in slots:
+            pipe.hgetall(f"{KEY_PREFIX}:{resolution}:{slot}")
+        rows = await pipe.execute()
+
+        result: Dict[int, Dict[str, LatencyHistogram]] = {}
+        for slot, row in zip(slots, rows):
+            if not row:
+                continue
+            routes = result.setdefault(slot, {})
+            for field, value in row.items():
+                route, _, name = field.rpartition("|")
+                histogram = routes.get(route)
+                if histogram is None:
+                    histogram = routes[route] = LatencyHistogram()
+                histogram.set_field(name, value)
+        return resolution, result
+
+    async def window(
+        self, start: datetime, end: datetime, step_seconds: Optional[int] = None
+    ) -> Tuple[Dict[str, LatencyHistogram], List[Tuple[int, LatencyHistogram]]]:
+        """
+        Histograms for a time window, from one read.
+
+        Windows up to 6 hours inside the per-minute retention use minute
+        buckets; longer ones use hour buckets, so their edges are rounded to
+        whole hours.
+
+        Args:
+            start: Window start (naive datetimes are UTC)
+            end: Window end
+            step_seconds: Also split the window into steps of this length
+
+        Returns:
+            Histogram per route template, and the all-route histogram per
+            step as (epoch seconds of the step start, histogram) pairs
+        """
+        _, slots = await self._read(start, end)
+        start_ts = _epoch(start)
+        totals: Dict[str, LatencyHistogram] = {}
+        steps: Dict[int, LatencyHistogram] = {}
+        for slot, routes in slots.items():
+            step_total = None
+            if step_seconds:
+                step = start_ts + max(0, slot - start_ts) // step_seconds * step_seconds
+                step_total = steps.get(step)
+                if step_total is None:
+                    step_total = steps[step] = LatencyHistogram()
+            for route, histogram in routes.items():
+                total = totals.get(route)
+                if total is None:
+                    total = totals[route] = LatencyHistogram()
+                total.merge(histogram)
+                if step_total is not None:
+                    step_total.merge(histogram)
+        return totals, sorted(steps.items())
+
+    async def by_route(self, start: datetime, end: datetime) -> Dict[str, LatencyHistogram]:
+        """Histogram per route template for a time window"""
+        totals, _ = await self.window(start, end)
+        return totals
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REQUEST_METRICS_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Request metrics flush error: {e}")
+
+    def start(self) -> None:
+        """Start periodic flushing on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write what is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -10,7 +10,7 @@ consider a server-side token blacklist (e.g. Redis) and revoke on logout.
 """
 import secrets
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -51,6 +51,34 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# Async variants for request handlers: the hashing runs on the
+# PasswordHasher process pool so it never blocks the event loop. They raise
+# ServiceUnavailableException (503) when the pool is saturated.
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password off the event loop (see verify_password)."""
+    from app.core.password_hashing import PasswordHasher
+    return await PasswordHasher.get_instance().verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop and rehash it if needed.
+
+    Returns:
+        (valid, new hash) where new hash is set only if the stored hash uses
+        a deprecated scheme or outdated cost and should be replaced
+    """
+    from app.core.password_hashing import PasswordHasher
+    return await PasswordHasher.get_instance().verify_and_update(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password off the event loop (see get_password_hash)."""
+    from app.core.password_hashing import PasswordHasher
+    return await PasswordHasher.get_instance().hash(password)
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """
     Create a JWT access token.
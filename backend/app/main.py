@@ -2,12 +2,15 @@
 CloudManager FastAPI Application.
 Main entry point for the backend API.
 """
+import os
+import asyncio
+import secrets
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 
 from app.config.database import close_db, init_db
@@ -106,11 +109,68 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️  Could not seed roles/permissions: {e}")
         logger.warning("⚠️  Continuing startup - roles may need to be seeded manually")
 
+    # Fill the network resource pool (first run, or widened port ranges); VPS
+    # provisioning only leases rows from it
+    try:
+        from app.modules.hosting.services.network_allocator import seed_network_resource_pool
+        inserted = await asyncio.to_thread(seed_network_resource_pool)
+        if inserted:
+            logger.info(f"✅ Seeded {inserted} network resource pool values")
+    except Exception as e:
+        logger.warning(f"⚠️  Could not seed the network resource pool: {e}")
+
+    # Start streaming Docker stats for running VPS containers
+    if settings.DOCKER_STATS_STREAM_ENABLED:
+        from app.modules.hosting.services.stats_stream_service import DockerStatsStream
+        try:
+            DockerStatsStream.get_instance().start()
+        except Exception as e:
+            logger.warning(f"⚠️  Docker stats streaming not started: {e}")
+
+    # Follow Docker container events so VPS status changes are applied as they happen
+    if settings.CONTAINER_EVENTS_WATCHER_ENABLED:
+        from app.modules.hosting.services.container_events_service import ContainerEventsWatcher
+        try:
+            ContainerEventsWatcher.get_instance().start()
+        except Exception as e:
+            logger.warning(f"⚠️  Container events watcher not started: {e}")
+
+    # Spawn the password hashing processes before the first login needs them
+    from app.core.password_hashing import PasswordHasher
+    PasswordHasher.get_instance().start()
+
+    # Flush per-route latency histograms to Redis periodically
+    if settings.REQUEST_METRICS_ENABLED:
+        from app.core.request_metrics import RequestMetrics
+        RequestMetrics.get_instance().start()
+
+    # Insert audit entries in batches; replays entries spooled by the last shutdown first
+    if settings.AUDIT_ASYNC_WRITES_ENABLED:
+        from app.modules.audit.writer import AuditWriter
+        AuditWriter.get_instance().start()
+
     logger.info("✅ Application startup complete")
     yield
 
     # Shutdown
     logger.info("🛑 Shutting down application...")
+    if settings.DOCKER_STATS_STREAM_ENABLED:
+        from app.modules.hosting.services.stats_stream_service import DockerStatsStream
+        DockerStatsStream.get_instance().stop()
+    if settings.CONTAINER_EVENTS_WATCHER_ENABLED:
+        from app.modules.hosting.services.container_events_service import ContainerEventsWatcher
+        ContainerEventsWatcher.get_instance().stop()
+    if settings.REQUEST_METRICS_ENABLED:
+        from app.core.request_metrics import RequestMetrics
+        await RequestMetrics.get_instance().stop()
+    if settings.AUDIT_ASYNC_WRITES_ENABLED:
+        from app.modules.audit.writer import AuditWriter
+        await AuditWriter.get_instance().stop()
+    from app.core.password_hashing import PasswordHasher
+    PasswordHasher.get_instance().shutdown()
+    if settings.PROMETHEUS_METRICS_ENABLED:
+        from app.core.prometheus_metrics import mark_process_dead
+        mark_process_dead(os.getpid())
     await close_redis()
     await close_db()
     logger.info("✅ Application shutdown complete")
@@ -235,6 +295,29 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus scrape endpoint.
+
+    Returns:
+        Metrics of every API worker process in the text exposition format
+    """
+    from app.core.prometheus_metrics import CONTENT_TYPE_LATEST, render_latest, sample_scrape_metrics
+
+    if not settings.PROMETHEUS_METRICS_ENABLED:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not Found"})
+    if settings.PROMETHEUS_METRICS_TOKEN:
+        expected = f"Bearer {settings.PROMETHEUS_METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get("Authorization", ""), expected):
+            return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"detail": "Unauthorized"})
+
+    await sample_scrape_metrics()
+    # Merging the multiprocess files is file I/O; keep it off the event loop
+    body = await asyncio.to_thread(render_latest)
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/", tags=["System"])
 async def root():
     """
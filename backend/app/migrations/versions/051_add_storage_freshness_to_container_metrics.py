@@ -0,0 +1,34 @@
+"""Add storage source and measurement time to container_metrics
+
+Revision ID: 051_storage_freshness
+Revises: 050_rename_email_metadata
+Create Date: 2026-10-16
+
+Storage usage is now measured host-side and cached on a longer interval than
+the metrics cycle, so each row records where the value came from and when it
+was actually measured.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "051_storage_freshness"
+down_revision = "050_rename_email_metadata"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'container_metrics',
+        sa.Column('storage_usage_source', sa.String(32), nullable=True, comment='Storage measurement source: quota, host_walk or df')
+    )
+    op.add_column(
+        'container_metrics',
+        sa.Column('storage_measured_at', sa.DateTime(), nullable=True, comment='When storage usage was actually measured')
+    )
+
+
+def downgrade():
+    op.drop_column('container_metrics', 'storage_measured_at')
+    op.drop_column('container_metrics', 'storage_usage_source')
@@ -0,0 +1,82 @@
+"""Add container_metrics_rollups for hourly and daily downsampled metrics
+
+Revision ID: 052_metrics_rollups
+Revises: 051_storage_freshness
+Create Date: 2026-10-16
+
+Long-range graphs read hourly/daily rollups (min/avg/max/p95) instead of raw
+5-minute rows, so raw metrics can be kept short while history is kept for months.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "052_metrics_rollups"
+down_revision = "051_storage_freshness"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'container_metrics_rollups',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('subscription_id', sa.String(36), sa.ForeignKey('vps_subscriptions.id'), nullable=False),
+        sa.Column('container_id', sa.String(36), sa.ForeignKey('container_instances.id'), nullable=False),
+        sa.Column('resolution', sa.String(8), nullable=False, comment='hour or day'),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('cpu_usage_percent_min', sa.Float(), nullable=False),
+        sa.Column('cpu_usage_percent_avg', sa.Float(), nullable=False),
+        sa.Column('cpu_usage_percent_max', sa.Float(), nullable=False),
+        sa.Column('cpu_usage_percent_p95', sa.Float(), nullable=False),
+        sa.Column('memory_usage_mb_min', sa.Float(), nullable=False),
+        sa.Column('memory_usage_mb_avg', sa.Float(), nullable=False),
+        sa.Column('memory_usage_mb_max', sa.Float(), nullable=False),
+        sa.Column('memory_usage_mb_p95', sa.Float(), nullable=False),
+        sa.Column('memory_usage_percent_min', sa.Float(), nullable=False),
+        sa.Column('memory_usage_percent_avg', sa.Float(), nullable=False),
+        sa.Column('memory_usage_percent_max', sa.Float(), nullable=False),
+        sa.Column('memory_usage_percent_p95', sa.Float(), nullable=False),
+        sa.Column('network_rx_bytes_per_sec_min', sa.Float(), nullable=True),
+        sa.Column('network_rx_bytes_per_sec_avg', sa.Float(), nullable=True),
+        sa.Column('network_rx_bytes_per_sec_max', sa.Float(), nullable=True),
+        sa.Column('network_rx_bytes_per_sec_p95', sa.Float(), nullable=True),
+        sa.Column('network_tx_bytes_per_sec_min', sa.Float(), nullable=True),
+        sa.Column('network_tx_bytes_per_sec_avg', sa.Float(), nullable=True),
+        sa.Column('network_tx_bytes_per_sec_max', sa.Float(), nullable=True),
+        sa.Column('network_tx_bytes_per_sec_p95', sa.Float(), nullable=True),
+        sa.Column('block_read_bytes_per_sec_min', sa.Float(), nullable=True),
+        sa.Column('block_read_bytes_per_sec_avg', sa.Float(), nullable=True),
+        sa.Column('block_read_bytes_per_sec_max', sa.Float(), nullable=True),
+        sa.Column('block_read_bytes_per_sec_p95', sa.Float(), nullable=True),
+        sa.Column('block_write_bytes_per_sec_min', sa.Float(), nullable=True),
+        sa.Column('block_write_bytes_per_sec_avg', sa.Float(), nullable=True),
+        sa.Column('block_write_bytes_per_sec_max', sa.Float(), nullable=True),
+        sa.Column('block_write_bytes_per_sec_p95', sa.Float(), nullable=True),
+        sa.Column('storage_usage_mb', sa.Integer(), nullable=False),
+        sa.Column('storage_usage_percent', sa.Float(), nullable=False),
+        sa.Column('network_rx_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('network_tx_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('block_read_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('block_write_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('process_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        'ux_metrics_rollup_container_bucket',
+        'container_metrics_rollups',
+        ['container_id', 'resolution', 'bucket_start'],
+        unique=True
+    )
+    op.create_index(
+        'ix_metrics_rollup_subscription_bucket',
+        'container_metrics_rollups',
+        ['subscription_id', 'resolution', 'bucket_start']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_metrics_rollup_subscription_bucket', table_name='container_metrics_rollups')
+    op.drop_index('ux_metrics_rollup_container_bucket', table_name='container_metrics_rollups')
+    op.drop_table('container_metrics_rollups')
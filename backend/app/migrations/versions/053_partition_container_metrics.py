@@ -0,0 +1,122 @@
+"""Range-partition container_metrics by recorded_at
+
+Revision ID: 053_partition_metrics
+Revises: 052_metrics_rollups
+Create Date: 2026-10-16
+
+Retention used to run a large DELETE every week. The table becomes a
+PARTITION BY RANGE (recorded_at) parent; the existing table is attached as a
+legacy partition covering everything up to tomorrow, and daily partitions
+after it are created ahead of time by hosting.maintain_metrics_partitions.
+A DEFAULT partition catches inserts beyond the last partition, should the
+maintenance task stop running, instead of failing them.
+Expired partitions are detached and dropped instead of deleted row by row.
+
+PostgreSQL only; other dialects keep a plain table.
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "053_partition_metrics"
+down_revision = "052_metrics_rollups"
+branch_labels = None
+depends_on = None
+
+# Indexes created by migration 029 (single-column ones via index=True)
+INDEXES = {
+    'ix_container_metrics_subscription_id': ['subscription_id'],
+    'ix_container_metrics_container_id': ['container_id'],
+    'ix_container_metrics_recorded_at': ['recorded_at'],
+    'ix_metrics_subscription_recorded': ['subscription_id', 'recorded_at'],
+    'ix_metrics_container_recorded': ['container_id', 'recorded_at'],
+}
+
+INITIAL_PARTITIONS_DAYS = 14
+
+
+def _bound(value: datetime) -> str:
+    return value.strftime("'%Y-%m-%d %H:%M:%S'")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # recorded_at is stored as naive UTC
+    today = bind.execute(sa.text("SELECT date_trunc('day', now() AT TIME ZONE 'UTC')")).scalar()
+    legacy_upper = today + timedelta(days=1)
+
+    op.execute("ALTER TABLE container_metrics RENAME TO container_metrics_legacy")
+    op.execute("ALTER TABLE container_metrics_legacy RENAME CONSTRAINT container_metrics_pkey TO container_metrics_legacy_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_legacy")
+
+    op.execute("""
+        CREATE TABLE container_metrics (
+            LIKE container_metrics_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS
+        ) PARTITION BY RANGE (recorded_at)
+    """)
+    # The partition key must be part of the primary key
+    op.execute("ALTER TABLE container_metrics ADD CONSTRAINT container_metrics_pkey PRIMARY KEY (id, recorded_at)")
+    op.execute("""
+        ALTER TABLE container_metrics
+            ADD CONSTRAINT container_metrics_subscription_id_fkey
+                FOREIGN KEY (subscription_id) REFERENCES vps_subscriptions(id) ON DELETE CASCADE,
+            ADD CONSTRAINT container_metrics_container_id_fkey
+                FOREIGN KEY (container_id) REFERENCES container_instances(id) ON DELETE CASCADE
+    """)
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'container_metrics', columns)
+
+    # Existing rows (and inserts until tomorrow) live in the legacy partition;
+    # it is dropped by retention once everything in it has expired.
+    op.execute(
+        "ALTER TABLE container_metrics ATTACH PARTITION container_metrics_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ({_bound(legacy_upper)})"
+    )
+
+    lower = legacy_upper
+    for _ in range(INITIAL_PARTITIONS_DAYS):
+        upper = lower + timedelta(days=1)
+        op.execute(
+            f"CREATE TABLE container_metrics_p{lower:%Y%m%d} PARTITION OF container_metrics "
+            f"FOR VALUES FROM ({_bound(lower)}) TO ({_bound(upper)})"
+        )
+        lower = upper
+
+    op.execute("CREATE TABLE container_metrics_default PARTITION OF container_metrics DEFAULT")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE container_metrics RENAME TO container_metrics_partitioned")
+    op.execute("ALTER TABLE container_metrics_partitioned RENAME CONSTRAINT container_metrics_pkey TO container_metrics_partitioned_pkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_partitioned")
+
+    op.execute("""
+        CREATE TABLE container_metrics (
+            LIKE container_metrics_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS
+        )
+    """)
+    op.execute("INSERT INTO container_metrics SELECT * FROM container_metrics_partitioned")
+    op.execute("ALTER TABLE container_metrics ADD CONSTRAINT container_metrics_pkey PRIMARY KEY (id)")
+    op.execute("""
+        ALTER TABLE container_metrics
+            ADD CONSTRAINT container_metrics_subscription_id_fkey
+                FOREIGN KEY (subscription_id) REFERENCES vps_subscriptions(id) ON DELETE CASCADE,
+            ADD CONSTRAINT container_metrics_container_id_fkey
+                FOREIGN KEY (container_id) REFERENCES container_instances(id) ON DELETE CASCADE
+    """)
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'container_metrics', columns)
+
+    # Drops every partition, including the legacy one
+    op.execute("DROP TABLE container_metrics_partitioned CASCADE")
@@ -0,0 +1,65 @@
+"""Add network_resource_pool for IP/port/subnet allocation
+
+Revision ID: 054_network_resource_pool
+Revises: 053_partition_metrics
+Create Date: 2026-10-16
+
+IPs, SSH/HTTP host ports and /24 subnets used to be picked with MAX()+1 or a
+scan of every container under a global advisory lock, and were never reused.
+They are now leased from a free list with row-level locks. Uniqueness among
+live containers moves to the pool, so the unique constraints on
+container_instances.ip_address/ssh_port are relaxed to plain indexes (a
+terminated container keeps its row while its values are handed out again).
+
+The pool is filled at API startup by NetworkResourceAllocator.seed() (see
+seed_network_resource_pool), which also leases the values existing
+containers hold.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "054_network_resource_pool"
+down_revision = "053_partition_metrics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'network_resource_pool',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('kind', sa.String(16), nullable=False, comment='ip, ssh_port, http_port or subnet'),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.Column('subscription_id', sa.String(36),
+                  sa.ForeignKey('vps_subscriptions.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('allocated_at', sa.DateTime(), nullable=True),
+        sa.Column('blocked', sa.Boolean(), nullable=False, server_default=sa.false(),
+                  comment='subnet leased but taken outside the pool'),
+    )
+    op.create_index('ux_network_resource_kind_value', 'network_resource_pool', ['kind', 'value'], unique=True)
+    op.create_index(
+        'ix_network_resource_free', 'network_resource_pool', ['kind', 'value'],
+        postgresql_where=sa.text('subscription_id IS NULL')
+    )
+    op.create_index('ix_network_resource_subscription', 'network_resource_pool', ['subscription_id'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_container_instances_ip_address')
+        op.execute('ALTER TABLE container_instances DROP CONSTRAINT IF EXISTS container_instances_ip_address_key')
+        op.execute('ALTER TABLE container_instances DROP CONSTRAINT IF EXISTS container_instances_ssh_port_key')
+        op.create_index('ix_container_instances_ip_address', 'container_instances', ['ip_address'])
+        op.create_index('ix_container_instances_ssh_port', 'container_instances', ['ssh_port'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_container_instances_ssh_port', table_name='container_instances')
+        op.drop_index('ix_container_instances_ip_address', table_name='container_instances')
+        op.create_index('ix_container_instances_ip_address', 'container_instances', ['ip_address'], unique=True)
+        op.create_unique_constraint('container_instances_ssh_port_key', 'container_instances', ['ssh_port'])
+
+    op.drop_index('ix_network_resource_subscription', table_name='network_resource_pool')
+    op.drop_index('ix_network_resource_free', table_name='network_resource_pool')
+    op.drop_index('ux_network_resource_kind_value', table_name='network_resource_pool')
+    op.drop_table('network_resource_pool')
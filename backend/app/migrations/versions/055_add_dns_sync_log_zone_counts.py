@@ -0,0 +1,28 @@
+"""Record written vs skipped zone counts on dns_sync_log
+
+Revision ID: 055_dns_sync_zone_counts
+Revises: 054_network_resource_pool
+Create Date: 2026-10-16
+
+CoreDNS zone files are now only rewritten when their content hash changes.
+Each sync log entry records how many zones were written and how many were
+skipped as unchanged.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "055_dns_sync_zone_counts"
+down_revision = "054_network_resource_pool"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dns_sync_log', sa.Column('zones_written', sa.Integer(), nullable=True))
+    op.add_column('dns_sync_log', sa.Column('zones_skipped', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dns_sync_log', 'zones_skipped')
+    op.drop_column('dns_sync_log', 'zones_written')
@@ -0,0 +1,85 @@
+"""Classify system log entries on audit_logs and index them for keyset pages
+
+Revision ID: 056_audit_system_logs
+Revises: 055_dns_sync_zone_counts
+Create Date: 2026-10-16
+
+GET /system/logs matched system logs with LIKE '%...%' on every request and
+derived level and component in Python, over-fetching to make up for the
+rows it then dropped. Entries are now classified once when they are written
+(classify_system_log): level and component are NULL for entries that are not
+system logs. Existing rows are backfilled below with the same rules.
+
+(created_at, id) indexes back cursor pagination of the audit listing and,
+as partial indexes over system logs, of the system log listing per level and
+component.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "056_audit_system_logs"
+down_revision = "055_dns_sync_zone_counts"
+branch_labels = None
+depends_on = None
+
+SYSTEM_LOGS = sa.text('level IS NOT NULL')
+
+# Mirrors app.modules.audit.repository.classify_system_log
+BACKFILL = """
+    UPDATE audit_logs
+    SET
+        level = left(CASE
+            WHEN lower(coalesce(nullif(extra_data->>'level', ''), 'info')) <> 'info'
+                THEN lower(extra_data->>'level')
+            WHEN action = 'system_error'
+                OR lower(description) LIKE '%error%'
+                OR lower(description) LIKE '%failed%'
+                THEN 'error'
+            WHEN lower(description) LIKE '%warn%' THEN 'warning'
+            ELSE 'info'
+        END, 10),
+        component = left(lower(coalesce(
+            nullif(extra_data->>'component', ''), nullif(resource_type, ''), 'system'
+        )), 100)
+    WHERE action IN ('system_error', 'config_change', 'security_alert')
+        OR resource_type IN ('system', 'database', 'cache', 'email', 'api')
+        OR description LIKE '%system%'
+        OR description LIKE '%error%'
+        OR description LIKE '%warning%'
+"""
+
+
+def upgrade():
+    op.add_column('audit_logs', sa.Column('level', sa.String(10), nullable=True))
+    op.add_column('audit_logs', sa.Column('component', sa.String(100), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(BACKFILL)
+
+    op.create_index('idx_audit_created_id', 'audit_logs', ['created_at', 'id'])
+    op.create_index(
+        'idx_audit_system_created', 'audit_logs', ['created_at', 'id'],
+        postgresql_where=SYSTEM_LOGS
+    )
+    op.create_index(
+        'idx_audit_system_level', 'audit_logs', ['level', 'created_at', 'id'],
+        postgresql_where=SYSTEM_LOGS
+    )
+    op.create_index(
+        'idx_audit_system_component', 'audit_logs', ['component', 'created_at', 'id'],
+        postgresql_where=SYSTEM_LOGS
+    )
+
+    # Estimated totals read reltuples of the table and of idx_audit_system_created
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ANALYZE audit_logs')
+
+
+def downgrade():
+    op.drop_index('idx_audit_system_component', table_name='audit_logs')
+    op.drop_index('idx_audit_system_level', table_name='audit_logs')
+    op.drop_index('idx_audit_system_created', table_name='audit_logs')
+    op.drop_index('idx_audit_created_id', table_name='audit_logs')
+    op.drop_column('audit_logs', 'component')
+    op.drop_column('audit_logs', 'level')
@@ -10,6 +10,7 @@ from app.modules.audit.schemas import (
     AuditLogListResponse,
 )
 from app.modules.audit.service import AuditService
+from app.modules.audit.writer import AuditWriter
 from app.modules.audit.router import router
 
 __all__ = [
@@ -19,5 +20,6 @@ __all__ = [
     "AuditLogResponse",
     "AuditLogListResponse",
     "AuditService",
+    "AuditWriter",
     "router",
 ]
@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy import String, DateTime, Text, JSON, Index, ForeignKey
+from sqlalchemy import String, DateTime, Text, JSON, Index, ForeignKey, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.config.database import Base
@@ -95,6 +95,11 @@ class AuditLog(Base):
     new_values: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     extra_data: Mapped[dict | None] = mapped_column(JSON, nullable=True)
 
+    # System log classification, set when the entry is written; NULL for
+    # entries that are not system logs (see classify_system_log)
+    level: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    component: Mapped[str | None] = mapped_column(String(100), nullable=True)
+
     # Status
     success: Mapped[bool] = mapped_column(default=True, nullable=False)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -135,6 +140,20 @@ class AuditLog(Base):
         Index("idx_audit_user_action", "user_id", "action"),
         Index("idx_audit_resource", "resource_type", "resource_id"),
         Index("idx_audit_created", "created_at"),
+        # Keyset pagination: (created_at, id) cursors, newest first
+        Index("idx_audit_created_id", "created_at", "id"),
+        Index(
+            "idx_audit_system_created", "created_at", "id",
+            postgresql_where=text("level IS NOT NULL"),
+        ),
+        Index(
+            "idx_audit_system_level", "level", "created_at", "id",
+            postgresql_where=text("level IS NOT NULL"),
+        ),
+        Index(
+            "idx_audit_system_component", "component", "created_at", "id",
+            postgresql_where=text("level IS NOT NULL"),
+        ),
     )
 
     def __repr__(self) -> str:
@@ -2,15 +2,97 @@
 Audit log repository for database operations.
 Handles all data access for audit logging.
 """
-from typing import Optional
+import base64
+from typing import Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, text, tuple_
 from sqlalchemy.orm import Session
 
+from app.core.exceptions import ValidationException
 from app.modules.audit.models import AuditLog, AuditAction
 from app.modules.audit.schemas import AuditLogCreate, AuditLogFilter
 
+# Below this many estimated rows an exact count is cheap enough to run
+EXACT_COUNT_BELOW = 100_000
+
+# Partial index over system log entries; its reltuples estimates their number
+SYSTEM_LOG_INDEX = "idx_audit_system_created"
+
+# Entries that count as system logs (GET /system/logs)
+SYSTEM_LOG_ACTIONS = frozenset({
+    AuditAction.SYSTEM_ERROR,
+    AuditAction.CONFIG_CHANGE,
+    AuditAction.SECURITY_ALERT,
+})
+SYSTEM_LOG_RESOURCE_TYPES = frozenset({"system", "database", "cache", "email", "api"})
+SYSTEM_LOG_KEYWORDS = ("system", "error", "warning")
+
+
+def classify_system_log(
+    action: AuditAction,
+    resource_type: Optional[str],
+    description: Optional[str],
+    extra_data: Optional[dict] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Level and component of an entry if it is a system log.
+
+    Migration 056 backfills existing rows with the same rules in SQL; keep
+    the two in step.
+
+    Returns:
+        (level, component), lower-cased, or (None, None) for other entries
+    """
+    description = description or ""
+    if not (
+        action in SYSTEM_LOG_ACTIONS
+        or resource_type in SYSTEM_LOG_RESOURCE_TYPES
+        or any(keyword in description for keyword in SYSTEM_LOG_KEYWORDS)
+    ):
+        return None, None
+
+    extra_data = extra_data or {}
+    level = str(extra_data.get("level") or "info").lower()
+    if level == "info":
+        lowered = description.lower()
+        if action == AuditAction.SYSTEM_ERROR or "error" in lowered or "failed" in lowered:
+            level = "error"
+        elif "warn" in lowered:
+            level = "warning"
+    component = extra_data.get("component") or resource_type or "system"
+    return level[:10], str(component).lower()[:100]
+
+
+def classify_audit_entry(audit_data: AuditLogCreate) -> AuditLogCreate:
+    """Fill in level and component of an entry about to be written, unless already set."""
+    if audit_data.level is None and audit_data.component is None:
+        audit_data.level, audit_data.component = classify_system_log(
+            audit_data.action, audit_data.resource_type, audit_data.description, audit_data.extra_data
+        )
+    return audit_data
+
+
+
+def encode_cursor(audit_log: AuditLog) -> str:
+    """Opaque cursor pointing just past an entry in newest-first order"""
+    raw = f"{audit_log.created_at.isoformat()}|{audit_log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a cursor from encode_cursor.
+
+    Raises:
+        ValidationException: If the cursor is malformed
+    """
+    try:
+        created_at, audit_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), audit_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationException("Invalid pagination cursor")
+
 
 class AuditRepository:
     """Repository for audit log data access."""
@@ -21,7 +103,7 @@ class AuditRepository:
 
     async def create(self, audit_data: AuditLogCreate) -> AuditLog:
         """
-        Create a new audit log entry.
+        Create a new audit log entry, classified as a system log if it is one.
 
         Args:
             audit_data: Audit log creation data
@@ -29,7 +111,7 @@ class AuditRepository:
         Returns:
             Created audit log entry
         """
-        audit_log = AuditLog(**audit_data.model_dump())
+        audit_log = AuditLog(**classify_audit_entry(audit_data).model_dump())
         self.db.add(audit_log)
         await self.db.commit()
         await self.db.refresh(audit_log)
@@ -41,62 +123,172 @@ class AuditRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    @staticmethod
+    def _filter_conditions(filters: Optional[AuditLogFilter]) -> list:
+        """SQL conditions for a filter; empty when nothing is filtered"""
+        conditions = []
+        if not filters:
+            return conditions
+
+        if filters.action:
+            conditions.append(AuditLog.action == filters.action)
+        if filters.resource_type:
+            conditions.append(AuditLog.resource_type == filters.resource_type)
+        if filters.resource_id:
+            conditions.append(AuditLog.resource_id == filters.resource_id)
+        if filters.user_id:
+            conditions.append(AuditLog.user_id == filters.user_id)
+        if filters.user_email:
+            conditions.append(AuditLog.user_email.ilike(f"%{filters.user_email}%"))
+        if filters.success is not None:
+            conditions.append(AuditLog.success == filters.success)
+        if filters.start_date:
+            conditions.append(AuditLog.created_at >= filters.start_date)
+        if filters.end_date:
+            conditions.append(AuditLog.created_at <= filters.end_date)
+        if filters.ip_address:
+            conditions.append(AuditLog.ip_address == filters.ip_address)
+        return conditions
+
+    async def _page(
+        self,
+        conditions: list,
+        limit: int,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+    ) -> tuple[list[AuditLog], Optional[str]]:
+        """
+        One newest-first page and the cursor for the next one.
+
+        With a cursor the page starts right after it (keyset), so it costs the
+        same at any depth; skip is only used without a cursor.
+        """
+        query = select(AuditLog)
+        if cursor:
+            query = query.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*decode_cursor(cursor)))
+        elif skip:
+            query = query.offset(skip)
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        # One extra row tells whether there is a next page
+        query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+        result = await self.db.execute(query)
+        audit_logs = list(result.scalars().all())
+
+        next_cursor = encode_cursor(audit_logs[limit - 1]) if len(audit_logs) > limit else None
+        return audit_logs[:limit], next_cursor
+
+    async def estimate_rows(self, relation: str) -> Optional[int]:
+        """
+        Row count of a table or index from planner statistics.
+
+        Returns:
+            The estimate, or None when it is unavailable (not PostgreSQL, or
+            the relation has not been analyzed yet)
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return None
+        result = await self.db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:relation)"),
+            {"relation": relation},
+        )
+        reltuples = result.scalar()
+        if reltuples is None or reltuples < 0:
+            return None
+        return int(reltuples)
+
+    async def _count(
+        self, conditions: list, estimate_relation: Optional[str] = None
+    ) -> tuple[int, bool]:
+        """
+        Count matching rows.
+
+        With estimate_relation, large counts come from that relation's
+        planner statistics instead of a scan; only valid when conditions
+        select exactly the rows the relation holds.
+
+        Returns:
+            Tuple of (count, whether it is an estimate)
+        """
+        if estimate_relation:
+            estimate = await self.estimate_rows(estimate_relation)
+            if estimate is not None and estimate >= EXACT_COUNT_BELOW:
+                return estimate, True
+
+        query = select(func.count()).select_from(AuditLog)
+        if conditions:
+            query = query.where(and_(*conditions))
+        result = await self.db.execute(query)
+        return result.scalar() or 0, False
+
     async def get_all(
         self,
         skip: int = 0,
         limit: int = 100,
         filters: Optional[AuditLogFilter] = None,
-    ) -> tuple[list[AuditLog], int]:
+        cursor: Optional[str] = None,
+        estimate_total: bool = False,
+    ) -> tuple[list[AuditLog], int, Optional[str], bool]:
         """
         Get all audit logs with pagination and filters.
 
         Args:
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when a cursor is given)
             limit: Maximum number of records to return
             filters: Optional filters to apply
+            cursor: next_cursor of the previous page
+            estimate_total: Use planner statistics for the total of
+                unfiltered listings instead of counting the table
 
         Returns:
-            Tuple of (audit logs list, total count)
+            Tuple of (audit logs list, total count, next cursor, whether the
+            total is an estimate)
         """
-        query = select(AuditLog)
+        conditions = self._filter_conditions(filters)
+        audit_logs, next_cursor = await self._page(conditions, limit, cursor=cursor, skip=skip)
+        total, is_estimate = await self._count(
+            conditions,
+            estimate_relation=AuditLog.__tablename__ if estimate_total and not conditions else None,
+        )
+        return audit_logs, total, next_cursor, is_estimate
 
-        # Apply filters
-        if filters:
-            conditions = []
-
-            if filters.action:
-                conditions.append(AuditLog.action == filters.action)
-            if filters.resource_type:
-                conditions.append(AuditLog.resource_type == filters.resource_type)
-            if filters.resource_id:
-                conditions.append(AuditLog.resource_id == filters.resource_id)
-            if filters.user_id:
-                conditions.append(AuditLog.user_id == filters.user_id)
-            if filters.user_email:
-                conditions.append(AuditLog.user_email.ilike(f"%{filters.user_email}%"))
-            if filters.success is not None:
-                conditions.append(AuditLog.success == filters.success)
-            if filters.start_date:
-                conditions.append(AuditLog.created_at >= filters.start_date)
-            if filters.end_date:
-                conditions.append(AuditLog.created_at <= filters.end_date)
-            if filters.ip_address:
-                conditions.append(AuditLog.ip_address == filters.ip_address)
-
-            if conditions:
-                query = query.where(and_(*conditions))
-
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.db.execute(count_query)
-        total_count = total.scalar()
-
-        # Apply pagination and ordering
-        query = query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        audit_logs = result.scalars().all()
+    async def get_system_logs(
+        self,
+        limit: int = 50,
+        level: Optional[str] = None,
+        component: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+    ) -> tuple[list[AuditLog], int, Optional[str], bool]:
+        """
+        Get entries classified as system logs, newest first.
+
+        Level and component are matched against the columns set when the
+        entry was written, through the partial indexes on them.
+
+        Returns:
+            Tuple of (audit logs list, total count, next cursor, whether the
+            total is an estimate)
+        """
+        conditions = [AuditLog.level.is_not(None)]
+        if level:
+            conditions.append(AuditLog.level == level.lower())
+        if component:
+            conditions.append(AuditLog.component == component.lower())
+        if start_date:
+            conditions.append(AuditLog.created_at >= start_date)
+        if end_date:
+            conditions.append(AuditLog.created_at <= end_date)
 
-        return list(audit_logs), total_count
+        audit_logs, next_cursor = await self._page(conditions, limit, cursor=cursor, skip=skip)
+        unfiltered = len(conditions) == 1
+        total, is_estimate = await self._count(
+            conditions, estimate_relation=SYSTEM_LOG_INDEX if unfiltered else None
+        )
+        return audit_logs, total, next_cursor, is_estimate
 
     async def get_by_user(
         self, user_id: str, skip: int = 0, limit: int = 100
@@ -31,6 +31,8 @@ async def get_audit_logs(
     resource_id: Optional[str] = Query(None, description="Filter by resource ID"),
     user_email: Optional[str] = Query(None, description="Filter by user email"),
     success: Optional[bool] = Query(None, description="Filter by success status"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    exact_total: bool = Query(False, description="Count exactly instead of estimating unfiltered totals"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -54,7 +56,13 @@ async def get_audit_logs(
     if not has_permission(current_user.role.value, Permission.AUDIT_ADMIN):
         filters.user_id = current_user.id
 
-    return await service.get_logs(page=page, page_size=page_size, filters=filters)
+    return await service.get_logs(
+        page=page,
+        page_size=page_size,
+        filters=filters,
+        cursor=cursor,
+        exact_total=exact_total,
+    )
 
 
 @router.get("/user/{user_id}", response_model=list[AuditLogResponse])
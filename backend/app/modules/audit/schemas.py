@@ -34,6 +34,8 @@ class AuditLogCreate(AuditLogBase):
     extra_data: Optional[dict] = None
     success: bool = True
     error_message: Optional[str] = None
+    level: Optional[str] = Field(None, max_length=10)
+    component: Optional[str] = Field(None, max_length=100)
 
 
 class AuditLogResponse(AuditLogBase):
@@ -79,5 +81,11 @@ class AuditLogListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as cursor to get the next page; null on the last page"
+    )
+    total_is_estimate: bool = Field(
+        False, description="total comes from planner statistics, not an exact count"
+    )
 
     model_config = ConfigDict(from_attributes=True)
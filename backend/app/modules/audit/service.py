@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from fastapi import Request
 
+from app.config.settings import get_settings
 from app.modules.audit.repository import AuditRepository
 from app.modules.audit.models import AuditLog, AuditAction
 from app.modules.audit.schemas import (
@@ -16,7 +17,23 @@ from app.modules.audit.schemas import (
     AuditLogListResponse,
     AuditLogFilter,
 )
-
+from app.modules.audit.writer import AuditWriter
+
+settings = get_settings()
+
+# Written and committed before log_action returns: failed logins are counted
+# from the table for lockouts, and the rest must not be lost to a crash
+SYNCHRONOUS_ACTIONS = frozenset({
+    AuditAction.LOGIN_FAILED,
+    AuditAction.PASSWORD_CHANGE,
+    AuditAction.PASSWORD_RESET,
+    AuditAction.TWO_FA_DISABLED,
+    AuditAction.PERMISSION_GRANT,
+    AuditAction.PERMISSION_REVOKE,
+    AuditAction.ROLE_ASSIGN,
+    AuditAction.ROLE_REMOVE,
+    AuditAction.SECURITY_ALERT,
+})
 
 class AuditService:
     """Service for audit logging operations."""
@@ -40,6 +57,7 @@ class AuditService:
         extra_data: Optional[dict] = None,
         success: bool = True,
         error_message: Optional[str] = None,
+        sync: Optional[bool] = None,
     ) -> AuditLog:
         """
         Log an audit action.
@@ -58,9 +76,13 @@ class AuditService:
             extra_data: Additional metadata
             success: Whether action was successful
             error_message: Error message if failed
+            sync: Insert before returning (True) or queue on the batched
+                writer (False); by default only SYNCHRONOUS_ACTIONS are
+                inserted inline
 
         Returns:
-            Created audit log entry
+            Created audit log entry; queued entries are returned transient,
+            with id and created_at set
         """
         audit_data = AuditLogCreate(
             action=action,
@@ -84,18 +106,35 @@ class AuditService:
             audit_data.request_method = request.method
             audit_data.request_path = str(request.url.path)
 
-        return await self.repository.create(audit_data)
+        if sync is None:
+            sync = action in SYNCHRONOUS_ACTIONS
+        writer = AuditWriter.get_instance()
+        if sync or not settings.AUDIT_ASYNC_WRITES_ENABLED or not writer.running:
+            return await self.repository.create(audit_data)
+        return writer.submit(audit_data)
 
     async def get_logs(
         self,
         page: int = 1,
         page_size: int = 20,
         filters: Optional[AuditLogFilter] = None,
+        cursor: Optional[str] = None,
+        exact_total: bool = False,
     ) -> AuditLogListResponse:
-        """Get paginated audit logs with filters."""
+        """
+        Get paginated audit logs with filters.
+
+        Pass the previous response's next_cursor to page without OFFSET;
+        page is then only echoed back. Unfiltered listings report an
+        estimated total unless exact_total is set.
+        """
         skip = (page - 1) * page_size
-        audit_logs, total = await self.repository.get_all(
-            skip=skip, limit=page_size, filters=filters
+        audit_logs, total, next_cursor, total_is_estimate = await self.repository.get_all(
+            skip=skip,
+            limit=page_size,
+            filters=filters,
+            cursor=cursor,
+            estimate_total=not exact_total,
         )
 
         total_pages = (total + page_size - 1) // page_size
@@ -106,6 +145,8 @@ class AuditService:
             page=page,
             page_size=page_size,
             total_pages=total_pages,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate,
         )
 
     async def get_user_activity(
@@ -35,6 +35,7 @@ async def log_crud_action(
     request: Optional[Request] = None,
     old_values: Optional[dict] = None,
     new_values: Optional[dict] = None,
+    sync: Optional[bool] = None,
 ):
     """
     Helper function to log CRUD actions.
@@ -51,6 +52,7 @@ async def log_crud_action(
         request: FastAPI request
         old_values: Old values for updates
         new_values: New values for creates/updates
+        sync: Insert before returning instead of queueing (see AuditService.log_action)
     """
     audit_service = AuditService(db)
     audit_action = get_audit_action(action)
@@ -66,6 +68,7 @@ async def log_crud_action(
         request=request,
         old_values=old_values,
         new_values=new_values,
+        sync=sync,
     )
 
 
@@ -0,0 +1,337 @@
+"""
+Batched audit log writer.
+
+AuditService.log_action used to insert and commit one row per call on the
+request path. AuditWriter instead queues entries in memory and inserts them
+with one multi-row INSERT per AUDIT_WRITER_BATCH_SIZE entries, every
+AUDIT_WRITER_FLUSH_SECONDS or as soon as a full batch is waiting.
+
+Entries get their id and created_at when they are queued, and every insert
+is ON CONFLICT (id) DO NOTHING, so writing an entry twice is harmless. That
+makes the delivery at-least-once:
+
+- when an insert fails the batch is kept and retried with the next flush;
+  beyond AUDIT_WRITER_MAX_BUFFER entries the oldest are spooled
+- on shutdown whatever cannot be inserted is spooled
+- the spool is the Redis stream audit:spool, or AUDIT_WRITER_SPOOL_PATH
+  (one JSON entry per line) when Redis is unreachable too
+- on startup the spool is replayed into the database before new entries
+
+A row the database rejects (a foreign key to a deleted user, a value too
+long for its column) would otherwise fail its batch on every retry. When a
+batch is rejected it is split in halves until the offending rows are
+isolated; those go to the Redis stream audit:dead-letter (or
+AUDIT_WRITER_SPOOL_PATH.rejected) and the rest are inserted.
+
+Security-relevant actions do not go through the writer; see
+AuditService.log_action.
+"""
+import os
+import json
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config.redis import get_redis
+from app.config.settings import get_settings
+from app.modules.audit.models import AuditLog
+from app.modules.audit.repository import classify_audit_entry
+from app.modules.audit.schemas import AuditLogCreate
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SPOOL_STREAM = "audit:spool"
+DEAD_LETTER_STREAM = "audit:dead-letter"
+DEAD_LETTER_MAXLEN = 100_000
+
+# Errors caused by the rows themselves rather than by the database being unavailable
+REJECTED_ROW_ERRORS = (IntegrityError, DataError)
+
+_DATETIME_COLUMNS = ("created_at", "updated_at", "deleted_at")
+
+
+def build_insert(rows: List[Dict[str, Any]]):
+    """Multi-row INSERT for audit rows that skips ids already written"""
+    return pg_insert(AuditLog).values(rows).on_conflict_do_nothing(index_elements=["id"])
+
+
+def _encode(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+
+
+def _decode(payload: str) -> Dict[str, Any]:
+    row = json.loads(payload)
+    for name in _DATETIME_COLUMNS:
+        if row.get(name):
+            row[name] = datetime.fromisoformat(row[name])
+    return row
+
+
+class AuditWriter:
+    """Process-wide queue of audit entries, inserted into audit_logs in batches"""
+
+    _instance: Optional["AuditWriter"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        redis_client=None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        max_buffer: Optional[int] = None,
+        spool_path: Optional[str] = None,
+    ):
+        """
+        Initialize audit writer
+
+        Args:
+            session_factory: Async session factory (defaults to AsyncSessionLocal)
+            redis_client: Async Redis client for the spool (defaults to get_redis())
+            batch_size: Rows per INSERT, and queued entries that trigger a flush
+            flush_seconds: Longest time an entry waits in the queue
+            max_buffer: Entries kept in memory while inserts fail before spooling
+            spool_path: Local spool file used when Redis is unreachable
+        """
+        self._session_factory = session_factory
+        self._redis = redis_client
+        self.batch_size = batch_size or settings.AUDIT_WRITER_BATCH_SIZE
+        self.flush_seconds = flush_seconds or settings.AUDIT_WRITER_FLUSH_SECONDS
+        self.max_buffer = max_buffer or settings.AUDIT_WRITER_MAX_BUFFER
+        self.spool_path = spool_path or settings.AUDIT_WRITER_SPOOL_PATH
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def get_instance(cls) -> "AuditWriter":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def running(self) -> bool:
+        """Whether the flush loop runs; callers write inline otherwise (Celery, scripts)"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def submit(self, audit_data: AuditLogCreate) -> AuditLog:
+        """
+        Queue an audit entry, classified as a system log if it is one.
+
+        Returns:
+            The entry as a transient AuditLog (id and created_at set, not yet
+            in the database)
+        """
+        now = datetime.utcnow()
+        audit_log = AuditLog(
+            id=str(uuid.uuid4()), created_at=now, updated_at=now,
+            **classify_audit_entry(audit_data).model_dump()
+        )
+        row = {column.name: getattr(audit_log, column.key) for column in AuditLog.__table__.columns}
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+        return audit_log
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        if self._session_factory is None:
+            from app.config.database import AsyncSessionLocal
+            self._session_factory = AsyncSessionLocal
+        async with self._session_factory() as db:
+            for i in range(0, len(rows), self.batch_size):
+                await db.execute(build_insert(rows[i:i + self.batch_size]))
+            await db.commit()
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert rows, dead-lettering the ones the database rejects.
+
+        Returns:
+            Number of rows inserted
+
+        Raises:
+            Exception: Any other insert failure (e.g. database unreachable)
+        """
+        try:
+            await self._insert(rows)
+            return len(rows)
+        except REJECTED_ROW_ERRORS as e:
+            if len(rows) == 1:
+                await self._dead_letter(rows[0], e)
+                return 0
+        middle = len(rows) // 2
+        return await self._write(rows[:middle]) + await self._write(rows[middle:])
+
+    async def _dead_letter(self, row: Dict[str, Any], error: Exception) -> None:
+        """Set aside a row the database rejected, with the reason"""
+        logger.error(f"Audit entry {row.get('id')} rejected by the database, dead-lettered: {error}")
+        payload = _encode(row)
+        try:
+            redis = self._redis or await get_redis()
+            await redis.xadd(
+                DEAD_LETTER_STREAM,
+                {"entry": payload, "error": str(error)[:1000]},
+                maxlen=DEAD_LETTER_MAXLEN,
+                approximate=True,
+            )
+            return
+        except Exception as e:
+            logger.warning(f"Audit dead-letter to Redis failed, writing to {self.spool_path}.rejected: {e}")
+        try:
+            await asyncio.to_thread(self._append_spool_file, [payload], f"{self.spool_path}.rejected")
+        except Exception as e:
+            logger.error(f"Audit dead-letter file write failed, audit entry {row.get('id')} lost: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Insert queued entries.
+
+        Rows the database rejects are dead-lettered. On other failures the
+        entries are put back at the front of the queue and retried with the
+        next flush; entries beyond max_buffer are spooled.
+
+        Returns:
+            Number of entries inserted
+        """
+        async with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                inserted = await self._write(rows)
+            except Exception as e:
+                logger.warning(f"Audit log flush failed, keeping {len(rows)} entries: {e}")
+                with self._lock:
+                    self._buffer[:0] = rows
+                    overflow = len(self._buffer) - self.max_buffer
+                    spill = self._buffer[:overflow] if overflow > 0 else []
+                    del self._buffer[:len(spill)]
+                if spill:
+                    await self._spool(spill)
+                return 0
+            return inserted
+
+    async def _spool(self, rows: List[Dict[str, Any]]) -> None:
+        """Persist entries for replay: the Redis stream, else the local spool file"""
+        payloads = [_encode(row) for row in rows]
+        try:
+            redis = self._redis or await get_redis()
+            pipe = redis.pipeline(transaction=False)
+            for payload in payloads:
+                pipe.xadd(SPOOL_STREAM, {"entry": payload})
+            await pipe.execute()
+            logger.warning(f"Spooled {len(rows)} audit entries to Redis stream {SPOOL_STREAM}")
+            return
+        except Exception as e:
+            logger.warning(f"Audit spool to Redis failed, writing {len(rows)} entries to {self.spool_path}: {e}")
+        try:
+            await asyncio.to_thread(self._append_spool_file, payloads)
+        except Exception as e:
+            logger.error(f"Audit spool file write failed, {len(rows)} audit entries lost: {e}", exc_info=True)
+
+    def _append_spool_file(self, payloads: List[str], path: Optional[str] = None) -> None:
+        path = path or self.spool_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as spool:
+            spool.write("".join(f"{payload}\n" for payload in payloads))
+            spool.flush()
+            os.fsync(spool.fileno())
+
+    async def replay_spool(self) -> int:
+        """
+        Insert spooled entries, then remove them from the spool.
+
+        Safe to run from several processes at once: duplicates are skipped
+        by id. Rows the database rejects are dead-lettered, so they do not
+        hold up the rest of the spool.
+
+        Returns:
+            Number of entries replayed
+        """
+        replayed = 0
+        try:
+            redis = self._redis or await get_redis()
+            while True:
+                items = await redis.xrange(SPOOL_STREAM, count=self.batch_size)
+                if not items:
+                    break
+                await self._write([_decode(fields["entry"]) for _, fields in items])
+                await redis.xdel(SPOOL_STREAM, *[entry_id for entry_id, _ in items])
+                replayed += len(items)
+        except Exception as e:
+            logger.warning(f"Audit spool replay from Redis stopped: {e}")
+
+        # Claim the file by renaming it, so entries spooled meanwhile go to a new file
+        claimed = f"{self.spool_path}.replay"
+        try:
+            if not os.path.exists(claimed) and os.path.exists(self.spool_path):
+                os.replace(self.spool_path, claimed)
+            if os.path.exists(claimed):
+                with open(claimed, encoding="utf-8") as spool:
+                    rows = [_decode(line) for line in spool if line.strip()]
+                if rows:
+                    await self._write(rows)
+                os.remove(claimed)
+                replayed += len(rows)
+        except Exception as e:
+            logger.warning(f"Audit spool replay from {claimed} stopped: {e}")
+
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled audit entries")
+        return replayed
+
+    async def _flush_loop(self) -> None:
+        try:
+            await self.replay_spool()
+        except Exception as e:
+            logger.warning(f"Audit spool replay error: {e}")
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Audit log flush error: {e}")
+
+    def start(self) -> None:
+        """Replay the spool and start flushing on the running event loop"""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush loop, insert what is queued and spool what cannot be inserted"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            await self._spool(rows)
@@ -17,8 +17,9 @@ from app.core.exceptions import (
     ValidationException,
 )
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    verify_and_update_password,
+    get_password_hash_async,
     create_access_token,
     create_refresh_token,
     decode_token,
@@ -79,7 +80,7 @@ class AuthService:
             raise ConflictException("Email already registered")
 
         # Hash password
-        password_hash = get_password_hash(user_data.password)
+        password_hash = await get_password_hash_async(user_data.password)
 
         # Create user
         user = await self.repository.create(user_data, password_hash)
@@ -183,26 +184,23 @@ class AuthService:
                 user.failed_login_attempts = 0
                 await self.db.commit()
 
-        # Verify password
-        password_valid = verify_password(password, user.password_hash)
+        # Verify password; the hashing pool also returns a new hash when the
+        # stored one uses a deprecated scheme or cost (one pool round trip)
+        password_valid, new_hash = await verify_and_update_password(password, user.password_hash)
         
-        # If password is valid and it's using bcrypt (old hash), migrate to Argon2
+        # If password is valid and its hash is outdated, store the upgraded hash
         if password_valid:
-            # Check if password is using bcrypt (starts with $2a$, $2b$, or $2y$)
-            if user.password_hash.startswith(("$2a$", "$2b$", "$2y$")):
-                # Migrate to Argon2
-                from app.core.security import get_password_hash
-                new_hash = get_password_hash(password)
+            if new_hash:
                 user.password_hash = new_hash
                 await self.db.commit()
-                logger.info(f"Password migrated to Argon2 for user {user.email}")
+                logger.info(f"Password hash upgraded for user {user.email}")
                 
                 # Log migration
                 try:
                     await self.audit_service.log_action(
                         action=AuditAction.PASSWORD_CHANGE,
                         resource_type="user",
-                        description=f"Password hash migrated from bcrypt to Argon2",
+                        description=f"Password hash upgraded to the current scheme",
                         user_id=user.id,
                         user_email=user.email,
                         user_role=user.role,
@@ -536,14 +534,12 @@ class AuthService:
                     f"Please try again in {minutes_remaining} minute(s) or contact support."
                 )
 
-        # Verify password
-        password_valid = verify_password(password, user.password_hash)
+        # Verify password (and rehash off the event loop if the hash is outdated)
+        password_valid, new_hash = await verify_and_update_password(password, user.password_hash)
 
         # Handle password migration if needed
-        if password_valid and user.password_hash.startswith("$2b$"):
-            # Migrate to new hash format if using old bcrypt
+        if password_valid and new_hash:
             try:
-                new_hash = get_password_hash(password)
                 user.password_hash = new_hash
                 await self.db.commit()
             except Exception as e:
@@ -809,7 +805,7 @@ class AuthService:
             raise ValidationException("User not found")
 
         # Hash new password
-        password_hash = get_password_hash(new_password)
+        password_hash = await get_password_hash_async(new_password)
 
         # Update password
         updated_user = await self.repository.update_password(user, password_hash)
@@ -859,10 +855,10 @@ class AuthService:
         if not user:
             raise UnauthorizedException("User not found")
 
-        if not verify_password(current_password, user.password_hash):
+        if not await verify_password_async(current_password, user.password_hash):
             raise ValidationException("Current password is incorrect")
 
-        password_hash = get_password_hash(new_password)
+        password_hash = await get_password_hash_async(new_password)
         await self.repository.update_password(user, password_hash)
 
         # Log password change
@@ -184,8 +184,7 @@ async def delete_zone(
 
     # Remove from CoreDNS
     try:
-        await coredns_service.delete_zone_files(zone_name)
-        await coredns_service.reload_coredns()
+        await coredns_service.remove_zone_from_coredns(zone_name)
     except Exception as e:
         logger.error(f"Failed to sync zone deletion to CoreDNS: {str(e)}")
 
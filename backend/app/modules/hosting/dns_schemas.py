@@ -302,6 +302,8 @@ class DNSSyncLogResponse(BaseModel):
     sync_type: DNSSyncType
     status: DNSSyncStatus
     error_message: Optional[str]
+    zones_written: Optional[int] = None
+    zones_skipped: Optional[int] = None
     triggered_by_id: Optional[str]
     triggered_at: datetime
     completed_at: Optional[datetime]
@@ -10,7 +10,7 @@ from enum import Enum as PyEnum
 
 from sqlalchemy import (
     String, DateTime, Enum as SQLEnum, Text, Numeric, Integer, Float,
-    ForeignKey, Boolean, Date, BigInteger, Index
+    ForeignKey, Boolean, Date, BigInteger, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
@@ -338,10 +338,12 @@ class ContainerInstance(Base):
     container_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
 
     # Network Configuration
-    ip_address: Mapped[str] = mapped_column(String(15), unique=True, nullable=False, index=True)
+    # Uniqueness of IPs/ports among live containers is enforced by network_resource_pool,
+    # so values released by terminated containers can be handed out again
+    ip_address: Mapped[str] = mapped_column(String(15), nullable=False, index=True)
     network_name: Mapped[str] = mapped_column(String(255), nullable=False)
     hostname: Mapped[str] = mapped_column(String(255), nullable=False)
-    ssh_port: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    ssh_port: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     http_port: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
 
     # Credentials (Encrypted at rest)
@@ -465,7 +467,11 @@ class VPSServiceDomain(Base):
 
 
 class ContainerMetrics(Base):
-    """Container Metrics database model - time-series resource usage data."""
+    """Container Metrics database model - time-series resource usage data.
+
+    On PostgreSQL the table is range-partitioned by recorded_at (migration 053,
+    primary key (id, recorded_at)); partitions are managed by MetricsPartitionService.
+    """
 
     __tablename__ = "container_metrics"
 
@@ -500,6 +506,8 @@ class ContainerMetrics(Base):
     # Storage Metrics
     storage_usage_mb: Mapped[int] = mapped_column(Integer, nullable=False)
     storage_usage_percent: Mapped[float] = mapped_column(Float, nullable=False)
+    storage_usage_source: Mapped[str | None] = mapped_column(String(32), nullable=True)  # quota, host_walk, df
+    storage_measured_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     # Network I/O (cumulative bytes)
     network_rx_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -546,6 +554,165 @@ class ContainerMetrics(Base):
     )
 
 
+class MetricsResolution(str, PyEnum):
+    """Metrics history resolution."""
+    RAW = "raw"  # One row per collection cycle (5 minutes)
+    HOUR = "hour"
+    DAY = "day"
+
+
+class ContainerMetricsRollup(Base):
+    """Downsampled container metrics - one row per container per hour or day.
+
+    Attribute names shared with ContainerMetrics (cpu_usage_percent, recorded_at, ...)
+    are exposed as properties so rollups can be served wherever raw rows are.
+    """
+
+    __tablename__ = "container_metrics_rollups"
+
+    # Primary Key
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+
+    # Foreign Keys
+    subscription_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("vps_subscriptions.id"),
+        nullable=False
+    )
+    container_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("container_instances.id"),
+        nullable=False
+    )
+
+    # Bucket
+    resolution: Mapped[str] = mapped_column(String(8), nullable=False)  # MetricsResolution.HOUR / DAY
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # CPU
+    cpu_usage_percent_min: Mapped[float] = mapped_column(Float, nullable=False)
+    cpu_usage_percent_avg: Mapped[float] = mapped_column(Float, nullable=False)
+    cpu_usage_percent_max: Mapped[float] = mapped_column(Float, nullable=False)
+    cpu_usage_percent_p95: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Memory
+    memory_usage_mb_min: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_mb_avg: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_mb_max: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_mb_p95: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_percent_min: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_percent_avg: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_percent_max: Mapped[float] = mapped_column(Float, nullable=False)
+    memory_usage_percent_p95: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Network I/O Rates (bytes/sec)
+    network_rx_bytes_per_sec_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_rx_bytes_per_sec_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_rx_bytes_per_sec_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_rx_bytes_per_sec_p95: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_tx_bytes_per_sec_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_tx_bytes_per_sec_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_tx_bytes_per_sec_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    network_tx_bytes_per_sec_p95: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # Block I/O Rates (bytes/sec)
+    block_read_bytes_per_sec_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_read_bytes_per_sec_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_read_bytes_per_sec_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_read_bytes_per_sec_p95: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_write_bytes_per_sec_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_write_bytes_per_sec_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_write_bytes_per_sec_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    block_write_bytes_per_sec_p95: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # Point-in-time values at the end of the bucket
+    storage_usage_mb: Mapped[int] = mapped_column(Integer, nullable=False)
+    storage_usage_percent: Mapped[float] = mapped_column(Float, nullable=False)
+    network_rx_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    network_tx_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    block_read_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    block_write_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    process_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.utcnow(), nullable=False)
+
+    __table_args__ = (
+        Index(
+            'ux_metrics_rollup_container_bucket',
+            'container_id', 'resolution', 'bucket_start',
+            unique=True
+        ),
+        Index('ix_metrics_rollup_subscription_bucket', 'subscription_id', 'resolution', 'bucket_start'),
+    )
+
+    # Raw-row compatible view (ContainerMetricsResponse)
+    @property
+    def recorded_at(self) -> datetime:
+        return self.bucket_start
+
+    @property
+    def cpu_usage_percent(self) -> float:
+        return self.cpu_usage_percent_avg
+
+    @property
+    def memory_usage_mb(self) -> int:
+        return int(round(self.memory_usage_mb_avg))
+
+    @property
+    def memory_usage_percent(self) -> float:
+        return self.memory_usage_percent_avg
+
+
+class NetworkResourceKind(str, PyEnum):
+    """Allocatable network resources."""
+    IP = "ip"  # Container IP in 172.20.0.0/16, value = third_octet * 256 + fourth_octet
+    SSH_PORT = "ssh_port"  # Host port mapped to 22/tcp
+    HTTP_PORT = "http_port"  # Host port mapped to 80/tcp
+    SUBNET = "subnet"  # Per-subscription 172.20.X.0/24 bridge network, value = X
+
+
+class NetworkResource(Base):
+    """One allocatable IP/port/subnet - the persisted free list.
+
+    A row is free while subscription_id is NULL. Allocation locks a single
+    free row (FOR UPDATE SKIP LOCKED) so concurrent provisioners never wait
+    on each other; release sets subscription_id back to NULL.
+
+    A blocked row is a subnet leased to a subscription that turned out to be
+    taken outside the pool; it stays with the subscription until release but
+    is never handed back as the subscription's subnet.
+    """
+
+    __tablename__ = "network_resource_pool"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)  # NetworkResourceKind
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    subscription_id: Mapped[str | None] = mapped_column(
+        String(36),
+        ForeignKey("vps_subscriptions.id", ondelete="SET NULL"),
+        nullable=True
+    )
+    allocated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    blocked: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=text("false"))
+
+    __table_args__ = (
+        Index('ux_network_resource_kind_value', 'kind', 'value', unique=True),
+        # Free-list lookups only ever scan unallocated rows
+        Index(
+            'ix_network_resource_free', 'kind', 'value',
+            postgresql_where=text('subscription_id IS NULL')
+        ),
+        Index('ix_network_resource_subscription', 'subscription_id'),
+    )
+
+
 class SubscriptionTimeline(Base):
     """Subscription Timeline database model - audit trail of subscription events."""
 
@@ -962,6 +1129,8 @@ class DNSSyncLog(Base):
     # Sync Data
     config_snapshot: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    zones_written: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    zones_skipped: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Content hash unchanged
 
     # Timestamps
     triggered_at: Mapped[datetime] = mapped_column(
@@ -3,7 +3,7 @@ VPS Hosting repository layer.
 
 Handles database operations for VPS hosting entities.
 """
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 
 from sqlalchemy import select, func, and_, or_, desc, cast, String
@@ -15,6 +15,8 @@ from app.modules.hosting.models import (
     VPSSubscription,
     ContainerInstance,
     ContainerMetrics,
+    ContainerMetricsRollup,
+    MetricsResolution,
     SubscriptionTimeline,
     SubscriptionStatus,
     ContainerStatus,
@@ -301,75 +303,32 @@ class ContainerInstanceRepository:
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def get_next_available_ssh_port(self) -> int:
+    async def allocate_network_resources(self, subscription_id: str) -> Dict[str, Any]:
         """
-        Get next available SSH port starting from 2222.
-        Uses database-level advisory lock to prevent race conditions.
-        """
-        from sqlalchemy import text
-
-        # Acquire PostgreSQL advisory lock (lock ID: 999001)
-        # Lock is automatically released at transaction end
-        await self.db.execute(text("SELECT pg_advisory_xact_lock(999001)"))
-
-        query = select(func.max(ContainerInstance.ssh_port))
-        result = await self.db.execute(query)
-        max_port = result.scalar_one_or_none()
+        Lease an IP, SSH port, HTTP port and /24 subnet for a subscription.
 
-        if max_port is None:
-            return 2222
-        return max_port + 1
-
-    async def get_next_available_http_port(self) -> int:
-        """
-        Get next available HTTP port starting from 8100.
-        Uses database-level advisory lock to prevent race conditions.
-        """
-        from sqlalchemy import text
-
-        # Acquire PostgreSQL advisory lock (lock ID: 999003)
-        # Lock is automatically released at transaction end
-        await self.db.execute(text("SELECT pg_advisory_xact_lock(999003)"))
-
-        query = select(func.max(ContainerInstance.http_port))
-        result = await self.db.execute(query)
-        max_port = result.scalar_one_or_none()
-
-        if max_port is None:
-            return 8100
-        return max_port + 1
-
-    async def get_next_available_ip(self) -> str:
-        """
-        Get next available IP address from 172.20.0.0/16 range.
-        Uses database-level advisory lock to prevent race conditions during concurrent provisioning.
+        Rows are taken from the network resource pool with row-level locks
+        (no global lock); leases commit or roll back with this session.
 
         Returns:
-            IP address in format 172.20.X.Y
+            Dict with ip_address, ssh_port, http_port and subnet_octet
 
         Raises:
-            ValueError: If no IPs available in the range
+            ResourceExhaustedError: If a pool has no free value left
         """
-        from sqlalchemy import text
+        from app.modules.hosting.services.network_allocator import NetworkResourceAllocator
 
-        # Acquire PostgreSQL advisory lock (lock ID: 999002)
-        # This ensures only ONE provisioning process allocates IPs at a time
-        # Lock is automatically released when transaction commits/rolls back
-        await self.db.execute(text("SELECT pg_advisory_xact_lock(999002)"))
-
-        # Get all used IPs (now safe from race conditions due to lock)
-        query = select(ContainerInstance.ip_address)
-        result = await self.db.execute(query)
-        used_ips = set(result.scalars().all())
+        return await self.db.run_sync(
+            lambda session: NetworkResourceAllocator(session).allocate_for_subscription(subscription_id)
+        )
 
-        # Find next available IP
-        for third_octet in range(1, 256):
-            for fourth_octet in range(2, 255):
-                ip = f"172.20.{third_octet}.{fourth_octet}"
-                if ip not in used_ips:
-                    return ip
+    async def release_network_resources(self, subscription_id: str) -> int:
+        """Return a subscription's IP/ports/subnet to the pool (on termination)."""
+        from app.modules.hosting.services.network_allocator import NetworkResourceAllocator
 
-        raise ValueError("No available IPs in 172.20.0.0/16 range")
+        return await self.db.run_sync(
+            lambda session: NetworkResourceAllocator(session).release(subscription_id)
+        )
 
     async def create(self, container: ContainerInstance) -> ContainerInstance:
         """Create a new container instance."""
@@ -401,10 +360,11 @@ class ContainerMetricsRepository:
         self,
         subscription_id: str,
         hours: int = 24,
-        limit: int = 288  # 288 = 24h * 12 samples/hour (5min intervals)
+        limit: Optional[int] = None
     ) -> List[ContainerMetrics]:
-        """Get recent metrics for a subscription."""
+        """Get recent metrics for a subscription (default limit: 12 samples/hour, at least 288)."""
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        limit = limit or max(hours * 12, 288)  # 5min intervals
 
         query = select(ContainerMetrics).where(
             and_(
@@ -425,6 +385,49 @@ class ContainerMetricsRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_latest_metrics_by_container(
+        self,
+        container_ids: List[str],
+        since: datetime
+    ) -> Dict[str, ContainerMetrics]:
+        """
+        Get the latest metrics row recorded since `since` for each container
+        in one query.
+
+        Uses a ROW_NUMBER() window partitioned by container so the lookup is a
+        single round trip regardless of fleet size. The recorded_at bound
+        limits the scan to the recent partitions and keeps the window from
+        ranking each container's whole history; containers with no row in the
+        window are left out.
+        """
+        if not container_ids:
+            return {}
+
+        ranked = select(
+            ContainerMetrics.id,
+            func.row_number().over(
+                partition_by=ContainerMetrics.container_id,
+                order_by=desc(ContainerMetrics.recorded_at)
+            ).label("rn")
+        ).where(
+            and_(
+                ContainerMetrics.container_id.in_(container_ids),
+                ContainerMetrics.recorded_at >= since
+            )
+        ).subquery()
+
+        query = select(ContainerMetrics).join(
+            ranked, ContainerMetrics.id == ranked.c.id
+        ).where(
+            and_(
+                ranked.c.rn == 1,
+                ContainerMetrics.recorded_at >= since
+            )
+        )
+
+        result = await self.db.execute(query)
+        return {metrics.container_id: metrics for metrics in result.scalars().all()}
+
     async def create(self, metrics: ContainerMetrics) -> ContainerMetrics:
         """Create new metrics record."""
         self.db.add(metrics)
@@ -438,21 +441,45 @@ class ContainerMetricsRepository:
         await self.db.flush()
 
     async def delete_old_metrics(self, days: int = 30) -> int:
-        """Delete metrics older than specified days."""
-        cutoff_time = datetime.utcnow() - timedelta(days=days)
+        """
+        Delete metrics older than specified days.
 
-        query = select(ContainerMetrics).where(
-            ContainerMetrics.recorded_at < cutoff_time
+        Drops expired partitions when container_metrics is partitioned,
+        otherwise runs a single bulk DELETE.
+        """
+        from app.modules.hosting.services.metrics_partition_service import MetricsPartitionService
+
+        return await self.db.run_sync(
+            lambda session: MetricsPartitionService(session).drop_expired(retention_days=days)
         )
-        result = await self.db.execute(query)
-        old_metrics = result.scalars().all()
 
-        count = len(old_metrics)
-        for metric in old_metrics:
-            await self.db.delete(metric)
 
-        await self.db.flush()
-        return count
+class ContainerMetricsRollupRepository:
+    """Repository for hourly/daily downsampled container metrics."""
+
+    def __init__(self, db: AsyncSession):
+        """Initialize repository with database session."""
+        self.db = db
+
+    async def get_recent_rollups(
+        self,
+        subscription_id: str,
+        resolution: MetricsResolution,
+        hours: int = 24 * 30
+    ) -> List[ContainerMetricsRollup]:
+        """Get rollups for a subscription covering the last `hours`, newest first."""
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+
+        query = select(ContainerMetricsRollup).where(
+            and_(
+                ContainerMetricsRollup.subscription_id == subscription_id,
+                ContainerMetricsRollup.resolution == resolution.value,
+                ContainerMetricsRollup.bucket_start >= cutoff_time
+            )
+        ).order_by(desc(ContainerMetricsRollup.bucket_start))
+
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
 
 
 class SubscriptionTimelineRepository:
@@ -3,7 +3,7 @@ VPS Hosting Admin API routes.
 
 Admin-only endpoints for managing all VPS subscriptions.
 """
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -36,6 +36,12 @@ from app.modules.hosting.services import (
     ContainerMonitoringService,
     DockerManagementService
 )
+from app.modules.hosting.services.log_stream_broker import sse_log_stream
+from app.modules.hosting.services.progress_events import (
+    clear_progress_state,
+    get_progress_state,
+    progress_sse_stream,
+)
 from app.modules.hosting.schemas import (
     VPSSubscriptionResponse,
     VPSSubscriptionDetailResponse,
@@ -423,84 +429,17 @@ async def stream_subscription_logs_admin(
     docker_service = DockerManagementService(db)
     container_id = subscription.container.container_id
 
-    def event_stream():
-        import time
-
+    async def event_stream():
         # Always yield the open event first to ensure a response is returned
-        try:
-            yield "event: open\ndata: connected\n\n"
-        except GeneratorExit:
-            logger.info(f"Client disconnected during open event for container {container_id}")
-            raise
-
-        try:
-            if not docker_service.docker_available:
-                yield f"event: error\ndata: {json.dumps({'error': 'Docker not available'})}\n\n"
-                return
+        yield "event: open\ndata: connected\n\n"
 
-            last_activity = time.time()
-            keepalive_interval = 15  # Send keepalive every 15 seconds
-
-            # Use a non-blocking approach to iterate logs
-            log_iterator = docker_service.iter_container_logs(container_id, tail=tail)
-
-            while True:
-                try:
-                    # Try to get next log chunk with a timeout mechanism
-                    chunk = next(log_iterator)
-
-                    if chunk:
-                        last_activity = time.time()
-                        for line in chunk.splitlines():
-                            if line:
-                                try:
-                                    # Properly escape the line for SSE
-                                    escaped_line = line.replace('\r', '').strip()
-                                    if escaped_line:
-                                        yield f"data: {escaped_line}\n\n"
-                                except GeneratorExit:
-                                    logger.info(f"Client disconnected while streaming logs for container {container_id}")
-                                    raise
-
-                    # Send keepalive if no activity for a while
-                    if time.time() - last_activity > keepalive_interval:
-                        try:
-                            yield ": keepalive\n\n"
-                            last_activity = time.time()
-                        except GeneratorExit:
-                            logger.info(f"Client disconnected during keepalive for container {container_id}")
-                            raise
-
-                except StopIteration:
-                    # Logs stream ended - send close event and exit gracefully
-                    logger.info(f"Log stream ended for container {container_id}")
-                    try:
-                        yield "event: close\ndata: stream_ended\n\n"
-                    except GeneratorExit:
-                        pass
-                    break
-                except GeneratorExit:
-                    # Client disconnected - let it propagate for proper cleanup
-                    raise
-                except Exception as chunk_error:
-                    logger.error(f"Error processing log chunk for container {container_id}: {chunk_error}")
-                    # Continue streaming despite chunk errors
-                    continue
+        if not docker_service.docker_available:
+            yield f"event: error\ndata: {json.dumps({'error': 'Docker not available'})}\n\n"
+            return
 
-        except GeneratorExit:
-            # Client disconnected - let it propagate for proper cleanup
-            logger.info(f"Client disconnected, cleaning up log stream for container {container_id}")
-            raise
-        except Exception as e:
-            logger.error(f"Error streaming logs for container {container_id}: {e}", exc_info=True)
-            try:
-                payload = json.dumps({"error": str(e)})
-                yield f"event: error\ndata: {payload}\n\n"
-            except GeneratorExit:
-                raise
-            except Exception as final_error:
-                logger.error(f"Failed to send error event: {final_error}")
-                pass  # Ignore other errors when client has disconnected
+        # Viewers of the same container share one Docker log follower
+        async for event in sse_log_stream(container_id, tail=tail):
+            yield event
 
     return StreamingResponse(
         event_stream(),
@@ -524,7 +463,7 @@ async def stream_subscription_logs_admin(
 )
 async def get_subscription_stats_admin(
     subscription_id: str,
-    hours: int = Query(24, ge=1, le=168, description="Hours of history to retrieve"),
+    hours: int = Query(24, ge=1, le=8760, description="Hours of history to retrieve"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_permission(Permission.HOSTING_ADMIN)),
 ):
@@ -573,6 +512,7 @@ async def download_subscription_image_admin(
     subscription.image_download_updated_at = datetime.utcnow()
     await repo.update(subscription)
     await db.commit()
+    await clear_progress_state(subscription_id)
 
     from app.modules.hosting.tasks import download_vps_image_async
     task = download_vps_image_async.delay(str(subscription.id))
@@ -599,17 +539,71 @@ async def get_subscription_download_status_admin(
     if not subscription:
         raise NotFoundException(f"Subscription {subscription_id} not found")
 
+    return await _download_status(subscription_id, subscription)
+
+
+@router.get(
+    "/subscriptions/{subscription_id}/download-status/stream",
+    summary="Stream VPS OS Image Download Progress (Admin, SSE)",
+    description="""
+    Stream download progress using Server-Sent Events (SSE).
+
+    Sends a `snapshot` event with the current status, a `progress` event for
+    every update published by the download task, and `close` once the
+    download completed or failed.
+
+    **Permissions Required:** `hosting:admin`
+    """
+)
+async def stream_subscription_download_status_admin(
+    subscription_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_permission(Permission.HOSTING_ADMIN)),
+):
+    repo = VPSSubscriptionRepository(db)
+    subscription = await repo.get_by_id(subscription_id)
+    if not subscription:
+        raise NotFoundException(f"Subscription {subscription_id} not found")
+
+    initial_state = _download_state_from_row(subscription)
+
+    return StreamingResponse(
+        progress_sse_stream(subscription_id, initial_state),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def _download_state_from_row(subscription) -> Dict[str, Any]:
+    """Download progress as last checkpointed on the subscription row."""
     logs = getattr(subscription, "image_download_logs", None) or ""
-    # Return last 200 lines max to keep payload small
-    tail = "\n".join(logs.splitlines()[-200:]) if logs else ""
+    return {
+        "subscription_id": subscription.id,
+        "phase": "image_pull",
+        "status": getattr(subscription, "image_download_status", None),
+        "progress": int(getattr(subscription, "image_download_progress", 0) or 0),
+        "message": getattr(subscription, "status_reason", None),
+        # Return last 200 lines max to keep payload small
+        "logs": "\n".join(logs.splitlines()[-200:]) if logs else "",
+        "updated_at": getattr(subscription, "image_download_updated_at", None),
+    }
+
+
+async def _download_status(subscription_id: str, subscription) -> Dict[str, Any]:
+    # The published state is fresher than the row's checkpoints
+    state = await get_progress_state(subscription_id) or _download_state_from_row(subscription)
 
     return {
         "subscription_id": subscription_id,
         "status": subscription.status.value,
-        "download_status": getattr(subscription, "image_download_status", None),
-        "progress": int(getattr(subscription, "image_download_progress", 0) or 0),
-        "updated_at": getattr(subscription, "image_download_updated_at", None),
-        "logs": tail,
+        "download_status": state.get("status"),
+        "progress": int(state.get("progress") or 0),
+        "updated_at": state.get("updated_at"),
+        "logs": state.get("logs") or "",
         "os_distro_id": getattr(subscription, "os_distro_id", None),
         "os_docker_image": getattr(subscription, "os_docker_image", None),
     }
@@ -1239,6 +1233,46 @@ async def get_alerts(
     return [AlertSchema.model_validate(a) for a in all_alerts]
 
 
+@router.get(
+    "/monitoring/health",
+    summary="Get Fleet Container Health",
+    description="""
+    Retrieve the health check status of all running VPS containers.
+
+    Built from one Docker container list call; only unhealthy or starting containers
+    are inspected. The snapshot is cached for a few seconds and shared by all callers.
+
+    **Permissions Required:** `hosting:monitor`
+
+    **Query Parameters:**
+    - refresh: Ignore the cached snapshot
+
+    **Response:** Counts per health status, unhealthy containers and per-container health.
+    """
+)
+async def get_fleet_health(
+    refresh: bool = Query(False, description="Ignore the cached snapshot"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_permission(Permission.HOSTING_MONITOR))
+) -> Dict[str, Any]:
+    """
+    Get fleet-wide container health.
+
+    Args:
+        refresh: Force a new snapshot
+        db: Database session
+        current_user: Authenticated user (requires hosting:monitor permission)
+
+    Returns:
+        Fleet health snapshot
+
+    Raises:
+        403: If user lacks hosting:monitor permission
+    """
+    docker_service = DockerManagementService(db)
+    return await docker_service.check_all_container_health(force=refresh)
+
+
 # ============================================================================
 # Subscription Creation (Admin)
 # ============================================================================
@@ -14,9 +14,6 @@ import json
 import tempfile
 import os
 from pathlib import Path
-import asyncio
-import threading
-import queue
 
 from app.config.database import get_db
 from app.core.dependencies import get_current_user, require_permission
@@ -42,6 +39,8 @@ from app.modules.hosting.services import (
     ContainerMonitoringService,
     DockerManagementService
 )
+from app.modules.hosting.services.log_stream_broker import sse_log_stream
+from app.modules.hosting.services.terminal_bridge import TerminalSession
 from app.modules.hosting.schemas import (
     VPSPlanResponse,
     VPSSubscriptionResponse,
@@ -964,213 +963,31 @@ async def websocket_terminal(
             await websocket.close()
             return
         
-        # Get container and create exec instance
-        container = docker_service.client.containers.get(container_id)
-        logger.info(f"[Terminal WS] Container {container_id} retrieved successfully")
-
-        # Create interactive shell session (docker-py Container does not expose exec_create/exec_start)
-        # Use exec_run with socket=True to get a raw socket for bidirectional I/O.
-        logger.debug(f"[Terminal WS] Creating interactive bash session in container")
-        exec_result = container.exec_run(
-            cmd="/bin/bash -i",
-            tty=True,
-            stdin=True,
-            socket=True,
-            environment={"TERM": "xterm-256color"},
-            user="root",
-        )
-        exec_socket = getattr(exec_result, "output", exec_result)
-        logger.info(f"[Terminal WS] Interactive bash session created, exec_socket type: {type(exec_socket)}")
-        
-        # Send welcome message
-        await websocket.send_text(json.dumps({
-            "type": "output",
-            "data": "\r\n\x1b[32mConnected to VPS Terminal\x1b[0m\r\n"
-        }))
-        
-        # Queues for communication
-        input_queue = queue.Queue()
-        output_queue = asyncio.Queue()
-        stop_event = threading.Event()
-        loop = asyncio.get_running_loop()
-        
-        # Get the actual socket from the exec_socket object
-        docker_sock = exec_socket._sock if hasattr(exec_socket, "_sock") else exec_socket
-        logger.info(f"[Terminal WS] Docker socket acquired for subscription {subscription_id}, type: {type(docker_sock)}")
-
-        # Thread to read from Docker exec socket
-        def read_from_docker():
-            try:
-                logger.info(f"[Terminal WS] Read thread started for subscription {subscription_id}")
-                while not stop_event.is_set():
-                    try:
-                        # Read from socket (non-blocking with timeout)
-                        docker_sock.settimeout(0.1)
-                        chunk = docker_sock.recv(4096)
-                        if chunk == b"":
-                            logger.info(f"[Terminal WS] Socket closed (received empty chunk)")
-                            break  # socket closed
-                        if chunk:
-                            logger.info(f"[Terminal WS] Received from Docker: {len(chunk)} bytes")
-                            asyncio.run_coroutine_threadsafe(output_queue.put(chunk), loop)
-                    except Exception as e:
-                        # Timeout or other error - check if we should continue
-                        if stop_event.is_set():
-                            break
-                        if "timed out" not in str(e).lower():
-                            logger.debug(f"[Terminal WS] Socket read: {e}")
-                        continue
-            except Exception as e:
-                logger.error(f"[Terminal WS] Error reading from Docker: {e}", exc_info=True)
-            finally:
-                logger.debug(f"[Terminal WS] Read thread ending, signaling output queue")
-                asyncio.run_coroutine_threadsafe(output_queue.put(None), loop)  # Signal end
-        
-        # Thread to write to Docker exec socket
-        def write_to_docker():
-            import socket as socket_module
-            import time
+        # Interactive shell on a non-blocking exec socket driven by the event loop
+        session = TerminalSession(websocket, client=docker_service.client, container_id=container_id)
 
-            try:
-                logger.info(f"[Terminal WS] Write thread started for subscription {subscription_id}")
-                iteration = 0
-                while not stop_event.is_set():
-                    iteration += 1
-                    if iteration % 1000 == 0:  # Log every 1000 iterations to avoid spam
-                        logger.info(f"[Terminal WS] Write thread loop iteration {iteration}, queue size: {input_queue.qsize()}")
-                    try:
-                        # Get data from queue with timeout
-                        data = input_queue.get(timeout=0.1)
-                        if data is None:
-                            logger.info(f"[Terminal WS] Received None, exiting write thread")
-                            break
-                        logger.info(f"[Terminal WS] ✓ Got data from queue: {repr(data[:50])}, sending to Docker...")
-                        # Set a timeout for the send operation to prevent blocking indefinitely
-                        docker_sock.settimeout(5.0)
-                        docker_sock.sendall(data)
-                        logger.info(f"[Terminal WS] ✓ Data sent to Docker successfully")
-                    except queue.Empty:
-                        # Normal - queue is empty, continue loop
-                        continue
-                    except socket_module.timeout:
-                        logger.warning(f"[Terminal WS] Socket send timeout, continuing...")
-                        continue
-                    except Exception as e:
-                        if not stop_event.is_set():
-                            logger.error(f"[Terminal WS] Error writing to Docker: {e}", exc_info=True)
-                        break
-                logger.info(f"[Terminal WS] Write thread exiting after {iteration} iterations")
-            except Exception as e:
-                logger.error(f"[Terminal WS] Fatal error in write thread: {e}", exc_info=True)
-        
-        # Start threads
-        read_thread = threading.Thread(target=read_from_docker, daemon=True)
-        write_thread = threading.Thread(target=write_to_docker, daemon=True)
-        read_thread.start()
-        write_thread.start()
-        logger.info(f"[Terminal WS] Read and write threads started for subscription {subscription_id}")
-
-        # Give threads a moment to initialize
-        await asyncio.sleep(0.1)
-
-        # Trigger initial prompt/output (bash often won't print until it receives input)
-        # Send this AFTER threads are started so the read thread can capture the response
         try:
-            logger.debug(f"[Terminal WS] Sending initial newline to trigger bash prompt")
-            await asyncio.to_thread(input_queue.put, b"\n")
-            logger.debug(f"[Terminal WS] Initial newline queued for Docker")
-        except Exception as e:
-            logger.warning(f"[Terminal WS] Failed to queue initial newline: {e}")
-
-        # Handle output from Docker
-        async def handle_output():
-            logger.info(f"[Terminal WS] Output handler started for subscription {subscription_id}")
-            while True:
-                chunk = await output_queue.get()
-                if chunk is None:
-                    logger.info(f"[Terminal WS] Output handler received None, exiting")
-                    break
-                try:
-                    text = chunk.decode('utf-8', errors='replace')
-                    logger.info(f"[Terminal WS] Sending output to client: {len(text)} chars, first 50: {repr(text[:50])}")
-                    await websocket.send_text(json.dumps({
-                        "type": "output",
-                        "data": text
-                    }))
-                except Exception as e:
-                    logger.error(f"[Terminal WS] Error sending output: {e}", exc_info=True)
-                    break
-        
-        output_task = asyncio.create_task(handle_output())
+            await session.open()
+            logger.info(f"[Terminal WS] Session opened for subscription {subscription_id}")
 
-        # Handle WebSocket messages
-        logger.info(f"[Terminal WS] Starting message receive loop for subscription {subscription_id}")
-        try:
-            message_count = 0
-            while True:
-                logger.debug(f"[Terminal WS] Waiting for WebSocket message (received {message_count} so far)...")
-                try:
-                    # Try to receive any type of message
-                    raw_message = await websocket.receive()
-                    message_count += 1
-                    logger.info(f"[Terminal WS] ✓ Received message #{message_count}, type: {raw_message.get('type')}")
-
-                    # Extract text from message
-                    if raw_message.get("type") == "websocket.receive":
-                        message = raw_message.get("text") or raw_message.get("bytes", b"").decode('utf-8')
-                        logger.info(f"[Terminal WS] Message content: {message[:100]}")
-
-                        # Process the message
-                        try:
-                            data = json.loads(message)
-                            logger.info(f"[Terminal WS] Parsed JSON, message type: {data.get('type')}")
-
-                            if data.get("type") == "input":
-                                # Send input to Docker
-                                input_data = data.get("data", "").encode('utf-8')
-                                logger.info(f"[Terminal WS] Queuing input data: {repr(input_data[:50])}")
-                                await asyncio.to_thread(input_queue.put, input_data)
-                                logger.info(f"[Terminal WS] Input data queued successfully")
-                            elif data.get("type") == "resize":
-                                # Handle terminal resize
-                                logger.info(f"[Terminal WS] Received resize request: cols={data.get('cols')}, rows={data.get('rows')}")
-                                # TODO: Implement PTY resize
-                        except json.JSONDecodeError as json_err:
-                            # If not JSON, treat as raw input
-                            logger.warning(f"[Terminal WS] JSON decode error: {json_err}, treating as raw input")
-                            await asyncio.to_thread(input_queue.put, message.encode('utf-8'))
-                        except Exception as process_err:
-                            logger.error(f"[Terminal WS] Error processing message: {process_err}", exc_info=True)
-
-                    elif raw_message.get("type") == "websocket.disconnect":
-                        logger.info(f"[Terminal WS] Received disconnect message")
-                        break
-                    else:
-                        logger.warning(f"[Terminal WS] Unknown message type: {raw_message}")
-                        continue
-
-                except Exception as recv_err:
-                    logger.error(f"[Terminal WS] Error in receive(): {recv_err}", exc_info=True)
-                    break
-                    
+            # Send welcome message
+            await websocket.send_text(json.dumps({
+                "type": "output",
+                "data": "\r\n\x1b[32mConnected to VPS Terminal\x1b[0m\r\n"
+            }))
+
+            # Trigger initial prompt (bash often won't print until it receives input)
+            await session.send_input(b"\n")
+
+            await session.run()
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected for subscription {subscription_id}")
         except Exception as e:
             logger.error(f"WebSocket error: {e}", exc_info=True)
         finally:
-            # Cleanup
-            stop_event.set()
-            await asyncio.to_thread(input_queue.put, None)
-            output_task.cancel()
-            try:
-                await output_task
-            except asyncio.CancelledError:
-                pass
-            try:
-                docker_sock.close()
-            except Exception:
-                pass
-            
+            # run() closes the exec socket; this covers failures before it started
+            await session.close()
+            logger.info(f"[Terminal WS] Session closed for subscription {subscription_id}")
             try:
                 await websocket.close()
             except:
@@ -1627,19 +1444,20 @@ async def run_docker_compose_stream(
     
     Returns current resource usage (CPU, memory, storage, network) directly from Docker,
     plus historical metrics from the database for graphing. Historical data can be
-    retrieved for up to 168 hours (7 days).
+    retrieved for up to 8760 hours (365 days). Windows up to 48 hours return raw
+    5-minute samples; longer windows return hourly or daily rollups.
     
     **Permissions Required:** `hosting:view`
     
     **Query Parameters:**
-    - hours: Number of hours of history to retrieve (default: 24, range: 1-168)
+    - hours: Number of hours of history to retrieve (default: 24, range: 1-8760)
     
     **Response:** Object containing current stats and historical metrics array.
     """
 )
 async def get_container_stats(
     subscription_id: str,
-    hours: int = Query(24, ge=1, le=168, description="Hours of history to retrieve"),
+    hours: int = Query(24, ge=1, le=8760, description="Hours of history to retrieve"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_permission(Permission.HOSTING_VIEW))
 ):
@@ -1648,7 +1466,7 @@ async def get_container_stats(
     
     Args:
         subscription_id: Unique identifier of the subscription
-        hours: Number of hours of historical data (1-168)
+        hours: Number of hours of historical data (1-8760)
         db: Database session
         current_user: Authenticated user (requires hosting:view permission)
     
@@ -1782,85 +1600,17 @@ async def stream_container_logs(
     docker_service = DockerManagementService(db)
     container_id = subscription.container.container_id
 
-    def event_stream():
-        import time
-
+    async def event_stream():
         # Always yield the open event first to ensure a response is returned
-        try:
-            # Initial event helps the client know the stream is connected
-            yield "event: open\ndata: connected\n\n"
-        except GeneratorExit:
-            logger.info(f"Client disconnected during open event for container {container_id}")
-            raise
-
-        try:
-            if not docker_service.docker_available:
-                yield f"event: error\ndata: {json.dumps({'error': 'Docker not available'})}\n\n"
-                return
-
-            last_activity = time.time()
-            keepalive_interval = 15  # Send keepalive every 15 seconds
+        yield "event: open\ndata: connected\n\n"
 
-            # Use a non-blocking approach to iterate logs
-            log_iterator = docker_service.iter_container_logs(container_id, tail=tail)
-
-            while True:
-                try:
-                    # Try to get next log chunk with a timeout mechanism
-                    chunk = next(log_iterator)
-
-                    if chunk:
-                        last_activity = time.time()
-                        for line in chunk.splitlines():
-                            if line:
-                                try:
-                                    # Properly escape the line for SSE
-                                    escaped_line = line.replace('\r', '').strip()
-                                    if escaped_line:
-                                        yield f"data: {escaped_line}\n\n"
-                                except GeneratorExit:
-                                    logger.info(f"Client disconnected while streaming logs for container {container_id}")
-                                    raise
-
-                    # Send keepalive if no activity for a while
-                    if time.time() - last_activity > keepalive_interval:
-                        try:
-                            yield ": keepalive\n\n"
-                            last_activity = time.time()
-                        except GeneratorExit:
-                            logger.info(f"Client disconnected during keepalive for container {container_id}")
-                            raise
-
-                except StopIteration:
-                    # Logs stream ended - send close event and exit gracefully
-                    logger.info(f"Log stream ended for container {container_id}")
-                    try:
-                        yield "event: close\ndata: stream_ended\n\n"
-                    except GeneratorExit:
-                        pass
-                    break
-                except GeneratorExit:
-                    # Client disconnected - let it propagate for proper cleanup
-                    raise
-                except Exception as chunk_error:
-                    logger.error(f"Error processing log chunk for container {container_id}: {chunk_error}")
-                    # Continue streaming despite chunk errors
-                    continue
+        if not docker_service.docker_available:
+            yield f"event: error\ndata: {json.dumps({'error': 'Docker not available'})}\n\n"
+            return
 
-        except GeneratorExit:
-            # Client disconnected - let it propagate for proper cleanup
-            logger.info(f"Client disconnected, cleaning up log stream for container {container_id}")
-            raise
-        except Exception as e:
-            logger.error(f"Error streaming logs for container {container_id}: {e}", exc_info=True)
-            try:
-                payload = json.dumps({"error": str(e)})
-                yield f"event: error\ndata: {payload}\n\n"
-            except GeneratorExit:
-                raise
-            except Exception as final_error:
-                logger.error(f"Failed to send error event: {final_error}")
-                pass  # Ignore other errors when client has disconnected
+        # Viewers of the same container share one Docker log follower
+        async for event in sse_log_stream(container_id, tail=tail):
+            yield event
 
     return StreamingResponse(
         event_stream(),
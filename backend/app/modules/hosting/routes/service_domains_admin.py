@@ -19,6 +19,7 @@ from app.modules.hosting.schemas import (
 )
 from app.modules.hosting.services.service_domain_service import ServiceDomainService
 from app.modules.hosting.services.nginx_proxy_service import NginxProxyService
+from app.modules.hosting.services.nginx_reload_coordinator import NginxReloadCoordinator
 from app.modules.hosting.repository import VPSServiceDomainRepository
 
 logger = logging.getLogger(__name__)
@@ -200,16 +201,19 @@ async def get_nginx_status(
     - Configuration validity
     - List of configured domains
     - Total domain count
+    - Reload counters and latency (this API worker)
     """
     nginx_service = NginxProxyService()
 
     is_healthy = await nginx_service.check_nginx_health()
     configured_domains = await nginx_service.list_configured_domains()
+    reload_stats = NginxReloadCoordinator.snapshot().get(nginx_service.nginx_container_name)
 
     return {
         "healthy": is_healthy,
         "configured_domains_count": len(configured_domains),
-        "configured_domains": configured_domains
+        "configured_domains": configured_domains,
+        "reload_stats": reload_stats
     }
 
 
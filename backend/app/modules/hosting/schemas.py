@@ -200,6 +200,13 @@ class ContainerMetricsResponse(BaseModel):
     process_count: Optional[int] = None
     recorded_at: datetime
 
+    # Set for hourly/daily rollups (cpu/memory fields above are bucket averages)
+    resolution: str = "raw"
+    cpu_usage_percent_max: Optional[float] = None
+    cpu_usage_percent_p95: Optional[float] = None
+    memory_usage_percent_max: Optional[float] = None
+    memory_usage_percent_p95: Optional[float] = None
+
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -0,0 +1,330 @@
+"""
+VPS Backup Engine
+
+Streams a volume into a compressed tar archive and straight into its
+destination (an S3 multipart upload or a local file) without staging the
+archive on disk first. Archives are built by `run_backup_job`, a plain
+function over a picklable `BackupJob`, so many volumes can be backed up in
+parallel in a process pool. A job with `timeout_seconds` enforces its own
+deadline: once it passes, the archive is abandoned and the multipart upload
+(or partial local file) is aborted.
+
+Codecs:
+- zstd: `zstandard` module if installed, otherwise the `zstd` CLI (multithreaded)
+- pigz: the `pigz` CLI (multithreaded gzip)
+- gzip: in-process zlib (single threaded, always available)
+"""
+import os
+import time
+import gzip
+import shutil
+import logging
+import tarfile
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, the zstd CLI is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for all but the last part
+
+CODEC_EXTENSIONS = {
+    "zstd": ".tar.zst",
+    "pigz": ".tar.gz",
+    "gzip": ".tar.gz",
+}
+
+
+def resolve_codec(requested: str) -> str:
+    """Return the requested codec if it can run here, otherwise fall back to gzip."""
+    requested = (requested or "gzip").lower()
+    if requested == "zstd" and (zstandard is not None or shutil.which("zstd")):
+        return "zstd"
+    if requested == "pigz" and shutil.which("pigz"):
+        return "pigz"
+    if requested not in ("gzip", "zstd", "pigz"):
+        logger.warning(f"Unknown backup codec '{requested}', using gzip")
+    elif requested != "gzip":
+        logger.warning(f"Backup codec '{requested}' is not available, using gzip")
+    return "gzip"
+
+
+def codec_for_filename(filename: str) -> str:
+    """Codec needed to read an existing archive."""
+    return "zstd" if filename.endswith(".zst") else "gzip"
+
+
+@dataclass
+class BackupJob:
+    """Everything a worker process needs to back up one volume"""
+    source_path: str
+    arcname: str
+    filename: str
+    codec: str = "gzip"
+    compression_level: int = 3
+    compression_threads: int = 1
+    part_size: int = 16 * 1024 * 1024
+    # Destination: S3 when s3_bucket/s3_key are set, else local_dir/filename
+    local_dir: Optional[str] = None
+    s3_config: Optional[Dict[str, Any]] = None  # boto3.client("s3", **s3_config)
+    s3_bucket: Optional[str] = None
+    s3_key: Optional[str] = None
+    s3_extra_args: Dict[str, Any] = field(default_factory=dict)
+    # Abort the backup if it is still running this many seconds after it starts
+    timeout_seconds: Optional[float] = None
+
+
+class S3MultipartWriter:
+    """Write-only file object that uploads what it receives as S3 multipart parts."""
+
+    def __init__(self, client, bucket: str, key: str, part_size: int, extra_args: Optional[Dict[str, Any]] = None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._parts = []
+        upload = client.create_multipart_upload(Bucket=bucket, Key=key, **(extra_args or {}))
+        self.upload_id = upload["UploadId"]
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=body
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+    def close(self) -> None:
+        """Upload the final (possibly short) part and complete the upload."""
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self._parts}
+        )
+
+    def abort(self) -> None:
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload of {self.key}: {e}")
+
+
+class LocalFileWriter:
+    """Write to `<path>.partial` and rename into place on close."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes_written = 0
+        self._partial = f"{path}.partial"
+        self._file = open(self._partial, "wb")
+
+    def write(self, data) -> int:
+        self.bytes_written += len(data)
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._partial, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self._partial)
+        except FileNotFoundError:
+            pass
+
+
+class _Unclosable:
+    """Keeps compressors and tarfile from closing the destination sink."""
+
+    def __init__(self, target, check: Optional[Callable[[], None]] = None):
+        self._target = target
+        self._check = check
+
+    def write(self, data) -> int:
+        if self._check:
+            self._check()
+        return self._target.write(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _pipe_through(command: list, produce: Callable[[BinaryIO], None], consume: Callable[[bytes], Any]) -> None:
+    """Run `produce` into a subprocess's stdin and hand its stdout to `consume`."""
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    errors = []
+
+    def feed() -> None:
+        try:
+            produce(proc.stdin)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="backup-tar", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            chunk = proc.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            consume(chunk)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        feeder.join()
+        returncode = proc.wait()
+
+    if errors:
+        raise errors[0]
+    if returncode != 0:
+        stderr = proc.stderr.read().decode(errors="replace").strip()
+        raise RuntimeError(f"{command[0]} exited with {returncode}: {stderr}")
+
+
+def write_archive(job: BackupJob, sink, check: Optional[Callable[[], None]] = None) -> int:
+    """
+    Tar and compress `job.source_path` into `sink` in one streaming pass.
+
+    Args:
+        job: Backup job description
+        sink: Destination writer
+        check: Called before every file and every write to the sink; raising
+            from it stops the archive
+
+    Returns:
+        Uncompressed size of the archived files in bytes
+    """
+    source_bytes = 0
+    check = check or (lambda: None)
+    sink = _Unclosable(sink, check)
+
+    def count(info: tarfile.TarInfo) -> tarfile.TarInfo:
+        nonlocal source_bytes
+        check()
+        if info.isfile():
+            source_bytes += info.size
+        return info
+
+    def write_tar(fileobj) -> None:
+        with tarfile.open(fileobj=fileobj, mode="w|", bufsize=CHUNK_SIZE) as tar:
+            tar.add(job.source_path, arcname=job.arcname, filter=count)
+
+    threads = max(1, job.compression_threads)
+    if job.codec == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=job.compression_level, threads=threads)
+        with compressor.stream_writer(sink) as writer:
+            write_tar(writer)
+    elif job.codec == "zstd":
+        _pipe_through(["zstd", "-q", "-c", f"-{job.compression_level}", f"-T{threads}"], write_tar, sink.write)
+    elif job.codec == "pigz":
+        _pipe_through(["pigz", "-c", f"-{job.compression_level}", "-p", str(threads)], write_tar, sink.write)
+    else:
+        with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=job.compression_level) as writer:
+            write_tar(writer)
+    return source_bytes
+
+
+def run_backup_job(job: BackupJob, s3_client=None) -> Dict[str, Any]:
+    """
+    Back up one volume. Runs in a worker process.
+
+    Args:
+        job: Backup job description
+        s3_client: Client to use instead of building one from `job.s3_config`
+
+    Returns:
+        Dict with bytes_written, source_bytes, duration_seconds and destination
+
+    Raises:
+        TimeoutError: The job ran past `job.timeout_seconds`; the upload is aborted
+    """
+    started = time.monotonic()
+
+    def check_deadline() -> None:
+        if job.timeout_seconds and time.monotonic() - started > job.timeout_seconds:
+            raise TimeoutError(f"Backup {job.filename} did not finish within {job.timeout_seconds:.0f}s")
+
+    if job.s3_bucket and job.s3_key:
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client("s3", **(job.s3_config or {}))
+        sink = S3MultipartWriter(s3_client, job.s3_bucket, job.s3_key, job.part_size, job.s3_extra_args)
+        backup_path = None
+    else:
+        os.makedirs(job.local_dir, exist_ok=True)
+        backup_path = os.path.join(job.local_dir, job.filename)
+        sink = LocalFileWriter(backup_path)
+
+    try:
+        source_bytes = write_archive(job, sink, check_deadline)
+        sink.close()
+    except BaseException:
+        sink.abort()
+        raise
+
+    return {
+        "filename": job.filename,
+        "codec": job.codec,
+        "backup_path": backup_path,
+        "s3_key": job.s3_key if backup_path is None else None,
+        "bytes_written": sink.bytes_written,
+        "source_bytes": source_bytes,
+        "duration_seconds": time.monotonic() - started,
+    }
+
+
+def extract_archive(archive_path: str, destination: str) -> None:
+    """Extract a backup archive written by `write_archive` (any codec)."""
+    codec = codec_for_filename(archive_path)
+    if codec == "zstd" and zstandard is not None:
+        with open(archive_path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                tar.extractall(destination)
+    elif codec == "zstd":
+        with open(archive_path, "rb") as raw:
+            proc = subprocess.Popen(["zstd", "-q", "-d", "-c"], stdin=raw, stdout=subprocess.PIPE)
+            try:
+                with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                    tar.extractall(destination)
+            finally:
+                proc.stdout.close()
+                if proc.wait() != 0:
+                    raise RuntimeError(f"zstd failed to decompress {archive_path}")
+    else:
+        with tarfile.open(archive_path, "r:gz") as tar:
+            tar.extractall(destination)
@@ -2,20 +2,32 @@
 VPS Hosting - Backup and Disaster Recovery Service
 
 Provides automated backups of VPS volumes to S3-compatible storage.
+Archives are built by the backup engine in a pool of worker processes and
+streamed straight into S3 multipart uploads.
 """
 
 import os
-import tarfile
+import asyncio
 import logging
 import shutil
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from app.modules.hosting.models import ContainerInstance, VPSSubscription, ContainerStatus, SubscriptionStatus
+from app.modules.hosting.services.backup_engine import (
+    CODEC_EXTENSIONS,
+    BackupJob,
+    extract_archive,
+    resolve_codec,
+    run_backup_job,
+)
 from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -44,6 +56,9 @@ class VPSBackupService:
     RETENTION_WEEKLY = 4   # Keep 4 weekly backups
     RETENTION_MONTHLY = 12 # Keep 12 monthly backups
 
+    # Worker pool shared by all service instances in this process
+    _pool: Optional[Executor] = None
+
     def __init__(self, db: AsyncSession):
         """Initialize backup service."""
         self.db = db
@@ -53,6 +68,7 @@ class VPSBackupService:
 
         # Initialize S3 client (boto3)
         self.s3_client = None
+        self.s3_config = None
         self.s3_enabled = False
 
         try:
@@ -66,12 +82,13 @@ class VPSBackupService:
             self.s3_bucket = os.getenv("VPS_BACKUP_S3_BUCKET", "vps-backups")
 
             if s3_endpoint and s3_access_key and s3_secret_key:
-                self.s3_client = boto3.client(
-                    's3',
-                    endpoint_url=s3_endpoint,
-                    aws_access_key_id=s3_access_key,
-                    aws_secret_access_key=s3_secret_key
-                )
+                # Worker processes build their own client from this config
+                self.s3_config = {
+                    "endpoint_url": s3_endpoint,
+                    "aws_access_key_id": s3_access_key,
+                    "aws_secret_access_key": s3_secret_key
+                }
+                self.s3_client = boto3.client('s3', **self.s3_config)
                 self.s3_enabled = True
                 logger.info(f"S3 backup enabled to bucket: {self.s3_bucket}")
             else:
@@ -82,6 +99,63 @@ class VPSBackupService:
         except Exception as e:
             logger.error(f"Failed to initialize S3 client: {e}")
 
+    @classmethod
+    def _get_pool(cls) -> Executor:
+        """
+        Worker pool that archives volumes in parallel.
+
+        Processes are used so compression never competes with the event loop
+        for the GIL. Daemonic processes (Celery prefork workers) cannot have
+        children, so there the pool falls back to threads; zlib, zstd and the
+        pigz/zstd CLIs all compress outside the GIL.
+        """
+        if cls._pool is None:
+            workers = max(1, settings.VPS_BACKUP_PARALLELISM)
+            if multiprocessing.current_process().daemon:
+                cls._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vps-backup")
+            else:
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return cls._pool
+
+    def _build_job(self, container: ContainerInstance, backup_type: str, timestamp: str) -> BackupJob:
+        """Describe the backup of one container for a worker process."""
+        codec = resolve_codec(settings.VPS_BACKUP_CODEC)
+        backup_filename = f"{container.container_name}-{backup_type}-{timestamp}{CODEC_EXTENSIONS[codec]}"
+
+        job = BackupJob(
+            source_path=container.data_volume_path,
+            arcname=f"vps-{container.id}",
+            filename=backup_filename,
+            codec=codec,
+            compression_level=settings.VPS_BACKUP_COMPRESSION_LEVEL,
+            compression_threads=settings.VPS_BACKUP_COMPRESSION_THREADS,
+            part_size=settings.VPS_BACKUP_PART_SIZE_MB * 1024 * 1024,
+            local_dir=self.BACKUP_DIR,
+            timeout_seconds=self.BACKUP_TIMEOUT_MINUTES * 60,
+        )
+
+        if self.s3_enabled:
+            customer_id = str(container.subscription.customer_id)
+            job.s3_config = self.s3_config
+            job.s3_bucket = self.s3_bucket
+            # S3 key: {customer_id}/{container_id}/{backup_filename}
+            job.s3_key = f"{customer_id}/{container.id}/{backup_filename}"
+            job.s3_extra_args = {
+                'StorageClass': 'STANDARD_IA',  # Infrequent access (cheaper)
+                'ServerSideEncryption': 'AES256',
+                'Metadata': {
+                    'container-id': str(container.id),
+                    'subscription-id': str(container.subscription_id),
+                    'customer-id': customer_id,
+                    'backup-type': backup_type,
+                    'timestamp': timestamp
+                }
+            }
+        return job
+
     async def backup_container(
         self,
         container: ContainerInstance,
@@ -90,6 +164,9 @@ class VPSBackupService:
         """
         Create backup of a single container's data volume.
 
+        The volume is tarred, compressed and uploaded in one streaming pass in
+        the worker pool; nothing is staged on local disk when S3 is enabled.
+
         Args:
             container: ContainerInstance to backup
             backup_type: Type of backup (daily, weekly, monthly, manual)
@@ -105,54 +182,36 @@ class VPSBackupService:
             if not os.path.exists(volume_path):
                 raise FileNotFoundError(f"Volume path does not exist: {volume_path}")
 
-            # Check volume size
-            volume_size_gb = self._get_directory_size(volume_path) / (1024 ** 3)
-            if volume_size_gb > self.MAX_BACKUP_SIZE_GB:
-                logger.warning(f"Volume size ({volume_size_gb:.2f} GB) exceeds limit ({self.MAX_BACKUP_SIZE_GB} GB)")
-                # Continue anyway but log warning
-
-            # Generate backup filename
             timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-            backup_filename = f"{container.container_name}-{backup_type}-{timestamp}.tar.gz"
-            backup_path = os.path.join(self.BACKUP_DIR, backup_filename)
+            job = self._build_job(container, backup_type, timestamp)
 
-            # Create compressed tarball
-            logger.info(f"Creating backup: {backup_filename}")
-            with tarfile.open(backup_path, "w:gz") as tar:
-                tar.add(volume_path, arcname=f"vps-{container.id}")
+            # The job enforces BACKUP_TIMEOUT_MINUTES itself so that a timed out
+            # backup also stops uploading and aborts its multipart upload
+            logger.info(f"Creating backup: {job.filename} ({job.codec})")
+            loop = asyncio.get_running_loop()
+            outcome = await loop.run_in_executor(self._get_pool(), run_backup_job, job)
 
-            # Get backup size
-            backup_size = os.path.getsize(backup_path)
-            backup_size_mb = backup_size / (1024 * 1024)
-
-            # Upload to S3 if enabled
-            s3_key = None
-            if self.s3_enabled:
-                s3_key = await self._upload_to_s3(
-                    backup_path,
-                    container,
-                    backup_type,
-                    timestamp
-                )
+            # Volume size is counted while archiving instead of walking the volume first
+            volume_size_gb = outcome["source_bytes"] / (1024 ** 3)
+            if volume_size_gb > self.MAX_BACKUP_SIZE_GB:
+                logger.warning(f"Volume size ({volume_size_gb:.2f} GB) exceeds limit ({self.MAX_BACKUP_SIZE_GB} GB)")
 
-            # Calculate duration
+            backup_size_mb = outcome["bytes_written"] / (1024 * 1024)
             duration = (datetime.utcnow() - start_time).total_seconds()
 
-            # Cleanup local file after upload (if S3 enabled)
-            if self.s3_enabled and s3_key:
-                os.remove(backup_path)
-                backup_path = None  # Mark as uploaded to S3
-
+            if outcome["s3_key"]:
+                logger.info(f"Uploaded backup to S3: s3://{self.s3_bucket}/{outcome['s3_key']}")
             logger.info(
-                f"Backup completed: {backup_filename} "
+                f"Backup completed: {job.filename} "
                 f"({backup_size_mb:.2f} MB in {duration:.1f}s)"
             )
 
             return {
                 "success": True,
-                "backup_filename": backup_filename,
-                "backup_path": backup_path,  # None if uploaded to S3
-                "s3_key": s3_key,
+                "backup_filename": job.filename,
+                "backup_path": outcome["backup_path"],  # None if uploaded to S3
+                "s3_key": outcome["s3_key"],
+                "codec": job.codec,
                 "backup_size_mb": backup_size_mb,
                 "volume_size_gb": volume_size_gb,
                 "duration_seconds": duration,
@@ -161,10 +220,10 @@ class VPSBackupService:
             }
 
         except Exception as e:
-            logger.error(f"Backup failed for container {container.id}: {e}")
+            logger.error(f"Backup failed for container {container.id}: {e!r}")
             return {
                 "success": False,
-                "error": str(e),
+                "error": str(e) or repr(e),
                 "container_id": str(container.id),
                 "duration_seconds": (datetime.utcnow() - start_time).total_seconds()
             }
@@ -177,6 +236,9 @@ class VPSBackupService:
         """
         Backup all VPS containers matching filter.
 
+        All backups are submitted at once; the worker pool runs
+        VPS_BACKUP_PARALLELISM of them concurrently.
+
         Args:
             status_filter: List of container statuses to backup (default: RUNNING, STOPPED)
             backup_type: Type of backup (daily, weekly, monthly)
@@ -187,31 +249,34 @@ class VPSBackupService:
         if status_filter is None:
             status_filter = [ContainerStatus.RUNNING, ContainerStatus.STOPPED]
 
-        # Get containers to backup
+        # Get containers to backup (subscription is needed for the S3 key)
         query = select(ContainerInstance).join(VPSSubscription).where(
             ContainerInstance.status.in_(status_filter),
             VPSSubscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.SUSPENDED])
-        )
+        ).options(selectinload(ContainerInstance.subscription))
 
         result = await self.db.execute(query)
         containers = result.scalars().all()
 
         logger.info(f"Starting {backup_type} backup of {len(containers)} containers")
+        start_time = datetime.utcnow()
 
-        # Backup each container
         results = {
             "total": len(containers),
             "successful": 0,
             "failed": 0,
             "total_size_mb": 0,
             "total_duration_seconds": 0,
+            "wall_clock_seconds": 0,
             "backups": [],
             "errors": []
         }
 
-        for container in containers:
-            backup_result = await self.backup_container(container, backup_type)
+        backup_results = await asyncio.gather(
+            *(self.backup_container(container, backup_type) for container in containers)
+        )
 
+        for container, backup_result in zip(containers, backup_results):
             if backup_result.get("success"):
                 results["successful"] += 1
                 results["total_size_mb"] += backup_result.get("backup_size_mb", 0)
@@ -232,10 +297,12 @@ class VPSBackupService:
 
             results["total_duration_seconds"] += backup_result.get("duration_seconds", 0)
 
+        results["wall_clock_seconds"] = (datetime.utcnow() - start_time).total_seconds()
+
         logger.info(
             f"Backup completed: {results['successful']}/{results['total']} successful, "
             f"total size: {results['total_size_mb']:.2f} MB, "
-            f"duration: {results['total_duration_seconds']:.1f}s"
+            f"duration: {results['wall_clock_seconds']:.1f}s"
         )
 
         return results
@@ -291,9 +358,8 @@ class VPSBackupService:
                 shutil.rmtree(volume_path)
             os.makedirs(volume_path, exist_ok=True)
 
-            # Extract backup
-            with tarfile.open(backup_path, "r:gz") as tar:
-                tar.extractall(volume_path)
+            # Extract backup (codec is picked from the file extension)
+            await asyncio.to_thread(extract_archive, backup_path, volume_path)
 
             # Restart container
             await docker_service.start_container(container.container_id)
@@ -336,22 +402,15 @@ class VPSBackupService:
                 logger.info("S3 backup cleanup - using bucket lifecycle policy")
             else:
                 # Cleanup local backups
-                backup_files = list(Path(self.BACKUP_DIR).glob("*.tar.gz"))
+                backup_files = self._list_local_backups("*")
 
                 # Group by container and type
                 backups_by_container = {}
                 for backup_file in backup_files:
-                    # Parse filename: {container_name}-{type}-{timestamp}.tar.gz
-                    parts = backup_file.stem.split("-")
-                    if len(parts) >= 3:
-                        container_name = parts[0]
-                        backup_type = parts[-2]
-                        timestamp = parts[-1]
-
-                        if container_name not in backups_by_container:
-                            backups_by_container[container_name] = {"daily": [], "weekly": [], "monthly": []}
-
-                        backups_by_container[container_name][backup_type].append(backup_file)
+                    parsed = self._parse_backup_filename(backup_file.name)
+                    if parsed:
+                        container_name, backup_type = parsed
+                        backups_by_container.setdefault(container_name, {}).setdefault(backup_type, []).append(backup_file)
 
                 # Apply retention policy
                 for container_name, backups in backups_by_container.items():
@@ -397,45 +456,27 @@ class VPSBackupService:
 
     # Helper methods
 
-    async def _upload_to_s3(
-        self,
-        backup_path: str,
-        container: ContainerInstance,
-        backup_type: str,
-        timestamp: str
-    ) -> Optional[str]:
-        """Upload backup to S3."""
-        if not self.s3_enabled:
-            return None
+    def _list_local_backups(self, name_pattern: str) -> List[Path]:
+        """Local archives matching `name_pattern` for every codec extension."""
+        files = set()
+        for extension in set(CODEC_EXTENSIONS.values()):
+            files.update(Path(self.BACKUP_DIR).glob(f"{name_pattern}{extension}"))
+        return list(files)
 
-        try:
-            # S3 key: {customer_id}/{container_id}/{timestamp}-{type}.tar.gz
-            s3_key = f"{container.subscription.customer_id}/{container.id}/{timestamp}-{backup_type}.tar.gz"
-
-            # Upload with server-side encryption
-            self.s3_client.upload_file(
-                backup_path,
-                self.s3_bucket,
-                s3_key,
-                ExtraArgs={
-                    'StorageClass': 'STANDARD_IA',  # Infrequent access (cheaper)
-                    'ServerSideEncryption': 'AES256',
-                    'Metadata': {
-                        'container-id': str(container.id),
-                        'subscription-id': str(container.subscription_id),
-                        'customer-id': str(container.subscription.customer_id),
-                        'backup-type': backup_type,
-                        'timestamp': timestamp
-                    }
-                }
-            )
-
-            logger.info(f"Uploaded backup to S3: s3://{self.s3_bucket}/{s3_key}")
-            return s3_key
+    @staticmethod
+    def _parse_backup_filename(filename: str) -> Optional[Tuple[str, str]]:
+        """
+        Split `{container_name}-{type}-{YYYYmmdd}-{HHMMSS}.tar.{gz,zst}`.
 
-        except Exception as e:
-            logger.error(f"S3 upload failed: {e}")
-            return None
+        Returns:
+            (container_name, backup_type) or None if the name doesn't match
+        """
+        for extension in set(CODEC_EXTENSIONS.values()):
+            if filename.endswith(extension):
+                parts = filename[:-len(extension)].rsplit("-", 3)
+                if len(parts) == 4:
+                    return parts[0], parts[1]
+        return None
 
     async def _download_from_s3(self, s3_key: str) -> Optional[str]:
         """Download backup from S3."""
@@ -470,19 +511,9 @@ class VPSBackupService:
                 logger.error(f"Failed to list S3 backups: {e}")
         else:
             # Find latest local backup
-            backup_files = list(Path(self.BACKUP_DIR).glob(f"{container.container_name}-*.tar.gz"))
+            backup_files = self._list_local_backups(f"{container.container_name}-*")
             if backup_files:
                 latest = max(backup_files, key=lambda f: f.stat().st_mtime)
                 return str(latest)
 
         return None
-
-    def _get_directory_size(self, path: str) -> int:
-        """Get total size of directory in bytes."""
-        total = 0
-        for entry in os.scandir(path):
-            if entry.is_file(follow_symlinks=False):
-                total += entry.stat().st_size
-            elif entry.is_dir(follow_symlinks=False):
-                total += self._get_directory_size(entry.path)
-        return total
@@ -0,0 +1,180 @@
+"""
+Docker-Ready VPS Base Images
+
+Provisioning used to install Docker Engine, docker-compose, openssh-server
+and nginx with apt inside every new VPS container. That costs minutes per
+VPS and fails whenever the mirrors do. Instead, each OS image gets a
+docker-ready derivative that is built once through DockerImageBuildService
+and tagged by a hash of its recipe (the generated Dockerfile, which includes
+the base image):
+
+    cloudmanager/docker-ready:ubuntu-22.04-3f9c0a1b2d4e
+
+Provisioning uses the derivative when the Docker host has it. On a cache miss
+it falls back to the in-container install and queues a build, so the next VPS
+on that OS skips it. Changing the recipe changes the tag, so a stale
+derivative is never picked up.
+"""
+import re
+import hashlib
+import logging
+from typing import Dict, Optional, Tuple
+
+try:
+    from docker.errors import ImageNotFound
+except ImportError:
+    ImageNotFound = Exception
+
+from app.config.redis import get_sync_redis
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Only apt-based images can be built from the recipe below
+DOCKER_READY_DISTROS = {"ubuntu", "debian"}
+
+COMPOSE_VERSION = "v2.24.0"
+
+LABEL_PREFIX = "org.cloudmanager.docker-ready"
+
+BUILD_LOCK_KEY = "hosting:docker-ready:build:{tag}"
+
+DOCKERFILE_TEMPLATE = """\
+FROM {base_image}
+ARG DEBIAN_FRONTEND=noninteractive
+RUN apt-get update -o Acquire::Retries=3 \\
+ && apt-get install -y -q ca-certificates curl gnupg lsb-release apt-transport-https openssh-server nginx \\
+ && install -m 0755 -d /etc/apt/keyrings \\
+ && . /etc/os-release \\
+ && curl -fsSL "https://download.docker.com/linux/${{ID}}/gpg" | gpg --batch --yes --dearmor -o /etc/apt/keyrings/docker.gpg \\
+ && echo "deb [arch=$(dpkg --print-architecture) signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/${{ID}} ${{VERSION_CODENAME}} stable" > /etc/apt/sources.list.d/docker.list \\
+ && apt-get update -o Acquire::Retries=3 \\
+ && apt-get install -y -q docker-ce docker-ce-cli containerd.io docker-buildx-plugin docker-compose-plugin \\
+ && rm -rf /var/lib/apt/lists/*
+RUN case "$(uname -m)" in aarch64|arm64) arch=aarch64 ;; *) arch=x86_64 ;; esac \\
+ && curl -fsSL "https://github.com/docker/compose/releases/download/{compose_version}/docker-compose-linux-${{arch}}" -o /usr/local/bin/docker-compose \\
+ && chmod +x /usr/local/bin/docker-compose
+RUN mkdir -p /var/run/sshd /var/run /var/lib/docker /etc/docker \\
+ && printf '{{\\n  "log-level": "info"\\n}}\\n' > /etc/docker/daemon.json \\
+ && printf '%s\\n' '#!/bin/bash' \\
+      '# Docker daemon startup script with VFS storage driver' \\
+      'if ! pgrep -x dockerd > /dev/null; then' \\
+      '    dockerd --storage-driver=vfs > /var/log/dockerd.log 2>&1 &' \\
+      '    sleep 2' \\
+      'fi' > /usr/local/bin/start-dockerd.sh \\
+ && chmod +x /usr/local/bin/start-dockerd.sh
+"""
+
+
+def supports_docker_ready(base_image: str) -> bool:
+    """Whether a docker-ready derivative can be built for an image (apt-based distros)."""
+    # registry:5000/library/ubuntu:22.04@sha256:... -> ubuntu
+    name = base_image.split("@", 1)[0].rsplit("/", 1)[-1]
+    return name.split(":", 1)[0] in DOCKER_READY_DISTROS
+
+
+def render_dockerfile(base_image: str) -> str:
+    """Dockerfile that turns an OS image into its docker-ready derivative"""
+    return DOCKERFILE_TEMPLATE.format(base_image=base_image, compose_version=COMPOSE_VERSION)
+
+
+def recipe_hash(base_image: str) -> str:
+    """Content hash identifying the derivative's recipe"""
+    return hashlib.sha256(render_dockerfile(base_image).encode("utf-8")).hexdigest()[:12]
+
+
+def docker_ready_tag(base_image: str) -> str:
+    """
+    Versioned tag of an image's docker-ready derivative.
+
+    Example: ubuntu:22.04 -> cloudmanager/docker-ready:ubuntu-22.04-3f9c0a1b2d4e
+    """
+    slug = re.sub(r"[^a-z0-9.]+", "-", base_image.lower()).strip("-.")[:100]
+    return f"{settings.VPS_DOCKER_READY_REPOSITORY}:{slug}-{recipe_hash(base_image)}"
+
+
+def docker_ready_labels(base_image: str) -> Dict[str, str]:
+    """Labels recording what a derivative was built from"""
+    return {
+        f"{LABEL_PREFIX}.base": base_image,
+        f"{LABEL_PREFIX}.recipe": recipe_hash(base_image),
+    }
+
+
+def find_docker_ready_image(client, base_image: str) -> Optional[str]:
+    """
+    Tag of the image's derivative if the Docker host already has it.
+
+    Args:
+        client: docker.DockerClient
+        base_image: OS image the VPS is provisioned from
+
+    Returns:
+        Derivative tag, or None on a cache miss (or when not applicable)
+    """
+    if not settings.VPS_DOCKER_READY_IMAGES_ENABLED or not supports_docker_ready(base_image):
+        return None
+    tag = docker_ready_tag(base_image)
+    try:
+        client.images.get(tag)
+    except ImageNotFound:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not look up docker-ready image {tag}: {e}")
+        return None
+    return tag
+
+
+def claim_docker_ready_build(base_image: str, redis_client=None) -> bool:
+    """
+    Claim the build of an image's derivative so it is queued only once.
+
+    The claim expires after the build timeout, so a crashed build is retried
+    on a later cache miss. Without Redis every caller gets the claim.
+
+    Returns:
+        True if the caller should queue the build
+    """
+    key = BUILD_LOCK_KEY.format(tag=docker_ready_tag(base_image))
+    try:
+        redis = redis_client or get_sync_redis()
+        return bool(redis.set(key, "1", nx=True, ex=settings.VPS_DOCKER_READY_BUILD_TIMEOUT_SECONDS))
+    except Exception as e:
+        logger.debug(f"Redis unavailable for docker-ready build claim: {e}")
+        return True
+
+
+def release_docker_ready_build(base_image: str, redis_client=None) -> None:
+    """Release a build claim once the build has finished or failed."""
+    try:
+        redis = redis_client or get_sync_redis()
+        redis.delete(BUILD_LOCK_KEY.format(tag=docker_ready_tag(base_image)))
+    except Exception as e:
+        logger.debug(f"Failed to release docker-ready build claim: {e}")
+
+
+async def build_docker_ready_image(build_service, base_image: str) -> Tuple[bool, str]:
+    """
+    Build an image's docker-ready derivative.
+
+    Args:
+        build_service: DockerImageBuildService
+        base_image: OS image to derive from
+
+    Returns:
+        Tuple of (success, derivative tag or error message)
+    """
+    if not supports_docker_ready(base_image):
+        return False, f"No docker-ready recipe for {base_image}"
+
+    tag = docker_ready_tag(base_image)
+    success, result = await build_service.build_derivative_image(
+        tag,
+        render_dockerfile(base_image),
+        labels=docker_ready_labels(base_image),
+        timeout_seconds=settings.VPS_DOCKER_READY_BUILD_TIMEOUT_SECONDS,
+    )
+    if not success:
+        return False, result
+    return True, tag
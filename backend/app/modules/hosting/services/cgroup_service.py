@@ -8,15 +8,27 @@ Provides metrics that Docker API doesn't expose, such as:
 - OOM kill events
 - CPU steal time
 
-Supports both cgroup v1 and v2 formats with automatic detection.
+Supports both cgroup v1 and v2 formats (cgroupfs and systemd drivers) with
+automatic detection. Resolved cgroup directories and open file descriptors are
+cached per container, and each stat file is read with a single pread() so a
+full metrics sample costs three syscalls per container. `scan_fleet` resolves
+the whole fleet with one directory scan per cgroup parent.
 """
 import os
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
 from dataclasses import dataclass
 
+from app.config.settings import get_settings
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Largest stat file we read (cpu.stat on v2 is ~200 bytes)
+_READ_SIZE = 4096
 
 
 @dataclass
@@ -37,16 +49,71 @@ class CgroupMetrics:
     cpu_steal_percent: Optional[float] = None
 
 
+@dataclass
+class CgroupPaths:
+    """Resolved stat files for one container (None = not available)"""
+    cpu_stat: Optional[Path] = None
+    memory_pressure: Optional[Path] = None
+    memory_events: Optional[Path] = None  # memory.events (v2) or memory.oom_control (v1)
+    cpuacct_stat: Optional[Path] = None  # v1 only
+
+
+def parse_cpu_stat(text: str) -> Dict[str, int]:
+    """Parse cpu.stat (v1 throttled_time in ns, v2 throttled_usec in us) into ns-based keys."""
+    result = {"nr_periods": 0, "nr_throttled": 0, "throttled_time": 0}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) != 2:
+            continue
+        key, value = parts
+        if key in ("nr_periods", "nr_throttled", "throttled_time"):
+            result[key] = int(value)
+        elif key == "throttled_usec":
+            result["throttled_time"] = int(value) * 1000
+    return result
+
+
+def parse_pressure(text: str) -> Dict[str, Optional[float]]:
+    """Parse a PSI file ("some avg10=0.00 avg60=0.00 avg300=0.00 total=0")."""
+    result = {"some_avg10": None, "some_avg60": None, "full_avg10": None, "full_avg60": None}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 4 or parts[0] not in ("some", "full"):
+            continue
+        for part in parts[1:]:
+            key, _, value = part.partition("=")
+            if key in ("avg10", "avg60"):
+                result[f"{parts[0]}_{key}"] = float(value)
+    return result
+
+
+def parse_oom_kill(text: str) -> int:
+    """Read the oom_kill counter from memory.events (v2) or memory.oom_control (v1)."""
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == "oom_kill":
+            return int(parts[1])
+    return 0
+
+
 class CgroupMonitoringService:
     """Service for reading cgroup metrics directly from filesystem"""
 
     CGROUP_V1_BASE = Path("/sys/fs/cgroup")
     CGROUP_V2_BASE = Path("/sys/fs/cgroup")
 
+    # Process-wide caches shared by all service instances
+    _cgroup_version: Optional[int] = None
+    _path_cache: Dict[str, CgroupPaths] = {}
+    _fd_cache: "OrderedDict[str, int]" = OrderedDict()
+    _fd_lock = threading.Lock()
+
     def __init__(self):
         """Initialize cgroup monitoring service"""
-        self.cgroup_version = self._detect_cgroup_version()
-        logger.info(f"Detected cgroup version: {self.cgroup_version}")
+        if CgroupMonitoringService._cgroup_version is None:
+            CgroupMonitoringService._cgroup_version = self._detect_cgroup_version()
+            logger.info(f"Detected cgroup version: {CgroupMonitoringService._cgroup_version}")
+        self.cgroup_version = CgroupMonitoringService._cgroup_version
 
     @staticmethod
     def _detect_cgroup_version() -> int:
@@ -57,6 +124,157 @@ class CgroupMonitoringService:
             return 2
         return 1
 
+    # ------------------------------------------------------------------
+    # Path resolution
+    # ------------------------------------------------------------------
+
+    def _container_dirs(self, base: Path, container_id: str) -> List[Path]:
+        """Candidate cgroup directories for a container under one hierarchy."""
+        return [
+            base / "docker" / container_id,  # cgroupfs driver
+            base / "system.slice" / f"docker-{container_id}.scope",  # systemd driver
+        ]
+
+    def _first_existing(self, candidates: Iterable[Path]) -> Optional[Path]:
+        for candidate in candidates:
+            if candidate.exists():
+                return candidate
+        return None
+
+    def _resolve_paths(self, container_id: str) -> CgroupPaths:
+        """Resolve (and cache) the stat files of a container."""
+        cached = self._path_cache.get(container_id)
+        if cached is not None:
+            return cached
+
+        paths = CgroupPaths()
+        if self.cgroup_version == 2:
+            directory = self._first_existing(self._container_dirs(self.CGROUP_V2_BASE, container_id))
+            if directory:
+                paths.cpu_stat = directory / "cpu.stat"
+                paths.memory_pressure = directory / "memory.pressure"
+                paths.memory_events = directory / "memory.events"
+        else:
+            cpu_dir = self._first_existing(
+                d for ctrl in ("cpu", "cpu,cpuacct")
+                for d in self._container_dirs(self.CGROUP_V1_BASE / ctrl, container_id)
+            )
+            cpuacct_dir = self._first_existing(
+                d for ctrl in ("cpuacct", "cpu,cpuacct")
+                for d in self._container_dirs(self.CGROUP_V1_BASE / ctrl, container_id)
+            )
+            memory_dir = self._first_existing(self._container_dirs(self.CGROUP_V1_BASE / "memory", container_id))
+            if cpu_dir:
+                paths.cpu_stat = cpu_dir / "cpu.stat"
+            if cpuacct_dir:
+                paths.cpuacct_stat = cpuacct_dir / "cpuacct.stat"
+            if memory_dir:
+                # cgroup v1 doesn't have PSI unless the kernel has CONFIG_PSI enabled
+                paths.memory_pressure = memory_dir / "memory.pressure"
+                paths.memory_events = memory_dir / "memory.oom_control"
+
+        # Only cache hits; a container that is still starting may get its cgroup later
+        if paths.cpu_stat or paths.memory_events:
+            self._path_cache[container_id] = paths
+        return paths
+
+    def forget(self, container_id: str) -> None:
+        """Drop cached paths and file descriptors of a container."""
+        paths = self._path_cache.pop(container_id, None)
+        if paths:
+            for path in (paths.cpu_stat, paths.memory_pressure, paths.memory_events, paths.cpuacct_stat):
+                if path:
+                    self._close_fd(str(path))
+
+    # ------------------------------------------------------------------
+    # File reading
+    # ------------------------------------------------------------------
+
+    def _read(self, path: Optional[Path]) -> Optional[str]:
+        """
+        Read a whole stat file with one pread() on a cached descriptor.
+
+        cgroupfs regenerates file content on every read from offset 0, so the
+        descriptor can be reused indefinitely while the cgroup exists.
+        """
+        if path is None:
+            return None
+        key = str(path)
+        with self._fd_lock:
+            fd = self._fd_cache.get(key)
+            if fd is not None:
+                self._fd_cache.move_to_end(key)
+        try:
+            if fd is None:
+                fd = os.open(key, os.O_RDONLY)
+                self._store_fd(key, fd)
+            return os.pread(fd, _READ_SIZE, 0).decode("utf-8", errors="replace")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            # ENODEV/ENOENT after the cgroup was removed: retry with a fresh open next time
+            logger.debug(f"Error reading {key}: {e}")
+            self._close_fd(key)
+            return None
+
+    def _store_fd(self, key: str, fd: int) -> None:
+        evicted = []
+        with self._fd_lock:
+            previous = self._fd_cache.pop(key, None)
+            if previous is not None and previous != fd:
+                evicted.append(previous)
+            self._fd_cache[key] = fd
+            while len(self._fd_cache) > settings.CGROUP_MAX_OPEN_FILES:
+                evicted.append(self._fd_cache.popitem(last=False)[1])
+        for old_fd in evicted:
+            try:
+                os.close(old_fd)
+            except OSError:
+                pass
+
+    def _close_fd(self, key: str) -> None:
+        with self._fd_lock:
+            fd = self._fd_cache.pop(key, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _read_metrics(self, container_id: str) -> CgroupMetrics:
+        """Read and parse all stat files of one container in a single pass."""
+        paths = self._resolve_paths(container_id)
+        metrics = CgroupMetrics()
+
+        cpu_stat = self._read(paths.cpu_stat)
+        if cpu_stat is not None:
+            throttle = parse_cpu_stat(cpu_stat)
+            metrics.cpu_throttle_periods = throttle["nr_throttled"]
+            metrics.cpu_throttled_time_ns = throttle["throttled_time"]
+
+        pressure = self._read(paths.memory_pressure)
+        if pressure is not None:
+            pressure_data = parse_pressure(pressure)
+            metrics.memory_pressure_some_avg10 = pressure_data["some_avg10"]
+            metrics.memory_pressure_full_avg10 = pressure_data["full_avg10"]
+
+        events = self._read(paths.memory_events)
+        if events is not None:
+            metrics.oom_kill_count = parse_oom_kill(events)
+
+        # Steal time requires deltas against host CPU stats; not tracked yet
+        metrics.cpu_steal_percent = None
+
+        if cpu_stat is None and events is None and container_id in self._path_cache:
+            # cgroup vanished (container stopped or recreated)
+            self.forget(container_id)
+
+        return metrics
+
     def get_all_metrics(self, container_id: str) -> CgroupMetrics:
         """
         Get all cgroup metrics for a container
@@ -67,29 +285,67 @@ class CgroupMonitoringService:
         Returns:
             CgroupMetrics object with all available metrics
         """
-        metrics = CgroupMetrics()
-
         try:
-            # CPU throttling metrics
-            throttle_data = self.get_cpu_throttling(container_id)
-            metrics.cpu_throttle_periods = throttle_data.get("nr_throttled", 0)
-            metrics.cpu_throttled_time_ns = throttle_data.get("throttled_time", 0)
-
-            # Memory pressure metrics
-            pressure_data = self.get_memory_pressure(container_id)
-            metrics.memory_pressure_some_avg10 = pressure_data.get("some_avg10")
-            metrics.memory_pressure_full_avg10 = pressure_data.get("full_avg10")
+            return self._read_metrics(container_id)
+        except Exception as e:
+            logger.warning(f"Failed to collect some cgroup metrics for {container_id[:12]}: {e}")
+            return CgroupMetrics()
 
-            # OOM kill count
-            metrics.oom_kill_count = self.get_oom_events(container_id)
+    def scan_fleet(self, container_ids: Optional[Iterable[str]] = None) -> Dict[str, CgroupMetrics]:
+        """
+        Read cgroup metrics for many containers at once.
 
-            # CPU steal time
-            metrics.cpu_steal_percent = self.get_cpu_steal_time(container_id)
+        The docker cgroup parents are listed once to resolve every container's
+        directory (instead of probing candidate paths per container), then each
+        container's files are read. Containers whose files cannot be read are
+        left out of the result.
 
-        except Exception as e:
-            logger.warning(f"Failed to collect some cgroup metrics for {container_id[:12]}: {e}")
+        Args:
+            container_ids: Containers to read (defaults to every docker cgroup found)
 
-        return metrics
+        Returns:
+            Mapping of Docker container ID to CgroupMetrics
+        """
+        wanted = set(container_ids) if container_ids is not None else None
+        found = self._scan_container_dirs()
+
+        if self.cgroup_version == 2:
+            for container_id, directory in found.items():
+                if (wanted is None or container_id in wanted) and container_id not in self._path_cache:
+                    self._path_cache[container_id] = CgroupPaths(
+                        cpu_stat=directory / "cpu.stat",
+                        memory_pressure=directory / "memory.pressure",
+                        memory_events=directory / "memory.events",
+                    )
+
+        targets = wanted if wanted is not None else set(found)
+        results: Dict[str, CgroupMetrics] = {}
+        for container_id in targets:
+            try:
+                results[container_id] = self._read_metrics(container_id)
+            except Exception as e:
+                logger.warning(f"Failed to collect cgroup metrics for {container_id[:12]}: {e}")
+        return results
+
+    def _scan_container_dirs(self) -> Dict[str, Path]:
+        """List docker container cgroup directories (cgroupfs and systemd layouts)."""
+        base = self.CGROUP_V2_BASE if self.cgroup_version == 2 else self.CGROUP_V1_BASE / "memory"
+        found: Dict[str, Path] = {}
+        for parent, prefix, suffix in ((base / "docker", "", ""), (base / "system.slice", "docker-", ".scope")):
+            try:
+                with os.scandir(parent) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        if prefix and not (name.startswith(prefix) and name.endswith(suffix)):
+                            continue
+                        container_id = name[len(prefix):len(name) - len(suffix)] if prefix else name
+                        if len(container_id) == 64:
+                            found[container_id] = Path(entry.path)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return found
 
     def get_cpu_throttling(self, container_id: str) -> Dict[str, int]:
         """
@@ -100,47 +356,11 @@ class CgroupMonitoringService:
         - nr_throttled: Number of times container was throttled
         - throttled_time: Total time throttled (nanoseconds)
         """
-        result = {
-            "nr_periods": 0,
-            "nr_throttled": 0,
-            "throttled_time": 0
-        }
-
-        try:
-            if self.cgroup_version == 1:
-                # cgroup v1: /sys/fs/cgroup/cpu/docker/<container_id>/cpu.stat
-                stat_file = self.CGROUP_V1_BASE / "cpu" / "docker" / container_id / "cpu.stat"
-            else:
-                # cgroup v2: /sys/fs/cgroup/docker/<container_id>/cpu.stat
-                stat_file = self.CGROUP_V2_BASE / "docker" / container_id / "cpu.stat"
-
-            if not stat_file.exists():
-                # Try alternative path (some systems use different hierarchy)
-                if self.cgroup_version == 1:
-                    stat_file = self.CGROUP_V1_BASE / "cpu,cpuacct" / "docker" / container_id / "cpu.stat"
-
-                if not stat_file.exists():
-                    logger.debug(f"CPU stat file not found for container {container_id[:12]}")
-                    return result
-
-            with open(stat_file, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) == 2:
-                        key, value = parts
-                        if key == "nr_periods":
-                            result["nr_periods"] = int(value)
-                        elif key == "nr_throttled":
-                            result["nr_throttled"] = int(value)
-                        elif key == "throttled_time":
-                            result["throttled_time"] = int(value)
-
-        except FileNotFoundError:
-            logger.debug(f"CPU throttling stats not available for {container_id[:12]}")
-        except Exception as e:
-            logger.warning(f"Error reading CPU throttling stats: {e}")
-
-        return result
+        text = self._read(self._resolve_paths(container_id).cpu_stat)
+        if text is None:
+            logger.debug(f"CPU stat file not found for container {container_id[:12]}")
+            return {"nr_periods": 0, "nr_throttled": 0, "throttled_time": 0}
+        return parse_cpu_stat(text)
 
     def get_memory_pressure(self, container_id: str) -> Dict[str, Optional[float]]:
         """
@@ -152,54 +372,11 @@ class CgroupMonitoringService:
         - full_avg10: % of time all tasks stalled (10s avg)
         - full_avg60: % of time all tasks stalled (60s avg)
         """
-        result = {
-            "some_avg10": None,
-            "some_avg60": None,
-            "full_avg10": None,
-            "full_avg60": None
-        }
-
-        try:
-            if self.cgroup_version == 1:
-                # cgroup v1 doesn't have PSI by default
-                # Would need kernel with CONFIG_PSI enabled
-                pressure_file = self.CGROUP_V1_BASE / "memory" / "docker" / container_id / "memory.pressure"
-            else:
-                # cgroup v2: /sys/fs/cgroup/docker/<container_id>/memory.pressure
-                pressure_file = self.CGROUP_V2_BASE / "docker" / container_id / "memory.pressure"
-
-            if not pressure_file.exists():
-                logger.debug(f"Memory pressure file not found for {container_id[:12]}")
-                return result
-
-            with open(pressure_file, 'r') as f:
-                for line in f:
-                    # Format: some avg10=0.00 avg60=0.00 avg300=0.00 total=0
-                    # Format: full avg10=0.00 avg60=0.00 avg300=0.00 total=0
-                    parts = line.strip().split()
-                    if len(parts) >= 4:
-                        pressure_type = parts[0]  # "some" or "full"
-
-                        for part in parts[1:]:
-                            if '=' in part:
-                                key, value = part.split('=')
-                                if key == "avg10":
-                                    if pressure_type == "some":
-                                        result["some_avg10"] = float(value)
-                                    elif pressure_type == "full":
-                                        result["full_avg10"] = float(value)
-                                elif key == "avg60":
-                                    if pressure_type == "some":
-                                        result["some_avg60"] = float(value)
-                                    elif pressure_type == "full":
-                                        result["full_avg60"] = float(value)
-
-        except FileNotFoundError:
-            logger.debug(f"Memory pressure not available for {container_id[:12]}")
-        except Exception as e:
-            logger.warning(f"Error reading memory pressure: {e}")
-
-        return result
+        text = self._read(self._resolve_paths(container_id).memory_pressure)
+        if text is None:
+            logger.debug(f"Memory pressure file not found for {container_id[:12]}")
+            return {"some_avg10": None, "some_avg60": None, "full_avg10": None, "full_avg60": None}
+        return parse_pressure(text)
 
     def get_oom_events(self, container_id: str) -> int:
         """
@@ -208,40 +385,11 @@ class CgroupMonitoringService:
         Returns:
             Number of times container was OOM killed
         """
-        try:
-            if self.cgroup_version == 1:
-                # cgroup v1: /sys/fs/cgroup/memory/docker/<container_id>/memory.oom_control
-                oom_file = self.CGROUP_V1_BASE / "memory" / "docker" / container_id / "memory.oom_control"
-            else:
-                # cgroup v2: /sys/fs/cgroup/docker/<container_id>/memory.events
-                # Look for "oom_kill" counter
-                events_file = self.CGROUP_V2_BASE / "docker" / container_id / "memory.events"
-
-                if events_file.exists():
-                    with open(events_file, 'r') as f:
-                        for line in f:
-                            parts = line.strip().split()
-                            if len(parts) == 2 and parts[0] == "oom_kill":
-                                return int(parts[1])
-                return 0
-
-            # cgroup v1 path
-            if not oom_file.exists():
-                logger.debug(f"OOM control file not found for {container_id[:12]}")
-                return 0
-
-            with open(oom_file, 'r') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) == 2 and parts[0] == "oom_kill":
-                        return int(parts[1])
-
-        except FileNotFoundError:
+        text = self._read(self._resolve_paths(container_id).memory_events)
+        if text is None:
             logger.debug(f"OOM stats not available for {container_id[:12]}")
-        except Exception as e:
-            logger.warning(f"Error reading OOM events: {e}")
-
-        return 0
+            return 0
+        return parse_oom_kill(text)
 
     def get_cpu_steal_time(self, container_id: str) -> Optional[float]:
         """
@@ -249,48 +397,13 @@ class CgroupMonitoringService:
 
         CPU steal time indicates host overcommitment - time when container
         wanted CPU but hypervisor allocated it to another VM/container.
+        Accurate steal time needs deltas against host CPU stats over time,
+        which are not tracked yet.
 
         Returns:
             Steal percentage (0-100) or None if not available
         """
-        try:
-            if self.cgroup_version == 1:
-                # Read from cpuacct.stat
-                stat_file = self.CGROUP_V1_BASE / "cpuacct" / "docker" / container_id / "cpuacct.stat"
-
-                if not stat_file.exists():
-                    # Try combined cpu,cpuacct
-                    stat_file = self.CGROUP_V1_BASE / "cpu,cpuacct" / "docker" / container_id / "cpuacct.stat"
-
-                if not stat_file.exists():
-                    return None
-
-                user_time = 0
-                system_time = 0
-
-                with open(stat_file, 'r') as f:
-                    for line in f:
-                        parts = line.strip().split()
-                        if len(parts) == 2:
-                            if parts[0] == "user":
-                                user_time = int(parts[1])
-                            elif parts[0] == "system":
-                                system_time = int(parts[1])
-
-                # Note: Actual steal time calculation would require comparing
-                # with previous sample and host CPU stats. This is a simplified version.
-                # For accurate steal time, we'd need to track deltas over time.
-                # Returning None for now as it requires state tracking
-                return None
-
-            else:
-                # cgroup v2 - CPU stat format different
-                # Would need to implement similar logic
-                return None
-
-        except Exception as e:
-            logger.warning(f"Error calculating CPU steal time: {e}")
-            return None
+        return None
 
     def is_available(self) -> bool:
         """
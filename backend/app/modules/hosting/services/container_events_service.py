@@ -0,0 +1,478 @@
+"""
+Container Events Watcher
+
+Keeps ContainerInstance.status in step with Docker as containers change,
+instead of waiting for the periodic reconciliation sweep. One thread follows
+the Docker events API for VPS containers (start, die, oom, destroy,
+health_status) and applies what it sees to the database:
+
+- Events are held for CONTAINER_EVENTS_SETTLE_SECONDS and folded per
+  container. A restart (die followed by start) therefore leaves no trace,
+  and user actions that update the row themselves (stop, reboot,
+  terminate) win over the watcher.
+- Status updates are conditional on the status the row had when it was
+  read, so only real changes write a timeline entry.
+- A destroyed container whose row is still RUNNING triggers the
+  reconciliation sweep right away rather than on its next scheduled run.
+
+The watcher runs in the API process. With several workers only the holder
+of a Redis lease follows events. The sweep (`reconcile_missing_vps_containers`)
+applies the same rules from one container list call, which repairs anything
+missed while no watcher was running.
+"""
+import os
+import re
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import docker
+except ImportError:
+    docker = None
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config.redis import get_sync_redis
+from app.config.settings import get_settings
+from app.modules.hosting.models import (
+    ActorType,
+    ContainerInstance,
+    ContainerStatus,
+    SubscriptionTimeline,
+    TimelineEventType,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WATCHED_ACTIONS = ["start", "die", "oom", "destroy", "health_status"]
+
+LEADER_KEY = "hosting:container-events:leader"
+
+_EXIT_CODE_RE = re.compile(r"\((-?\d+)\)")
+
+
+@dataclass
+class ContainerObservation:
+    """What Docker last reported about one container"""
+    container_id: str
+    state: str  # running | exited | removed ("" while unknown)
+    exit_code: Optional[int] = None
+    oom_killed: bool = False
+    health: Optional[str] = None
+    observed_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def docker_state(self) -> str:
+        """Compact state stored on the container row, e.g. "exited (137)" """
+        if self.state == "exited" and self.exit_code is not None:
+            return f"exited ({self.exit_code})"
+        if self.state == "running" and self.health:
+            return f"running ({self.health})"
+        return self.state
+
+
+@dataclass
+class ContainerTransition:
+    """Status change (and timeline entry) implied by an observation"""
+    status: ContainerStatus
+    event_type: Optional[TimelineEventType] = None
+    description: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def decide_transition(current: ContainerStatus, observation: ContainerObservation) -> Optional[ContainerTransition]:
+    """
+    Status change implied by what Docker reports, if any.
+
+    CREATING and TERMINATED rows belong to provisioning and termination, and
+    a REBOOTING container is expected to go down; those are left alone. A
+    removed container is left to the sweep, which recreates RUNNING ones.
+
+    Args:
+        current: Status recorded on the row
+        observation: Latest Docker state
+
+    Returns:
+        Transition to apply, or None
+    """
+    if current in (ContainerStatus.CREATING, ContainerStatus.TERMINATED):
+        return None
+
+    if observation.state == "running":
+        if current == ContainerStatus.REBOOTING:
+            return ContainerTransition(ContainerStatus.RUNNING)
+        if current in (ContainerStatus.STOPPED, ContainerStatus.ERROR):
+            return ContainerTransition(
+                ContainerStatus.RUNNING,
+                TimelineEventType.STARTED,
+                "Container started (detected from Docker)",
+            )
+        return None
+
+    if observation.state == "exited" and current == ContainerStatus.RUNNING:
+        metadata = {"exit_code": observation.exit_code}
+        if observation.oom_killed:
+            metadata["reason"] = "oom"
+            return ContainerTransition(
+                ContainerStatus.ERROR,
+                TimelineEventType.STOPPED,
+                "Container was killed after running out of memory",
+                metadata,
+            )
+        if observation.exit_code == 0:
+            return ContainerTransition(
+                ContainerStatus.STOPPED,
+                TimelineEventType.STOPPED,
+                "Container stopped (detected from Docker)",
+                metadata,
+            )
+        return ContainerTransition(
+            ContainerStatus.ERROR,
+            TimelineEventType.STOPPED,
+            f"Container exited unexpectedly (exit code {observation.exit_code})",
+            metadata,
+        )
+
+    return None
+
+
+def observation_from_summary(summary: Dict[str, Any]) -> Optional[ContainerObservation]:
+    """
+    Observation from one entry of the container list API (`docker ps -a`).
+
+    Returns:
+        Observation, or None for transitional states (created, paused, restarting)
+    """
+    state = (summary.get("State") or "").lower()
+    if state == "running":
+        status_text = (summary.get("Status") or "").lower()
+        health = None
+        if "(unhealthy)" in status_text:
+            health = "unhealthy"
+        elif "(healthy)" in status_text:
+            health = "healthy"
+        return ContainerObservation(summary["Id"], "running", health=health)
+    if state in ("exited", "dead"):
+        match = _EXIT_CODE_RE.search(summary.get("Status") or "")
+        exit_code = int(match.group(1)) if match else None
+        return ContainerObservation(summary["Id"], "exited", exit_code=exit_code)
+    return None
+
+
+def apply_observation(db: Session, instance: ContainerInstance, observation: ContainerObservation) -> Optional[ContainerTransition]:
+    """
+    Apply an observation to a container row (caller commits).
+
+    The update only lands if the row still has the status it was read with,
+    so a concurrent user action is never overwritten.
+
+    Returns:
+        Transition applied, or None if nothing changed
+    """
+    transition = decide_transition(instance.status, observation)
+    if not transition and instance.docker_state == observation.docker_state:
+        return None
+    values: Dict[str, Any] = {"docker_state": observation.docker_state}
+    if transition:
+        values["status"] = transition.status
+        now = datetime.utcnow()
+        if transition.status == ContainerStatus.RUNNING:
+            values["last_started_at"] = now
+        else:
+            values["last_stopped_at"] = now
+
+    result = db.execute(
+        update(ContainerInstance)
+        .where(ContainerInstance.id == instance.id, ContainerInstance.status == instance.status)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not transition or result.rowcount != 1:
+        return None
+
+    if transition.event_type:
+        db.add(SubscriptionTimeline(
+            subscription_id=instance.subscription_id,
+            event_type=transition.event_type,
+            event_description=transition.description,
+            event_metadata={"container_id": observation.container_id, **transition.metadata},
+            actor_type=ActorType.SYSTEM,
+        ))
+    logger.info(
+        f"Container {observation.container_id[:12]} is now {transition.status.value} "
+        f"(was {instance.status.value}, Docker: {observation.docker_state})"
+    )
+    return transition
+
+
+def apply_observations(db: Session, observations: Dict[str, ContainerObservation]) -> Dict[str, Any]:
+    """
+    Apply folded observations for many containers in one transaction.
+
+    Returns:
+        Dict with "changed" count and "missing_running" (subscription IDs whose
+        RUNNING container was removed)
+    """
+    if not observations:
+        return {"changed": 0, "missing_running": []}
+
+    instances = db.execute(
+        select(ContainerInstance).where(ContainerInstance.container_id.in_(list(observations)))
+    ).scalars().all()
+
+    changed = 0
+    missing_running: List[str] = []
+    for instance in instances:
+        observation = observations[instance.container_id]
+        if observation.state == "removed":
+            if instance.status == ContainerStatus.RUNNING:
+                missing_running.append(instance.subscription_id)
+            continue
+        if apply_observation(db, instance, observation):
+            changed += 1
+    db.commit()
+    return {"changed": changed, "missing_running": missing_running}
+
+
+class ContainerEventsWatcher:
+    """Process-wide follower of Docker container events"""
+
+    _instance: Optional["ContainerEventsWatcher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        client=None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        settle_seconds: Optional[float] = None,
+        redis_client=None,
+    ):
+        """
+        Initialize events watcher
+
+        Args:
+            client: docker.DockerClient (created from DOCKER_HOST if omitted)
+            session_factory: Sync session factory (defaults to SyncSessionLocal)
+            settle_seconds: How long a container's events are folded before applying
+            redis_client: Blocking Redis client for the leader lease
+        """
+        self._client = client
+        self._session_factory = session_factory
+        self.settle_seconds = settings.CONTAINER_EVENTS_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self._redis = redis_client
+        self._token = uuid.uuid4().hex
+        self._pending: Dict[str, ContainerObservation] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stream = None
+        self._since: Optional[int] = None
+        self.is_leader = False
+
+    @classmethod
+    def get_instance(cls) -> "ContainerEventsWatcher":
+        """Get the process-wide watcher"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def client(self):
+        if self._client is None and docker:
+            docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+            self._client = docker.DockerClient(base_url=docker_host)
+        return self._client
+
+    def start(self) -> bool:
+        """Start following events (and the thread that applies them)"""
+        if self.running:
+            return True
+        if self.client is None:
+            logger.warning("Docker SDK not available - container events watcher disabled")
+            return False
+
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._follow_loop, name="docker-events", daemon=True),
+            threading.Thread(target=self._flush_loop, name="docker-events-apply", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Container events watcher started")
+        return True
+
+    def stop(self) -> None:
+        """Stop following events and give up the lease"""
+        self._stop_event.set()
+        self._close_stream()
+        self.flush(force=True)
+        if self.is_leader:
+            try:
+                redis = self._redis or get_sync_redis()
+                if redis.get(LEADER_KEY) == self._token:
+                    redis.delete(LEADER_KEY)
+            except Exception:
+                pass
+            self.is_leader = False
+        self._threads = []
+        logger.info("Container events watcher stopped")
+
+    def handle_event(self, event: Dict[str, Any], now: Optional[float] = None) -> None:
+        """Fold one Docker event into the container's pending observation."""
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        action = event.get("Action") or event.get("status") or ""
+        if not container_id:
+            return
+        attributes = (event.get("Actor") or {}).get("Attributes") or {}
+        if not (attributes.get("name") or "").startswith("vps-"):
+            return
+
+        if event.get("time"):
+            self._since = int(event["time"])
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            observation = self._pending.get(container_id)
+            if observation is None:
+                # State stays unknown ("") until start/die/destroy or a health report
+                observation = self._pending[container_id] = ContainerObservation(container_id, "")
+            observation.observed_at = now
+
+            if action == "start":
+                observation.state = "running"
+                observation.exit_code = None
+                observation.oom_killed = False
+            elif action == "die":
+                observation.state = "exited"
+                try:
+                    observation.exit_code = int(attributes.get("exitCode"))
+                except (TypeError, ValueError):
+                    observation.exit_code = None
+            elif action == "oom":
+                observation.oom_killed = True
+            elif action == "destroy":
+                observation.state = "removed"
+            elif action.startswith("health_status"):
+                observation.health = action.split(":", 1)[-1].strip() or None
+                if not observation.state:
+                    observation.state = "running"
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Apply observations whose container has been quiet for the settle time.
+
+        Returns:
+            Result of apply_observations()
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            ready = {
+                container_id: observation
+                for container_id, observation in self._pending.items()
+                if observation.state and (force or now - observation.observed_at >= self.settle_seconds)
+            }
+            for container_id in ready:
+                del self._pending[container_id]
+        if not ready:
+            return {"changed": 0, "missing_running": []}
+
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.config.database import SyncSessionLocal
+            session_factory = SyncSessionLocal
+
+        try:
+            with session_factory() as db:
+                result = apply_observations(db, ready)
+        except Exception as e:
+            logger.error(f"Failed to apply {len(ready)} container events: {e}")
+            return {"changed": 0, "missing_running": []}
+
+        if result["missing_running"]:
+            self._trigger_reconcile(result["missing_running"])
+        return result
+
+    def _trigger_reconcile(self, subscription_ids: List[str]) -> None:
+        logger.warning(f"Containers removed for running subscriptions {subscription_ids}, reconciling now")
+        try:
+            from app.modules.hosting.tasks import reconcile_missing_vps_containers
+            reconcile_missing_vps_containers.delay()
+        except Exception as e:
+            logger.warning(f"Failed to queue reconciliation: {e}")
+
+    def _acquire_lease(self) -> bool:
+        """Take or renew the leader lease; without Redis every process leads."""
+        ttl = settings.CONTAINER_EVENTS_LEASE_SECONDS
+        try:
+            redis = self._redis or get_sync_redis()
+            if redis.set(LEADER_KEY, self._token, nx=True, ex=ttl):
+                return True
+            if redis.get(LEADER_KEY) == self._token:
+                redis.expire(LEADER_KEY, ttl)
+                return True
+            return False
+        except Exception as e:
+            logger.debug(f"Redis unavailable for container events lease: {e}")
+            return True
+
+    def _close_stream(self) -> None:
+        stream = self._stream
+        self._stream = None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _follow_loop(self) -> None:
+        """Follow the events API while holding the lease (runs in its own thread)."""
+        while not self._stop_event.is_set():
+            if not self.is_leader:
+                self._stop_event.wait(settings.CONTAINER_EVENTS_LEASE_SECONDS / 3)
+                continue
+            try:
+                self._stream = self.client.events(
+                    decode=True,
+                    since=self._since,
+                    filters={"type": "container", "event": WATCHED_ACTIONS},
+                )
+                for event in self._stream:
+                    if self._stop_event.is_set() or not self.is_leader:
+                        break
+                    self.handle_event(event)
+            except Exception as e:
+                if not self._stop_event.is_set() and self.is_leader:
+                    logger.warning(f"Docker events stream interrupted: {e}")
+                    self._stop_event.wait(5)
+            finally:
+                self._close_stream()
+
+    def _flush_loop(self) -> None:
+        """Renew the lease and apply settled events (runs in its own thread)."""
+        interval = max(self.settle_seconds / 2, 0.5)
+        last_lease_check = 0.0
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            if now - last_lease_check >= settings.CONTAINER_EVENTS_LEASE_SECONDS / 3:
+                last_lease_check = now
+                was_leader, self.is_leader = self.is_leader, self._acquire_lease()
+                if was_leader and not self.is_leader:
+                    logger.info("Lost container events lease, another worker follows events")
+                    self._close_stream()
+                elif self.is_leader and not was_leader:
+                    logger.info("Following Docker container events")
+            self.flush()
+            self._stop_event.wait(interval)
@@ -3,11 +3,22 @@ CoreDNS Configuration Service.
 
 Handles CoreDNS integration including zone file generation,
 Corefile management, and DNS server reload operations.
+
+Zone files are only rewritten when their content hash changes, writes are
+atomic (temp file + rename) and run in parallel, and reloads requested
+within a short window are coalesced into a single CoreDNS reload. A zone
+sync reloads even without changes when the previous reload failed, and a
+full regeneration always reloads.
 """
 import os
 import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+import weakref
 import aiofiles
-from typing import List, Optional, Dict, Any
+from typing import Awaitable, Callable, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from pathlib import Path
 import httpx
@@ -25,6 +36,125 @@ from app.modules.hosting.models import (
     DNSSyncLog
 )
 from app.core.exceptions import CloudManagerException, NotFoundException
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def post_coredns_reload(reload_url: str, timeout: int = 10) -> Dict[str, Any]:
+    """
+    Trigger CoreDNS configuration reload via HTTP API.
+
+    Args:
+        reload_url: CoreDNS reload endpoint
+        timeout: Request timeout in seconds
+
+    Returns:
+        Reload response dictionary
+
+    Raises:
+        CloudManagerException: If reload fails
+    """
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.post(reload_url)
+
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "message": "CoreDNS reloaded successfully",
+                    "status_code": response.status_code
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": f"CoreDNS reload failed with status {response.status_code}",
+                    "status_code": response.status_code,
+                    "error": response.text
+                }
+
+    except httpx.TimeoutException:
+        raise CloudManagerException(
+            f"CoreDNS reload timeout after {timeout} seconds",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    except Exception as e:
+        raise CloudManagerException(
+            f"Failed to reload CoreDNS: {str(e)}",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+class CoreDNSReloadCoalescer:
+    """Debounced CoreDNS reloads shared by every caller in the event loop"""
+
+    # One coalescer per (event loop, reload URL); waiters are loop-bound futures
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, CoreDNSReloadCoalescer]]" = \
+        weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        reload_fn: Callable[[], Awaitable[Dict[str, Any]]],
+        debounce_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize reload coalescer
+
+        Args:
+            reload_fn: Performs one reload and returns its result dictionary
+            debounce_seconds: Window over which requests are collected
+        """
+        self._reload_fn = reload_fn
+        self.debounce_seconds = (
+            settings.COREDNS_RELOAD_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        )
+        self._waiters: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    @classmethod
+    def get_instance(cls, reload_url: str) -> "CoreDNSReloadCoalescer":
+        """Get the coalescer for a CoreDNS reload URL in the running event loop"""
+        loop = asyncio.get_running_loop()
+        with cls._instances_lock:
+            per_loop = cls._instances.setdefault(loop, {})
+            if reload_url not in per_loop:
+                per_loop[reload_url] = cls(lambda: post_coredns_reload(reload_url))
+            return per_loop[reload_url]
+
+    async def request_reload(self) -> Dict[str, Any]:
+        """
+        Ask for CoreDNS to be reloaded.
+
+        Call after the zone files are on disk. Returns the result of the
+        reload that picked the change up.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return await asyncio.shield(future)
+
+    async def _flush_loop(self) -> None:
+        """Reload once per debounce window while requests keep arriving."""
+        while self._waiters:
+            await asyncio.sleep(self.debounce_seconds)
+            waiters, self._waiters = self._waiters, []
+
+            try:
+                result = await self._reload_fn()
+            except Exception as e:
+                logger.error(f"CoreDNS reload failed: {e}")
+                result = {"success": False, "message": str(e), "error": str(e)}
+            self.reloads += 1
+
+            if len(waiters) > 1:
+                logger.info(f"Coalesced {len(waiters)} CoreDNS reload requests into one")
+            for future in waiters:
+                if not future.done():
+                    future.set_result({**result, "coalesced_requests": len(waiters)})
 
 
 class CoreDNSConfigService:
@@ -36,6 +166,13 @@ class CoreDNSConfigService:
     COREDNS_RELOAD_URL = os.getenv("COREDNS_RELOAD_URL", "http://coredns:8080/reload")
     COREDNS_HEALTH_URL = os.getenv("COREDNS_HEALTH_URL", "http://coredns:8080/health")
 
+    # Zone file path -> (mtime_ns, size, sha256) of the content last seen on disk
+    _content_hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    # Reload URL -> whether the last reload failed: files written before it
+    # are on disk but not served, so the next sync reloads even if unchanged
+    _reload_failed: Dict[str, bool] = {}
+
     def __init__(self, db: AsyncSession):
         self.db = db
         self.zone_repo = DNSZoneRepository(db)
@@ -175,9 +312,82 @@ class CoreDNSConfigService:
     # File I/O Operations
     # ============================================================================
 
+    def generate_zone_config_content(self, zone: DNSZone) -> str:
+        """
+        Generate the zone-specific CoreDNS config snippet.
+
+        Args:
+            zone: DNSZone
+
+        Returns:
+            Config snippet content
+        """
+        return f"""# Zone configuration for {zone.zone_name}
+{zone.zone_name} {{
+    file /etc/coredns/zones/{zone.zone_name}.zone
+    errors
+    log
+}}
+"""
+
+    @classmethod
+    def _disk_hash(cls, path: Path) -> Optional[str]:
+        """Content hash of a file on disk (cached until its mtime/size change)."""
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        cached = cls._content_hashes.get(str(path))
+        if cached and cached[0] == stat_result.st_mtime_ns and cached[1] == stat_result.st_size:
+            return cached[2]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        cls._content_hashes[str(path)] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        return digest
+
+    @classmethod
+    def _write_if_changed(cls, path: Path, content: str) -> bool:
+        """
+        Atomically replace a file unless it already holds `content` (blocking).
+
+        The new content goes to a hidden temp file in the same directory,
+        which is then renamed over the target, so CoreDNS never reads a
+        partially written zone.
+
+        Returns:
+            True if the file was written, False if it was unchanged
+        """
+        data = content.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        if cls._disk_hash(path) == digest:
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # Set file permissions (644 - read for all, write for owner)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        stat_result = os.stat(path)
+        cls._content_hashes[str(path)] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        return True
+
     async def write_zone_file(self, zone: DNSZone) -> str:
         """
-        Write zone file to disk.
+        Write zone file to disk (skipped if the content is unchanged).
 
         Args:
             zone: DNSZone with loaded records
@@ -188,32 +398,18 @@ class CoreDNSConfigService:
         Raises:
             CloudManagerException: If file write fails
         """
-        # Ensure zones directory exists
-        zones_dir = Path(self.COREDNS_ZONES_DIR)
-        zones_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate zone file path
-        zone_file_path = zones_dir / f"{zone.zone_name}.zone"
-
-        # Generate zone file content
+        zone_file_path = Path(self.COREDNS_ZONES_DIR) / f"{zone.zone_name}.zone"
         content = self.generate_zone_file_content(zone)
 
         try:
-            # Write zone file
-            async with aiofiles.open(zone_file_path, 'w') as f:
-                await f.write(content)
-
-            # Set file permissions (644 - read for all, write for owner)
-            os.chmod(zone_file_path, 0o644)
-
+            await asyncio.to_thread(self._write_if_changed, zone_file_path, content)
             return str(zone_file_path)
-
         except Exception as e:
             raise CloudManagerException(f"Failed to write zone file for {zone.zone_name}: {str(e)}")
 
     async def write_zone_config(self, zone: DNSZone) -> str:
         """
-        Write zone-specific CoreDNS config snippet.
+        Write zone-specific CoreDNS config snippet (skipped if unchanged).
 
         Args:
             zone: DNSZone
@@ -224,53 +420,79 @@ class CoreDNSConfigService:
         Raises:
             CloudManagerException: If file write fails
         """
-        # Ensure zones directory exists
-        zones_dir = Path(self.COREDNS_ZONES_DIR)
-        zones_dir.mkdir(parents=True, exist_ok=True)
+        config_file_path = Path(self.COREDNS_ZONES_DIR) / f"{zone.zone_name}.conf"
+        content = self.generate_zone_config_content(zone)
 
-        # Generate config file path
-        config_file_path = zones_dir / f"{zone.zone_name}.conf"
+        try:
+            await asyncio.to_thread(self._write_if_changed, config_file_path, content)
+            return str(config_file_path)
+        except Exception as e:
+            raise CloudManagerException(f"Failed to write zone config for {zone.zone_name}: {str(e)}")
 
-        # Generate CoreDNS config snippet
-        content = f"""# Zone configuration for {zone.zone_name}
-{zone.zone_name} {{
-    file /etc/coredns/zones/{zone.zone_name}.zone
-    errors
-    log
-}}
-"""
+    async def write_zone(self, zone: DNSZone) -> bool:
+        """
+        Write a zone's file and config snippet if either changed.
 
-        try:
-            # Write config file
-            async with aiofiles.open(config_file_path, 'w') as f:
-                await f.write(content)
+        Args:
+            zone: DNSZone with loaded records
 
-            # Set file permissions
-            os.chmod(config_file_path, 0o644)
+        Returns:
+            True if anything was written, False if both were up to date
 
-            return str(config_file_path)
+        Raises:
+            CloudManagerException: If file write fails
+        """
+        zones_dir = Path(self.COREDNS_ZONES_DIR)
+        zone_content = self.generate_zone_file_content(zone)
+        config_content = self.generate_zone_config_content(zone)
 
+        def write_both() -> bool:
+            # Zone file first: the config snippet references it
+            zone_written = self._write_if_changed(zones_dir / f"{zone.zone_name}.zone", zone_content)
+            config_written = self._write_if_changed(zones_dir / f"{zone.zone_name}.conf", config_content)
+            return zone_written or config_written
+
+        try:
+            return await asyncio.to_thread(write_both)
         except Exception as e:
-            raise CloudManagerException(f"Failed to write zone config for {zone.zone_name}: {str(e)}")
+            raise CloudManagerException(f"Failed to write zone files for {zone.zone_name}: {str(e)}")
 
-    async def delete_zone_files(self, zone_name: str) -> None:
+    async def delete_zone_files(self, zone_name: str) -> bool:
         """
         Delete zone file and config from disk.
 
         Args:
             zone_name: Zone name
+
+        Returns:
+            True if any file was removed
         """
         zones_dir = Path(self.COREDNS_ZONES_DIR)
+        removed = False
 
-        zone_file = zones_dir / f"{zone_name}.zone"
-        config_file = zones_dir / f"{zone_name}.conf"
+        for path in (zones_dir / f"{zone_name}.zone", zones_dir / f"{zone_name}.conf"):
+            self._content_hashes.pop(str(path), None)
+            try:
+                path.unlink()
+                removed = True
+            except FileNotFoundError:
+                pass
 
-        # Delete files if they exist
-        if zone_file.exists():
-            zone_file.unlink()
+        return removed
 
-        if config_file.exists():
-            config_file.unlink()
+    async def remove_zone_from_coredns(self, zone_name: str) -> Dict[str, Any]:
+        """
+        Delete a zone's files and schedule a (coalesced) reload if any existed.
+
+        Args:
+            zone_name: Zone name
+
+        Returns:
+            Reload result dictionary
+        """
+        if not await self.delete_zone_files(zone_name):
+            return {"success": True, "skipped": True, "message": "Zone files already absent"}
+        return await self.request_reload()
 
     # ============================================================================
     # CoreDNS Reload & Health Check
@@ -278,7 +500,7 @@ class CoreDNSConfigService:
 
     async def reload_coredns(self, timeout: int = 10) -> Dict[str, Any]:
         """
-        Trigger CoreDNS configuration reload via HTTP API.
+        Trigger CoreDNS configuration reload via HTTP API immediately.
 
         Args:
             timeout: Request timeout in seconds
@@ -289,34 +511,23 @@ class CoreDNSConfigService:
         Raises:
             CloudManagerException: If reload fails
         """
-        try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(self.COREDNS_RELOAD_URL)
-
-                if response.status_code == 200:
-                    return {
-                        "success": True,
-                        "message": "CoreDNS reloaded successfully",
-                        "status_code": response.status_code
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"CoreDNS reload failed with status {response.status_code}",
-                        "status_code": response.status_code,
-                        "error": response.text
-                    }
-
-        except httpx.TimeoutException:
-            raise CloudManagerException(
-                f"CoreDNS reload timeout after {timeout} seconds",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        except Exception as e:
-            raise CloudManagerException(
-                f"Failed to reload CoreDNS: {str(e)}",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return await post_coredns_reload(self.COREDNS_RELOAD_URL, timeout=timeout)
+
+    async def request_reload(self) -> Dict[str, Any]:
+        """
+        Reload CoreDNS, sharing the reload with other changes in the same window.
+
+        Returns:
+            Reload response dictionary (never raises; failures have success=False)
+        """
+        result = await CoreDNSReloadCoalescer.get_instance(self.COREDNS_RELOAD_URL).request_reload()
+        self._reload_failed[self.COREDNS_RELOAD_URL] = not result["success"]
+        return result
+
+    @property
+    def last_reload_failed(self) -> bool:
+        """Whether this process's last CoreDNS reload failed"""
+        return self._reload_failed.get(self.COREDNS_RELOAD_URL, False)
 
     async def check_coredns_health(self, timeout: int = 5) -> Dict[str, Any]:
         """
@@ -355,6 +566,11 @@ class CoreDNSConfigService:
         """
         Regenerate all active zone files and reload CoreDNS.
 
+        Zones whose generated content matches the file on disk are skipped.
+        CoreDNS is always reloaded, so a regeneration also repairs an earlier
+        failed reload (possibly in another process) that left written files
+        unserved.
+
         Args:
             triggered_by_id: User ID triggering the regeneration
 
@@ -377,36 +593,51 @@ class CoreDNSConfigService:
             # Get all active zones with records
             zones = await self.zone_repo.get_active_zones_for_coredns()
 
-            zones_generated = 0
-            errors = []
+            # Write changed zones in parallel; unchanged ones are skipped by hash
+            semaphore = asyncio.Semaphore(max(1, settings.COREDNS_WRITE_CONCURRENCY))
 
-            # Generate zone files
-            for zone in zones:
-                try:
-                    await self.write_zone_file(zone)
-                    await self.write_zone_config(zone)
-                    zones_generated += 1
-                except Exception as e:
+            async def write(zone: DNSZone) -> bool:
+                async with semaphore:
+                    return await self.write_zone(zone)
+
+            results = await asyncio.gather(*(write(zone) for zone in zones), return_exceptions=True)
+
+            zones_written = 0
+            zones_skipped = 0
+            errors = []
+            for zone, result in zip(zones, results):
+                if isinstance(result, Exception):
                     errors.append({
                         "zone": zone.zone_name,
-                        "error": str(e)
+                        "error": str(result)
                     })
+                elif result:
+                    zones_written += 1
+                else:
+                    zones_skipped += 1
 
-            # Reload CoreDNS
-            reload_result = await self.reload_coredns()
+            reload_result = await self.request_reload()
 
             # Update sync log
             sync_log.status = DNSSyncStatus.SUCCESS if reload_result["success"] else DNSSyncStatus.FAILED
             sync_log.completed_at = datetime.utcnow()
             sync_log.error_message = reload_result.get("error") if not reload_result["success"] else None
+            sync_log.zones_written = zones_written
+            sync_log.zones_skipped = zones_skipped
             await self.sync_log_repo.update(sync_log)
             await self.db.commit()
 
             duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            logger.info(
+                f"Regenerated CoreDNS zones: {zones_written} written, {zones_skipped} unchanged, "
+                f"{len(errors)} failed in {duration_ms}ms"
+            )
 
             return {
                 "success": reload_result["success"],
-                "zones_generated": zones_generated,
+                "zones_generated": zones_written + zones_skipped,
+                "zones_written": zones_written,
+                "zones_skipped": zones_skipped,
                 "zones_failed": len(errors),
                 "errors": errors,
                 "reload_result": reload_result,
@@ -434,6 +665,10 @@ class CoreDNSConfigService:
         """
         Sync a single zone to CoreDNS (write files and reload).
 
+        The reload is skipped if the zone files are unchanged and the last
+        reload succeeded, and is shared with other zone edits made within
+        COREDNS_RELOAD_DEBOUNCE_SECONDS.
+
         Args:
             zone_id: Zone ID
             triggered_by_id: User ID triggering the sync
@@ -460,25 +695,30 @@ class CoreDNSConfigService:
         try:
             # Write zone files
             if zone.status == DNSZoneStatus.ACTIVE:
-                await self.write_zone_file(zone)
-                await self.write_zone_config(zone)
+                changed = await self.write_zone(zone)
             else:
                 # Delete files for non-active zones
-                await self.delete_zone_files(zone.zone_name)
+                changed = await self.delete_zone_files(zone.zone_name)
 
-            # Reload CoreDNS
-            reload_result = await self.reload_coredns()
+            # Reload CoreDNS (shared with other edits in the same window)
+            if changed or self.last_reload_failed:
+                reload_result = await self.request_reload()
+            else:
+                reload_result = {"success": True, "skipped": True, "message": "Zone unchanged"}
 
             # Update sync log
             sync_log.status = DNSSyncStatus.SUCCESS if reload_result["success"] else DNSSyncStatus.FAILED
             sync_log.completed_at = datetime.utcnow()
             sync_log.error_message = reload_result.get("error") if not reload_result["success"] else None
+            sync_log.zones_written = 1 if changed else 0
+            sync_log.zones_skipped = 0 if changed else 1
             await self.sync_log_repo.update(sync_log)
             await self.db.commit()
 
             return {
                 "success": reload_result["success"],
                 "zone_name": zone.zone_name,
+                "changed": changed,
                 "reload_result": reload_result
             }
 
@@ -591,6 +831,8 @@ import /etc/coredns/zones/*.conf
                     "zone_id": log.zone_id,
                     "sync_type": log.sync_type.value,
                     "status": log.status.value,
+                    "zones_written": log.zones_written,
+                    "zones_skipped": log.zones_skipped,
                     "triggered_at": log.triggered_at.isoformat()
                 }
                 for log in recent_syncs
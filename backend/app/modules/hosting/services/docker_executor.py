@@ -0,0 +1,135 @@
+"""
+Docker Executor
+
+Async access layer for the synchronous docker-py SDK. Every blocking Docker
+call made from an `async def` runs on a dedicated, sized thread pool so a slow
+Docker daemon never stalls the event loop, with an optional timeout and
+per-operation latency statistics (also exported to Prometheus).
+"""
+import asyncio
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from app.config.settings import get_settings
+from app.core.prometheus_metrics import DOCKER_API_DURATION
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class DockerOperationStats:
+    """Latency counters for one Docker operation type"""
+    count: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+
+class DockerExecutor:
+    """Process-wide thread pool for blocking Docker SDK calls"""
+
+    _instance: Optional["DockerExecutor"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        """
+        Initialize Docker executor
+
+        Args:
+            max_workers: Thread pool size (defaults to DOCKER_EXECUTOR_WORKERS)
+            default_timeout: Timeout applied when a call does not pass one
+        """
+        self.max_workers = max_workers or settings.DOCKER_EXECUTOR_WORKERS
+        self.default_timeout = default_timeout or settings.DOCKER_CALL_TIMEOUT_SECONDS
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="docker-api")
+        self._stats: Dict[str, DockerOperationStats] = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "DockerExecutor":
+        """Get the process-wide executor"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    async def run(
+        self,
+        operation: str,
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = -1,
+        **kwargs
+    ) -> Any:
+        """
+        Run a blocking Docker call on the pool and await its result
+
+        Args:
+            operation: Name used for latency statistics (e.g. "stats", "exec")
+            fn: Blocking callable
+            timeout: Seconds to wait; -1 uses the default, None waits forever
+
+        Raises:
+            TimeoutError: If the call exceeds the timeout. The worker thread
+                keeps running until Docker answers; only the caller is released.
+        """
+        if timeout == -1:
+            timeout = self.default_timeout
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        started = time.perf_counter()
+        try:
+            if timeout:
+                result = await asyncio.wait_for(future, timeout=timeout)
+            else:
+                result = await future
+        except asyncio.TimeoutError:
+            self._record(operation, time.perf_counter() - started, timed_out=True)
+            raise TimeoutError(f"Docker {operation} timed out after {timeout}s")
+        except Exception:
+            self._record(operation, time.perf_counter() - started, error=True)
+            raise
+
+        self._record(operation, time.perf_counter() - started)
+        return result
+
+    def _record(self, operation: str, seconds: float, error: bool = False, timed_out: bool = False) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(operation, DockerOperationStats())
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if error:
+                stats.errors += 1
+            if timed_out:
+                stats.timeouts += 1
+        outcome = "timeout" if timed_out else "error" if error else "ok"
+        DOCKER_API_DURATION.labels(operation, outcome).observe(seconds)
+        if seconds > 5:
+            logger.warning(f"Slow Docker call: {operation} took {seconds:.2f}s")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Latency statistics per operation since process start"""
+        with self._stats_lock:
+            return {operation: stats.to_dict() for operation, stats in self._stats.items()}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -5,7 +5,6 @@ Low-level Docker operations for VPS container management.
 """
 import os
 import secrets
-import hashlib
 import logging
 import tarfile
 import zipfile
@@ -14,6 +13,7 @@ import shutil
 import json
 import time
 import io
+import threading
 import re
 from pathlib import Path
 from datetime import datetime
@@ -42,6 +42,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.hosting.models import VPSSubscription, ContainerInstance, ContainerStatus
 from app.modules.hosting.repository import ContainerInstanceRepository
+from app.modules.hosting.services.storage_usage_service import StorageUsageService
+from app.modules.hosting.services.stats_stream_service import DockerStatsStream, parse_docker_stats
+from app.modules.hosting.services.docker_executor import DockerExecutor
+from app.modules.hosting.services.fleet_health_service import FleetHealthMonitor, health_from_inspect
 from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -78,35 +82,65 @@ class DockerManagementService:
 
         self.cipher = Fernet(encryption_key.encode())
 
+    # Process-wide Docker client, created and pinged once and shared by all
+    # service instances (each request builds its own DockerManagementService)
+    _shared_client = None
+    _shared_available: Optional[bool] = None
+    _shared_lock = threading.Lock()
+
     def _ensure_docker_client(self):
         """Initialize Docker client if not already initialized (lazy initialization)."""
         if self._client_initialized:
             return
 
+        cls = DockerManagementService
+        with cls._shared_lock:
+            if cls._shared_available is None:
+                cls._shared_client, cls._shared_available = self._connect()
+
+        self._client = cls._shared_client
+        self._docker_available = cls._shared_available
         self._client_initialized = True
 
-        if docker:
-            try:
-                # Connect to Docker socket (or socket proxy in production)
-                # In development: unix:///var/run/docker.sock
-                # In production: tcp://docker-socket-proxy:2375
-                docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
-                self._client = docker.DockerClient(base_url=docker_host)
-                
-                # Actually test the connection by calling a lightweight API method
-                # This will fail immediately if there's a permission or connection issue
-                self._client.ping()
-                
-                self._docker_available = True
-                logger.info(f"Docker client initialized and verified with host: {docker_host}")
-            except Exception as e:
-                logger.warning(f"Docker client not available: {e}")
-                self._client = None
-                self._docker_available = False
-        else:
+    @staticmethod
+    def _connect():
+        """Create and verify a Docker client. Returns (client, available)."""
+        if not docker:
             logger.warning("Docker SDK not installed")
-            self._client = None
-            self._docker_available = False
+            return None, False
+
+        try:
+            # Connect to Docker socket (or socket proxy in production)
+            # In development: unix:///var/run/docker.sock
+            # In production: tcp://docker-socket-proxy:2375
+            docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+            client = docker.DockerClient(
+                base_url=docker_host,
+                timeout=settings.DOCKER_CALL_TIMEOUT_SECONDS,
+                # One pooled connection per executor worker
+                max_pool_size=settings.DOCKER_EXECUTOR_WORKERS
+            )
+
+            # Actually test the connection by calling a lightweight API method
+            # This will fail immediately if there's a permission or connection issue
+            client.ping()
+
+            logger.info(f"Docker client initialized and verified with host: {docker_host}")
+            return client, True
+        except Exception as e:
+            logger.warning(f"Docker client not available: {e}")
+            return None, False
+
+    @classmethod
+    def reset_client(cls):
+        """Forget the shared Docker client so the next access reconnects."""
+        with cls._shared_lock:
+            cls._shared_client = None
+            cls._shared_available = None
+
+    async def _run(self, operation: str, fn, *args, timeout: Optional[float] = -1, **kwargs):
+        """Run a blocking Docker SDK call on the Docker executor."""
+        return await DockerExecutor.get_instance().run(operation, fn, *args, timeout=timeout, **kwargs)
 
     @property
     def client(self):
@@ -120,20 +154,6 @@ class DockerManagementService:
         self._ensure_docker_client()
         return self._docker_available
 
-    def _get_unique_subnet_octet(self, subscription_id: str) -> int:
-        """
-        Generate a unique third octet (1-254) for network subnet based on subscription ID.
-        
-        Uses hash of subscription ID to ensure consistent subnet per subscription
-        while avoiding overlaps between different subscriptions.
-        """
-        # Hash the subscription ID to get a consistent value
-        hash_obj = hashlib.md5(subscription_id.encode())
-        hash_int = int(hash_obj.hexdigest(), 16)
-        # Map to range 1-254 (avoid 0 and 255)
-        octet = (hash_int % 253) + 1
-        return octet
-
     async def create_container(self, subscription: VPSSubscription) -> ContainerInstance:
         """
         Create a fully isolated Docker container with dedicated network and resources.
@@ -156,365 +176,386 @@ class DockerManagementService:
             sub8 = str(subscription.id)[:8]
             container_name = f"vps-{customer8}-{subscription.plan.slug}-{sub8}"
             network_name = f"vps-net-{customer8}-{sub8}"
+            hostname = f"vps-{subscription.plan.slug}-{sub8}"
 
-            # Allocate unique IP and SSH port
-            ip_address = await self.repository.get_next_available_ip()
-            ssh_port = await self.repository.get_next_available_ssh_port()
-            http_port = await self.repository.get_next_available_http_port()
-            logger.info(f"Allocated ports - SSH: {ssh_port}, HTTP: {http_port}")
+            # Lease IP, ports and subnet from the network resource pool
+            resources = await self.repository.allocate_network_resources(str(subscription.id))
+            ip_address = resources["ip_address"]
+            ssh_port = resources["ssh_port"]
+            http_port = resources["http_port"]
+            logger.info(
+                f"Allocated ports - SSH: {ssh_port}, HTTP: {http_port}, "
+                f"subnet: {self.ip_network_base}.{resources['subnet_octet']}.0/24"
+            )
 
-            # Generate root password
-            root_password = self._generate_password()
-            encrypted_password = self._encrypt_password(root_password)
+            # Everything below talks to Docker (image pull, network and container
+            # creation); run it on the executor without a call timeout
+            return await self._run(
+                "create", self._create_container_blocking,
+                subscription, container_name, network_name, hostname, ip_address, ssh_port, http_port,
+                resources["subnet_octet"],
+                timeout=None
+            )
 
-            # Create isolated bridge network with unique subnet per subscription
-            # Use subscription ID hash to ensure unique subnet (avoids overlaps)
-            subnet_octet = self._get_unique_subnet_octet(str(subscription.id))
-            shared_network = None  # Initialize for Docker proxy access
+        except Exception as e:
+            logger.error(f"Failed to create container: {e}")
+            # Attempt cleanup
+            await self._cleanup_failed_container(container_name, network_name)
+            raise
 
-            try:
-                network = self.client.networks.create(
-                    name=network_name,
-                    driver="bridge",
-                    ipam=docker.types.IPAMConfig(
-                        pool_configs=[docker.types.IPAMPool(
-                            subnet=f"{self.ip_network_base}.{subnet_octet}.0/24",
-                            gateway=f"{self.ip_network_base}.{subnet_octet}.1"
-                        )]
-                    ),
-                    internal=False  # Allow internet access
-                )
-                logger.info(f"Created network: {network_name}")
-            except APIError as e:
-                # Check if network already exists
-                if "already exists" in str(e).lower() or "already in use" in str(e).lower():
-                    logger.info(f"Network {network_name} already exists, reusing it")
-                    try:
-                        network = self.client.networks.get(network_name)
-                    except NotFound:
-                        # Network was deleted between creation attempt and get, re-raise original error
-                        logger.error(f"Network {network_name} creation failed and network not found: {e}")
-                        raise
-                else:
-                    # Other API error during creation, re-raise
-                    logger.error(f"Failed to create network {network_name}: {e}")
-                    raise
-            except Exception as e:
-                # Unexpected error, try to get existing network as fallback
-                logger.warning(f"Unexpected error creating network {network_name}: {e}, attempting to get existing network")
+    def _create_container_blocking(
+        self,
+        subscription: VPSSubscription,
+        container_name: str,
+        network_name: str,
+        hostname: str,
+        ip_address: str,
+        ssh_port: int,
+        http_port: int,
+        subnet_octet: int
+    ) -> ContainerInstance:
+        """Blocking Docker part of create_container (runs on the Docker executor)."""
+        # Generate root password
+        root_password = self._generate_password()
+        encrypted_password = self._encrypt_password(root_password)
+
+        # Create isolated bridge network on the subscription's leased /24 subnet
+        shared_network = None  # Initialize for Docker proxy access
+
+        try:
+            network = self.client.networks.create(
+                name=network_name,
+                driver="bridge",
+                ipam=docker.types.IPAMConfig(
+                    pool_configs=[docker.types.IPAMPool(
+                        subnet=f"{self.ip_network_base}.{subnet_octet}.0/24",
+                        gateway=f"{self.ip_network_base}.{subnet_octet}.1"
+                    )]
+                ),
+                internal=False  # Allow internet access
+            )
+            logger.info(f"Created network: {network_name}")
+        except APIError as e:
+            # Check if network already exists
+            if "already exists" in str(e).lower() or "already in use" in str(e).lower():
+                logger.info(f"Network {network_name} already exists, reusing it")
                 try:
                     network = self.client.networks.get(network_name)
-                    logger.info(f"Found existing network: {network_name}")
                 except NotFound:
-                    # Network doesn't exist, re-raise original error
-                    logger.error(f"Network {network_name} does not exist and creation failed: {e}")
+                    # Network was deleted between creation attempt and get, re-raise original error
+                    logger.error(f"Network {network_name} creation failed and network not found: {e}")
                     raise
+            else:
+                # Other API error during creation, re-raise
+                logger.error(f"Failed to create network {network_name}: {e}")
+                raise
+        except Exception as e:
+            # Unexpected error, try to get existing network as fallback
+            logger.warning(f"Unexpected error creating network {network_name}: {e}, attempting to get existing network")
+            try:
+                network = self.client.networks.get(network_name)
+                logger.info(f"Found existing network: {network_name}")
+            except NotFound:
+                # Network doesn't exist, re-raise original error
+                logger.error(f"Network {network_name} does not exist and creation failed: {e}")
+                raise
+
+        # Get cloudmanager-network for Docker proxy access
+        # VPS will connect to this network to access docker-socket-proxy
+        # NOTE: docker-compose usually prefixes network names (e.g. "manil_cloudmanager-network"),
+        # so we try to discover the real network via the proxy container attachments.
+        try:
+            shared_network = None
+            shared_network_name = None
 
-            # Get cloudmanager-network for Docker proxy access
-            # VPS will connect to this network to access docker-socket-proxy
-            # NOTE: docker-compose usually prefixes network names (e.g. "manil_cloudmanager-network"),
-            # so we try to discover the real network via the proxy container attachments.
+            # 1) Direct lookup (works if network was created with explicit name)
             try:
+                shared_network = self.client.networks.get("cloudmanager-network")
+                shared_network_name = "cloudmanager-network"
+            except Exception:
                 shared_network = None
-                shared_network_name = None
 
-                # 1) Direct lookup (works if network was created with explicit name)
+            # 2) Discover via proxy container's networks (handles compose-prefixed names)
+            if not shared_network:
+                proxy_container = None
                 try:
-                    shared_network = self.client.networks.get("cloudmanager-network")
-                    shared_network_name = "cloudmanager-network"
+                    proxy_container = self.client.containers.get("cloudmanager-docker-proxy")
                 except Exception:
-                    shared_network = None
-
-                # 2) Discover via proxy container's networks (handles compose-prefixed names)
-                if not shared_network:
-                    proxy_container = None
                     try:
-                        proxy_container = self.client.containers.get("cloudmanager-docker-proxy")
+                        proxy_container = self.client.containers.get("docker-socket-proxy")
                     except Exception:
-                        try:
-                            proxy_container = self.client.containers.get("docker-socket-proxy")
-                        except Exception:
-                            proxy_container = None
-
-                    proxy_networks = (proxy_container.attrs.get("NetworkSettings", {}).get("Networks", {}) or {}) if proxy_container else {}
-                    if proxy_networks:
-                        # Prefer the expected suffix; otherwise fall back to any network that contains "cloudmanager".
-                        candidates = list(proxy_networks.keys())
-                        preferred = next((n for n in candidates if n.endswith("cloudmanager-network")), None)
-                        if not preferred:
-                            preferred = next((n for n in candidates if "cloudmanager" in n), None)
-                        shared_network_name = preferred or candidates[0]
-                        try:
-                            shared_network = self.client.networks.get(shared_network_name)
-                        except Exception:
-                            shared_network = None
-
-                if shared_network:
-                    logger.info(f"Found shared network '{shared_network_name}', VPS will access host Docker via proxy on this network")
-                else:
-                    logger.warning("Could not locate shared cloudmanager network; Docker proxy access may be unavailable")
-            except NotFound:
-                logger.warning("cloudmanager-network not found, Docker-in-Docker will not be available")
-                shared_network = None
-            except Exception as e:
-                logger.warning(f"Error getting cloudmanager-network: {e}, Docker-in-Docker will not be available")
-                shared_network = None
-
-            # Create persistent volume path
-            volume_path = f"/var/lib/vps-volumes/{container_name}"
-            os.makedirs(volume_path, exist_ok=True)
-
-            # Pull Docker image (subscription override > plan default)
-            docker_image = getattr(subscription, "os_docker_image", None) or subscription.plan.docker_image
-            logger.info(f"Pulling image: {docker_image}")
-            self.client.images.pull(docker_image)
+                        proxy_container = None
 
-            # Prepare hostname
-            hostname = f"vps-{subscription.plan.slug}-{sub8}"
+                proxy_networks = (proxy_container.attrs.get("NetworkSettings", {}).get("Networks", {}) or {}) if proxy_container else {}
+                if proxy_networks:
+                    # Prefer the expected suffix; otherwise fall back to any network that contains "cloudmanager".
+                    candidates = list(proxy_networks.keys())
+                    preferred = next((n for n in candidates if n.endswith("cloudmanager-network")), None)
+                    if not preferred:
+                        preferred = next((n for n in candidates if "cloudmanager" in n), None)
+                    shared_network_name = preferred or candidates[0]
+                    try:
+                        shared_network = self.client.networks.get(shared_network_name)
+                    except Exception:
+                        shared_network = None
 
-            # Command to keep container running and set up SSH
-            # This will: set root password, install/start SSH, then keep running
-            # Note: SSH installation is done here synchronously to avoid apt-get lock conflicts
-            # with later Docker installation
-            container_command = [
-                "/bin/bash", "-c",
-                (
-                    "set -e && "
-                    f"echo 'root:{root_password}' | chpasswd && "
-                    "if ! command -v sshd &> /dev/null || ! command -v nginx &> /dev/null; then "
-                    # Install SSH and Nginx with lock file to prevent conflicts
-                    "flock -x /var/lock/apt-setup.lock -c '"
-                    "DEBIAN_FRONTEND=noninteractive apt-get update -qq && "
-                    "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq openssh-server nginx && "
-                    "rm -rf /var/lib/apt/lists/*"
-                    "'; "
-                    "fi && "
-                    "mkdir -p /var/run/sshd && "
-                    "echo 'PermitRootLogin yes' >> /etc/ssh/sshd_config && "
-                    "echo 'PasswordAuthentication yes' >> /etc/ssh/sshd_config && "
-                    "/usr/sbin/sshd -D & "
-                    "exec tail -f /dev/null"
-                )
-            ]
-            
-            # Create container with HARDENED security configuration
-            # NOTE: When VPS_DOCKER_ENGINE_MODE=dind, Docker-in-Docker requires writable cgroups.
-            # On many hosts (notably Docker Desktop) this effectively requires running the VPS container
-            # with elevated privileges + host cgroup namespace.
-            dind_mode = (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() == "dind"
-            create_kwargs = dict(
-                image=docker_image,
-                name=container_name,
-                hostname=hostname,
-                command=container_command,
-
-                # === RESOURCE LIMITS ===
-                # CPU quota (cores * 100000)
-                cpu_quota=int(subscription.plan.cpu_cores * 100000),
-                # Memory limit
-                mem_limit=f"{subscription.plan.ram_gb}g",
-                # Memory swap limit (same as memory = no swap)
-                memswap_limit=f"{subscription.plan.ram_gb}g",
-                # Storage limit (if supported by storage driver)
-                storage_opt={"size": f"{subscription.plan.storage_gb}g"},
-
-                # === PROCESS LIMITS ===
-                # Prevent fork bombs
-                pids_limit=2048,
-
-                # === ULIMITS ===
-                ulimits=[
-                    docker.types.Ulimit(name='nofile', soft=1024, hard=2048),  # File descriptors
-                    docker.types.Ulimit(name='nproc', soft=512, hard=1024)     # Processes
-                ] if docker else None,
-
-                # === NETWORK ===
-                network=network_name,
-
-                # === PORT MAPPING ===
-                # Map container port 22 to unique host port (SSH)
-                # Map container port 80 to unique host port (HTTP for service domains)
-                ports={
-                    '22/tcp': ssh_port,
-                    '80/tcp': http_port
-                },
-
-                # === VOLUMES ===
-                mounts=[
-                    Mount(target="/data", source=volume_path, type="bind", read_only=False),
-                    # DinD requires writable cgroups for nested container creation (build/run).
-                    # Bind-mount cgroup fs when in DinD mode.
-                    *(
-                        [Mount(target="/sys/fs/cgroup", source="/sys/fs/cgroup", type="bind", read_only=False)]
-                        if dind_mode
-                        else []
-                    ),
-                    # NOTE: Docker socket NOT mounted directly for security
-                    # VPS accesses Docker via docker-socket-proxy over TCP (see DOCKER_HOST env var)
-                ] if Mount else None,
-
-                # === SECURITY HARDENING ===
-                # CRITICAL: Never run as root
-                # user="1000:1000",  # Uncomment if image supports non-root user
-
-                # For Docker-in-Docker support, we need specific capabilities
-                # These allow running Docker inside the VPS while maintaining some security
-                cap_add=[
-                    # Basic capabilities
-                    "CHOWN",           # Change file ownership
-                    "DAC_OVERRIDE",    # Bypass file permissions
-                    "SETGID",          # Set group ID
-                    "SETUID",          # Set user ID
-                    "NET_BIND_SERVICE", # Bind to ports < 1024
-                    # Docker-specific capabilities
-                    "SYS_ADMIN",       # Required for mounting filesystems (Docker volumes)
-                    "NET_ADMIN",       # Required for Docker networking
-                    "SYS_RESOURCE",    # Required for resource management
-                    "MKNOD",           # Required for device creation
-                    "AUDIT_WRITE",     # Required for audit logs
-                    "SYS_CHROOT",      # Required for chroot operations
-                ],
-
-                # Security options - allow some privileges for Docker
-                security_opt=[
-                    # NOTE: no-new-privileges is disabled to allow Docker operations
-                    # The Docker Socket Proxy restricts what operations are allowed
-                    "apparmor:unconfined",  # Required for Docker-in-Docker (use colon, not =)
-                    "seccomp:unconfined"    # Required for Docker-in-Docker (use colon, not =)
-                ],
-
-                # Cgroup namespace - gives container its own cgroup view.
-                # Docker SDK arg name differs by version; we set it below in a compatible way.
-
-                # CRITICAL: Never run in privileged mode
-                # We use capabilities instead for better security
-                # DinD typically requires privileged mode to get writable cgroup controllers on Docker Desktop/Linux.
-                privileged=True if dind_mode else False,
-
-                # NOTE: read_only=True disabled to allow SSH installation at runtime
-                # TODO: Use custom image with SSH pre-installed for better security
-                # read_only=True,
-
-                # Writable /tmp with size limit
-                tmpfs={
-                    '/tmp': 'size=100m,mode=1777',
-                    '/var/tmp': 'size=50m,mode=1777'
-                },
-
-                # === AUTO-RESTART POLICY ===
-                restart_policy={"Name": "unless-stopped"},
-
-                # === HEALTHCHECK ===
-                healthcheck={
-                    # Check if SSH service is running
-                    "test": ["CMD-SHELL", "nc -z localhost 22 || exit 1"],
-                    "interval": 30000000000,    # 30 seconds (nanoseconds)
-                    "timeout": 10000000000,     # 10 seconds
-                    "retries": 3,
-                    "start_period": 60000000000 # 60 seconds grace period
-                },
-
-                # === RUN DETACHED ===
-                detach=True,
-
-                # === ENVIRONMENT VARIABLES ===
-                environment={
-                    "ROOT_PASSWORD": root_password,  # Will be used by entrypoint
-                    "CONTAINER_ID": str(subscription.id)[:8],
-                    "VPS_SUBSCRIPTION_ID": str(subscription.id),
-                    # Docker engine selection:
-                    # - If VPS_DOCKER_ENGINE_MODE=dind, do NOT pin DOCKER_HOST to the host proxy (build must happen inside VPS).
-                    # - Otherwise, default to host Docker proxy for compatibility/performance.
-                    **(
-                        {}
-                        if (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() == "dind"
-                        else {
-                            # Use docker-compose container_name for reliable DNS on the shared network.
-                            "DOCKER_HOST": "tcp://cloudmanager-docker-proxy:2375",
-                            "DOCKER_API_VERSION": "1.41",
-                        }
-                    ),
-                },
-
-                # === LABELS ===
-                labels={
-                    "vps.subscription_id": str(subscription.id),
-                    "vps.customer_id": str(subscription.customer_id),
-                    "vps.plan": subscription.plan.slug,
-                    "vps.managed": "true"
-                }
+            if shared_network:
+                logger.info(f"Found shared network '{shared_network_name}', VPS will access host Docker via proxy on this network")
+            else:
+                logger.warning("Could not locate shared cloudmanager network; Docker proxy access may be unavailable")
+        except NotFound:
+            logger.warning("cloudmanager-network not found, Docker-in-Docker will not be available")
+            shared_network = None
+        except Exception as e:
+            logger.warning(f"Error getting cloudmanager-network: {e}, Docker-in-Docker will not be available")
+            shared_network = None
+
+        # Create persistent volume path
+        volume_path = f"/var/lib/vps-volumes/{container_name}"
+        os.makedirs(volume_path, exist_ok=True)
+
+        # Pull Docker image (subscription override > plan default)
+        docker_image = getattr(subscription, "os_docker_image", None) or subscription.plan.docker_image
+        logger.info(f"Pulling image: {docker_image}")
+        self.client.images.pull(docker_image)
+
+        # Command to keep container running and set up SSH
+        # This will: set root password, install/start SSH, then keep running
+        # Note: SSH installation is done here synchronously to avoid apt-get lock conflicts
+        # with later Docker installation
+        container_command = [
+            "/bin/bash", "-c",
+            (
+                "set -e && "
+                f"echo 'root:{root_password}' | chpasswd && "
+                "if ! command -v sshd &> /dev/null || ! command -v nginx &> /dev/null; then "
+                # Install SSH and Nginx with lock file to prevent conflicts
+                "flock -x /var/lock/apt-setup.lock -c '"
+                "DEBIAN_FRONTEND=noninteractive apt-get update -qq && "
+                "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq openssh-server nginx && "
+                "rm -rf /var/lib/apt/lists/*"
+                "'; "
+                "fi && "
+                "mkdir -p /var/run/sshd && "
+                "echo 'PermitRootLogin yes' >> /etc/ssh/sshd_config && "
+                "echo 'PasswordAuthentication yes' >> /etc/ssh/sshd_config && "
+                "/usr/sbin/sshd -D & "
+                "exec tail -f /dev/null"
             )
+        ]
+
+        # Create container with HARDENED security configuration
+        # NOTE: When VPS_DOCKER_ENGINE_MODE=dind, Docker-in-Docker requires writable cgroups.
+        # On many hosts (notably Docker Desktop) this effectively requires running the VPS container
+        # with elevated privileges + host cgroup namespace.
+        dind_mode = (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() == "dind"
+        create_kwargs = dict(
+            image=docker_image,
+            name=container_name,
+            hostname=hostname,
+            command=container_command,
+
+            # === RESOURCE LIMITS ===
+            # CPU quota (cores * 100000)
+            cpu_quota=int(subscription.plan.cpu_cores * 100000),
+            # Memory limit
+            mem_limit=f"{subscription.plan.ram_gb}g",
+            # Memory swap limit (same as memory = no swap)
+            memswap_limit=f"{subscription.plan.ram_gb}g",
+            # Storage limit (if supported by storage driver)
+            storage_opt={"size": f"{subscription.plan.storage_gb}g"},
+
+            # === PROCESS LIMITS ===
+            # Prevent fork bombs
+            pids_limit=2048,
+
+            # === ULIMITS ===
+            ulimits=[
+                docker.types.Ulimit(name='nofile', soft=1024, hard=2048),  # File descriptors
+                docker.types.Ulimit(name='nproc', soft=512, hard=1024)     # Processes
+            ] if docker else None,
+
+            # === NETWORK ===
+            network=network_name,
+
+            # === PORT MAPPING ===
+            # Map container port 22 to unique host port (SSH)
+            # Map container port 80 to unique host port (HTTP for service domains)
+            ports={
+                '22/tcp': ssh_port,
+                '80/tcp': http_port
+            },
+
+            # === VOLUMES ===
+            mounts=[
+                Mount(target="/data", source=volume_path, type="bind", read_only=False),
+                # DinD requires writable cgroups for nested container creation (build/run).
+                # Bind-mount cgroup fs when in DinD mode.
+                *(
+                    [Mount(target="/sys/fs/cgroup", source="/sys/fs/cgroup", type="bind", read_only=False)]
+                    if dind_mode
+                    else []
+                ),
+                # NOTE: Docker socket NOT mounted directly for security
+                # VPS accesses Docker via docker-socket-proxy over TCP (see DOCKER_HOST env var)
+            ] if Mount else None,
+
+            # === SECURITY HARDENING ===
+            # CRITICAL: Never run as root
+            # user="1000:1000",  # Uncomment if image supports non-root user
+
+            # For Docker-in-Docker support, we need specific capabilities
+            # These allow running Docker inside the VPS while maintaining some security
+            cap_add=[
+                # Basic capabilities
+                "CHOWN",           # Change file ownership
+                "DAC_OVERRIDE",    # Bypass file permissions
+                "SETGID",          # Set group ID
+                "SETUID",          # Set user ID
+                "NET_BIND_SERVICE", # Bind to ports < 1024
+                # Docker-specific capabilities
+                "SYS_ADMIN",       # Required for mounting filesystems (Docker volumes)
+                "NET_ADMIN",       # Required for Docker networking
+                "SYS_RESOURCE",    # Required for resource management
+                "MKNOD",           # Required for device creation
+                "AUDIT_WRITE",     # Required for audit logs
+                "SYS_CHROOT",      # Required for chroot operations
+            ],
+
+            # Security options - allow some privileges for Docker
+            security_opt=[
+                # NOTE: no-new-privileges is disabled to allow Docker operations
+                # The Docker Socket Proxy restricts what operations are allowed
+                "apparmor:unconfined",  # Required for Docker-in-Docker (use colon, not =)
+                "seccomp:unconfined"    # Required for Docker-in-Docker (use colon, not =)
+            ],
+
+            # Cgroup namespace - gives container its own cgroup view.
+            # Docker SDK arg name differs by version; we set it below in a compatible way.
+
+            # CRITICAL: Never run in privileged mode
+            # We use capabilities instead for better security
+            # DinD typically requires privileged mode to get writable cgroup controllers on Docker Desktop/Linux.
+            privileged=True if dind_mode else False,
+
+            # NOTE: read_only=True disabled to allow SSH installation at runtime
+            # TODO: Use custom image with SSH pre-installed for better security
+            # read_only=True,
+
+            # Writable /tmp with size limit
+            tmpfs={
+                '/tmp': 'size=100m,mode=1777',
+                '/var/tmp': 'size=50m,mode=1777'
+            },
+
+            # === AUTO-RESTART POLICY ===
+            restart_policy={"Name": "unless-stopped"},
+
+            # === HEALTHCHECK ===
+            healthcheck={
+                # Check if SSH service is running
+                "test": ["CMD-SHELL", "nc -z localhost 22 || exit 1"],
+                "interval": 30000000000,    # 30 seconds (nanoseconds)
+                "timeout": 10000000000,     # 10 seconds
+                "retries": 3,
+                "start_period": 60000000000 # 60 seconds grace period
+            },
+
+            # === RUN DETACHED ===
+            detach=True,
+
+            # === ENVIRONMENT VARIABLES ===
+            environment={
+                "ROOT_PASSWORD": root_password,  # Will be used by entrypoint
+                "CONTAINER_ID": str(subscription.id)[:8],
+                "VPS_SUBSCRIPTION_ID": str(subscription.id),
+                # Docker engine selection:
+                # - If VPS_DOCKER_ENGINE_MODE=dind, do NOT pin DOCKER_HOST to the host proxy (build must happen inside VPS).
+                # - Otherwise, default to host Docker proxy for compatibility/performance.
+                **(
+                    {}
+                    if (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() == "dind"
+                    else {
+                        # Use docker-compose container_name for reliable DNS on the shared network.
+                        "DOCKER_HOST": "tcp://cloudmanager-docker-proxy:2375",
+                        "DOCKER_API_VERSION": "1.41",
+                    }
+                ),
+            },
+
+            # === LABELS ===
+            labels={
+                "vps.subscription_id": str(subscription.id),
+                "vps.customer_id": str(subscription.customer_id),
+                "vps.plan": subscription.plan.slug,
+                "vps.managed": "true"
+            }
+        )
 
-            if dind_mode:
-                create_kwargs["cgroupns_mode"] = "host"
+        if dind_mode:
+            create_kwargs["cgroupns_mode"] = "host"
 
-            try:
+        try:
+            container = self.client.containers.create(**create_kwargs)
+        except TypeError as e:
+            msg = str(e)
+            if "cgroupns_mode" in msg:
+                create_kwargs.pop("cgroupns_mode", None)
+                create_kwargs["cgroupns"] = "host" if dind_mode else "private"
                 container = self.client.containers.create(**create_kwargs)
-            except TypeError as e:
-                msg = str(e)
-                if "cgroupns_mode" in msg:
-                    create_kwargs.pop("cgroupns_mode", None)
-                    create_kwargs["cgroupns"] = "host" if dind_mode else "private"
-                    container = self.client.containers.create(**create_kwargs)
-                elif "cgroupns" in msg:
-                    create_kwargs.pop("cgroupns_mode", None)
-                    create_kwargs.pop("cgroupns", None)
-                    container = self.client.containers.create(**create_kwargs)
-                else:
-                    raise
+            elif "cgroupns" in msg:
+                create_kwargs.pop("cgroupns_mode", None)
+                create_kwargs.pop("cgroupns", None)
+                container = self.client.containers.create(**create_kwargs)
+            else:
+                raise
 
-            # Start the container
-            container.start()
-            logger.info(f"Container {container_name} started with ID: {container.id}")
+        # Start the container
+        container.start()
+        logger.info(f"Container {container_name} started with ID: {container.id}")
 
-            # Connect to cloudmanager-network for Docker proxy access (if available)
-            if shared_network and (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() != "dind":
+        # Connect to cloudmanager-network for Docker proxy access (if available)
+        if shared_network and (getattr(settings, "VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() != "dind":
+            try:
+                # Add explicit aliases so the VPS can reliably resolve the proxy
+                # regardless of docker-compose service/container_name differences.
+                #
+                # If it's already connected, Docker won't update aliases in-place,
+                # so disconnect/reconnect to enforce aliases.
                 try:
-                    # Add explicit aliases so the VPS can reliably resolve the proxy
-                    # regardless of docker-compose service/container_name differences.
-                    #
-                    # If it's already connected, Docker won't update aliases in-place,
-                    # so disconnect/reconnect to enforce aliases.
-                    try:
-                        shared_network.disconnect(container, force=True)
-                    except Exception:
-                        pass
-                    shared_network.connect(
-                        container,
-                        aliases=["docker-socket-proxy", "cloudmanager-docker-proxy"],
-                    )
-                    logger.info(f"Connected VPS to cloudmanager-network for Docker proxy access")
-                except Exception as e:
-                    logger.warning(f"Could not connect VPS to cloudmanager-network: {e}")
-                    logger.warning("Docker-in-Docker will not be available for this VPS")
-
-            # Create ContainerInstance model
-            instance = ContainerInstance(
-                subscription_id=subscription.id,
-                container_id=container.id,
-                container_name=container_name,
-                ip_address=ip_address,
-                network_name=network_name,
-                hostname=hostname,
-                ssh_port=ssh_port,
-                http_port=http_port,
-                root_password=encrypted_password,
-                status=ContainerStatus.RUNNING,
-                cpu_limit=subscription.plan.cpu_cores,
-                memory_limit_gb=subscription.plan.ram_gb,
-                storage_limit_gb=subscription.plan.storage_gb,
-                data_volume_path=volume_path,
-                first_started_at=datetime.utcnow(),
-                last_started_at=datetime.utcnow()
-            )
-
-            return instance
-
-        except Exception as e:
-            logger.error(f"Failed to create container: {e}")
-            # Attempt cleanup
-            await self._cleanup_failed_container(container_name, network_name)
-            raise
+                    shared_network.disconnect(container, force=True)
+                except Exception:
+                    pass
+                shared_network.connect(
+                    container,
+                    aliases=["docker-socket-proxy", "cloudmanager-docker-proxy"],
+                )
+                logger.info(f"Connected VPS to cloudmanager-network for Docker proxy access")
+            except Exception as e:
+                logger.warning(f"Could not connect VPS to cloudmanager-network: {e}")
+                logger.warning("Docker-in-Docker will not be available for this VPS")
+
+        # Create ContainerInstance model
+        instance = ContainerInstance(
+            subscription_id=subscription.id,
+            container_id=container.id,
+            container_name=container_name,
+            ip_address=ip_address,
+            network_name=network_name,
+            hostname=hostname,
+            ssh_port=ssh_port,
+            http_port=http_port,
+            root_password=encrypted_password,
+            status=ContainerStatus.RUNNING,
+            cpu_limit=subscription.plan.cpu_cores,
+            memory_limit_gb=subscription.plan.ram_gb,
+            storage_limit_gb=subscription.plan.storage_gb,
+            data_volume_path=volume_path,
+            first_started_at=datetime.utcnow(),
+            last_started_at=datetime.utcnow()
+        )
+
+        return instance
 
     async def start_container(self, container_id: str) -> bool:
         """
@@ -529,9 +570,12 @@ class DockerManagementService:
         if not self.docker_available:
             return False
 
-        try:
+        def _start() -> None:
             container = self.client.containers.get(container_id)
             container.start()
+
+        try:
+            await self._run("start", _start)
             logger.info(f"Container {container_id[:12]} started")
             return True
         except Exception as e:
@@ -552,9 +596,12 @@ class DockerManagementService:
         if not self.docker_available:
             return False
 
-        try:
+        def _stop() -> None:
             container = self.client.containers.get(container_id)
             container.stop(timeout=timeout)
+
+        try:
+            await self._run("stop", _stop, timeout=timeout + settings.DOCKER_CALL_TIMEOUT_SECONDS)
             logger.info(f"Container {container_id[:12]} stopped")
             return True
         except Exception as e:
@@ -574,9 +621,12 @@ class DockerManagementService:
         if not self.docker_available:
             return False
 
-        try:
+        def _restart() -> None:
             container = self.client.containers.get(container_id)
             container.restart(timeout=30)
+
+        try:
+            await self._run("restart", _restart, timeout=30 + settings.DOCKER_CALL_TIMEOUT_SECONDS)
             logger.info(f"Container {container_id[:12]} rebooted")
             return True
         except Exception as e:
@@ -598,52 +648,57 @@ class DockerManagementService:
             return False
 
         try:
-            container = self.client.containers.get(container_id)
-
-            # Get network and volume info before deletion
-            attrs = container.attrs
-            networks = list(attrs['NetworkSettings']['Networks'].keys())
-            network_name = networks[0] if networks else None
-
-            # Get volume path
-            mounts = attrs.get('Mounts', [])
-            volume_path = None
-            for mount in mounts:
-                if mount.get('Type') == 'bind' and '/data' in mount.get('Destination', ''):
-                    volume_path = mount.get('Source')
-                    break
-
-            # Stop if running
-            if container.status == 'running':
-                container.stop(timeout=30)
-
-            # Remove container
-            container.remove(force=True)
-            logger.info(f"Container {container_id[:12]} removed")
-
-            # Remove network
-            if network_name:
-                try:
-                    network = self.client.networks.get(network_name)
-                    network.remove()
-                    logger.info(f"Network {network_name} removed")
-                except Exception as e:
-                    logger.warning(f"Could not remove network {network_name}: {e}")
-
-            # Remove volumes
-            if remove_volumes and volume_path:
-                try:
-                    import shutil
-                    shutil.rmtree(volume_path, ignore_errors=True)
-                    logger.info(f"Volume {volume_path} removed")
-                except Exception as e:
-                    logger.warning(f"Could not remove volume {volume_path}: {e}")
-
+            # Stop, remove and volume cleanup can take a while; no call timeout
+            await self._run("delete", self._delete_container_blocking, container_id, remove_volumes, timeout=None)
+            StorageUsageService.forget(container_id)
             return True
         except Exception as e:
             logger.error(f"Failed to delete container {container_id}: {e}")
             return False
 
+    def _delete_container_blocking(self, container_id: str, remove_volumes: bool) -> None:
+        """Blocking part of delete_container (runs on the Docker executor)."""
+        container = self.client.containers.get(container_id)
+
+        # Get network and volume info before deletion
+        attrs = container.attrs
+        networks = list(attrs['NetworkSettings']['Networks'].keys())
+        network_name = networks[0] if networks else None
+
+        # Get volume path
+        mounts = attrs.get('Mounts', [])
+        volume_path = None
+        for mount in mounts:
+            if mount.get('Type') == 'bind' and '/data' in mount.get('Destination', ''):
+                volume_path = mount.get('Source')
+                break
+
+        # Stop if running
+        if container.status == 'running':
+            container.stop(timeout=30)
+
+        # Remove container
+        container.remove(force=True)
+        logger.info(f"Container {container_id[:12]} removed")
+
+        # Remove network
+        if network_name:
+            try:
+                network = self.client.networks.get(network_name)
+                network.remove()
+                logger.info(f"Network {network_name} removed")
+            except Exception as e:
+                logger.warning(f"Could not remove network {network_name}: {e}")
+
+        # Remove volumes
+        if remove_volumes and volume_path:
+            try:
+                import shutil
+                shutil.rmtree(volume_path, ignore_errors=True)
+                logger.info(f"Volume {volume_path} removed")
+            except Exception as e:
+                logger.warning(f"Could not remove volume {volume_path}: {e}")
+
     async def get_container_stats(self, container_id: str) -> Optional[Dict]:
         """
         Fetch real-time resource usage statistics.
@@ -657,74 +712,40 @@ class DockerManagementService:
         if not self.docker_available:
             return None
 
-        try:
-            container = self.client.containers.get(container_id)
-
-            # Get stats snapshot
-            stats = container.stats(stream=False)
-
-            # Parse CPU usage
-            cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - \
-                        stats['precpu_stats']['cpu_usage']['total_usage']
-            system_delta = stats['cpu_stats']['system_cpu_usage'] - \
-                           stats['precpu_stats']['system_cpu_usage']
-            cpu_count = stats['cpu_stats']['online_cpus']
-
-            if system_delta > 0 and cpu_delta > 0:
-                cpu_percent = (cpu_delta / system_delta) * cpu_count * 100.0
-            else:
-                cpu_percent = 0.0
-
-            # Parse memory usage
-            memory_usage = stats['memory_stats'].get('usage', 0)
-            memory_limit = stats['memory_stats'].get('limit', 1)
-            memory_percent = (memory_usage / memory_limit) * 100.0 if memory_limit > 0 else 0.0
-
-            # Parse network I/O
-            network_rx = 0
-            network_tx = 0
-            networks = stats.get('networks', {})
-            for interface, data in networks.items():
-                network_rx += data.get('rx_bytes', 0)
-                network_tx += data.get('tx_bytes', 0)
-
-            # Parse block I/O
-            block_read = 0
-            block_write = 0
-            blkio_stats = stats.get('blkio_stats', {})
-            io_service_bytes = blkio_stats.get('io_service_bytes_recursive', [])
-            for entry in io_service_bytes:
-                if entry.get('op') == 'Read':
-                    block_read += entry.get('value', 0)
-                elif entry.get('op') == 'Write':
-                    block_write += entry.get('value', 0)
-
-            # Process count
-            pids_stats = stats.get('pids_stats', {})
-            process_count = pids_stats.get('current')
+        # Serve from the streaming stats hub when it is following this container
+        stats_stream = DockerStatsStream.get_instance()
+        if stats_stream.running:
+            cached = stats_stream.latest(container_id)
+            if cached:
+                return cached
+            stats_stream.subscribe(container_id)
 
-            return {
-                'cpu_usage_percent': round(cpu_percent, 2),
-                'memory_usage_mb': round(memory_usage / (1024 * 1024), 2),
-                'memory_usage_percent': round(memory_percent, 2),
-                'network_rx_bytes': network_rx,
-                'network_tx_bytes': network_tx,
-                'block_read_bytes': block_read,
-                'block_write_bytes': block_write,
-                'process_count': process_count
-            }
+        # stats(stream=False) blocks until Docker has two samples (~2s), so run
+        # it on the executor to keep the event loop free for parallel callers
+        try:
+            return await self._run("stats", self._read_container_stats, container_id)
         except Exception as e:
             logger.error(f"Failed to get stats for container {container_id}: {e}")
             return None
 
+    def _read_container_stats(self, container_id: str) -> Optional[Dict]:
+        """Blocking stats snapshot + parsing (runs on the Docker executor)."""
+        container = self.client.containers.get(container_id)
+
+        # Get stats snapshot
+        stats = container.stats(stream=False)
+        return parse_docker_stats(stats)
+
     async def get_container_status(self, container_id: str) -> Optional[str]:
         """Get current container status."""
         if not self.docker_available:
             return None
 
+        def _status() -> str:
+            return self.client.containers.get(container_id).status
+
         try:
-            container = self.client.containers.get(container_id)
-            return container.status
+            return await self._run("status", _status)
         except Exception as e:
             logger.error(f"Failed to get status for container {container_id}: {e}")
             return None
@@ -744,9 +765,13 @@ class DockerManagementService:
         if not self.docker_available:
             return None
 
-        try:
+        def _exec() -> tuple:
             container = self.client.containers.get(container_id)
-            exit_code, output = container.exec_run(command, tty=tty)
+            return container.exec_run(command, tty=tty)
+
+        try:
+            # Commands may legitimately run for a long time (package installs)
+            exit_code, output = await self._run("exec", _exec, timeout=None)
             return {
                 'exit_code': exit_code,
                 'output': output.decode('utf-8', errors='replace') if output else ''
@@ -795,6 +820,20 @@ class DockerManagementService:
         archive_path: str,
         target_path: str = "/data",
         extract: bool = True
+    ) -> Dict[str, any]:
+        """Deploy files to container (see _deploy_files_to_container_blocking)."""
+        # Archive extraction and upload can take minutes; no call timeout
+        return await self._run(
+            "deploy_files", self._deploy_files_to_container_blocking,
+            container_id, archive_path, target_path, extract, timeout=None
+        )
+
+    def _deploy_files_to_container_blocking(
+        self,
+        container_id: str,
+        archive_path: str,
+        target_path: str = "/data",
+        extract: bool = True
     ) -> Dict[str, any]:
         """
         Deploy files to container by extracting archive and copying to target path.
@@ -2078,6 +2117,12 @@ class DockerManagementService:
             yield "event: close\ndata: deployment_completed\n\n"
     
     async def install_docker_in_container(self, container_id: str) -> Dict[str, any]:
+        """Install Docker in a container (see _install_docker_in_container_blocking)."""
+        return await self._run(
+            "install_docker", self._install_docker_in_container_blocking, container_id, timeout=None
+        )
+
+    def _install_docker_in_container_blocking(self, container_id: str) -> Dict[str, any]:
         """
         Install Docker and docker-compose in a container.
         
@@ -2520,6 +2565,19 @@ class DockerManagementService:
         compose_file_path: str,
         command: str = "up -d",
         working_dir: str = "/data"
+    ) -> Dict[str, any]:
+        """Run docker-compose in a container (see _run_docker_compose_blocking)."""
+        return await self._run(
+            "compose", self._run_docker_compose_blocking,
+            container_id, compose_file_path, command, working_dir, timeout=None
+        )
+
+    def _run_docker_compose_blocking(
+        self,
+        container_id: str,
+        compose_file_path: str,
+        command: str = "up -d",
+        working_dir: str = "/data"
     ) -> Dict[str, any]:
         """
         Run docker-compose command in container.
@@ -2747,86 +2805,91 @@ class DockerManagementService:
             return []
 
         try:
-            container = self.client.containers.get(container_id)
-            
-            # Check if docker is available inside the VPS container
-            # Try with docker command first, then docker compose/docker-compose
-            ps_prefix = ""
-            for cmd in ["docker", "docker compose", "docker-compose"]:
-                check_result = container.exec_run(f"which {cmd.split()[0]}", user="root")
-                if check_result.exit_code == 0:
-                    ps_prefix = cmd.split()[0] + " "
-                    break
-            
-            if not ps_prefix:
-                logger.warning(f"Docker not found inside VPS container {container_id}")
-                return []
-            
-            # Execute docker ps with formatted output
-            # Format: ID, Image, Status, Ports, Names
-            ps_result = container.exec_run(
-                f"sh -c '{ps_prefix}docker ps --format \"{{{{.ID}}}}\\t{{{{.Image}}}}\\t{{{{.Status}}}}\\t{{{{.Ports}}}}\\t{{{{.Names}}}}\" 2>/dev/null'",
-                user="root"
-            )
-            
-            if ps_result.exit_code != 0 or not ps_result.output:
-                return []
-            
-            output = ps_result.output.decode('utf-8', errors='replace').strip()
-            if not output:
-                return []
-            
-            containers = []
-            for line in output.split('\n'):
-                if not line.strip() or line.startswith('CONTAINER'):
-                    continue
-                    
-                parts = line.split('\t')
-                if len(parts) >= 5:
-                    container_id_short = parts[0][:12]  # Short ID
-                    image = parts[1]
-                    status = parts[2]
-                    ports = parts[3]
-                    name = parts[4]
-                    
-                    # Parse port mappings
-                    ports_parsed = []
-                    if ports and ports != '<none>':
-                        # Parse format: "0.0.0.0:3000->3000/tcp, [::]:3000->3000/tcp"
-                        port_pattern = r'(\d+\.\d+\.\d+\.\d+):(\d+)->(\d+)/(tcp|udp)'
-                        matches = re.findall(port_pattern, ports)
-                        for match in matches:
-                            ports_parsed.append({
-                                'host_ip': match[0],
-                                'host_port': int(match[1]),
-                                'container_port': int(match[2]),
-                                'protocol': match[3],
-                                'display': f"{match[0]}:{match[1]}->{match[2]}/{match[3]}"
-                            })
-                    
-                    containers.append({
-                        'id': container_id_short,
-                        'name': name,
-                        'image': image,
-                        'status': status,
-                        'ports': ports,
-                        'ports_parsed': ports_parsed
-                    })
-            
-            return containers
-            
+            return await self._run("list_vps_containers", self._list_containers_in_vps_blocking, container_id)
         except Exception as e:
             logger.error(f"Failed to list containers in VPS {subscription_id}: {e}", exc_info=True)
             return []
 
+    def _list_containers_in_vps_blocking(self, container_id: str) -> List[Dict[str, Any]]:
+        """Run `docker ps` inside a VPS container and parse it (runs on the Docker executor)."""
+        container = self.client.containers.get(container_id)
+
+        # Check if docker is available inside the VPS container
+        # Try with docker command first, then docker compose/docker-compose
+        ps_prefix = ""
+        for cmd in ["docker", "docker compose", "docker-compose"]:
+            check_result = container.exec_run(f"which {cmd.split()[0]}", user="root")
+            if check_result.exit_code == 0:
+                ps_prefix = cmd.split()[0] + " "
+                break
+
+        if not ps_prefix:
+            logger.warning(f"Docker not found inside VPS container {container_id}")
+            return []
+
+        # Execute docker ps with formatted output
+        # Format: ID, Image, Status, Ports, Names
+        ps_result = container.exec_run(
+            f"sh -c '{ps_prefix}docker ps --format \"{{{{.ID}}}}\\t{{{{.Image}}}}\\t{{{{.Status}}}}\\t{{{{.Ports}}}}\\t{{{{.Names}}}}\" 2>/dev/null'",
+            user="root"
+        )
+
+        if ps_result.exit_code != 0 or not ps_result.output:
+            return []
+
+        output = ps_result.output.decode('utf-8', errors='replace').strip()
+        if not output:
+            return []
+
+        containers = []
+        for line in output.split('\n'):
+            if not line.strip() or line.startswith('CONTAINER'):
+                continue
+
+            parts = line.split('\t')
+            if len(parts) >= 5:
+                container_id_short = parts[0][:12]  # Short ID
+                image = parts[1]
+                status = parts[2]
+                ports = parts[3]
+                name = parts[4]
+
+                # Parse port mappings
+                ports_parsed = []
+                if ports and ports != '<none>':
+                    # Parse format: "0.0.0.0:3000->3000/tcp, [::]:3000->3000/tcp"
+                    port_pattern = r'(\d+\.\d+\.\d+\.\d+):(\d+)->(\d+)/(tcp|udp)'
+                    matches = re.findall(port_pattern, ports)
+                    for match in matches:
+                        ports_parsed.append({
+                            'host_ip': match[0],
+                            'host_port': int(match[1]),
+                            'container_port': int(match[2]),
+                            'protocol': match[3],
+                            'display': f"{match[0]}:{match[1]}->{match[2]}/{match[3]}"
+                        })
+
+                containers.append({
+                    'id': container_id_short,
+                    'name': name,
+                    'image': image,
+                    'status': status,
+                    'ports': ports,
+                    'ports_parsed': ports_parsed
+                })
+
+        return containers
+
     async def get_container_logs(self, container_id: str, tail: int = 100) -> Optional[str]:
         """Get container logs."""
         if not self.docker_available:
             return None
 
+        def _logs() -> bytes:
+            return self.client.containers.get(container_id).logs(tail=tail, timestamps=True)
+
         try:
-            container = self.client.containers.get(container_id)
-            logs = container.logs(tail=tail, timestamps=True)
+            logs = await self._run("logs", _logs)
             return logs.decode('utf-8') if logs else ''
         except Exception as e:
             logger.error(f"Failed to get logs for container {container_id}: {e}")
@@ -2852,9 +2915,11 @@ class DockerManagementService:
         if not self.docker_available:
             return None
 
+        def _inspect() -> Dict:
+            return self.client.containers.get(container_id).attrs
+
         try:
-            container = self.client.containers.get(container_id)
-            return container.attrs
+            return await self._run("inspect", _inspect)
         except Exception as e:
             logger.error(f"Failed to inspect container {container_id}: {e}")
             return None
@@ -2863,6 +2928,9 @@ class DockerManagementService:
         """
         Get container health check status.
 
+        Served from the fleet health snapshot when it is fresh; otherwise the
+        container is inspected.
+
         Returns:
             Dict with health information including:
             - status: 'healthy', 'unhealthy', 'starting', 'none'
@@ -2873,98 +2941,39 @@ class DockerManagementService:
         if not self.docker_available:
             return None
 
+        cached = FleetHealthMonitor.get_instance().cached(container_id)
+        if cached:
+            return cached
+
         try:
             inspect = await self.inspect_container(container_id)
             if not inspect:
                 return None
-
-            state = inspect.get('State', {})
-            health = state.get('Health', {})
-
-            # If no health check configured
-            if not health:
-                return {
-                    'status': 'none',
-                    'message': 'No health check configured'
-                }
-
-            # Get health status
-            status = health.get('Status', 'unknown').lower()
-            failing_streak = health.get('FailingStreak', 0)
-
-            # Get last health check log
-            health_log = health.get('Log', [])
-            last_check = None
-            last_output = None
-
-            if health_log:
-                last_entry = health_log[-1]
-                last_check = last_entry.get('End')
-                last_output = last_entry.get('Output', '').strip()
-                exit_code = last_entry.get('ExitCode', 0)
-
-            return {
-                'status': status,
-                'failing_streak': failing_streak,
-                'last_check': last_check,
-                'last_output': last_output,
-                'is_healthy': status == 'healthy',
-                'needs_attention': status in ['unhealthy', 'starting'] and failing_streak >= 3
-            }
+            return health_from_inspect(inspect)
 
         except Exception as e:
             logger.error(f"Failed to get health for container {container_id}: {e}")
             return None
 
-    async def check_all_container_health(self) -> Dict[str, any]:
+    async def check_all_container_health(self, force: bool = False) -> Dict[str, any]:
         """
         Check health of all running VPS containers.
 
+        Uses one container list call plus concurrent inspects of unhealthy
+        or starting containers; the result is cached briefly (see
+        FleetHealthMonitor).
+
+        Args:
+            force: Ignore a cached snapshot
+
         Returns:
             Dict with summary of health checks
         """
-        from app.modules.hosting.repository import ContainerInstanceRepository
-
         if not self.docker_available:
             return {"error": "Docker not available"}
 
-        repo = ContainerInstanceRepository(self.db)
-        running_containers = await repo.get_running_containers()
-
-        health_summary = {
-            'total': len(running_containers),
-            'healthy': 0,
-            'unhealthy': 0,
-            'starting': 0,
-            'no_healthcheck': 0,
-            'unhealthy_containers': []
-        }
-
-        for container in running_containers:
-            health = await self.get_container_health(container.container_id)
-
-            if not health:
-                continue
-
-            status = health.get('status')
-
-            if status == 'healthy':
-                health_summary['healthy'] += 1
-            elif status == 'unhealthy':
-                health_summary['unhealthy'] += 1
-                health_summary['unhealthy_containers'].append({
-                    'container_id': container.container_id,
-                    'container_name': container.container_name,
-                    'subscription_id': str(container.subscription_id),
-                    'failing_streak': health.get('failing_streak', 0),
-                    'last_output': health.get('last_output')
-                })
-            elif status == 'starting':
-                health_summary['starting'] += 1
-            elif status == 'none':
-                health_summary['no_healthcheck'] += 1
-
-        return health_summary
+        running_containers = await self.repository.get_running_containers()
+        return await FleetHealthMonitor.get_instance().snapshot(self.client, running_containers, force=force)
 
     # Helper methods
 
@@ -3151,6 +3160,10 @@ class DockerManagementService:
             raise
 
     async def _cleanup_failed_container(self, container_name: str, network_name: str):
+        """Cleanup resources after failed container creation."""
+        await self._run("cleanup", self._cleanup_failed_container_blocking, container_name, network_name)
+
+    def _cleanup_failed_container_blocking(self, container_name: str, network_name: str):
         """Cleanup resources after failed container creation."""
         if not self.docker_available:
             return
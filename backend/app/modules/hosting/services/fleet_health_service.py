@@ -0,0 +1,227 @@
+"""
+Fleet Health Monitor
+
+Builds the health picture of every running VPS container from a single
+container list call. The list's status text ("Up 3 hours (unhealthy)")
+already carries each container's health, so only containers that are
+unhealthy or still starting are inspected, for their failing streak and
+last check output. Those inspects run concurrently, up to
+FLEET_HEALTH_INSPECT_CONCURRENCY at a time.
+
+The result is cached for FLEET_HEALTH_CACHE_TTL_SECONDS. Dashboards and
+alerting read that one snapshot, and concurrent callers share a single
+refresh.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.modules.hosting.services.docker_executor import DockerExecutor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def health_from_inspect(inspect: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse a container inspection into a health dict.
+
+    Returns:
+        Dict with status ('healthy', 'unhealthy', 'starting', 'none'),
+        failing_streak, last_check, last_output, is_healthy, needs_attention
+    """
+    health = (inspect.get('State') or {}).get('Health') or {}
+
+    # If no health check configured
+    if not health:
+        return {
+            'status': 'none',
+            'message': 'No health check configured'
+        }
+
+    status = health.get('Status', 'unknown').lower()
+    failing_streak = health.get('FailingStreak', 0)
+
+    last_check = None
+    last_output = None
+    health_log = health.get('Log') or []
+    if health_log:
+        last_entry = health_log[-1]
+        last_check = last_entry.get('End')
+        last_output = (last_entry.get('Output') or '').strip()
+
+    return {
+        'status': status,
+        'failing_streak': failing_streak,
+        'last_check': last_check,
+        'last_output': last_output,
+        'is_healthy': status == 'healthy',
+        'needs_attention': status in ['unhealthy', 'starting'] and failing_streak >= 3
+    }
+
+
+def health_from_summary(summary: Dict[str, Any]) -> Optional[str]:
+    """
+    Health status from a container list entry.
+
+    Returns:
+        'healthy', 'unhealthy', 'starting', 'none', or None if not running
+    """
+    if (summary.get('State') or '').lower() != 'running':
+        return None
+    status_text = (summary.get('Status') or '').lower()
+    if '(unhealthy)' in status_text:
+        return 'unhealthy'
+    if '(health: starting)' in status_text:
+        return 'starting'
+    if '(healthy)' in status_text:
+        return 'healthy'
+    return 'none'
+
+
+class FleetHealthMonitor:
+    """Cached fleet-wide health snapshot for the running event loop"""
+
+    # One monitor per event loop; the in-flight refresh is a loop-bound future
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, FleetHealthMonitor]" = \
+        weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        inspect_concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize fleet health monitor
+
+        Args:
+            ttl_seconds: How long a snapshot is served before refreshing
+            inspect_concurrency: Containers inspected at once during a refresh
+        """
+        self.ttl_seconds = settings.FLEET_HEALTH_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.inspect_concurrency = inspect_concurrency or settings.FLEET_HEALTH_INSPECT_CONCURRENCY
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = 0.0
+        self._refresh: Optional[asyncio.Future] = None
+
+    @classmethod
+    def get_instance(cls) -> "FleetHealthMonitor":
+        """Get the monitor for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with cls._instances_lock:
+            monitor = cls._instances.get(loop)
+            if monitor is None:
+                monitor = cls._instances[loop] = cls()
+            return monitor
+
+    def cached(self, container_id: str) -> Optional[Dict[str, Any]]:
+        """Health of one container from a fresh snapshot, if there is one"""
+        if self._snapshot is None or time.monotonic() - self._snapshot_at > self.ttl_seconds:
+            return None
+        health = self._snapshot['containers'].get(container_id)
+        return dict(health) if health else None
+
+    async def snapshot(self, client, instances: List[Any], force: bool = False) -> Dict[str, Any]:
+        """
+        Fleet health summary, refreshed at most once per TTL.
+
+        Args:
+            client: docker.DockerClient
+            instances: ContainerInstance rows expected to be running
+            force: Refresh even if the cached snapshot is fresh
+
+        Returns:
+            Dict with counts per status, unhealthy_containers and per-container health
+        """
+        if not force and self._snapshot is not None and time.monotonic() - self._snapshot_at <= self.ttl_seconds:
+            return self._snapshot
+
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._build(client, instances))
+        # Shielded so one caller going away does not cancel everyone's refresh
+        return await asyncio.shield(self._refresh)
+
+    async def _build(self, client, instances: List[Any]) -> Dict[str, Any]:
+        executor = DockerExecutor.get_instance()
+        summaries = await executor.run(
+            "list_containers", client.api.containers, all=True, filters={"name": "vps-"}
+        )
+        by_id = {summary['Id']: summary for summary in summaries}
+        by_name = {name.lstrip('/'): summary for summary in summaries for name in (summary.get('Names') or [])}
+
+        health_summary: Dict[str, Any] = {
+            'total': len(instances),
+            'healthy': 0,
+            'unhealthy': 0,
+            'starting': 0,
+            'no_healthcheck': 0,
+            'not_running': 0,
+            'unhealthy_containers': [],
+            'containers': {},
+        }
+
+        semaphore = asyncio.Semaphore(self.inspect_concurrency)
+
+        async def inspect_health(container_id: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    inspect = await executor.run("inspect", client.api.inspect_container, container_id)
+                except Exception as e:
+                    logger.warning(f"Failed to inspect container {container_id[:12]} for health: {e}")
+                    return None
+            return health_from_inspect(inspect)
+
+        to_inspect = []
+        for instance in instances:
+            summary = by_id.get(instance.container_id) or by_name.get(instance.container_name)
+            status = health_from_summary(summary) if summary else None
+            if status is None:
+                health_summary['not_running'] += 1
+            elif status in ('unhealthy', 'starting'):
+                to_inspect.append(instance)
+            elif status == 'healthy':
+                health_summary['containers'][instance.container_id] = {
+                    'status': 'healthy', 'is_healthy': True, 'needs_attention': False
+                }
+            else:
+                health_summary['containers'][instance.container_id] = {
+                    'status': 'none', 'message': 'No health check configured'
+                }
+
+        inspected = await asyncio.gather(*(inspect_health(instance.container_id) for instance in to_inspect))
+        for instance, health in zip(to_inspect, inspected):
+            if health:
+                health_summary['containers'][instance.container_id] = health
+
+        for instance in instances:
+            health = health_summary['containers'].get(instance.container_id)
+            if not health:
+                continue
+            status = health.get('status')
+            if status == 'healthy':
+                health_summary['healthy'] += 1
+            elif status == 'unhealthy':
+                health_summary['unhealthy'] += 1
+                health_summary['unhealthy_containers'].append({
+                    'container_id': instance.container_id,
+                    'container_name': instance.container_name,
+                    'subscription_id': str(instance.subscription_id),
+                    'failing_streak': health.get('failing_streak', 0),
+                    'last_output': health.get('last_output')
+                })
+            elif status == 'starting':
+                health_summary['starting'] += 1
+            elif status == 'none':
+                health_summary['no_healthcheck'] += 1
+
+        health_summary['generated_at'] = datetime.utcnow().isoformat()
+        health_summary['inspected'] = len(to_inspect)
+        self._snapshot = health_summary
+        self._snapshot_at = time.monotonic()
+        return health_summary
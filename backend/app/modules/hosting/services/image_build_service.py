@@ -6,7 +6,7 @@ Handles uploading, validating, building, and scanning custom Docker images.
 
 import os
 import re
-import json
+import asyncio
 import shutil
 import tarfile
 import zipfile
@@ -27,6 +27,7 @@ from app.modules.hosting.models import (
     VPSSubscription,
     ImageBuildStatus
 )
+from app.modules.hosting.services.image_scanner import ImageScanner, ImageScanError
 from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -41,7 +42,7 @@ class DockerImageBuildService:
     - Upload validation (zip/tar, max size)
     - Dockerfile security validation
     - Automated Docker image building
-    - Trivy security scanning
+    - Trivy security scanning (bounded and cached, see ImageScanner)
     - Real-time build logs
     - Version control
     """
@@ -452,6 +453,76 @@ class DockerImageBuildService:
 
             return False, error_msg
 
+    async def build_derivative_image(
+        self,
+        tag: str,
+        dockerfile_content: str,
+        labels: Optional[Dict[str, str]] = None,
+        timeout_seconds: Optional[int] = None
+    ) -> Tuple[bool, str]:
+        """
+        Build a platform-owned image from a generated Dockerfile.
+
+        Unlike build_docker_image() there is no uploaded project or
+        CustomDockerImage record: the Dockerfile is piped to `docker build`
+        without a build context, and the base image is always re-pulled.
+
+        Args:
+            tag: Full image name and tag to build
+            dockerfile_content: Dockerfile text
+            labels: Image labels
+            timeout_seconds: Build timeout (defaults to BUILD_TIMEOUT_SECONDS)
+
+        Returns:
+            Tuple of (success, docker_image_id or error_message)
+        """
+        timeout_seconds = timeout_seconds or self.BUILD_TIMEOUT_SECONDS
+        build_start = datetime.utcnow()
+
+        build_cmd = ["docker", "build", "--pull", "-t", tag]
+        for key, value in (labels or {}).items():
+            build_cmd.extend(["--label", f"{key}={value}"])
+        build_cmd.append("-")
+
+        logger.info(f"Building derivative image {tag}")
+
+        try:
+            result = subprocess.run(
+                build_cmd,
+                input=dockerfile_content,
+                capture_output=True,
+                text=True,
+                timeout=timeout_seconds
+            )
+        except subprocess.TimeoutExpired:
+            error_msg = f"Build timeout after {timeout_seconds} seconds"
+            logger.error(f"Derivative image {tag}: {error_msg}")
+            return False, error_msg
+        except Exception as e:
+            error_msg = f"Build error: {str(e)}"
+            logger.error(f"Derivative image {tag}: {error_msg}")
+            return False, error_msg
+
+        if result.returncode != 0:
+            output = f"{result.stdout or ''}\n{result.stderr or ''}".strip().splitlines()
+            error_msg = "\n".join(output[-20:])  # Last 20 lines
+            logger.error(f"Derivative image build failed for {tag}: {error_msg}")
+            return False, error_msg
+
+        inspect_result = subprocess.run(
+            ["docker", "inspect", "--format={{.Id}}", tag],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if inspect_result.returncode != 0:
+            return False, f"Failed to inspect built image {tag}"
+
+        build_duration = (datetime.utcnow() - build_start).total_seconds()
+        logger.info(f"Derivative image {tag} built in {build_duration:.1f}s")
+
+        return True, inspect_result.stdout.strip()
+
     async def scan_image_security(
         self,
         image: CustomDockerImage
@@ -469,16 +540,11 @@ class DockerImageBuildService:
         await self._update_image_status(image.id, ImageBuildStatus.SCANNING)
 
         full_image_name = f"{image.image_name}:{image.image_tag}"
+        scanner = ImageScanner.get_instance()
 
         try:
             # Check if Trivy is installed
-            trivy_check = subprocess.run(
-                ["which", "trivy"],
-                capture_output=True,
-                timeout=10
-            )
-
-            if trivy_check.returncode != 0:
+            if not scanner.available:
                 logger.warning("Trivy not installed - skipping security scan")
 
                 scan_results = {
@@ -493,69 +559,17 @@ class DockerImageBuildService:
 
             logger.info(f"Scanning image with Trivy: {full_image_name}")
 
-            # Run Trivy scan
-            scan_cmd = [
-                "trivy", "image",
-                "--format", "json",
-                "--severity", "CRITICAL,HIGH,MEDIUM,LOW",
-                "--timeout", "5m",
-                full_image_name
-            ]
-
-            result = subprocess.run(
-                scan_cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-
-            if result.returncode != 0:
-                logger.error(f"Trivy scan failed: {result.stderr}")
-
-                scan_results = {
-                    "status": "error",
-                    "message": f"Scan failed: {result.stderr}",
-                    "vulnerabilities": {}
-                }
-
-                await self._update_scan_results(image.id, scan_results)
-
-                return False, scan_results
-
-            # Parse scan results
-            scan_data = json.loads(result.stdout)
-
-            # Count vulnerabilities by severity
-            vuln_counts = {
-                "CRITICAL": 0,
-                "HIGH": 0,
-                "MEDIUM": 0,
-                "LOW": 0
-            }
-
-            vulnerabilities = []
-
-            for result_item in scan_data.get("Results", []):
-                for vuln in result_item.get("Vulnerabilities", []):
-                    severity = vuln.get("Severity", "UNKNOWN")
-
-                    if severity in vuln_counts:
-                        vuln_counts[severity] += 1
-
-                    vulnerabilities.append({
-                        "id": vuln.get("VulnerabilityID"),
-                        "package": vuln.get("PkgName"),
-                        "severity": severity,
-                        "title": vuln.get("Title", ""),
-                        "fixed_version": vuln.get("FixedVersion", "")
-                    })
+            # Bounded async subprocess; unchanged images/layers come from the scan cache
+            report = await scanner.scan(full_image_name)
+            vuln_counts = report["vulnerabilities_by_severity"]
 
             scan_results = {
                 "status": "completed",
-                "scan_date": datetime.utcnow().isoformat(),
-                "total_vulnerabilities": sum(vuln_counts.values()),
+                "scan_date": report["scan_date"],
+                "total_vulnerabilities": report["total_vulnerabilities"],
                 "vulnerabilities_by_severity": vuln_counts,
-                "vulnerabilities": vulnerabilities[:50]  # Limit to 50 for storage
+                "vulnerabilities": report["vulnerabilities"][:50],  # Limit to 50 for storage
+                "cache": report["cache"]
             }
 
             # Save scan results
@@ -581,7 +595,7 @@ class DockerImageBuildService:
 
             return passed, scan_results
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             error_msg = "Security scan timeout"
             logger.error(error_msg)
 
@@ -595,6 +609,19 @@ class DockerImageBuildService:
 
             return False, scan_results
 
+        except ImageScanError as e:
+            logger.error(f"Trivy scan failed: {e}")
+
+            scan_results = {
+                "status": "error",
+                "message": f"Scan failed: {e}",
+                "vulnerabilities": {}
+            }
+
+            await self._update_scan_results(image.id, scan_results)
+
+            return False, scan_results
+
         except Exception as e:
             error_msg = f"Security scan error: {str(e)}"
             logger.error(error_msg)
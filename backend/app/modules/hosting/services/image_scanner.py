@@ -0,0 +1,260 @@
+"""
+Image Vulnerability Scanner
+
+Runs Trivy against built images without blocking the event loop. Each scan
+is an asyncio subprocess, and at most IMAGE_SCAN_CONCURRENCY run at once.
+Results are cached in Redis for IMAGE_SCAN_CACHE_TTL_SECONDS, since the
+vulnerability DB is refreshed daily:
+
+- By image ID: scanning the same image again returns immediately.
+- By the ChainID of the image's whole layer stack: a rebuild that only
+  changed labels, env or CMD gets a new image ID but the same layers, and
+  reuses the findings without running Trivy. Findings are not cached per
+  layer, since what Trivy reports for a layer depends on the rest of the
+  stack (a later layer can remove or upgrade the package). Images with new
+  layers are scanned with a shared Trivy cache dir, so only those layers
+  are analysed again.
+
+The scanner command is configurable (IMAGE_SCAN_COMMAND), so a local stub
+can stand in for Trivy in tests.
+"""
+import os
+import json
+import time
+import hashlib
+import shlex
+import shutil
+import asyncio
+import logging
+import threading
+import weakref
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config.redis import get_sync_redis
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+
+IMAGE_CACHE_KEY = "hosting:image-scan:image:{image_id}"
+STACK_CACHE_KEY = "hosting:image-scan:stack:{chain_id}"
+
+
+class ImageScanError(Exception):
+    """Scanner failed to produce a report"""
+
+
+def summarize_vulnerabilities(vulnerabilities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scan report (counts by severity plus findings) for a list of findings"""
+    vuln_counts = {severity: 0 for severity in SEVERITIES}
+    for vuln in vulnerabilities:
+        if vuln.get("severity") in vuln_counts:
+            vuln_counts[vuln["severity"]] += 1
+    return {
+        "status": "completed",
+        "scan_date": datetime.utcnow().isoformat(),
+        "total_vulnerabilities": sum(vuln_counts.values()),
+        "vulnerabilities_by_severity": vuln_counts,
+        "vulnerabilities": vulnerabilities,
+    }
+
+
+def chain_id(diff_ids: List[str]) -> Optional[str]:
+    """OCI ChainID of a layer stack (identifies the layers and their order)"""
+    chain = None
+    for diff_id in diff_ids:
+        chain = diff_id if chain is None else "sha256:" + hashlib.sha256(f"{chain} {diff_id}".encode()).hexdigest()
+    return chain
+
+
+def parse_trivy_report(scan_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten Trivy JSON output into findings tagged with their layer DiffID"""
+    vulnerabilities = []
+    for result_item in scan_data.get("Results") or []:
+        for vuln in result_item.get("Vulnerabilities") or []:
+            vulnerabilities.append({
+                "id": vuln.get("VulnerabilityID"),
+                "package": vuln.get("PkgName"),
+                "severity": vuln.get("Severity", "UNKNOWN"),
+                "title": vuln.get("Title", ""),
+                "fixed_version": vuln.get("FixedVersion", ""),
+                "layer": (vuln.get("Layer") or {}).get("DiffID"),
+            })
+    return vulnerabilities
+
+
+class ImageScanner:
+    """Bounded, cached Trivy scans for the running event loop"""
+
+    # One scanner per event loop; the semaphore and in-flight scans are loop-bound
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ImageScanner]" = \
+        weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+
+    # Extra time given to Trivy beyond its own --timeout so it can report it
+    TIMEOUT_GRACE_SECONDS = 30
+
+    def __init__(
+        self,
+        command: Optional[List[str]] = None,
+        docker_command: Optional[List[str]] = None,
+        concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        redis_client=None,
+    ):
+        """
+        Initialize image scanner
+
+        Args:
+            command: Scanner command (defaults to IMAGE_SCAN_COMMAND, i.e. trivy)
+            docker_command: Docker CLI used to read image and layer digests
+            concurrency: Scans run at once
+            timeout_seconds: Per-scan timeout
+            redis_client: Blocking Redis client for the result cache (defaults to get_sync_redis())
+        """
+        self.command = command or shlex.split(settings.IMAGE_SCAN_COMMAND)
+        self.docker_command = docker_command or ["docker"]
+        self.timeout_seconds = timeout_seconds or settings.IMAGE_SCAN_TIMEOUT_SECONDS
+        self._semaphore = asyncio.Semaphore(concurrency or settings.IMAGE_SCAN_CONCURRENCY)
+        self._redis = redis_client
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def get_instance(cls) -> "ImageScanner":
+        """Get the scanner for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with cls._instances_lock:
+            scanner = cls._instances.get(loop)
+            if scanner is None:
+                scanner = cls._instances[loop] = cls()
+            return scanner
+
+    @property
+    def available(self) -> bool:
+        return shutil.which(self.command[0]) is not None
+
+    async def scan(self, image_ref: str) -> Dict[str, Any]:
+        """
+        Scan an image, using cached results where possible.
+
+        Concurrent scans of the same image share one run.
+
+        Args:
+            image_ref: Image name:tag or ID
+
+        Returns:
+            Scan report with status, counts by severity, findings and
+            "cache" ("image", "stack" or "miss")
+
+        Raises:
+            ImageScanError: Scanner or Docker CLI failed
+            asyncio.TimeoutError: Scan exceeded the timeout
+        """
+        image = await self._inspect(image_ref)
+        image_id = image["Id"]
+        diff_ids = (image.get("RootFS") or {}).get("Layers") or []
+
+        future = self._in_flight.get(image_id)
+        if future is None:
+            future = asyncio.ensure_future(self._scan_image(image_ref, image_id, diff_ids))
+            self._in_flight[image_id] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(image_id, None))
+        report = await asyncio.shield(future)
+        return {**report, "vulnerabilities": list(report["vulnerabilities"])}
+
+    async def _scan_image(self, image_ref: str, image_id: str, diff_ids: List[str]) -> Dict[str, Any]:
+        cached = await self._cache_get(IMAGE_CACHE_KEY.format(image_id=image_id))
+        if cached is not None:
+            return {**summarize_vulnerabilities(cached), "image_id": image_id, "cache": "image"}
+
+        stack = chain_id(diff_ids)
+        if stack:
+            cached = await self._cache_get(STACK_CACHE_KEY.format(chain_id=stack))
+            if cached is not None:
+                await self._cache_set(IMAGE_CACHE_KEY.format(image_id=image_id), cached)
+                return {**summarize_vulnerabilities(cached), "image_id": image_id, "cache": "stack"}
+
+        started = time.monotonic()
+        async with self._semaphore:
+            scan_data = await self._run_scanner(image_ref)
+        vulnerabilities = self._merge(parse_trivy_report(scan_data))
+        logger.info(
+            f"Scanned {image_ref} in {time.monotonic() - started:.1f}s: "
+            f"{len(vulnerabilities)} vulnerabilities"
+        )
+
+        await self._cache_set(IMAGE_CACHE_KEY.format(image_id=image_id), vulnerabilities)
+        if stack:
+            await self._cache_set(STACK_CACHE_KEY.format(chain_id=stack), vulnerabilities)
+
+        return {**summarize_vulnerabilities(vulnerabilities), "image_id": image_id, "cache": "miss"}
+
+    @staticmethod
+    def _merge(vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop duplicate findings (same ID and package), most severe first"""
+        seen = set()
+        merged = []
+        rank = {severity: i for i, severity in enumerate(SEVERITIES)}
+        for vuln in sorted(vulnerabilities, key=lambda v: rank.get(v.get("severity"), len(SEVERITIES))):
+            key = (vuln.get("id"), vuln.get("package"))
+            if key not in seen:
+                seen.add(key)
+                merged.append(vuln)
+        return merged
+
+    async def _run(self, *args: str, timeout: Optional[float] = None) -> str:
+        """Run a command; returns stdout or raises ImageScanError."""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            raise ImageScanError(f"{os.path.basename(args[0])} exited with {process.returncode}: {message}")
+        return stdout.decode("utf-8", errors="replace")
+
+    async def _inspect(self, image_ref: str) -> Dict[str, Any]:
+        output = await self._run(*self.docker_command, "image", "inspect", "--format", "{{json .}}", image_ref, timeout=30)
+        return json.loads(output)
+
+    async def _run_scanner(self, image_ref: str) -> Dict[str, Any]:
+        args = [
+            *self.command, "image",
+            "--format", "json",
+            "--severity", ",".join(SEVERITIES),
+            "--timeout", f"{max(int(self.timeout_seconds), 1)}s",
+            "--quiet",
+        ]
+        if settings.IMAGE_SCAN_CACHE_DIR:
+            args.extend(["--cache-dir", settings.IMAGE_SCAN_CACHE_DIR])
+        args.append(image_ref)
+        output = await self._run(*args, timeout=self.timeout_seconds + self.TIMEOUT_GRACE_SECONDS)
+        return json.loads(output)
+
+    async def _cache_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            redis = self._redis or get_sync_redis()
+            raw = await asyncio.to_thread(redis.get, key)
+        except Exception as e:
+            logger.debug(f"Scan cache unavailable: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _cache_set(self, key: str, vulnerabilities: List[Dict[str, Any]]) -> None:
+        try:
+            redis = self._redis or get_sync_redis()
+            await asyncio.to_thread(
+                redis.set, key, json.dumps(vulnerabilities), ex=settings.IMAGE_SCAN_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.debug(f"Failed to cache scan result: {e}")
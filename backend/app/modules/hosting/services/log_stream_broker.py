@@ -0,0 +1,323 @@
+"""
+Container Log Broker
+
+Fans container logs out to any number of live viewers. Each container being
+watched has exactly one upstream Docker log follower, running on its own
+thread, that feeds a bounded ring buffer of recent lines. Viewers subscribe
+to an async queue: a new viewer replays the last `tail` lines from the ring
+and then receives live lines.
+
+A viewer that falls behind does not slow the others. When its queue is full
+the oldest queued lines are dropped and the viewer is told how many it
+missed. The upstream follower is closed as soon as the last viewer leaves.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+try:
+    import docker
+    from docker.errors import NotFound
+except ImportError:
+    docker = None
+    NotFound = Exception
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# ("line", str) | ("dropped", int) | ("error", str) | ("end", None)
+LogEvent = Tuple[str, Any]
+
+
+def split_log_chunk(text: str) -> List[str]:
+    """Split decoded log output into non-empty, stripped lines."""
+    lines = []
+    for line in text.splitlines():
+        line = line.replace('\r', '').strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _line_timestamp(line: str) -> str:
+    # Docker prefixes lines with a fixed-width RFC3339 timestamp, so the
+    # prefixes order correctly as strings
+    return line.split(" ", 1)[0]
+
+
+class LogSubscription:
+    """One viewer's bounded queue of log events"""
+
+    def __init__(self, container_id: str, tail: int, queue_size: int):
+        self.container_id = container_id
+        self.tail = tail
+        self.dropped = 0
+        self._queue: "asyncio.Queue[LogEvent]" = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, event: LogEvent) -> None:
+        """Queue an event, dropping the oldest one if the viewer is behind."""
+        if self._queue.full():
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self._queue.put_nowait(event)
+
+    async def get(self) -> LogEvent:
+        """Next event; a ("dropped", n) event is reported before resuming."""
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return "dropped", dropped
+        return await self._queue.get()
+
+
+class _LogChannel:
+    """One upstream follower, its ring buffer and its viewers"""
+
+    def __init__(self, container_id: str, buffer_size: int):
+        self.container_id = container_id
+        self.lines: deque = deque(maxlen=buffer_size)
+        self.subscribers: Set[LogSubscription] = set()
+        self.backlog_loaded = False
+        self.stop_event = threading.Event()
+        self.stream = None
+        self.thread: Optional[threading.Thread] = None
+
+    def close_upstream(self) -> None:
+        self.stop_event.set()
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Failed to close log stream for {self.container_id[:12]}: {e}")
+
+
+class ContainerLogBroker:
+    """Shared per-container log followers for the running event loop"""
+
+    # One broker per event loop; subscriber queues are loop-bound
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ContainerLogBroker]" = \
+        weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        client=None,
+        buffer_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """
+        Initialize log broker
+
+        Args:
+            client: docker.DockerClient (created from DOCKER_HOST if omitted)
+            buffer_size: Recent lines kept per container for late joiners
+            queue_size: Undelivered lines kept per viewer before dropping
+        """
+        self._client = client
+        self.buffer_size = buffer_size or settings.LOG_STREAM_BUFFER_LINES
+        self.queue_size = queue_size or settings.LOG_STREAM_SUBSCRIBER_QUEUE_SIZE
+        self._channels: Dict[str, _LogChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def get_instance(cls) -> "ContainerLogBroker":
+        """Get the broker for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with cls._instances_lock:
+            broker = cls._instances.get(loop)
+            if broker is None:
+                broker = cls._instances[loop] = cls()
+            return broker
+
+    @property
+    def client(self):
+        if self._client is None and docker:
+            docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+            self._client = docker.DockerClient(base_url=docker_host)
+        return self._client
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Viewers and buffered lines per followed container"""
+        return {
+            container_id[:12]: {
+                "subscribers": len(channel.subscribers),
+                "buffered_lines": len(channel.lines),
+            }
+            for container_id, channel in self._channels.items()
+        }
+
+    def subscribe(self, container_id: str, tail: int = 100) -> LogSubscription:
+        """
+        Start watching a container's logs.
+
+        The first viewer starts the upstream follower; later viewers share
+        it. Always pair with `unsubscribe()`.
+
+        Args:
+            container_id: Docker container ID
+            tail: Recent lines replayed before live lines
+
+        Returns:
+            Subscription to read events from
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = LogSubscription(container_id, tail, self.queue_size)
+
+        channel = self._channels.get(container_id)
+        if channel is None:
+            channel = self._channels[container_id] = _LogChannel(container_id, self.buffer_size)
+            channel.subscribers.add(subscription)
+            channel.thread = threading.Thread(
+                target=self._follow, args=(channel, self._loop),
+                name=f"docker-logs-{container_id[:12]}", daemon=True
+            )
+            channel.thread.start()
+            return subscription
+
+        channel.subscribers.add(subscription)
+        if channel.backlog_loaded and tail:
+            for line in list(channel.lines)[-tail:]:
+                subscription.offer(("line", line))
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        """Stop watching; closes the upstream follower after the last viewer."""
+        channel = self._channels.get(subscription.container_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers:
+            del self._channels[subscription.container_id]
+            channel.close_upstream()
+            logger.debug(f"Closed log follower for {subscription.container_id[:12]} (no viewers left)")
+
+    def _publish(self, channel: _LogChannel, lines: List[str], backlog: bool = False) -> None:
+        """Append lines to the ring and fan them out (runs on the event loop)."""
+        if channel.stop_event.is_set():
+            return
+        channel.lines.extend(lines)
+        if backlog:
+            # Viewers that joined before the backlog arrived get their own tail of it
+            channel.backlog_loaded = True
+            for subscription in channel.subscribers:
+                for line in lines[-subscription.tail:] if subscription.tail else []:
+                    subscription.offer(("line", line))
+            return
+        for subscription in channel.subscribers:
+            for line in lines:
+                subscription.offer(("line", line))
+
+    def _finish(self, channel: _LogChannel, event: LogEvent) -> None:
+        """Upstream ended: notify viewers and forget the channel (runs on the event loop)."""
+        if self._channels.get(channel.container_id) is channel:
+            del self._channels[channel.container_id]
+        for subscription in channel.subscribers:
+            subscription.offer(event)
+
+    def _follow(self, channel: _LogChannel, loop: asyncio.AbstractEventLoop) -> None:
+        """Read one container's logs until stopped (runs in its own thread)."""
+        def post(fn, *args) -> None:
+            try:
+                loop.call_soon_threadsafe(fn, *args)
+            except RuntimeError:
+                # Event loop closed
+                channel.stop_event.set()
+
+        try:
+            container = self.client.containers.get(channel.container_id)
+
+            # Backlog first, then follow from just before it was taken; lines
+            # already in the backlog are filtered out by timestamp
+            since = int(time.time()) - 1
+            backlog = split_log_chunk(
+                container.logs(tail=self.buffer_size, timestamps=True).decode("utf-8", errors="replace")
+            )
+            last_seen = _line_timestamp(backlog[-1]) if backlog else None
+            post(self._publish, channel, backlog, True)
+
+            channel.stream = container.logs(stream=True, follow=True, since=since, timestamps=True)
+            if channel.stop_event.is_set():
+                channel.close_upstream()
+                return
+
+            partial = ""
+            for chunk in channel.stream:
+                if channel.stop_event.is_set():
+                    break
+                if not chunk:
+                    continue
+                text = partial + chunk.decode("utf-8", errors="replace")
+                complete, _, partial = text.rpartition("\n")
+                lines = split_log_chunk(complete)
+                if last_seen is not None:
+                    lines = [line for line in lines if _line_timestamp(line) > last_seen]
+                    if lines:
+                        last_seen = None
+                if lines:
+                    post(self._publish, channel, lines)
+
+            if not channel.stop_event.is_set():
+                if partial.strip():
+                    post(self._publish, channel, split_log_chunk(partial))
+                post(self._finish, channel, ("end", None))
+
+        except NotFound:
+            post(self._finish, channel, ("error", f"Container {channel.container_id[:12]} not found"))
+        except Exception as e:
+            if not channel.stop_event.is_set():
+                logger.error(f"Log stream for {channel.container_id[:12]} failed: {e}")
+                post(self._finish, channel, ("error", str(e)))
+
+
+async def sse_log_stream(
+    container_id: str,
+    tail: int = 100,
+    broker: Optional[ContainerLogBroker] = None,
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one viewer of a container's logs.
+
+    Args:
+        container_id: Docker container ID
+        tail: Recent lines sent before live lines
+        broker: Broker to subscribe through (defaults to the loop's broker)
+
+    Yields:
+        SSE frames: log lines, keepalives, and dropped/error/close events
+    """
+    broker = broker or ContainerLogBroker.get_instance()
+    subscription = broker.subscribe(container_id, tail=tail)
+    try:
+        while True:
+            try:
+                kind, payload = await asyncio.wait_for(
+                    subscription.get(), timeout=settings.LOG_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if kind == "line":
+                yield f"data: {payload}\n\n"
+            elif kind == "dropped":
+                yield f"event: dropped\ndata: {json.dumps({'lines': payload})}\n\n"
+            elif kind == "error":
+                yield f"event: error\ndata: {json.dumps({'error': payload})}\n\n"
+                break
+            else:
+                logger.info(f"Log stream ended for container {container_id}")
+                yield "event: close\ndata: stream_ended\n\n"
+                break
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,210 @@
+"""
+Metrics Partition Service
+
+Maintains the range partitions of `container_metrics` (partitioned by
+`recorded_at` in migration 053). Future partitions are created ahead of time
+and retention detaches and drops whole partitions instead of running a large
+DELETE, so cleanup takes constant time and leaves no bloat behind.
+
+Rows outside every range partition (the maintenance task did not run for
+longer than METRICS_PARTITION_PREMAKE_DAYS) land in the DEFAULT partition
+instead of failing the insert. When the partition for their range is
+created they are moved into it.
+
+On databases where the table is not partitioned (SQLite in tests, or a
+PostgreSQL instance that has not run migration 053) retention falls back to a
+single bulk DELETE.
+"""
+import re
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.modules.hosting.models import ContainerMetrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PARENT_TABLE = "container_metrics"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class MetricsPartition:
+    """One range partition of container_metrics (None bound = MINVALUE/MAXVALUE)"""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    estimated_rows: int = 0
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def partition_name(lower: datetime) -> str:
+    """Partition table name for a range starting at `lower`."""
+    return f"{PARTITION_PREFIX}{lower:%Y%m%d}"
+
+
+class MetricsPartitionService:
+    """Creates and retires container_metrics partitions"""
+
+    def __init__(self, db: Session):
+        """
+        Initialize partition service
+
+        Args:
+            db: Synchronous database session
+        """
+        self.db = db
+
+    def is_partitioned(self) -> bool:
+        """Whether container_metrics is a partitioned table on this database."""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(self.db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+        ), {"table": PARENT_TABLE}).scalar())
+
+    def has_default_partition(self) -> bool:
+        """Whether container_metrics has a DEFAULT partition (migration 053)."""
+        return bool(self.db.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}
+        ).scalar())
+
+    def _default_has_rows(self, lower: datetime, upper: datetime) -> bool:
+        return bool(self.db.execute(text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE recorded_at >= :lower AND recorded_at < :upper LIMIT 1"
+        ), {"lower": lower, "upper": upper}).scalar())
+
+    def _create_partition(self, name: str, lower: datetime, upper: datetime, move_default_rows: bool) -> None:
+        bounds = f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+        if not move_default_rows:
+            self.db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} {bounds}'
+            ))
+            return
+        # PostgreSQL refuses a partition whose range has rows in the DEFAULT
+        # partition: build the table, move those rows into it, then attach it
+        self.db.execute(text(
+            f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        self.db.execute(text(
+            f"WITH moved AS ("
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at >= :lower AND recorded_at < :upper "
+            f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+        ), {"lower": lower, "upper": upper})
+        self.db.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{name}" {bounds}'))
+
+    def list_partitions(self) -> List[MetricsPartition]:
+        """Attached partitions ordered by lower bound."""
+        rows = self.db.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = current_schema()::regnamespace"
+        ), {"table": PARENT_TABLE}).all()
+
+        partitions = []
+        for name, bound, reltuples in rows:
+            match = _BOUND_RE.search(bound or "")
+            if not match:
+                # DEFAULT partition
+                continue
+            partitions.append(MetricsPartition(
+                name=name,
+                lower=_parse_bound(match.group(1)),
+                upper=_parse_bound(match.group(2)),
+                estimated_rows=max(int(reltuples), 0)
+            ))
+        partitions.sort(key=lambda p: p.lower or datetime.min)
+        return partitions
+
+    def ensure_partitions(self, days_ahead: Optional[int] = None, now: Optional[datetime] = None) -> List[str]:
+        """
+        Create partitions so that inserts up to `days_ahead` from now have a home.
+
+        New partitions continue from the highest existing upper bound, so they
+        stay contiguous regardless of when the job runs. Rows that went to the
+        DEFAULT partition meanwhile are moved into the new partitions.
+
+        Returns:
+            Names of created partitions
+        """
+        if not self.is_partitioned():
+            return []
+
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(days=days_ahead if days_ahead is not None else settings.METRICS_PARTITION_PREMAKE_DAYS)
+        step = timedelta(days=settings.METRICS_PARTITION_INTERVAL_DAYS)
+
+        uppers = [p.upper for p in self.list_partitions() if p.upper is not None]
+        lower = max(uppers) if uppers else now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        has_default = self.has_default_partition()
+
+        created = []
+        while lower <= horizon:
+            upper = lower + step
+            name = partition_name(lower)
+            self._create_partition(name, lower, upper, has_default and self._default_has_rows(lower, upper))
+            created.append(name)
+            lower = upper
+        self.db.commit()
+
+        if created:
+            logger.info(f"Created container_metrics partitions: {', '.join(created)}")
+        return created
+
+    def drop_expired(self, retention_days: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """
+        Remove raw metrics older than the retention period.
+
+        Partitions whose whole range is older than the cutoff are detached and
+        dropped; a partition straddling the cutoff is kept until it fully expires.
+        Expired rows in the DEFAULT partition are deleted.
+
+        Returns:
+            Number of rows removed (estimated from planner statistics for dropped partitions)
+        """
+        days = retention_days if retention_days is not None else settings.METRICS_RAW_RETENTION_DAYS
+        cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+
+        if not self.is_partitioned():
+            result = self.db.execute(delete(ContainerMetrics).where(ContainerMetrics.recorded_at < cutoff))
+            self.db.commit()
+            return result.rowcount
+
+        removed = 0
+        if self.has_default_partition():
+            result = self.db.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at < :cutoff"), {"cutoff": cutoff}
+            )
+            self.db.commit()
+            removed += result.rowcount
+
+        for partition in self.list_partitions():
+            if partition.upper is None or partition.upper > cutoff:
+                continue
+            self.db.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"'))
+            self.db.execute(text(f'DROP TABLE "{partition.name}"'))
+            self.db.commit()
+            removed += partition.estimated_rows
+            logger.info(f"Dropped metrics partition {partition.name} (< {partition.upper.isoformat()})")
+        return removed
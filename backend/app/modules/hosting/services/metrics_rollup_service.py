@@ -0,0 +1,217 @@
+"""
+Metrics Rollup Service
+
+Downsamples raw 5-minute ContainerMetrics rows into hourly and daily
+ContainerMetricsRollup rows (min/avg/max/p95 per metric). Rollups are built
+incrementally: each run only processes complete buckets after the newest
+existing rollup, so long-range graphs read a few hundred rows instead of
+thousands and raw history can be dropped early.
+
+Runs from Celery with a synchronous session (SyncSessionLocal).
+"""
+import math
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, delete, insert, func, and_
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.modules.hosting.models import ContainerMetrics, ContainerMetricsRollup, MetricsResolution
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Metrics summarized as min/avg/max/p95 in every rollup row
+ROLLUP_METRICS = (
+    "cpu_usage_percent",
+    "memory_usage_mb",
+    "memory_usage_percent",
+    "network_rx_bytes_per_sec",
+    "network_tx_bytes_per_sec",
+    "block_read_bytes_per_sec",
+    "block_write_bytes_per_sec",
+)
+
+# Point-in-time values taken from the last sample in the bucket
+LAST_VALUE_COLUMNS = (
+    "storage_usage_mb",
+    "storage_usage_percent",
+    "network_rx_bytes",
+    "network_tx_bytes",
+    "block_read_bytes",
+    "block_write_bytes",
+)
+
+BUCKET_SIZES = {
+    MetricsResolution.HOUR: timedelta(hours=1),
+    MetricsResolution.DAY: timedelta(days=1),
+}
+
+
+def summarize(values: Iterable[Optional[float]]) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Summarize samples as (min, avg, max, p95), ignoring missing values.
+
+    p95 uses the nearest-rank method so it is always an observed sample.
+
+    Returns:
+        Tuple of statistics, or None if there are no values
+    """
+    ordered = sorted(v for v in values if v is not None)
+    if not ordered:
+        return None
+    rank = max(math.ceil(0.95 * len(ordered)), 1)
+    return (
+        float(ordered[0]),
+        round(sum(ordered) / len(ordered), 4),
+        float(ordered[-1]),
+        float(ordered[rank - 1]),
+    )
+
+
+def bucket_floor(moment: datetime, resolution: MetricsResolution) -> datetime:
+    """Start of the hour/day bucket containing `moment`."""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if resolution == MetricsResolution.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def aggregate_samples(samples: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Build rollup column values from one container's samples in one bucket.
+
+    Args:
+        samples: Raw metrics rows (anything with ContainerMetrics attributes),
+            ordered by recorded_at
+
+    Returns:
+        Dict of ContainerMetricsRollup column values (without bucket keys)
+    """
+    values: Dict[str, Any] = {"sample_count": len(samples)}
+
+    for metric in ROLLUP_METRICS:
+        stats = summarize(getattr(sample, metric) for sample in samples)
+        for suffix, value in zip(("min", "avg", "max", "p95"), stats or (None,) * 4):
+            values[f"{metric}_{suffix}"] = value
+
+    last = samples[-1]
+    for column in LAST_VALUE_COLUMNS:
+        values[column] = getattr(last, column)
+    process_counts = [s.process_count for s in samples if s.process_count is not None]
+    values["process_count"] = max(process_counts) if process_counts else None
+
+    return values
+
+
+class MetricsRollupService:
+    """Incremental hourly/daily downsampling of container metrics"""
+
+    def __init__(self, db: Session):
+        """
+        Initialize rollup service
+
+        Args:
+            db: Synchronous database session
+        """
+        self.db = db
+
+    def rollup(self, resolution: MetricsResolution, now: Optional[datetime] = None) -> int:
+        """
+        Roll up every complete bucket not yet rolled up.
+
+        Args:
+            resolution: HOUR or DAY
+            now: Current time (defaults to utcnow)
+
+        Returns:
+            Number of rollup rows written
+        """
+        step = BUCKET_SIZES[resolution]
+        end = bucket_floor(now or datetime.utcnow(), resolution)
+
+        # Never look further back than the backfill window, so a quiet fleet
+        # (no new rows, no advancing watermark) does not rescan all history
+        earliest = bucket_floor(end - timedelta(hours=settings.METRICS_ROLLUP_BACKFILL_HOURS), resolution)
+        watermark = self.db.execute(
+            select(func.max(ContainerMetricsRollup.bucket_start)).where(
+                ContainerMetricsRollup.resolution == resolution.value
+            )
+        ).scalar()
+        start = max(watermark + step, earliest) if watermark else earliest
+
+        written = 0
+        bucket_start = start
+        while bucket_start < end:
+            written += self._rollup_bucket(resolution, bucket_start, bucket_start + step)
+            self.db.commit()
+            bucket_start += step
+
+        if written:
+            logger.info(f"Rolled up {written} {resolution.value} metrics rows up to {end.isoformat()}")
+        return written
+
+    def _rollup_bucket(self, resolution: MetricsResolution, bucket_start: datetime, bucket_end: datetime) -> int:
+        """Aggregate raw rows of one bucket (re-running a bucket replaces its rows)"""
+        columns = [getattr(ContainerMetrics, name) for name in (
+            "container_id", "subscription_id", "recorded_at", "process_count",
+            *ROLLUP_METRICS, *LAST_VALUE_COLUMNS
+        )]
+        stmt = (
+            select(*columns)
+            .where(and_(
+                ContainerMetrics.recorded_at >= bucket_start,
+                ContainerMetrics.recorded_at < bucket_end,
+            ))
+            .order_by(ContainerMetrics.container_id, ContainerMetrics.recorded_at)
+            .execution_options(yield_per=5000)
+        )
+
+        rows: List[Dict[str, Any]] = []
+        for container_id, samples in groupby(self.db.execute(stmt), key=lambda row: row.container_id):
+            samples = list(samples)
+            rows.append({
+                "container_id": container_id,
+                "subscription_id": samples[-1].subscription_id,
+                "resolution": resolution.value,
+                "bucket_start": bucket_start,
+                **aggregate_samples(samples),
+            })
+
+        self.db.execute(
+            delete(ContainerMetricsRollup).where(and_(
+                ContainerMetricsRollup.resolution == resolution.value,
+                ContainerMetricsRollup.bucket_start == bucket_start,
+            ))
+        )
+        if rows:
+            self.db.execute(insert(ContainerMetricsRollup), rows)
+        return len(rows)
+
+    def delete_expired(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Delete rollups past their retention period.
+
+        Returns:
+            Deleted row count per resolution
+        """
+        now = now or datetime.utcnow()
+        retention = {
+            MetricsResolution.HOUR: settings.METRICS_HOURLY_RETENTION_DAYS,
+            MetricsResolution.DAY: settings.METRICS_DAILY_RETENTION_DAYS,
+        }
+
+        deleted = {}
+        for resolution, days in retention.items():
+            result = self.db.execute(
+                delete(ContainerMetricsRollup).where(and_(
+                    ContainerMetricsRollup.resolution == resolution.value,
+                    ContainerMetricsRollup.bucket_start < now - timedelta(days=days),
+                ))
+            )
+            deleted[resolution.value] = result.rowcount
+        self.db.commit()
+        return deleted
@@ -4,17 +4,24 @@ Container Monitoring Service.
 Real-time metrics collection, historical data, and resource alerting.
 Enhanced with cgroup metrics and I/O rate calculations.
 """
+import asyncio
+import time
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, cast, String
 
+from app.config.settings import get_settings
 from app.core.exceptions import NotFoundException
 from app.core.logging import logger
+from app.core.prometheus_metrics import METRICS_CYCLE_CONTAINERS, METRICS_CYCLE_DURATION
 from app.modules.hosting.models import (
     ContainerInstance,
     ContainerMetrics,
+    ContainerMetricsRollup,
+    MetricsResolution,
     VPSSubscription,
     SubscriptionStatus,
     ContainerStatus
@@ -22,16 +29,49 @@ from app.modules.hosting.models import (
 from app.modules.hosting.repository import (
     ContainerInstanceRepository,
     ContainerMetricsRepository,
+    ContainerMetricsRollupRepository,
     VPSSubscriptionRepository
 )
 from app.modules.hosting.services.docker_service import DockerManagementService
-from app.modules.hosting.services.cgroup_service import CgroupMonitoringService
+from app.modules.hosting.services.cgroup_service import CgroupMonitoringService, CgroupMetrics
+from app.modules.hosting.services.storage_usage_service import StorageUsageService
 from app.infrastructure.email.service import EmailService
 from app.infrastructure.email import templates
 from app.infrastructure.sms.service import SMSService
 from app.modules.notifications.service import user_id_by_email
 from app.modules.settings.service import UserNotificationPreferencesService
 
+settings = get_settings()
+
+
+@dataclass
+class ContainerSample:
+    """Raw resource usage read for one container, before rate calculation."""
+    stats: Dict[str, Any]
+    cgroup_metrics: Optional[CgroupMetrics]
+    storage_used_mb: float
+    storage_percent: float
+    sampled_at: datetime
+    storage_source: Optional[str] = None
+    storage_measured_at: Optional[datetime] = None
+
+
+@dataclass
+class MetricsCollectionCycle:
+    """Summary of one fleet-wide metrics collection cycle."""
+    started_at: datetime
+    total: int = 0
+    collected: int = 0
+    skipped: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    duration_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["started_at"] = self.started_at.isoformat()
+        return data
+
 
 class ContainerMonitoringService:
     """Service for container metrics collection and monitoring."""
@@ -41,14 +81,18 @@ class ContainerMonitoringService:
         self.db = db
         self.container_repo = ContainerInstanceRepository(db)
         self.metrics_repo = ContainerMetricsRepository(db)
+        self.rollup_repo = ContainerMetricsRollupRepository(db)
         self.subscription_repo = VPSSubscriptionRepository(db)
         self.docker_service = DockerManagementService(db)
         self.cgroup_service = CgroupMonitoringService()
+        self.storage_service = StorageUsageService(self.docker_service)
         self.email_service = EmailService()
         # Track last notification time per subscription+alert_type to avoid spam
         self._last_alert_notification: Dict[str, datetime] = {}
         # Default metrics collection interval (5 minutes)
         self.collection_interval_seconds = 300
+        # Summary of the most recent run_collection_cycle()
+        self.last_cycle: Optional[MetricsCollectionCycle] = None
 
     async def _get_previous_metrics(self, container_id: str) -> Optional[ContainerMetrics]:
         """
@@ -92,36 +136,76 @@ class ContainerMonitoringService:
         rate_bytes_per_sec = int(delta_bytes / time_delta_seconds)
         return rate_bytes_per_sec
 
-    async def collect_metrics(self, container_id: str) -> Optional[ContainerMetrics]:
+    async def _get_storage_usage(self, container: ContainerInstance) -> Tuple[float, float, Optional[str], Optional[datetime]]:
         """
-        Collect current metrics for a single container.
-        Enhanced with cgroup metrics and I/O rate calculations.
+        Get disk usage of the container's filesystem.
+
+        Prefers the cached host-side measurement (project quota or a walk of
+        the writable layer and data volume). Falls back to `df` inside the
+        container only when no host-side source is available.
 
         Args:
-            container_id: Container instance ID
+            container: Container instance
 
         Returns:
-            Created metrics record or None if collection failed
+            Tuple of (storage_used_mb, storage_percent, source, measured_at)
         """
-        container = await self.container_repo.get_by_id(container_id)
-        if not container:
-            raise NotFoundException(f"Container {container_id} not found")
+        storage_used_mb = 0
+        storage_percent = 0.0
+        source = None
+        measured_at = None
+        storage_limit_mb = container.storage_limit_gb * 1024  # Convert GB to MB
 
-        if container.status != ContainerStatus.RUNNING:
-            logger.debug(f"Container {container_id} is not running, skipping metrics collection")
-            return None
+        try:
+            usage = await self.storage_service.get_usage(container)
+            if usage:
+                storage_used_mb = usage.used_mb
+                source = usage.source
+                measured_at = usage.measured_at
+            else:
+                logger.debug(f"No host-side storage source, using df for container {container.container_id[:12]}")
+                fallback_result = await self.docker_service.exec_command(
+                    container.container_id,
+                    "df -B1 / 2>/dev/null | tail -1 | awk '{print $3}' || echo '0'"
+                )
+                if fallback_result and fallback_result.get('exit_code') == 0:
+                    output = fallback_result.get('output', '').strip()
+                    if output and output.isdigit():
+                        storage_used_mb = round(int(output) / (1024 * 1024), 2)
+                        source = "df"
+                        measured_at = datetime.utcnow()
+                    else:
+                        logger.debug(f"Storage output not numeric for container {container.container_id[:12]}: {output}")
 
-        # Get previous metrics for delta calculation
-        previous_metrics = await self._get_previous_metrics(container_id)
+            # Calculate percentage based on container's storage limit
+            if storage_limit_mb > 0:
+                # Cap at 100% if somehow usage exceeds limit
+                storage_percent = min(round((storage_used_mb / storage_limit_mb) * 100.0, 2), 100.0)
+            else:
+                logger.warning(f"Storage limit is 0 for container {container.container_id[:12]}")
+        except Exception as e:
+            logger.warning(f"Failed to get storage usage for container {container.container_id[:12]}: {e}")
 
-        # Calculate time delta for rate calculations
-        time_delta_seconds = self.collection_interval_seconds
-        if previous_metrics and previous_metrics.recorded_at:
-            actual_delta = datetime.utcnow() - previous_metrics.recorded_at
-            time_delta_seconds = int(actual_delta.total_seconds())
-            if time_delta_seconds <= 0:
-                time_delta_seconds = self.collection_interval_seconds
+        return storage_used_mb, storage_percent, source, measured_at
+
+    async def _sample_container(
+        self,
+        container: ContainerInstance,
+        cgroup_metrics: Optional[CgroupMetrics] = None
+    ) -> Optional[ContainerSample]:
+        """
+        Read raw resource usage for one container (Docker stats, cgroups, storage).
 
+        Does not touch the database, so it is safe to run for many containers
+        concurrently.
+
+        Args:
+            container: Container instance
+            cgroup_metrics: Metrics already read by a fleet scan (read here if None)
+
+        Returns:
+            ContainerSample or None if Docker stats are unavailable
+        """
         # Get stats from Docker API
         stats = await self.docker_service.get_container_stats(container.container_id)
         if not stats:
@@ -129,61 +213,53 @@ class ContainerMonitoringService:
             return None
 
         # Get advanced cgroup metrics (CPU throttling, memory pressure, OOM)
-        cgroup_metrics = None
-        if self.cgroup_service.is_available():
+        if cgroup_metrics is None and self.cgroup_service.is_available():
             try:
                 cgroup_metrics = self.cgroup_service.get_all_metrics(container.container_id)
             except Exception as e:
                 logger.warning(f"Failed to collect cgroup metrics for {container.container_id[:12]}: {e}")
 
-        # Calculate storage usage
-        # Use du to calculate actual disk usage of the container's filesystem
-        storage_used_mb = 0
-        storage_percent = 0.0
-        storage_limit_mb = container.storage_limit_gb * 1024  # Convert GB to MB
-        
-        try:
-            # Use du to get actual disk usage of root filesystem (excluding virtual filesystems)
-            # This gives us the real disk space used by the container
-            # Calculate size of / excluding /proc, /sys, /dev, /run which are virtual filesystems
-            storage_result = await self.docker_service.exec_command(
-                container.container_id,
-                "du -sb / 2>/dev/null | awk '{print $1}' || (du -sb /bin /boot /etc /home /lib /lib64 /opt /root /sbin /srv /tmp /usr /var 2>/dev/null | awk '{sum+=$1} END {print sum+0}') || echo '0'"
-            )
-            if storage_result and storage_result.get('exit_code') == 0:
-                output = storage_result.get('output', '').strip()
-                if output and output.isdigit():
-                    storage_used_bytes = int(output)
-                    storage_used_mb = round(storage_used_bytes / (1024 * 1024), 2)
-                    
-                    # Calculate percentage based on container's storage limit
-                    if storage_limit_mb > 0:
-                        storage_percent = round((storage_used_mb / storage_limit_mb) * 100.0, 2)
-                        # Cap at 100% if somehow usage exceeds limit
-                        if storage_percent > 100.0:
-                            storage_percent = 100.0
-                    else:
-                        logger.warning(f"Storage limit is 0 for container {container.container_id[:12]}")
-                else:
-                    logger.debug(f"Storage output not numeric for container {container.container_id[:12]}: {output}")
-            else:
-                # Fallback: try simpler df command if du fails
-                logger.debug(f"du command failed, trying df fallback for container {container.container_id[:12]}")
-                fallback_result = await self.docker_service.exec_command(
-                    container.container_id,
-                    "df -B1 / 2>/dev/null | tail -1 | awk '{print $3}' || echo '0'"
-                )
-                if fallback_result and fallback_result.get('exit_code') == 0:
-                    output = fallback_result.get('output', '').strip()
-                    if output and output.isdigit():
-                        storage_used_bytes = int(output)
-                        storage_used_mb = round(storage_used_bytes / (1024 * 1024), 2)
-                        if storage_limit_mb > 0:
-                            storage_percent = round((storage_used_mb / storage_limit_mb) * 100.0, 2)
-                            if storage_percent > 100.0:
-                                storage_percent = 100.0
-        except Exception as e:
-            logger.warning(f"Failed to get storage usage for container {container.container_id[:12]}: {e}")
+        storage_used_mb, storage_percent, storage_source, storage_measured_at = \
+            await self._get_storage_usage(container)
+
+        return ContainerSample(
+            stats=stats,
+            cgroup_metrics=cgroup_metrics,
+            storage_used_mb=storage_used_mb,
+            storage_percent=storage_percent,
+            sampled_at=datetime.utcnow(),
+            storage_source=storage_source,
+            storage_measured_at=storage_measured_at
+        )
+
+    def _build_metrics(
+        self,
+        container: ContainerInstance,
+        sample: ContainerSample,
+        previous_metrics: Optional[ContainerMetrics]
+    ) -> ContainerMetrics:
+        """
+        Turn a raw sample into a ContainerMetrics row, deriving I/O rates
+        from the previous sample.
+
+        Args:
+            container: Container instance
+            sample: Raw sample from _sample_container
+            previous_metrics: Previous metrics record for delta calculation
+
+        Returns:
+            Unsaved ContainerMetrics record
+        """
+        stats = sample.stats
+        cgroup_metrics = sample.cgroup_metrics
+
+        # Calculate time delta for rate calculations
+        time_delta_seconds = self.collection_interval_seconds
+        if previous_metrics and previous_metrics.recorded_at:
+            actual_delta = sample.sampled_at - previous_metrics.recorded_at
+            time_delta_seconds = int(actual_delta.total_seconds())
+            if time_delta_seconds <= 0:
+                time_delta_seconds = self.collection_interval_seconds
 
         # Calculate network I/O rates
         network_rx_bytes = stats.get('network_rx_bytes', 0)
@@ -214,15 +290,17 @@ class ContainerMonitoringService:
         )
 
         # Create enhanced metrics record
-        metrics = ContainerMetrics(
+        return ContainerMetrics(
             subscription_id=container.subscription_id,
             container_id=container.id,
             # Basic Docker stats
             cpu_usage_percent=stats.get('cpu_usage_percent', 0.0),
             memory_usage_mb=stats.get('memory_usage_mb', 0.0),
             memory_usage_percent=stats.get('memory_usage_percent', 0.0),
-            storage_usage_mb=storage_used_mb,
-            storage_usage_percent=storage_percent,
+            storage_usage_mb=sample.storage_used_mb,
+            storage_usage_percent=sample.storage_percent,
+            storage_usage_source=sample.storage_source,
+            storage_measured_at=sample.storage_measured_at,
             # Cumulative I/O counters
             network_rx_bytes=network_rx_bytes,
             network_tx_bytes=network_tx_bytes,
@@ -243,9 +321,38 @@ class ContainerMonitoringService:
             memory_pressure_full_avg10=cgroup_metrics.memory_pressure_full_avg10 if cgroup_metrics else None,
             oom_kill_count=cgroup_metrics.oom_kill_count if cgroup_metrics else 0,
             # Timestamp
-            recorded_at=datetime.utcnow()
+            recorded_at=sample.sampled_at
         )
 
+    async def collect_metrics(self, container_id: str) -> Optional[ContainerMetrics]:
+        """
+        Collect current metrics for a single container.
+        Enhanced with cgroup metrics and I/O rate calculations.
+
+        Args:
+            container_id: Container instance ID
+
+        Returns:
+            Created metrics record or None if collection failed
+        """
+        container = await self.container_repo.get_by_id(container_id)
+        if not container:
+            raise NotFoundException(f"Container {container_id} not found")
+
+        if container.status != ContainerStatus.RUNNING:
+            logger.debug(f"Container {container_id} is not running, skipping metrics collection")
+            return None
+
+        # Get previous metrics for delta calculation
+        previous_metrics = await self._get_previous_metrics(container_id)
+
+        sample = await self._sample_container(container)
+        if not sample:
+            return None
+
+        metrics = self._build_metrics(container, sample, previous_metrics)
+        network_rx_rate = metrics.network_rx_bytes_per_sec
+        network_tx_rate = metrics.network_tx_bytes_per_sec
         metrics = await self.metrics_repo.create(metrics)
         await self.db.commit()
 
@@ -259,14 +366,8 @@ class ContainerMonitoringService:
 
         return metrics
 
-    async def collect_all_metrics(self) -> int:
-        """
-        Scheduled task: Collect metrics for all running containers.
-
-        Returns:
-            Number of metrics collected
-        """
-        # Find all active subscriptions with running containers
+    async def _get_running_containers(self, container_ids: Optional[List[str]] = None) -> List[ContainerInstance]:
+        """Get running containers that belong to active subscriptions (optionally limited to `container_ids`)."""
         containers_query = select(ContainerInstance).join(VPSSubscription).where(
             and_(
                 # Compare as string to avoid enum type-name mismatches in PostgreSQL
@@ -274,41 +375,187 @@ class ContainerMonitoringService:
                 ContainerInstance.status == ContainerStatus.RUNNING
             )
         )
+        if container_ids is not None:
+            containers_query = containers_query.where(ContainerInstance.id.in_(container_ids))
 
         result = await self.db.execute(containers_query)
-        containers = result.scalars().all()
+        return list(result.scalars().all())
+
+    async def run_collection_cycle(
+        self,
+        containers: Optional[List[ContainerInstance]] = None,
+        concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        container_ids: Optional[List[str]] = None
+    ) -> MetricsCollectionCycle:
+        """
+        Collect metrics for many containers with bounded parallelism.
+
+        Docker sampling fans out over a pool of `concurrency` workers, each
+        container limited to `timeout_seconds`. The database is touched a
+        constant number of times per cycle: one previous-sample lookup, one
+        bulk insert and one commit.
 
-        collected_count = 0
+        Args:
+            containers: Containers to collect (defaults to all running containers)
+            concurrency: Max containers sampled at once (defaults to settings)
+            timeout_seconds: Per-container sampling timeout (defaults to settings)
+            container_ids: Restrict the default running-container lookup to these
+                IDs (one shard of the fleet); ignored if `containers` is given
 
+        Returns:
+            MetricsCollectionCycle summary
+        """
+        concurrency = max(1, concurrency or settings.METRICS_COLLECTION_CONCURRENCY)
+        timeout_seconds = timeout_seconds or settings.METRICS_COLLECTION_TIMEOUT_SECONDS
+
+        cycle = MetricsCollectionCycle(started_at=datetime.utcnow())
+        started = time.monotonic()
+
+        if containers is None:
+            containers = await self._get_running_containers(container_ids)
+        cycle.total = len(containers)
+
+        # Previous samples are needed for rate calculation; load them for the
+        # whole batch in one query so the parallel phase never touches the session
+        previous_by_container = await self.metrics_repo.get_latest_metrics_by_container(
+            [container.id for container in containers],
+            since=cycle.started_at - timedelta(minutes=settings.METRICS_PREVIOUS_SAMPLE_MAX_AGE_MINUTES)
+        )
+
+        # Read the whole fleet's cgroup files in one pass up front and hand
+        # each container its entry; containers missing from it are read singly
+        fleet_cgroup_metrics: Dict[str, CgroupMetrics] = {}
+        if containers and self.cgroup_service.is_available():
+            try:
+                fleet_cgroup_metrics = await asyncio.to_thread(
+                    self.cgroup_service.scan_fleet,
+                    [container.container_id for container in containers if container.container_id]
+                )
+            except Exception as e:
+                logger.warning(f"cgroup fleet scan failed, falling back to per-container reads: {e}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for container in containers:
+            queue.put_nowait(container)
+        samples: Dict[str, ContainerSample] = {}
+
+        async def worker() -> None:
+            while True:
+                try:
+                    container = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    sample = await asyncio.wait_for(
+                        self._sample_container(
+                            container,
+                            fleet_cgroup_metrics.get(container.container_id)
+                        ),
+                        timeout=timeout_seconds
+                    )
+                    if sample:
+                        samples[container.id] = sample
+                    else:
+                        cycle.skipped += 1
+                except asyncio.TimeoutError:
+                    cycle.timed_out += 1
+                    logger.warning(
+                        f"Metrics collection timed out after {timeout_seconds}s "
+                        f"for container {container.id}"
+                    )
+                except Exception as e:
+                    cycle.failed += 1
+                    logger.error(f"Failed to collect metrics for container {container.id}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(containers)) or 1)))
+
+        new_metrics: List[ContainerMetrics] = []
         for container in containers:
+            sample = samples.get(container.id)
+            if not sample:
+                continue
             try:
-                metrics = await self.collect_metrics(container.id)
-                if metrics:
-                    collected_count += 1
+                new_metrics.append(
+                    self._build_metrics(container, sample, previous_by_container.get(container.id))
+                )
             except Exception as e:
-                logger.error(f"Failed to collect metrics for container {container.id}: {e}")
+                cycle.failed += 1
+                logger.error(f"Failed to build metrics for container {container.id}: {e}")
 
-        logger.info(f"Collected metrics for {collected_count}/{len(containers)} containers")
+        # One bulk insert and one commit for the whole cycle
+        if new_metrics:
+            try:
+                await self.metrics_repo.bulk_create(new_metrics)
+                await self.db.commit()
+                cycle.collected = len(new_metrics)
+            except Exception as e:
+                cycle.failed += len(new_metrics)
+                logger.error(f"Failed to store {len(new_metrics)} metrics rows: {e}")
+                await self.db.rollback()
 
-        return collected_count
+        cycle.duration_seconds = round(time.monotonic() - started, 3)
+        self.last_cycle = cycle
+
+        METRICS_CYCLE_DURATION.labels("shard").observe(cycle.duration_seconds)
+        for outcome in ("collected", "skipped", "timed_out", "failed"):
+            METRICS_CYCLE_CONTAINERS.labels(outcome).inc(getattr(cycle, outcome))
+
+        logger.info(
+            f"Collected metrics for {cycle.collected}/{cycle.total} containers in "
+            f"{cycle.duration_seconds:.2f}s (skipped={cycle.skipped}, "
+            f"timed_out={cycle.timed_out}, failed={cycle.failed})"
+        )
+
+        return cycle
+
+    async def collect_all_metrics(self) -> int:
+        """
+        Scheduled task: Collect metrics for all running containers.
+
+        The full cycle summary is available on `last_cycle` afterwards.
+
+        Returns:
+            Number of metrics collected
+        """
+        cycle = await self.run_collection_cycle()
+        return cycle.collected
 
     async def get_metrics_history(
         self,
         subscription_id: str,
-        hours: int = 24
-    ) -> List[ContainerMetrics]:
+        hours: int = 24,
+        resolution: Optional[MetricsResolution] = None
+    ) -> List[ContainerMetrics | ContainerMetricsRollup]:
         """
         Get historical metrics for graphing.
 
+        Short windows return raw 5-minute rows; longer windows are served from
+        hourly or daily rollups so a graph never loads thousands of rows.
+
         Args:
             subscription_id: Subscription ID
             hours: Number of hours of history to retrieve
+            resolution: Force a resolution instead of choosing from `hours`
 
         Returns:
-            List of metrics records
+            List of metrics records (raw rows or rollups), newest first
         """
-        metrics = await self.metrics_repo.get_recent_metrics(subscription_id, hours=hours)
-        return metrics
+        resolution = resolution or self.resolution_for_window(hours)
+
+        if resolution == MetricsResolution.RAW:
+            return await self.metrics_repo.get_recent_metrics(subscription_id, hours=hours)
+
+        return await self.rollup_repo.get_recent_rollups(subscription_id, resolution, hours=hours)
+
+    @staticmethod
+    def resolution_for_window(hours: int) -> MetricsResolution:
+        """Pick the coarsest resolution that still gives a useful graph for the window."""
+        if hours <= settings.METRICS_HISTORY_RAW_MAX_HOURS:
+            return MetricsResolution.RAW
+        if hours <= settings.METRICS_HISTORY_HOURLY_MAX_HOURS:
+            return MetricsResolution.HOUR
+        return MetricsResolution.DAY
 
     async def get_real_time_stats(self, container_id: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,301 @@
+"""
+Network Resource Allocator
+
+Hands out container IPs, SSH/HTTP host ports and per-subscription /24 subnets
+from `network_resource_pool`, a persisted free list with one row per value.
+
+Allocation locks a single free row with FOR UPDATE SKIP LOCKED, so concurrent
+provisioners each take a different row instead of queueing on a global
+advisory lock, and a rolled-back provisioning simply leaves its rows free.
+Release (on termination) puts the rows back on the free list so ports and
+addresses are reused instead of growing MAX()+1 forever.
+
+A subnet that turns out to be taken outside the pool ("Pool overlaps") is
+blocked: it stays leased to the subscription, so nobody else trips over it,
+but the subscription's subnet is always its one unblocked SUBNET lease.
+
+The pool is filled by seed_network_resource_pool() at API startup, which
+also picks up widened port ranges; allocation only locks and leases rows, so
+provisioning never inserts the ranges inside its own transaction.
+
+The allocator works on a synchronous session and never commits; leases become
+durable with the caller's transaction. Async callers go through
+`ContainerInstanceRepository` (run_sync).
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.modules.hosting.models import (
+    ContainerInstance,
+    ContainerStatus,
+    NetworkResource,
+    NetworkResourceKind,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+IP_NETWORK_BASE = "172.20"
+
+# Subnet octets usable for per-subscription bridge networks (172.20.X.0/24)
+SUBNET_OCTETS = range(1, 254)
+
+
+class ResourceExhaustedError(ValueError):
+    """No free value of a resource kind is left in the pool."""
+
+
+def ip_to_value(ip_address: str) -> int:
+    """172.20.X.Y -> X * 256 + Y"""
+    parts = ip_address.split(".")
+    return int(parts[2]) * 256 + int(parts[3])
+
+
+def value_to_ip(value: int) -> str:
+    """X * 256 + Y -> 172.20.X.Y"""
+    return f"{IP_NETWORK_BASE}.{value // 256}.{value % 256}"
+
+
+def legacy_subnet_octet(subscription_id: str) -> int:
+    """Subnet octet picked by the old hash-based scheme (used to seed existing networks)."""
+    hash_int = int(hashlib.md5(subscription_id.encode()).hexdigest(), 16)
+    return (hash_int % 253) + 1
+
+
+def resource_values(kind: NetworkResourceKind) -> Iterable[int]:
+    """Every value of a kind that the pool should contain."""
+    if kind == NetworkResourceKind.IP:
+        # .0/.1 are network/gateway addresses, .255 broadcast
+        return (third * 256 + fourth for third in range(1, 256) for fourth in range(2, 255))
+    if kind == NetworkResourceKind.SSH_PORT:
+        return range(settings.VPS_SSH_PORT_RANGE_START, settings.VPS_SSH_PORT_RANGE_END + 1)
+    if kind == NetworkResourceKind.HTTP_PORT:
+        return range(settings.VPS_HTTP_PORT_RANGE_START, settings.VPS_HTTP_PORT_RANGE_END + 1)
+    return SUBNET_OCTETS
+
+
+class NetworkResourceAllocator:
+    """Allocates and releases IPs, ports and subnets for subscriptions"""
+
+    def __init__(self, db: Session):
+        """
+        Initialize allocator
+
+        Args:
+            db: Synchronous database session (caller commits)
+        """
+        self.db = db
+
+    def allocate(
+        self,
+        kind: NetworkResourceKind,
+        subscription_id: str,
+        reuse: bool = True
+    ) -> int:
+        """
+        Lease one free value of `kind` to a subscription.
+
+        Args:
+            kind: Resource kind
+            subscription_id: Subscription the value is leased to
+            reuse: Return the subscription's existing lease of this kind if it
+                has one (makes provisioning retries idempotent)
+
+        Returns:
+            Leased value
+
+        Raises:
+            ResourceExhaustedError: If the pool has no free value left (or has
+                not been seeded yet)
+        """
+        if reuse:
+            existing = self.db.execute(
+                select(NetworkResource.value).where(
+                    NetworkResource.kind == kind.value,
+                    NetworkResource.subscription_id == subscription_id,
+                    NetworkResource.blocked.is_(False)
+                ).order_by(NetworkResource.value).limit(1)
+            ).scalar()
+            if existing is not None:
+                return existing
+
+        row = self._lock_free_row(kind)
+        if row is None:
+            raise ResourceExhaustedError(
+                f"No free {kind.value} left in the network resource pool (it is seeded at API startup)"
+            )
+
+        row.subscription_id = subscription_id
+        row.allocated_at = datetime.utcnow()
+        self.db.flush()
+        return row.value
+
+    def _lock_free_row(self, kind: NetworkResourceKind) -> Optional[NetworkResource]:
+        """Lowest free row of a kind, skipping rows other transactions are taking."""
+        return self.db.execute(
+            select(NetworkResource).where(
+                NetworkResource.kind == kind.value,
+                NetworkResource.subscription_id.is_(None)
+            ).order_by(NetworkResource.value).limit(1).with_for_update(skip_locked=True)
+        ).scalars().first()
+
+    def allocate_ip(self, subscription_id: str) -> str:
+        return value_to_ip(self.allocate(NetworkResourceKind.IP, subscription_id))
+
+    def allocate_ssh_port(self, subscription_id: str) -> int:
+        return self.allocate(NetworkResourceKind.SSH_PORT, subscription_id)
+
+    def allocate_http_port(self, subscription_id: str) -> int:
+        return self.allocate(NetworkResourceKind.HTTP_PORT, subscription_id)
+
+    def allocate_subnet(self, subscription_id: str, reuse: bool = True) -> int:
+        """Lease a 172.20.X.0/24 subnet; returns X."""
+        return self.allocate(NetworkResourceKind.SUBNET, subscription_id, reuse=reuse)
+
+    def block_subnet(self, subscription_id: str, octet: int) -> None:
+        """
+        Mark a subscription's subnet lease as taken outside the pool.
+
+        The octet stays leased until release but is no longer returned as the
+        subscription's subnet, so the next allocate_subnet() leases another.
+        """
+        self.db.execute(
+            update(NetworkResource).where(
+                NetworkResource.kind == NetworkResourceKind.SUBNET.value,
+                NetworkResource.value == octet,
+                NetworkResource.subscription_id == subscription_id
+            ).values(blocked=True).execution_options(synchronize_session=False)
+        )
+        logger.warning(f"Subnet 172.20.{octet}.0/24 of subscription {subscription_id} blocked: taken outside the pool")
+
+    def allocate_for_subscription(self, subscription_id: str) -> Dict[str, object]:
+        """Lease everything a new container needs."""
+        return {
+            "ip_address": self.allocate_ip(subscription_id),
+            "ssh_port": self.allocate_ssh_port(subscription_id),
+            "http_port": self.allocate_http_port(subscription_id),
+            "subnet_octet": self.allocate_subnet(subscription_id),
+        }
+
+    def release(self, subscription_id: str, kinds: Optional[List[NetworkResourceKind]] = None) -> int:
+        """
+        Return a subscription's leases to the free list.
+
+        Returns:
+            Number of values released
+        """
+        stmt = update(NetworkResource).where(NetworkResource.subscription_id == subscription_id)
+        if kinds:
+            stmt = stmt.where(NetworkResource.kind.in_([kind.value for kind in kinds]))
+        result = self.db.execute(
+            stmt.values(subscription_id=None, allocated_at=None, blocked=False)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            logger.info(f"Released {result.rowcount} network resources of subscription {subscription_id}")
+        return result.rowcount
+
+    def seed(self, kinds: Optional[List[NetworkResourceKind]] = None) -> int:
+        """
+        Fill the pool with the configured ranges and lease values that live
+        containers already use (first run after upgrading).
+
+        Idempotent: existing rows are left untouched.
+
+        Returns:
+            Number of rows inserted
+        """
+        kinds = kinds or list(NetworkResourceKind)
+        table = NetworkResource.__table__
+        inserted = 0
+
+        for kind in kinds:
+            existing = set(self.db.execute(
+                select(NetworkResource.value).where(NetworkResource.kind == kind.value)
+            ).scalars())
+            rows = [{"kind": kind.value, "value": value} for value in resource_values(kind) if value not in existing]
+            if rows:
+                self.db.execute(self._insert_ignoring_conflicts(table), rows)
+                inserted += len(rows)
+                logger.info(f"Seeded {len(rows)} {kind.value} values into the network resource pool")
+
+        self._lease_values_in_use(kinds)
+        self.db.flush()
+        return inserted
+
+    def _insert_ignoring_conflicts(self, table):
+        """INSERT ... ON CONFLICT DO NOTHING (another worker may be seeding too)."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return table.insert()
+        return insert(table).on_conflict_do_nothing(index_elements=["kind", "value"])
+
+    def _lease_values_in_use(self, kinds: List[NetworkResourceKind]) -> None:
+        """Mark values held by non-terminated containers as leased to their subscription."""
+        containers = self.db.execute(
+            select(
+                ContainerInstance.subscription_id,
+                ContainerInstance.ip_address,
+                ContainerInstance.ssh_port,
+                ContainerInstance.http_port,
+            ).where(ContainerInstance.status != ContainerStatus.TERMINATED)
+        ).all()
+
+        leases = []
+        for subscription_id, ip_address, ssh_port, http_port in containers:
+            values = {
+                NetworkResourceKind.IP: ip_to_value(ip_address) if ip_address else None,
+                NetworkResourceKind.SSH_PORT: ssh_port,
+                NetworkResourceKind.HTTP_PORT: http_port,
+                NetworkResourceKind.SUBNET: legacy_subnet_octet(subscription_id),
+            }
+            for kind in kinds:
+                if values[kind] is not None:
+                    leases.append({"b_kind": kind.value, "b_value": values[kind], "b_subscription": subscription_id})
+
+        if not leases:
+            return
+
+        table = NetworkResource.__table__
+        self.db.execute(
+            table.update().where(and_(
+                table.c.kind == bindparam("b_kind"),
+                table.c.value == bindparam("b_value"),
+                table.c.subscription_id.is_(None)
+            )).values(subscription_id=bindparam("b_subscription"), allocated_at=func.now()),
+            leases
+        )
+
+    def free_counts(self) -> Dict[str, int]:
+        """Free values per kind (for monitoring pool exhaustion)."""
+        rows = self.db.execute(
+            select(NetworkResource.kind, func.count()).where(
+                NetworkResource.subscription_id.is_(None)
+            ).group_by(NetworkResource.kind)
+        ).all()
+        return {kind: count for kind, count in rows}
+
+
+def seed_network_resource_pool() -> int:
+    """
+    Fill the pool in its own transaction (blocking; run at API startup).
+
+    Returns:
+        Number of rows inserted
+    """
+    from app.config.database import SyncSessionLocal
+
+    with SyncSessionLocal() as db:
+        inserted = NetworkResourceAllocator(db).seed()
+        db.commit()
+    return inserted
@@ -2,7 +2,7 @@
 Nginx Proxy Service - Manages nginx configuration for VPS service domains.
 
 Handles dynamic nginx server block generation, configuration file management,
-and nginx container reloads.
+and nginx container reloads (coalesced by NginxReloadCoordinator).
 """
 import os
 import logging
@@ -12,7 +12,11 @@ from pathlib import Path
 import docker
 from docker.errors import DockerException, NotFound
 
+from app.config.settings import get_settings
+from app.modules.hosting.services.nginx_reload_coordinator import NginxReloadCoordinator
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class NginxProxyService:
@@ -21,7 +25,7 @@ class NginxProxyService:
     def __init__(self):
         """Initialize nginx proxy service."""
         self.nginx_sites_dir = Path("/Users/fathallah/projects/manil/nginx/sites-enabled")
-        self.nginx_container_name = "cloudmanager-nginx-proxy"
+        self.nginx_container_name = settings.NGINX_PROXY_CONTAINER_NAME
         self.docker_client = None
 
     def _get_docker_client(self):
@@ -122,8 +126,8 @@ server {{
 
             logger.info(f"Created nginx config for domain: {domain} -> {vps_ip}:{port}")
 
-            # Reload nginx
-            reload_success = await self.reload_nginx()
+            # Reload nginx (shared with other changes made in the same window)
+            reload_success = await self.reload_nginx(reason=f"add {domain}")
 
             if not reload_success:
                 # Rollback: remove config file if reload failed
@@ -158,8 +162,8 @@ server {{
             config_file.unlink()
             logger.info(f"Removed nginx config for domain: {domain}")
 
-            # Reload nginx
-            reload_success = await self.reload_nginx()
+            # Reload nginx (shared with other changes made in the same window)
+            reload_success = await self.reload_nginx(reason=f"remove {domain}")
 
             if not reload_success:
                 logger.error(f"Nginx reload failed after removing {domain}")
@@ -172,38 +176,22 @@ server {{
             logger.error(f"Failed to remove service route for {domain}: {e}", exc_info=True)
             return False
 
-    async def reload_nginx(self) -> bool:
+    async def reload_nginx(self, reason: str = "") -> bool:
         """
-        Reload nginx configuration.
+        Validate and reload nginx configuration.
+
+        Requests made within the debounce window (from any API worker) share
+        a single nginx -t and reload.
+
+        Args:
+            reason: Short description for logs
 
         Returns:
             True if successful, False otherwise
         """
         try:
-            client = self._get_docker_client()
-            container = client.containers.get(self.nginx_container_name)
-
-            # Test configuration first
-            test_result = container.exec_run("nginx -t")
-            if test_result.exit_code != 0:
-                logger.error(f"Nginx config test failed: {test_result.output.decode()}")
-                return False
-
-            # Reload nginx
-            reload_result = container.exec_run("nginx -s reload")
-            if reload_result.exit_code != 0:
-                logger.error(f"Nginx reload failed: {reload_result.output.decode()}")
-                return False
-
-            logger.info("Nginx reloaded successfully")
-            return True
-
-        except NotFound:
-            logger.error(f"Nginx container '{self.nginx_container_name}' not found")
-            return False
-        except DockerException as e:
-            logger.error(f"Docker error during nginx reload: {e}")
-            return False
+            coordinator = NginxReloadCoordinator.get_instance(self.nginx_container_name)
+            return await coordinator.request_reload(reason)
         except Exception as e:
             logger.error(f"Failed to reload nginx: {e}", exc_info=True)
             return False
@@ -262,7 +250,7 @@ server {{
             # which calls add_service_route() for each active domain
 
             # Reload nginx to apply empty configuration
-            return await self.reload_nginx()
+            return await self.reload_nginx(reason="regenerate all routes")
 
         except Exception as e:
             logger.error(f"Failed to regenerate all routes: {e}", exc_info=True)
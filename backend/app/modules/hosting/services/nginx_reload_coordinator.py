@@ -0,0 +1,278 @@
+"""
+Nginx Reload Coordinator
+
+Coalesces reloads of the external nginx proxy. Callers write their config
+files and then `await request_reload()`; requests arriving within a short
+debounce window share a single `nginx -t` + `nginx -s reload`, and every
+caller gets that reload's result.
+
+Across API workers, reloads are serialized by a Redis lock and deduplicated
+with two counters: each request increments `requested` after its files are
+written, and a reload records the `requested` value it covered as `applied`.
+A worker that obtains the lock after another worker already applied its
+generation skips the reload. Without Redis, coalescing is per process.
+"""
+import asyncio
+import time
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import docker
+from docker.errors import DockerException, NotFound
+
+from app.config.redis import get_redis
+from app.config.settings import get_settings
+from app.modules.hosting.services.docker_executor import DockerExecutor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REQUESTED_KEY = "nginx:reload:{container}:requested"
+APPLIED_KEY = "nginx:reload:{container}:applied"
+RESULT_KEY = "nginx:reload:{container}:result"
+LOCK_KEY = "nginx:reload:{container}:lock"
+
+
+@dataclass
+class NginxReloadStats:
+    """Reload counters and latency (request -> reload applied)"""
+    requests: int = 0
+    reloads: int = 0
+    failures: int = 0
+    skipped: int = 0  # Already applied by another worker
+    total_latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+    last_latency_seconds: float = 0.0
+    last_reload_seconds: float = 0.0  # nginx -t + reload itself
+
+    def record_latency(self, seconds: float) -> None:
+        self.total_latency_seconds += seconds
+        self.max_latency_seconds = max(self.max_latency_seconds, seconds)
+        self.last_latency_seconds = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "avg_latency_ms": round(self.total_latency_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_latency_ms": round(self.max_latency_seconds * 1000, 2),
+            "last_latency_ms": round(self.last_latency_seconds * 1000, 2),
+            "last_reload_ms": round(self.last_reload_seconds * 1000, 2),
+        }
+
+
+class NginxReloadCoordinator:
+    """Debounced, coalescing reloads of one nginx container"""
+
+    # One coordinator per (event loop, container); waiters are loop-bound futures
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, NginxReloadCoordinator]]" = \
+        weakref.WeakKeyDictionary()
+    _instances_lock = threading.Lock()
+
+    # Stats are shared by all coordinators in the process
+    _stats: Dict[str, NginxReloadStats] = {}
+
+    def __init__(
+        self,
+        container_name: Optional[str] = None,
+        debounce_seconds: Optional[float] = None,
+        reload_fn: Optional[Callable[[], Tuple[bool, str]]] = None,
+        redis_factory: Optional[Callable[[], Awaitable[Any]]] = get_redis,
+    ):
+        """
+        Initialize reload coordinator
+
+        Args:
+            container_name: nginx container (defaults to NGINX_PROXY_CONTAINER_NAME)
+            debounce_seconds: Window over which requests are collected
+            reload_fn: Blocking test-and-reload returning (ok, output); defaults to docker exec
+            redis_factory: Returns the async Redis client; None disables cross-worker coordination
+        """
+        self.container_name = container_name or settings.NGINX_PROXY_CONTAINER_NAME
+        self.debounce_seconds = settings.NGINX_RELOAD_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self._reload_fn = reload_fn or self._docker_test_and_reload
+        self._redis_factory = redis_factory
+        self._docker_client = None
+        self._waiters: List[Tuple[asyncio.Future, float]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._local_generation = 0
+        self._batch_generation = 0
+        self.stats = self._stats.setdefault(self.container_name, NginxReloadStats())
+
+    @classmethod
+    def get_instance(cls, container_name: Optional[str] = None) -> "NginxReloadCoordinator":
+        """Get the coordinator for a container in the running event loop"""
+        loop = asyncio.get_running_loop()
+        name = container_name or settings.NGINX_PROXY_CONTAINER_NAME
+        with cls._instances_lock:
+            per_loop = cls._instances.setdefault(loop, {})
+            if name not in per_loop:
+                per_loop[name] = cls(container_name=name)
+            return per_loop[name]
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Any]]:
+        """Reload stats per container"""
+        return {name: stats.to_dict() for name, stats in cls._stats.items()}
+
+    def _key(self, template: str) -> str:
+        return template.format(container=self.container_name)
+
+    async def _redis(self):
+        if self._redis_factory is None:
+            return None
+        try:
+            return await self._redis_factory()
+        except Exception as e:
+            logger.debug(f"Redis unavailable for nginx reload coordination: {e}")
+            return None
+
+    async def request_reload(self, reason: str = "") -> bool:
+        """
+        Ask for nginx to be validated and reloaded.
+
+        Call after the config change is on disk. Returns once a reload that
+        includes the change has been applied (here or by another worker).
+
+        Returns:
+            True if nginx -t passed and nginx reloaded
+        """
+        requested_at = time.monotonic()
+        self.stats.requests += 1
+
+        redis = await self._redis()
+        generation = None
+        if redis is not None:
+            try:
+                generation = int(await redis.incr(self._key(REQUESTED_KEY)))
+            except Exception as e:
+                logger.debug(f"Failed to record nginx reload request in Redis: {e}")
+        if generation is None:
+            self._local_generation += 1
+            generation = self._local_generation
+        self._batch_generation = max(self._batch_generation, generation)
+
+        if reason:
+            logger.debug(f"nginx reload requested ({reason})")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((future, requested_at))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return await asyncio.shield(future)
+
+    async def _flush_loop(self) -> None:
+        """Reload once per debounce window while requests keep arriving."""
+        while self._waiters:
+            await asyncio.sleep(self.debounce_seconds)
+            waiters, self._waiters = self._waiters, []
+            generation, self._batch_generation = self._batch_generation, 0
+
+            try:
+                ok = await self._reload_covering(generation)
+            except Exception as e:
+                logger.error(f"Nginx reload failed: {e}", exc_info=True)
+                ok = False
+
+            now = time.monotonic()
+            for future, requested_at in waiters:
+                self.stats.record_latency(now - requested_at)
+                if not future.done():
+                    future.set_result(ok)
+
+            if len(waiters) > 1:
+                logger.info(f"Coalesced {len(waiters)} nginx reload requests into one")
+
+    async def _reload_covering(self, generation: int) -> bool:
+        """Reload unless another worker already applied `generation`."""
+        redis = await self._redis()
+        if redis is None:
+            return await self._reload()
+
+        try:
+            lock = redis.lock(
+                self._key(LOCK_KEY),
+                timeout=settings.NGINX_RELOAD_LOCK_TIMEOUT_SECONDS,
+                blocking_timeout=settings.NGINX_RELOAD_LOCK_TIMEOUT_SECONDS
+            )
+            acquired = await lock.acquire()
+        except Exception as e:
+            logger.warning(f"Redis lock unavailable for nginx reload, reloading without it: {e}")
+            return await self._reload()
+
+        if not acquired:
+            logger.warning("Timed out waiting for the nginx reload lock, reloading anyway")
+            return await self._reload()
+
+        try:
+            applied = int(await redis.get(self._key(APPLIED_KEY)) or 0)
+            if applied >= generation:
+                self.stats.skipped += 1
+                return (await redis.get(self._key(RESULT_KEY))) == "1"
+
+            # Everything requested so far is on disk and covered by this reload
+            covering = int(await redis.get(self._key(REQUESTED_KEY)) or generation)
+            ok = await self._reload()
+            await redis.set(self._key(APPLIED_KEY), max(covering, generation))
+            await redis.set(self._key(RESULT_KEY), "1" if ok else "0")
+            return ok
+        finally:
+            try:
+                await lock.release()
+            except Exception as e:
+                logger.debug(f"Failed to release nginx reload lock: {e}")
+
+    async def _reload(self) -> bool:
+        """Test and reload nginx, retrying Docker errors with backoff."""
+        started = time.monotonic()
+        delay = 1.0
+        attempts = max(1, settings.NGINX_RELOAD_MAX_ATTEMPTS)
+        ok = False
+        for attempt in range(1, attempts + 1):
+            try:
+                ok, output = await DockerExecutor.get_instance().run("nginx_reload", self._reload_fn)
+                if not ok:
+                    logger.error(f"Nginx reload of {self.container_name} failed: {output}")
+                break
+            except NotFound:
+                logger.error(f"Nginx container '{self.container_name}' not found")
+                break
+            except Exception as e:
+                logger.warning(f"Failed to reload nginx (attempt {attempt}/{attempts}): {e}")
+                if attempt < attempts:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+
+        self.stats.last_reload_seconds = time.monotonic() - started
+        if ok:
+            self.stats.reloads += 1
+            logger.info(f"Nginx reloaded in {self.stats.last_reload_seconds * 1000:.0f}ms")
+        else:
+            self.stats.failures += 1
+        return ok
+
+    def _docker_test_and_reload(self) -> Tuple[bool, str]:
+        """Run nginx -t and nginx -s reload in the container (blocking)."""
+        if self._docker_client is None:
+            try:
+                self._docker_client = docker.from_env()
+            except DockerException as e:
+                logger.error(f"Failed to connect to Docker: {e}")
+                raise
+        container = self._docker_client.containers.get(self.container_name)
+
+        test_result = container.exec_run("nginx -t")
+        if test_result.exit_code != 0:
+            output = test_result.output.decode() if test_result.output else "Unknown error"
+            return False, f"config test failed: {output}"
+
+        reload_result = container.exec_run("nginx -s reload")
+        if reload_result.exit_code != 0:
+            output = reload_result.output.decode() if reload_result.output else "Unknown error"
+            return False, f"reload failed: {output}"
+        return True, ""
@@ -0,0 +1,228 @@
+"""
+Subscription Progress Events
+
+Long-running subscription work (image pulls, provisioning) runs in Celery.
+Its progress is pushed to clients over Redis instead of being written to
+the subscription row every second and polled:
+
+- Celery tasks use `ProgressPublisher`. Each event carries the phase,
+  status, percent and any new log lines. Events are published on
+  `hosting:progress:{subscription_id}`, at most once per
+  PROGRESS_EVENT_MIN_INTERVAL_SECONDS unless the status changes.
+- The latest state, including a bounded log tail, is kept in a Redis key.
+  A client connecting mid-way starts from the current picture.
+- `progress_sse_stream()` turns the channel into Server-Sent Events.
+
+Postgres only receives the checkpoints and the final state written by the
+task itself.
+"""
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config.redis import get_redis, get_sync_redis
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROGRESS_CHANNEL = "hosting:progress:{subscription_id}"
+PROGRESS_STATE_KEY = "hosting:progress:{subscription_id}:state"
+
+TERMINAL_STATUSES = {"COMPLETED", "ERROR"}
+LOG_TAIL_LINES = 200
+
+
+class ProgressPublisher:
+    """Publishes one subscription's progress from a (synchronous) Celery task"""
+
+    def __init__(
+        self,
+        subscription_id: str,
+        phase: str,
+        redis_client=None,
+        min_interval_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize progress publisher
+
+        Args:
+            subscription_id: Subscription the work belongs to
+            phase: Work being reported (e.g. "image_pull")
+            redis_client: Blocking Redis client (defaults to get_sync_redis())
+            min_interval_seconds: Minimum time between routine events
+        """
+        self.subscription_id = subscription_id
+        self.phase = phase
+        self.min_interval_seconds = (
+            settings.PROGRESS_EVENT_MIN_INTERVAL_SECONDS if min_interval_seconds is None else min_interval_seconds
+        )
+        self._redis = redis_client
+        self._log_tail: deque = deque(maxlen=LOG_TAIL_LINES)
+        self._pending_lines: List[str] = []
+        self._last_publish = 0.0
+        self.status: Optional[str] = None
+        self.progress = 0
+        self.message: Optional[str] = None
+
+    @property
+    def logs(self) -> str:
+        """Log tail as stored on the subscription row"""
+        return "\n".join(self._log_tail)
+
+    def update(self, status: str, progress: Optional[int] = None, log_line: Optional[str] = None) -> None:
+        """
+        Record progress; publishes if the status changed or the interval elapsed.
+
+        Args:
+            status: Current status (e.g. DOWNLOADING)
+            progress: Percent complete, if known
+            log_line: Log line to append
+        """
+        if log_line:
+            self._log_tail.append(log_line)
+            self._pending_lines.append(log_line)
+        status_changed = status != self.status
+        self.status = status
+        if progress is not None:
+            self.progress = progress
+
+        if status_changed or time.monotonic() - self._last_publish >= self.min_interval_seconds:
+            self.flush()
+
+    def finish(self, status: str, progress: Optional[int] = None, message: Optional[str] = None) -> None:
+        """Publish the final state (COMPLETED or ERROR) immediately."""
+        self.status = status
+        if progress is not None:
+            self.progress = progress
+        self.message = message
+        self.flush()
+
+    def flush(self) -> None:
+        """Publish pending lines and the current state."""
+        self._last_publish = time.monotonic()
+        lines, self._pending_lines = self._pending_lines, []
+        event = self._event(lines)
+        state = {**event, "logs": self.logs}
+        state.pop("lines")
+
+        try:
+            redis = self._redis or get_sync_redis()
+            pipe = redis.pipeline(transaction=False)
+            pipe.set(
+                PROGRESS_STATE_KEY.format(subscription_id=self.subscription_id),
+                json.dumps(state),
+                ex=settings.PROGRESS_STATE_TTL_SECONDS,
+            )
+            pipe.publish(PROGRESS_CHANNEL.format(subscription_id=self.subscription_id), json.dumps(event))
+            pipe.execute()
+        except Exception as e:
+            # Progress is best effort; the task's DB checkpoints still land
+            logger.debug(f"Failed to publish progress for {self.subscription_id}: {e}")
+
+    def _event(self, lines: List[str]) -> Dict[str, Any]:
+        return {
+            "subscription_id": self.subscription_id,
+            "phase": self.phase,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "lines": lines,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+
+async def get_progress_state(subscription_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Latest published state for a subscription, if any is still in Redis.
+
+    Returns:
+        State dict (phase, status, progress, message, logs, updated_at) or None
+    """
+    try:
+        redis = await get_redis()
+        raw = await redis.get(PROGRESS_STATE_KEY.format(subscription_id=subscription_id))
+    except Exception as e:
+        logger.debug(f"Redis unavailable for progress state of {subscription_id}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def clear_progress_state(subscription_id: str) -> None:
+    """Forget the published state, e.g. before the work is started again."""
+    try:
+        redis = await get_redis()
+        await redis.delete(PROGRESS_STATE_KEY.format(subscription_id=subscription_id))
+    except Exception as e:
+        logger.debug(f"Failed to clear progress state of {subscription_id}: {e}")
+
+
+async def progress_sse_stream(
+    subscription_id: str,
+    initial_state: Dict[str, Any],
+    redis=None,
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a subscription's progress.
+
+    Sends a `snapshot` event (Redis state, or `initial_state` from the DB),
+    then one `progress` event per published update, and closes after a
+    terminal status.
+
+    Args:
+        subscription_id: Subscription to follow
+        initial_state: Fallback snapshot built from the subscription row
+        redis: Async Redis client (defaults to get_redis())
+    """
+    keepalive_interval = settings.PROGRESS_SSE_KEEPALIVE_SECONDS
+    try:
+        redis = redis or await get_redis()
+    except Exception as e:
+        logger.warning(f"Redis unavailable for progress stream: {e}")
+        yield f"event: snapshot\ndata: {json.dumps(initial_state, default=str)}\n\n"
+        yield f"event: error\ndata: {json.dumps({'error': 'Progress stream unavailable'})}\n\n"
+        return
+
+    channel = PROGRESS_CHANNEL.format(subscription_id=subscription_id)
+    pubsub = redis.pubsub()
+    # Subscribe before reading the state so no update falls in between
+    await pubsub.subscribe(channel)
+    try:
+        raw_state = await redis.get(PROGRESS_STATE_KEY.format(subscription_id=subscription_id))
+        state = json.loads(raw_state) if raw_state else initial_state
+        yield f"event: snapshot\ndata: {json.dumps(state, default=str)}\n\n"
+        if state.get("status") in TERMINAL_STATUSES:
+            yield "event: close\ndata: finished\n\n"
+            return
+
+        last_keepalive = time.monotonic()
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            now = time.monotonic()
+            if message and message.get("type") == "message" and message.get("data"):
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                yield f"event: progress\ndata: {data}\n\n"
+                last_keepalive = now
+                if json.loads(data).get("status") in TERMINAL_STATUSES:
+                    yield "event: close\ndata: finished\n\n"
+                    return
+            elif now - last_keepalive >= keepalive_interval:
+                yield ": keepalive\n\n"
+                last_keepalive = now
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception(f"Progress stream error for {subscription_id}: {e}")
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    finally:
+        try:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+        except Exception:
+            pass
@@ -553,6 +553,9 @@ class VPSProvisioningService:
             container.status = ContainerStatus.TERMINATED
             await self.container_repo.update(container)
 
+        # Return IP, ports and subnet to the pool for reuse
+        await self.container_repo.release_network_resources(subscription_id)
+
         # Update subscription status
         subscription.status = SubscriptionStatus.TERMINATED
         subscription.terminated_at = datetime.utcnow()
@@ -530,60 +530,15 @@ class ServiceDomainService:
             
             logger.info(f"Successfully wrote {configs_written} external nginx config files")
             
-            # Reload external nginx proxy container with retry logic
-            import docker
-            import time
-            nginx_reloaded = False
-            max_retries = 3
-            retry_delay = 1
-            
-            for attempt in range(1, max_retries + 1):
-                try:
-                    logger.info(f"Attempting to reload external nginx proxy (attempt {attempt}/{max_retries})")
-                    docker_client = docker.from_env()
-                    nginx_proxy = docker_client.containers.get("cloudmanager-nginx-proxy")
-                    
-                    # Test nginx config before reload
-                    test_result = nginx_proxy.exec_run("nginx -t")
-                    if test_result.exit_code != 0:
-                        error_output = test_result.output.decode() if test_result.output else "Unknown error"
-                        logger.error(f"Nginx config test failed: {error_output}")
-                        if attempt < max_retries:
-                            logger.info(f"Retrying in {retry_delay} seconds...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2  # Exponential backoff
-                            continue
-                        return False
-                    
-                    # Reload nginx
-                    reload_result = nginx_proxy.exec_run("nginx -s reload")
-                    if reload_result.exit_code == 0:
-                        logger.info("Successfully reloaded external nginx proxy")
-                        nginx_reloaded = True
-                        break
-                    else:
-                        error_output = reload_result.output.decode() if reload_result.output else "Unknown error"
-                        logger.warning(f"Failed to reload external nginx (attempt {attempt}): {error_output}")
-                        if attempt < max_retries:
-                            logger.info(f"Retrying in {retry_delay} seconds...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2
-                except docker.errors.NotFound:
-                    logger.error("nginx-proxy container not found")
-                    return False
-                except Exception as e:
-                    logger.warning(f"Failed to reload external nginx (attempt {attempt}): {e}")
-                    if attempt < max_retries:
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        logger.error(f"All retry attempts failed for nginx reload: {e}")
-            
+            # Reload external nginx proxy (coalesced with other pending changes,
+            # retried on Docker errors by the coordinator)
+            nginx_reloaded = await self.nginx_service.reload_nginx(
+                reason=f"{configs_written} service domains for {container.container_name}"
+            )
             if not nginx_reloaded:
-                logger.error("Failed to reload external nginx after all retry attempts")
+                logger.error("Failed to reload external nginx")
                 return False
-            
+
             # Final validation: verify all config files still exist
             for config_file_path in written_config_files:
                 if not os.path.exists(config_file_path):
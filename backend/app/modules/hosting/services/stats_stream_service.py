@@ -0,0 +1,284 @@
+"""
+Docker Stats Stream Service
+
+Keeps one long-lived streaming stats connection per running VPS container and
+holds the latest parsed samples in an in-memory ring buffer, so stats readers
+(real-time stats endpoints, metrics collection) get a sample from memory
+instead of opening a `stats(stream=False)` request that blocks for ~2 seconds.
+
+The stream hub is process-wide. It is started from the API lifespan; in
+processes where it is not running, DockerManagementService falls back to
+one-shot stats requests.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable
+
+try:
+    import docker
+    from docker.errors import NotFound
+except ImportError:
+    docker = None
+    NotFound = Exception
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def parse_docker_stats(stats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Parse a raw Docker stats payload into the flat dict used across hosting.
+
+    Args:
+        stats: Raw stats JSON from the Docker API
+
+    Returns:
+        Dictionary with CPU, memory, network, and block I/O stats, or None
+        if the payload is empty (container not running)
+    """
+    cpu_stats = stats.get('cpu_stats') or {}
+    precpu_stats = stats.get('precpu_stats') or {}
+    if not cpu_stats:
+        return None
+
+    # Parse CPU usage (the first streamed sample has no precpu_stats)
+    cpu_delta = (cpu_stats.get('cpu_usage') or {}).get('total_usage', 0) - \
+                (precpu_stats.get('cpu_usage') or {}).get('total_usage', 0)
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu_stats.get('system_cpu_usage', 0)
+    cpu_count = cpu_stats.get('online_cpus') or 1
+
+    if precpu_stats.get('system_cpu_usage') and system_delta > 0 and cpu_delta > 0:
+        cpu_percent = (cpu_delta / system_delta) * cpu_count * 100.0
+    else:
+        cpu_percent = 0.0
+
+    # Parse memory usage
+    memory_stats = stats.get('memory_stats') or {}
+    memory_usage = memory_stats.get('usage', 0)
+    memory_limit = memory_stats.get('limit', 1)
+    memory_percent = (memory_usage / memory_limit) * 100.0 if memory_limit > 0 else 0.0
+
+    # Parse network I/O
+    network_rx = 0
+    network_tx = 0
+    networks = stats.get('networks') or {}
+    for interface, data in networks.items():
+        network_rx += data.get('rx_bytes', 0)
+        network_tx += data.get('tx_bytes', 0)
+
+    # Parse block I/O
+    block_read = 0
+    block_write = 0
+    blkio_stats = stats.get('blkio_stats') or {}
+    io_service_bytes = blkio_stats.get('io_service_bytes_recursive') or []
+    for entry in io_service_bytes:
+        op = (entry.get('op') or '').lower()
+        if op == 'read':
+            block_read += entry.get('value', 0)
+        elif op == 'write':
+            block_write += entry.get('value', 0)
+
+    # Process count
+    pids_stats = stats.get('pids_stats') or {}
+    process_count = pids_stats.get('current')
+
+    return {
+        'cpu_usage_percent': round(cpu_percent, 2),
+        'memory_usage_mb': round(memory_usage / (1024 * 1024), 2),
+        'memory_usage_percent': round(memory_percent, 2),
+        'network_rx_bytes': network_rx,
+        'network_tx_bytes': network_tx,
+        'block_read_bytes': block_read,
+        'block_write_bytes': block_write,
+        'process_count': process_count
+    }
+
+
+@dataclass
+class _StatsSubscription:
+    """One streaming stats connection and its ring buffer"""
+    container_id: str
+    samples: deque
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    thread: Optional[threading.Thread] = None
+
+
+class DockerStatsStream:
+    """Process-wide hub of streaming Docker stats subscriptions"""
+
+    _instance: Optional["DockerStatsStream"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        client=None,
+        buffer_size: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        sync_interval_seconds: Optional[float] = None
+    ):
+        """
+        Initialize stats stream hub
+
+        Args:
+            client: docker.DockerClient (created from DOCKER_HOST if omitted)
+            buffer_size: Samples kept per container
+            max_age_seconds: Oldest sample served as "latest"
+            sync_interval_seconds: How often running containers are re-listed
+        """
+        self._client = client
+        self.buffer_size = buffer_size or settings.DOCKER_STATS_BUFFER_SIZE
+        self.max_age_seconds = max_age_seconds or settings.DOCKER_STATS_MAX_AGE_SECONDS
+        self.sync_interval_seconds = sync_interval_seconds or settings.DOCKER_STATS_SYNC_INTERVAL_SECONDS
+        self._subscriptions: Dict[str, _StatsSubscription] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def get_instance(cls) -> "DockerStatsStream":
+        """Get the process-wide stream hub"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def running(self) -> bool:
+        return self._sync_thread is not None and self._sync_thread.is_alive()
+
+    @property
+    def client(self):
+        if self._client is None and docker:
+            docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+            # One pooled connection per streamed container
+            self._client = docker.DockerClient(
+                base_url=docker_host,
+                max_pool_size=settings.DOCKER_STATS_MAX_STREAMS
+            )
+        return self._client
+
+    def start(self) -> bool:
+        """Start the background sync thread that follows running VPS containers"""
+        if self.running:
+            return True
+        if self.client is None:
+            logger.warning("Docker SDK not available - stats streaming disabled")
+            return False
+
+        self._stop_event.clear()
+        self._sync_thread = threading.Thread(
+            target=self._sync_loop, name="docker-stats-sync", daemon=True
+        )
+        self._sync_thread.start()
+        logger.info("Docker stats streaming started")
+        return True
+
+    def stop(self) -> None:
+        """Stop the sync thread and close all stats streams"""
+        self._stop_event.set()
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            self._subscriptions.clear()
+        for sub in subscriptions:
+            sub.stop_event.set()
+        self._sync_thread = None
+        logger.info("Docker stats streaming stopped")
+
+    def _sync_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                running = self.client.containers.list(filters={"status": "running", "name": "vps-"})
+                self.sync(container.id for container in running)
+            except Exception as e:
+                logger.warning(f"Docker stats sync failed: {e}")
+            self._stop_event.wait(self.sync_interval_seconds)
+
+    def sync(self, container_ids: Iterable[str]) -> None:
+        """Subscribe to every given container and drop all others"""
+        wanted = set(container_ids)
+        with self._lock:
+            current = set(self._subscriptions)
+        for container_id in current - wanted:
+            self.unsubscribe(container_id)
+        for container_id in wanted - current:
+            self.subscribe(container_id)
+
+    def subscribe(self, container_id: str) -> None:
+        """Start streaming stats for a container (no-op if already streaming)"""
+        with self._lock:
+            if container_id in self._subscriptions:
+                return
+            if len(self._subscriptions) >= settings.DOCKER_STATS_MAX_STREAMS:
+                logger.warning(f"Stats stream limit reached, not following {container_id[:12]}")
+                return
+            sub = _StatsSubscription(
+                container_id=container_id,
+                samples=deque(maxlen=self.buffer_size)
+            )
+            sub.thread = threading.Thread(
+                target=self._follow, args=(sub,),
+                name=f"docker-stats-{container_id[:12]}", daemon=True
+            )
+            self._subscriptions[container_id] = sub
+        sub.thread.start()
+
+    def unsubscribe(self, container_id: str) -> None:
+        """Stop streaming stats for a container"""
+        with self._lock:
+            sub = self._subscriptions.pop(container_id, None)
+        if sub:
+            sub.stop_event.set()
+
+    def _follow(self, sub: _StatsSubscription) -> None:
+        """Consume one container's stats stream until stopped (runs in its own thread)"""
+        while not sub.stop_event.is_set():
+            try:
+                for raw in self.client.api.stats(sub.container_id, stream=True, decode=True):
+                    if sub.stop_event.is_set():
+                        break
+                    parsed = parse_docker_stats(raw)
+                    if parsed:
+                        sub.samples.append((time.monotonic(), parsed))
+                # Stream ended: the container stopped
+                break
+            except NotFound:
+                break
+            except Exception as e:
+                logger.debug(f"Stats stream for {sub.container_id[:12]} interrupted: {e}")
+                sub.stop_event.wait(5)
+
+        with self._lock:
+            if self._subscriptions.get(sub.container_id) is sub:
+                del self._subscriptions[sub.container_id]
+
+    def latest(self, container_id: str, max_age_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the newest sample for a container if it is fresh enough
+
+        Returns:
+            Parsed stats dict, or None if not streamed or stale
+        """
+        sub = self._subscriptions.get(container_id)
+        if not sub or not sub.samples:
+            return None
+        sampled_at, parsed = sub.samples[-1]
+        if time.monotonic() - sampled_at > (max_age_seconds or self.max_age_seconds):
+            return None
+        return dict(parsed)
+
+    def history(self, container_id: str) -> List[Dict[str, Any]]:
+        """Get all buffered samples for a container, oldest first"""
+        sub = self._subscriptions.get(container_id)
+        if not sub:
+            return []
+        return [dict(parsed) for _, parsed in list(sub.samples)]
+
+    def is_streaming(self, container_id: str) -> bool:
+        return container_id in self._subscriptions
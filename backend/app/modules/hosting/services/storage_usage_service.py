@@ -0,0 +1,201 @@
+"""
+Storage Usage Service
+
+Measures VPS disk usage from the host instead of running `du` inside each guest.
+
+Sources, in order of preference:
+- quota: the data volume is a separate mount or an XFS/ext4 project-quota
+  directory, so statvfs() reports its usage in O(1)
+- host_walk: the container's overlay writable layer (UpperDir) plus its data
+  volume, walked from the host with os.scandir in a worker thread
+
+Results are cached per container and only refreshed every
+STORAGE_USAGE_REFRESH_SECONDS, so the 5-minute metrics cycle reads memory.
+"""
+import asyncio
+import os
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class StorageUsage:
+    """Disk usage of one container and where/when it was measured"""
+    used_bytes: int
+    source: str
+    measured_at: datetime
+
+    @property
+    def used_mb(self) -> float:
+        return round(self.used_bytes / (1024 * 1024), 2)
+
+    @property
+    def age_seconds(self) -> int:
+        return int((datetime.utcnow() - self.measured_at).total_seconds())
+
+
+class StorageUsageService:
+    """Host-side, cached disk usage measurement for VPS containers"""
+
+    # Shared across service instances so the cache survives per-cycle services
+    _usage_cache: Dict[str, Tuple[float, StorageUsage]] = {}
+    _path_cache: Dict[str, List[str]] = {}
+
+    def __init__(self, docker_service, refresh_seconds: Optional[int] = None):
+        """
+        Initialize storage usage service
+
+        Args:
+            docker_service: DockerManagementService used to resolve layer paths
+            refresh_seconds: How long a measurement stays valid (defaults to settings)
+        """
+        self.docker_service = docker_service
+        self.refresh_seconds = refresh_seconds or settings.STORAGE_USAGE_REFRESH_SECONDS
+        self.host_root = settings.STORAGE_USAGE_HOST_ROOT.rstrip("/")
+
+    def _host_path(self, path: str) -> str:
+        """Map a host path to where it is visible from this process"""
+        if self.host_root and path.startswith("/"):
+            return f"{self.host_root}{path}"
+        return path
+
+    async def _resolve_paths(self, container) -> List[str]:
+        """
+        Resolve the host directories holding a container's writable data
+
+        Paths never change for the lifetime of a container, so they are cached
+        by Docker container ID. A partial result (inspect failed, or no path
+        exists yet) is not cached, so the next refresh resolves it again.
+        """
+        cached = self._path_cache.get(container.container_id)
+        if cached is not None:
+            return cached
+
+        candidates = []
+        upper_dir = None
+        try:
+            inspect = await self.docker_service.inspect_container(container.container_id)
+            graph_data = (inspect or {}).get("GraphDriver", {}).get("Data") or {}
+            upper_dir = graph_data.get("UpperDir")
+            if isinstance(upper_dir, str):
+                candidates.append(upper_dir)
+        except Exception as e:
+            logger.debug(f"Could not resolve overlay layer for {container.container_id[:12]}: {e}")
+
+        if isinstance(container.data_volume_path, str):
+            candidates.append(container.data_volume_path)
+
+        paths = [
+            self._host_path(path) for path in candidates
+            if os.path.isdir(self._host_path(path))
+        ]
+        if isinstance(upper_dir, str) and paths:
+            self._path_cache[container.container_id] = paths
+        return paths
+
+    @staticmethod
+    def _quota_usage(path: str) -> Optional[int]:
+        """
+        Read usage with statvfs when the path has its own accounting
+
+        A separate mount, or a directory under an XFS/ext4 project quota,
+        reports a different block count than its parent filesystem.
+        """
+        try:
+            parent = os.path.dirname(path.rstrip("/")) or "/"
+            own = os.statvfs(path)
+            if os.path.ismount(path) or own.f_blocks != os.statvfs(parent).f_blocks:
+                return (own.f_blocks - own.f_bfree) * own.f_frsize
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def _walk_usage(path: str) -> int:
+        """Sum allocated bytes under a directory without following symlinks"""
+        total = 0
+        seen_inodes = set()
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        # Count hard links once
+                        if st.st_nlink > 1:
+                            key = (st.st_dev, st.st_ino)
+                            if key in seen_inodes:
+                                continue
+                            seen_inodes.add(key)
+                        total += st.st_blocks * 512
+            except OSError:
+                continue
+        return total
+
+    def _measure(self, paths: List[str]) -> StorageUsage:
+        """Measure all paths (blocking; runs in a worker thread)"""
+        total = 0
+        sources = set()
+        for path in paths:
+            quota_bytes = self._quota_usage(path)
+            if quota_bytes is not None:
+                total += quota_bytes
+                sources.add("quota")
+            else:
+                total += self._walk_usage(path)
+                sources.add("host_walk")
+        return StorageUsage(
+            used_bytes=total,
+            source="+".join(sorted(sources)),
+            measured_at=datetime.utcnow()
+        )
+
+    async def get_usage(self, container, force_refresh: bool = False) -> Optional[StorageUsage]:
+        """
+        Get disk usage for a container from the host
+
+        Args:
+            container: ContainerInstance
+            force_refresh: Ignore the cached value
+
+        Returns:
+            StorageUsage, or None if no host-side source is available
+        """
+        cached = self._usage_cache.get(container.container_id)
+        if cached and not force_refresh and time.monotonic() - cached[0] < self.refresh_seconds:
+            return cached[1]
+
+        paths = await self._resolve_paths(container)
+        if not paths:
+            return None
+
+        try:
+            usage = await asyncio.to_thread(self._measure, paths)
+        except Exception as e:
+            logger.warning(f"Host-side storage measurement failed for {container.container_id[:12]}: {e}")
+            # Serve the stale value rather than nothing
+            return cached[1] if cached else None
+
+        self._usage_cache[container.container_id] = (time.monotonic(), usage)
+        return usage
+
+    @classmethod
+    def forget(cls, docker_container_id: str) -> None:
+        """Drop cached paths and usage for a removed container"""
+        cls._usage_cache.pop(docker_container_id, None)
+        cls._path_cache.pop(docker_container_id, None)
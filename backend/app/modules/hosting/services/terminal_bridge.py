@@ -0,0 +1,205 @@
+"""
+Terminal Bridge
+
+Connects a browser terminal (WebSocket) to an interactive shell in a VPS
+container. The Docker exec socket is driven directly by the event loop
+through asyncio streams, so a session costs a file descriptor and two
+small tasks rather than threads.
+
+Output read from the shell within TERMINAL_OUTPUT_BATCH_SECONDS is sent as
+one WebSocket frame (up to TERMINAL_OUTPUT_MAX_FRAME_BYTES). Queued
+keystrokes are written to the shell in one go. Flow control is end to end:
+a slow browser stops us reading the exec socket, which eventually blocks
+the shell's writes, and a shell that stops reading stdin stops us
+receiving from the browser once the bounded input queue is full.
+"""
+import json
+import codecs
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.modules.hosting.services.docker_executor import DockerExecutor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+READ_SIZE = 65536
+
+
+class TerminalSession:
+    """One interactive shell in a container bridged to a WebSocket"""
+
+    def __init__(
+        self,
+        websocket,
+        client=None,
+        container_id: Optional[str] = None,
+        command: str = "/bin/bash -i",
+        user: str = "root",
+    ):
+        """
+        Initialize terminal session
+
+        Args:
+            websocket: Accepted WebSocket (receive() / send_text())
+            client: docker.DockerClient used to create the exec
+            container_id: Container to open the shell in
+            command: Shell command
+            user: User the shell runs as
+        """
+        self.websocket = websocket
+        self.client = client
+        self.container_id = container_id
+        self.command = command
+        self.user = user
+        self.exec_id: Optional[str] = None
+        self._exec_socket = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._input: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=settings.TERMINAL_INPUT_QUEUE_SIZE)
+
+    async def open(self) -> None:
+        """Create the exec instance and attach to its socket."""
+        executor = DockerExecutor.get_instance()
+        api = self.client.api
+
+        exec_info = await executor.run(
+            "exec_create", api.exec_create, self.container_id, self.command,
+            stdin=True, tty=True, environment={"TERM": "xterm-256color"}, user=self.user,
+        )
+        self.exec_id = exec_info["Id"]
+        self._exec_socket = await executor.run("exec_start", api.exec_start, self.exec_id, tty=True, socket=True)
+
+        sock = getattr(self._exec_socket, "_sock", self._exec_socket)
+        await self.attach(sock)
+
+    async def attach(self, sock) -> None:
+        """Drive an already connected exec socket from the event loop."""
+        self._reader, self._writer = await asyncio.open_connection(sock=sock, limit=READ_SIZE)
+
+    async def resize(self, rows: int, cols: int) -> None:
+        """Resize the shell's TTY."""
+        if not self.exec_id or not rows or not cols:
+            return
+        try:
+            await DockerExecutor.get_instance().run(
+                "exec_resize", self.client.api.exec_resize, self.exec_id, height=int(rows), width=int(cols),
+            )
+        except Exception as e:
+            logger.debug(f"Terminal resize failed for {self.container_id}: {e}")
+
+    async def run(self) -> None:
+        """
+        Pump data both ways until the shell exits or the browser disconnects.
+        """
+        tasks = [
+            asyncio.create_task(self._pump_output()),
+            asyncio.create_task(self._pump_input()),
+            asyncio.create_task(self._receive()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.close()
+
+    async def send_input(self, data: bytes) -> None:
+        """Queue keystrokes for the shell (waits while the queue is full)."""
+        if data:
+            await self._input.put(data)
+
+    async def close(self) -> None:
+        """Close the exec socket."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+        if self._exec_socket is not None:
+            try:
+                self._exec_socket.close()
+            except Exception:
+                pass
+            self._exec_socket = None
+
+    async def _pump_output(self) -> None:
+        """Shell -> browser, batching output that arrives close together."""
+        loop = asyncio.get_running_loop()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        batch_seconds = settings.TERMINAL_OUTPUT_BATCH_SECONDS
+        max_frame = settings.TERMINAL_OUTPUT_MAX_FRAME_BYTES
+
+        eof = False
+        while not eof:
+            chunk = await self._reader.read(READ_SIZE)
+            if not chunk:
+                break
+            buffer = bytearray(chunk)
+
+            deadline = loop.time() + batch_seconds
+            while len(buffer) < max_frame:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    more = await asyncio.wait_for(self._reader.read(max_frame - len(buffer)), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if not more:
+                    eof = True
+                    break
+                buffer += more
+
+            # Incremental decoding keeps multi-byte characters split across reads intact
+            text = decoder.decode(bytes(buffer))
+            if text:
+                await self.websocket.send_text(json.dumps({"type": "output", "data": text}))
+
+        logger.debug(f"Terminal shell for {self.container_id} exited")
+
+    async def _pump_input(self) -> None:
+        """Browser -> shell, writing all queued input at once; stops when run() cancels it."""
+        while True:
+            pending: List[bytes] = [await self._input.get()]
+            while not self._input.empty():
+                pending.append(self._input.get_nowait())
+
+            self._writer.write(b"".join(pending))
+            await self._writer.drain()
+
+    async def _receive(self) -> None:
+        """Read WebSocket messages until the browser disconnects."""
+        while True:
+            message = await self.websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                break
+            if message.get("type") != "websocket.receive":
+                continue
+
+            raw = message.get("text")
+            if raw is None:
+                raw = (message.get("bytes") or b"").decode("utf-8", errors="replace")
+            await self.handle_message(raw)
+
+    async def handle_message(self, raw: str) -> None:
+        """Apply one client message: {"type": "input"|"resize", ...} or raw input."""
+        try:
+            data: Dict[str, Any] = json.loads(raw)
+        except json.JSONDecodeError:
+            # If not JSON, treat as raw input
+            await self.send_input(raw.encode("utf-8"))
+            return
+        if not isinstance(data, dict):
+            await self.send_input(raw.encode("utf-8"))
+            return
+
+        if data.get("type") == "input":
+            await self.send_input(str(data.get("data", "")).encode("utf-8"))
+        elif data.get("type") == "resize":
+            await self.resize(data.get("rows"), data.get("cols"))
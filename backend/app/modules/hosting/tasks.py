@@ -13,7 +13,6 @@ import secrets
 import os
 import shutil
 import time
-import hashlib
 from datetime import datetime, date, timedelta
 from typing import Dict, Any, Optional, List, Tuple
 from decimal import Decimal
@@ -32,12 +31,15 @@ except ImportError:
     IPAMConfig = None
     IPAMPool = None
 
-from sqlalchemy import select, update, delete, func, text
+from celery import chord, group
+from sqlalchemy import select, update, cast, String
 from sqlalchemy.orm import Session
 
 from app.core.celery_app import celery_app
 from app.core.logging import logger
+from app.core.prometheus_metrics import METRICS_CYCLE_DURATION
 from app.config.database import SyncSessionLocal  # Use SYNC sessions for Celery
+from app.config.database import AsyncSessionLocal, engine as async_engine  # Async services (metrics shards)
 from app.config.settings import get_settings
 from app.modules.hosting.models import (
     VPSSubscription,
@@ -47,8 +49,24 @@ from app.modules.hosting.models import (
     ContainerStatus,
     TimelineEventType,
     SubscriptionTimeline,
-    ContainerMetrics
+    MetricsResolution
 )
+from app.modules.hosting.services.metrics_rollup_service import MetricsRollupService
+from app.modules.hosting.services.monitoring_service import ContainerMonitoringService
+from app.modules.hosting.services.metrics_partition_service import MetricsPartitionService
+from app.modules.hosting.services.backup_service import VPSBackupService
+from app.modules.hosting.services.network_allocator import NetworkResourceAllocator, SUBNET_OCTETS
+from app.modules.hosting.services.progress_events import ProgressPublisher
+from app.modules.hosting.services.image_build_service import DockerImageBuildService
+from app.modules.hosting.services.base_image_cache import (
+    supports_docker_ready,
+    find_docker_ready_image,
+    claim_docker_ready_build,
+    release_docker_ready_build,
+    build_docker_ready_image,
+)
+from app.modules.hosting.services.container_events_service import apply_observation, observation_from_summary
+from app.modules.hosting.distros import SUPPORTED_DISTROS
 from app.infrastructure.email.service import EmailService
 
 settings = get_settings()
@@ -58,21 +76,6 @@ settings = get_settings()
 # Helper Functions
 # =============================================================================
 
-def _get_unique_subnet_octet(subscription_id: str) -> int:
-    """
-    Generate a unique third octet (1-254) for network subnet based on subscription ID.
-    
-    Uses hash of subscription ID to ensure consistent subnet per subscription
-    while avoiding overlaps between different subscriptions.
-    """
-    # Hash the subscription ID to get a consistent value
-    hash_obj = hashlib.md5(subscription_id.encode())
-    hash_int = int(hash_obj.hexdigest(), 16)
-    # Map to range 1-254 (avoid 0 and 255)
-    octet = (hash_int % 253) + 1
-    return octet
-
-
 def _make_vps_identifiers(customer_id: str, plan_slug: str, subscription_id: str) -> Dict[str, str]:
     """
     Generate per-subscription identifiers for Docker artifacts.
@@ -431,6 +434,89 @@ fi
     logger.info(f"Docker installation complete in container {container.name}")
 
 
+def _vps_container_command(root_password: str) -> List[str]:
+    """
+    Startup command of a VPS container.
+
+    Sets the root password, installs SSH and Nginx unless the image has them,
+    starts sshd and, when the image has Docker (docker-ready images, or after
+    _install_docker_in_container on a restart), dockerd with VFS; then keeps
+    running.
+    """
+    return [
+        "/bin/bash", "-c",
+        (
+            "set -e && "
+            f"echo 'root:{root_password}' | chpasswd && "
+            "if ! command -v sshd &> /dev/null || ! command -v nginx &> /dev/null; then "
+            # Install SSH and Nginx with lock file to prevent conflicts
+            "flock -x /var/lock/apt-setup.lock -c '"
+            "DEBIAN_FRONTEND=noninteractive apt-get update -qq && "
+            "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq openssh-server nginx && "
+            "rm -rf /var/lib/apt/lists/*"
+            "'; "
+            "fi && "
+            "mkdir -p /var/run/sshd && "
+            "echo 'PermitRootLogin yes' >> /etc/ssh/sshd_config && "
+            "echo 'PasswordAuthentication yes' >> /etc/ssh/sshd_config && "
+            "/usr/sbin/sshd -D & "
+            # Start Docker daemon if it's installed (with VFS storage driver for DinD)
+            # CRITICAL: VFS prevents overlayfs-on-overlayfs issues in Docker-in-Docker
+            "if command -v dockerd &> /dev/null; then "
+            "mkdir -p /var/run /var/lib/docker /etc/docker && "
+            "echo '{\"log-level\":\"info\"}' > /etc/docker/daemon.json && "
+            # Clear any existing Docker data to force VFS initialization
+            "rm -rf /var/lib/docker/* 2>/dev/null; "
+            "dockerd --storage-driver=vfs > /var/log/dockerd.log 2>&1 & "
+            "sleep 3; "
+            "fi && "
+            "exec tail -f /dev/null"
+        )
+    ]
+
+
+def _resolve_vps_image(client: "docker.DockerClient", base_image: str) -> Tuple[str, bool]:
+    """
+    Pick the image a VPS container is created from.
+
+    Prefers the base image's docker-ready derivative. On a cache miss the base
+    image is pulled, Docker is installed in the container after it starts,
+    and a derivative build is queued for the next VPS on this OS.
+
+    Args:
+        client: docker.DockerClient
+        base_image: OS image (subscription override or plan default)
+
+    Returns:
+        Tuple of (image to create the container from, whether Docker is preinstalled)
+    """
+    docker_ready_image = find_docker_ready_image(client, base_image)
+    if docker_ready_image:
+        logger.info(f"Using docker-ready image {docker_ready_image} for {base_image}")
+        return docker_ready_image, True
+
+    logger.info(f"Pulling image: {base_image}")
+    client.images.pull(base_image)
+    _queue_docker_ready_build(base_image)
+    return base_image, False
+
+
+def _queue_docker_ready_build(base_image: str) -> bool:
+    """Queue a docker-ready derivative build unless one is already queued or running."""
+    if not settings.VPS_DOCKER_READY_IMAGES_ENABLED or not supports_docker_ready(base_image):
+        return False
+    if not claim_docker_ready_build(base_image):
+        return False
+    try:
+        build_docker_ready_image_task.delay(base_image)
+        logger.info(f"Queued docker-ready image build for {base_image}")
+        return True
+    except Exception as e:
+        release_docker_ready_build(base_image)
+        logger.warning(f"Failed to queue docker-ready image build for {base_image}: {e}")
+        return False
+
+
 def _create_docker_container(
     db: Session, subscription: VPSSubscription, plan: VPSPlan
 ) -> Dict[str, Any]:
@@ -463,10 +549,12 @@ def _create_docker_container(
         container_name = ids["container_name"]
         network_name = ids["network_name"]
 
-        # Allocate unique IP and ports
-        ip_address = _get_next_available_ip(db)
-        ssh_port = _get_next_available_ssh_port(db)
-        http_port = _get_next_available_http_port(db)
+        # Lease unique IP, ports and subnet from the network resource pool
+        allocator = NetworkResourceAllocator(db)
+        resources = allocator.allocate_for_subscription(str(subscription.id))
+        ip_address = resources["ip_address"]
+        ssh_port = resources["ssh_port"]
+        http_port = resources["http_port"]
 
         # Generate and encrypt root password
         root_password = secrets.token_urlsafe(16)
@@ -477,42 +565,17 @@ def _create_docker_container(
         cipher = Fernet(encryption_key.encode())
         encrypted_password = cipher.encrypt(root_password.encode()).decode()
 
-        # Create isolated bridge network with unique subnet per subscription.
-        # NOTE: subnet hash alone isn't enough if existing networks already occupy that /24.
-        # We detect "Pool overlaps" and retry with the next free octet.
-        def _get_used_subnet_octets() -> set[int]:
-            used: set[int] = set()
-            try:
-                for net in client.networks.list():
-                    try:
-                        ipam_cfgs = (net.attrs or {}).get("IPAM", {}).get("Config") or []
-                        for cfg in ipam_cfgs:
-                            subnet = cfg.get("Subnet")
-                            if not subnet:
-                                continue
-                            # Expect form 172.20.X.0/24
-                            if subnet.startswith("172.20.") and subnet.endswith("/24"):
-                                parts = subnet.split(".")
-                                if len(parts) >= 4:
-                                    try:
-                                        used.add(int(parts[2]))
-                                    except Exception:
-                                        pass
-                    except Exception:
-                        continue
-            except Exception:
-                # If listing networks fails, just fall back to retry-on-error.
-                pass
-            return used
-
-        base_octet = _get_unique_subnet_octet(str(subscription.id))
-        used_octets = _get_used_subnet_octets()
+        # Create isolated bridge network on the subscription's leased subnet.
+        # A /24 can still be taken by a network created outside the pool; on
+        # "Pool overlaps" that octet is blocked (it stays leased, so nobody else
+        # trips over it until this subscription is terminated) and the next
+        # free one is tried. The unblocked lease is the octet the network uses.
+        subnet_octet = resources["subnet_octet"]
         network = None
 
-        for attempt in range(0, 253):
-            subnet_octet = ((base_octet - 1 + attempt) % 253) + 1  # 1..253
-            if subnet_octet in used_octets:
-                continue
+        for attempt in range(0, len(SUBNET_OCTETS)):
+            if attempt:
+                subnet_octet = allocator.allocate_subnet(str(subscription.id))
 
             try:
                 network = client.networks.create(
@@ -544,7 +607,8 @@ def _create_docker_container(
 
                 # Handle overlapping subnet pools by trying the next octet
                 if "pool overlaps" in err or "overlaps with other one" in err or "overlaps" in err:
-                    used_octets.add(subnet_octet)
+                    logger.warning(f"Subnet 172.20.{subnet_octet}.0/24 is taken outside the pool, trying another")
+                    allocator.block_subnet(str(subscription.id), subnet_octet)
                     continue
 
                 logger.error(f"Failed to create network {network_name}: {e}")
@@ -568,47 +632,15 @@ def _create_docker_container(
         volume_path = ids["volume_path"]
         os.makedirs(volume_path, exist_ok=True)
 
-        # Pull Docker image (subscription override > plan default)
-        docker_image = getattr(subscription, "os_docker_image", None) or plan.docker_image
-        logger.info(f"Pulling image: {docker_image}")
-        client.images.pull(docker_image)
+        # Docker-ready derivative if cached, else pull the image (subscription override > plan default)
+        base_image = getattr(subscription, "os_docker_image", None) or plan.docker_image
+        docker_image, docker_ready = _resolve_vps_image(client, base_image)
 
         # Prepare hostname
         hostname = ids["hostname"]
 
         # Create container with resource limits
-        # Command to keep container running and set up SSH, Nginx, and Docker daemon
-        # This will: set root password, install/start SSH, install Nginx, start Docker daemon with VFS, then keep running
-        container_command = [
-            "/bin/bash", "-c",
-            (
-                "set -e && "
-                f"echo 'root:{root_password}' | chpasswd && "
-                "if ! command -v sshd &> /dev/null || ! command -v nginx &> /dev/null; then "
-                # Install SSH and Nginx with lock file to prevent conflicts
-                "flock -x /var/lock/apt-setup.lock -c '"
-                "DEBIAN_FRONTEND=noninteractive apt-get update -qq && "
-                "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq openssh-server nginx && "
-                "rm -rf /var/lib/apt/lists/*"
-                "'; "
-                "fi && "
-                "mkdir -p /var/run/sshd && "
-                "echo 'PermitRootLogin yes' >> /etc/ssh/sshd_config && "
-                "echo 'PasswordAuthentication yes' >> /etc/ssh/sshd_config && "
-                "/usr/sbin/sshd -D & "
-                # Start Docker daemon if it's installed (with VFS storage driver for DinD)
-                # CRITICAL: VFS prevents overlayfs-on-overlayfs issues in Docker-in-Docker
-                "if command -v dockerd &> /dev/null; then "
-                "mkdir -p /var/run /var/lib/docker /etc/docker && "
-                "echo '{\"log-level\":\"info\"}' > /etc/docker/daemon.json && "
-                # Clear any existing Docker data to force VFS initialization
-                "rm -rf /var/lib/docker/* 2>/dev/null; "
-                "dockerd --storage-driver=vfs > /var/log/dockerd.log 2>&1 & "
-                "sleep 3; "
-                "fi && "
-                "exec tail -f /dev/null"
-            )
-        ]
+        container_command = _vps_container_command(root_password)
         
         # NOTE: When VPS_DOCKER_ENGINE_MODE=dind, Docker-in-Docker requires writable cgroups.
         # This typically requires privileged mode + host cgroup namespace.
@@ -688,18 +720,22 @@ def _create_docker_container(
         container.start()
         logger.info(f"Container {container_name} created and started")
 
-        # Wait a moment for container to fully start
-        time.sleep(5)
+        if docker_ready:
+            # Docker, sshd and nginx are baked into the image; the startup command starts dockerd
+            logger.info(f"Container {container_name} uses docker-ready image, skipping Docker installation")
+        else:
+            # Wait a moment for container to fully start
+            time.sleep(5)
 
-        # Install Docker and docker-compose in the container
-        logger.info(f"Installing Docker in container {container_name}...")
-        try:
-            _install_docker_in_container(container)
-            logger.info(f"Docker installed successfully in container {container_name}")
-        except Exception as e:
-            logger.warning(f"Failed to install Docker in container {container_name}: {e}")
-            # Don't fail provisioning if Docker installation fails - user can install manually later
-            # But log it for visibility
+            # Install Docker and docker-compose in the container
+            logger.info(f"Installing Docker in container {container_name}...")
+            try:
+                _install_docker_in_container(container)
+                logger.info(f"Docker installed successfully in container {container_name}")
+            except Exception as e:
+                logger.warning(f"Failed to install Docker in container {container_name}: {e}")
+                # Don't fail provisioning if Docker installation fails - user can install manually later
+                # But log it for visibility
 
         return {
             "container_id": container.id,
@@ -724,63 +760,6 @@ def _create_docker_container(
         raise
 
 
-def _get_next_available_ip(db: Session) -> str:
-    """Get next available IP address for VPS container."""
-    # Prevent concurrent allocations (match async repo lock ID)
-    db.execute(text("SELECT pg_advisory_xact_lock(999002)"))
-
-    # Find max IP in use
-    stmt = select(func.max(ContainerInstance.ip_address))
-    max_ip = db.execute(stmt).scalar()
-
-    if not max_ip:
-        # First container
-        return "172.20.1.10"
-
-    # Increment last octet
-    parts = max_ip.split(".")
-    last_octet = int(parts[-1]) + 1
-
-    # If we exceed 254, increment third octet
-    if last_octet > 254:
-        third_octet = int(parts[2]) + 1
-        return f"172.20.{third_octet}.10"
-
-    return f"{parts[0]}.{parts[1]}.{parts[2]}.{last_octet}"
-
-
-def _get_next_available_ssh_port(db: Session) -> int:
-    """Get next available SSH port for VPS container."""
-    # Prevent concurrent allocations (match async repo lock ID)
-    db.execute(text("SELECT pg_advisory_xact_lock(999001)"))
-
-    # Find max SSH port in use
-    stmt = select(func.max(ContainerInstance.ssh_port))
-    max_port = db.execute(stmt).scalar()
-
-    if not max_port:
-        # First container
-        return 2222
-
-    return max_port + 1
-
-
-def _get_next_available_http_port(db: Session) -> int:
-    """Get next available HTTP port starting from 8100."""
-    # Prevent concurrent allocations (match async repo lock ID)
-    db.execute(text("SELECT pg_advisory_xact_lock(999003)"))
-
-    # Find max HTTP port in use
-    stmt = select(func.max(ContainerInstance.http_port))
-    max_port = db.execute(stmt).scalar()
-
-    if not max_port:
-        # First container
-        return 8100
-
-    return max_port + 1
-
-
 def _encrypt_vps_password(plain_password: str) -> str:
     """Encrypt a VPS password for storage in DB."""
     encryption_key = os.getenv("VPS_PASSWORD_ENCRYPTION_KEY")
@@ -791,32 +770,6 @@ def _encrypt_vps_password(plain_password: str) -> str:
     return cipher.encrypt(plain_password.encode()).decode()
 
 
-def _docker_container_exists(client: "docker.DockerClient", container_id: Optional[str], container_name: str) -> Optional[str]:
-    """
-    Check if a container exists, preferring lookup by ID (more stable), then by name.
-
-    Returns:
-        Docker container ID if found, otherwise None.
-    """
-    # Try by ID first
-    if container_id:
-        try:
-            container = client.containers.get(container_id)
-            return container.id
-        except NotFound:
-            pass
-        except Exception:
-            # If Docker is transiently unhappy, don't assume missing
-            raise
-
-    # Fallback to name
-    try:
-        container = client.containers.get(container_name)
-        return container.id
-    except NotFound:
-        return None
-
-
 # =============================================================================
 # Celery Tasks
 # =============================================================================
@@ -991,7 +944,8 @@ def provision_vps_async(self, subscription_id: str) -> Dict[str, Any]:
 def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
     """
     Download (pull) the selected OS Docker image for a subscription before provisioning.
-    Updates download progress fields on the subscription and then triggers provisioning.
+    Publishes progress events to Redis, checkpoints the subscription's download
+    fields occasionally, and then triggers provisioning.
     """
     task_id = self.request.id
     logger.info(f"[Task {task_id}] Starting image download for subscription {subscription_id}")
@@ -1000,6 +954,7 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
         raise Exception("Docker SDK not installed")
 
     docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+    progress: Optional[ProgressPublisher] = None
 
     try:
         with SyncSessionLocal() as db:
@@ -1015,22 +970,24 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
 
             docker_image = getattr(subscription, "os_docker_image", None) or plan.docker_image
 
+            # Progress goes to Redis; the row only gets checkpoints and the final state
+            progress = ProgressPublisher(subscription_id, phase="image_pull")
+
             # Initialize tracking fields
             subscription.image_download_status = "DOWNLOADING"
             subscription.image_download_progress = 0
             subscription.image_download_updated_at = datetime.utcnow()
-            # Keep a rolling log
-            logs: List[str] = []
             subscription.image_download_logs = ""
             db.add(subscription)
             db.commit()
+            progress.update("DOWNLOADING", 0, f"Pulling {docker_image}")
 
             api = docker.APIClient(base_url=docker_host)
 
             # Track layer progress for best-effort percent
             layer_totals: Dict[str, int] = {}
             layer_currents: Dict[str, int] = {}
-            last_flush = time.time()
+            last_checkpoint = time.time()
 
             def compute_percent() -> int:
                 total = sum(layer_totals.values())
@@ -1044,13 +1001,6 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
                 layer_id = item.get("id")
                 progress_detail = item.get("progressDetail") or {}
 
-                # Record log lines (bounded)
-                if status:
-                    line = status if not layer_id else f"{layer_id}: {status}"
-                    logs.append(line)
-                    if len(logs) > 200:
-                        logs = logs[-200:]
-
                 # Update progress
                 if layer_id and isinstance(progress_detail, dict):
                     total = progress_detail.get("total")
@@ -1060,26 +1010,32 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
                     if isinstance(current, int) and current >= 0:
                         layer_currents[layer_id] = current
 
-                # Periodically flush updates to DB
+                # Byte counters are in the percent; only status changes become log lines
+                line = None
+                if status and not progress_detail.get("current"):
+                    line = status if not layer_id else f"{layer_id}: {status}"
+                progress.update("DOWNLOADING", compute_percent(), line)
+
+                # Occasional checkpoint so the row is roughly right if Redis is lost
                 now = time.time()
-                if now - last_flush >= 1.0:
-                    subscription.image_download_progress = compute_percent()
+                if now - last_checkpoint >= settings.PROGRESS_CHECKPOINT_SECONDS:
+                    subscription.image_download_progress = progress.progress
                     subscription.image_download_updated_at = datetime.utcnow()
-                    subscription.image_download_logs = "\n".join(logs)
                     db.add(subscription)
                     db.commit()
-                    last_flush = now
+                    last_checkpoint = now
 
             # Finalize
             subscription.image_download_status = "COMPLETED"
             subscription.image_download_progress = 100
             subscription.image_download_updated_at = datetime.utcnow()
-            subscription.image_download_logs = "\n".join(logs)
+            subscription.image_download_logs = progress.logs
 
             # Transition to provisioning and trigger provisioning task
             subscription.status = SubscriptionStatus.PROVISIONING
             db.add(subscription)
             db.commit()
+            progress.finish("COMPLETED", 100)
 
             from app.modules.hosting.tasks import provision_vps_async as _provision
             _provision.delay(str(subscription.id))
@@ -1096,6 +1052,8 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
                 if subscription:
                     subscription.image_download_status = "ERROR"
                     subscription.image_download_updated_at = datetime.utcnow()
+                    if progress is not None:
+                        subscription.image_download_logs = progress.logs
                     subscription.status_reason = f"Image download failed: {str(e)}"
                     # Move back to PENDING so admin can retry
                     subscription.status = SubscriptionStatus.PENDING
@@ -1104,6 +1062,8 @@ def download_vps_image_async(self, subscription_id: str) -> Dict[str, Any]:
         except Exception:
             pass
 
+        if progress is not None:
+            progress.finish("ERROR", message=f"Image download failed: {str(e)}")
         raise
 
 
@@ -1112,8 +1072,14 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
     """
     Scheduled task: reconcile DB vs Docker state for VPS containers.
 
-    If a ContainerInstance is marked RUNNING but its Docker container is missing,
-    recreate it (reset password, keep existing volume path if it exists).
+    Status changes are normally applied as they happen by the container
+    events watcher; this is the sweep behind it. All VPS containers are read
+    with one list call and compared with the DB:
+
+    - Rows whose Docker state drifted get the update the watcher would have made.
+    - If a ContainerInstance is marked RUNNING but its Docker container is missing,
+      recreate it (reset password, keep existing volume path if it exists).
+      At most `limit` containers are recreated per run.
     """
     task_id = self.request.id
 
@@ -1123,7 +1089,15 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
     docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
     client = docker.DockerClient(base_url=docker_host)
 
+    # One list call for the whole fleet instead of one lookup per row
+    summaries = client.api.containers(all=True, filters={"name": "vps-"})
+    summaries_by_id = {summary["Id"]: summary for summary in summaries}
+    summaries_by_name = {
+        name.lstrip("/"): summary for summary in summaries for name in (summary.get("Names") or [])
+    }
+
     reconciled: List[str] = []
+    drifted: List[str] = []
     skipped: List[str] = []
     failed: List[Dict[str, str]] = []
 
@@ -1133,24 +1107,30 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
             select(ContainerInstance, VPSSubscription, VPSPlan)
             .join(VPSSubscription, ContainerInstance.subscription_id == VPSSubscription.id)
             .join(VPSPlan, VPSSubscription.plan_id == VPSPlan.id)
-            .where(ContainerInstance.status == ContainerStatus.RUNNING)
-            .limit(limit)
+            .where(ContainerInstance.status.in_([
+                ContainerStatus.RUNNING, ContainerStatus.STOPPED, ContainerStatus.ERROR,
+            ]))
         )
         rows: List[Tuple[ContainerInstance, VPSSubscription, VPSPlan]] = db.execute(stmt).all()
 
         for instance, subscription, plan in rows:
             try:
-                # If it exists, optionally refresh container_id if found by name
-                found_id = _docker_container_exists(
-                    client=client,
-                    container_id=instance.container_id,
-                    container_name=instance.container_name,
-                )
-                if found_id:
-                    if instance.container_id != found_id:
-                        instance.container_id = found_id
+                # If it exists, refresh container_id if found by name and fix status drift
+                summary = summaries_by_id.get(instance.container_id) or summaries_by_name.get(instance.container_name)
+                if summary:
+                    if instance.container_id != summary["Id"]:
+                        instance.container_id = summary["Id"]
                         db.add(instance)
                         db.commit()
+                    observation = observation_from_summary(summary)
+                    if observation and apply_observation(db, instance, observation):
+                        drifted.append(instance.subscription_id)
+                    db.commit()
+                    skipped.append(instance.subscription_id)
+                    continue
+
+                # Only containers that should be running are recreated
+                if instance.status != ContainerStatus.RUNNING or len(reconciled) + len(failed) >= limit:
                     skipped.append(instance.subscription_id)
                     continue
 
@@ -1165,8 +1145,10 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
                 volume_path = instance.data_volume_path if instance.data_volume_path and os.path.isdir(instance.data_volume_path) else ids["volume_path"]
                 os.makedirs(volume_path, exist_ok=True)
 
-                # Ensure network exists (best effort) with unique subnet per subscription
-                subnet_octet = _get_unique_subnet_octet(str(subscription.id))
+                # Ensure network exists (best effort) on the subscription's leased subnet,
+                # the octet provisioning created it on (overlapping octets are blocked)
+                allocator = NetworkResourceAllocator(db)
+                subnet_octet = allocator.allocate_subnet(str(subscription.id))
                 try:
                     client.networks.create(
                         name=ids["network_name"],
@@ -1201,33 +1183,19 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
                         logger.warning(f"Network {ids['network_name']} does not exist and creation failed, will continue anyway")
 
                 # Keep IP/port if already assigned in DB; else allocate new
-                ip_address = instance.ip_address or _get_next_available_ip(db)
-                ssh_port = instance.ssh_port or _get_next_available_ssh_port(db)
+                ip_address = instance.ip_address or allocator.allocate_ip(str(subscription.id))
+                ssh_port = instance.ssh_port or allocator.allocate_ssh_port(str(subscription.id))
 
                 # Reset password (do not log it)
                 new_root_password = secrets.token_urlsafe(16)
                 encrypted_password = _encrypt_vps_password(new_root_password)
 
-                # Pull image and create container
-                docker_image = getattr(subscription, "os_docker_image", None) or plan.docker_image
-                client.images.pull(docker_image)
+                # Resolve image (docker-ready derivative or pulled base) and create container
+                base_image = getattr(subscription, "os_docker_image", None) or plan.docker_image
+                docker_image, docker_ready = _resolve_vps_image(client, base_image)
                 
-                # Command to keep container running and set up SSH
-                container_command = [
-                    "/bin/bash", "-c",
-                    (
-                        "set -e && "
-                        f"echo 'root:{new_root_password}' | chpasswd && "
-                        "if ! command -v sshd &> /dev/null; then "
-                        "apt-get update -qq && apt-get install -y -qq openssh-server && rm -rf /var/lib/apt/lists/*; "
-                        "fi && "
-                        "mkdir -p /var/run/sshd && "
-                        "echo 'PermitRootLogin yes' >> /etc/ssh/sshd_config && "
-                        "echo 'PasswordAuthentication yes' >> /etc/ssh/sshd_config && "
-                        "/usr/sbin/sshd -D & "
-                        "exec tail -f /dev/null"
-                    )
-                ]
+                # Same startup command as provisioning, so dockerd runs on docker-ready images
+                container_command = _vps_container_command(new_root_password)
                 
                 dind_mode = (os.getenv("VPS_DOCKER_ENGINE_MODE", "auto") or "auto").strip().lower() == "dind"
                 volumes_cfg = {volume_path: {"bind": "/data", "mode": "rw"}}
@@ -1282,18 +1250,19 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
                     else:
                         raise
                 container.start()
-                
-                # Wait a moment for container to fully start
-                time.sleep(5)
-                
-                # Install Docker and docker-compose in the container
-                logger.info(f"Installing Docker in container {ids['container_name']}...")
-                try:
-                    _install_docker_in_container(container)
-                    logger.info(f"Docker installed successfully in container {ids['container_name']}")
-                except Exception as e:
-                    logger.warning(f"Failed to install Docker in container {ids['container_name']}: {e}")
-                    # Don't fail reconciliation if Docker installation fails
+
+                if not docker_ready:
+                    # Wait a moment for container to fully start
+                    time.sleep(5)
+
+                    # Install Docker and docker-compose in the container
+                    logger.info(f"Installing Docker in container {ids['container_name']}...")
+                    try:
+                        _install_docker_in_container(container)
+                        logger.info(f"Docker installed successfully in container {ids['container_name']}")
+                    except Exception as e:
+                        logger.warning(f"Failed to install Docker in container {ids['container_name']}: {e}")
+                        # Don't fail reconciliation if Docker installation fails
 
                 now = datetime.utcnow()
 
@@ -1320,46 +1289,77 @@ def reconcile_missing_vps_containers(self, limit: int = 100) -> Dict[str, Any]:
                 db.rollback()
                 failed.append({"subscription_id": instance.subscription_id, "error": str(e)})
 
+    if drifted:
+        logger.info(f"[Task {task_id}] Corrected status drift for {len(drifted)} containers")
+
     return {
         "status": "success",
         "reconciled": len(reconciled),
+        "drifted": len(drifted),
         "skipped": len(skipped),
         "failed": failed,
     }
 
 
+def _get_collectable_container_ids(db: Session) -> List[str]:
+    """IDs of running containers on active subscriptions, in a stable order for sharding."""
+    stmt = (
+        select(ContainerInstance.id)
+        .join(VPSSubscription, VPSSubscription.id == ContainerInstance.subscription_id)
+        .where(
+            # Compare as string to avoid enum type-name mismatches in PostgreSQL
+            cast(VPSSubscription.status, String) == SubscriptionStatus.ACTIVE.value,
+            ContainerInstance.status == ContainerStatus.RUNNING,
+        )
+        .order_by(ContainerInstance.id)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
 @celery_app.task(name="hosting.collect_all_metrics", bind=True)
 def collect_all_metrics_task(self) -> Dict[str, Any]:
     """
     Scheduled task: Collect metrics for all running containers.
 
-    Runs every 5 minutes.
+    Runs every 5 minutes. Splits the running fleet into shards of
+    METRICS_COLLECTION_SHARD_SIZE containers and dispatches them as a chord:
+    each shard is collected and bulk-inserted by a worker in parallel, and
+    summarize_metrics_cycle_task aggregates the cycle summary.
 
     Returns:
-        Dict with status and count of containers processed
+        Dict with status and how many containers/shards were dispatched
     """
     task_id = self.request.id
     logger.info(f"[Task {task_id}] Starting metrics collection for all containers")
 
     try:
         with SyncSessionLocal() as db:
-            # Get all running containers
-            stmt = select(ContainerInstance).where(
-                ContainerInstance.status == ContainerStatus.RUNNING
-            )
-            containers = db.execute(stmt).scalars().all()
+            container_ids = _get_collectable_container_ids(db)
 
-            # Collect metrics for each container (simplified - would need Docker client)
-            count = len(containers)
-            logger.info(
-                f"[Task {task_id}] Metrics collection completed: {count} containers processed"
-            )
+        shard_size = max(1, settings.METRICS_COLLECTION_SHARD_SIZE)
+        shards = [
+            container_ids[i:i + shard_size]
+            for i in range(0, len(container_ids), shard_size)
+        ]
 
-            return {
-                "status": "success",
-                "containers_collected": count,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
+        if shards:
+            started_at = datetime.utcnow().isoformat()
+            chord(
+                group(collect_metrics_shard_task.s(shard) for shard in shards),
+                summarize_metrics_cycle_task.s(started_at=started_at),
+            ).apply_async()
+
+        logger.info(
+            f"[Task {task_id}] Metrics collection dispatched: "
+            f"{len(container_ids)} containers in {len(shards)} shards"
+        )
+
+        return {
+            "status": "success",
+            "containers_dispatched": len(container_ids),
+            "shards": len(shards),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
 
     except Exception as e:
         logger.error(f"[Task {task_id}] Metrics collection failed: {e}")
@@ -1371,6 +1371,87 @@ def collect_all_metrics_task(self) -> Dict[str, Any]:
         }
 
 
+@celery_app.task(name="hosting.collect_metrics_shard", bind=True)
+def collect_metrics_shard_task(self, container_ids: List[str]) -> Dict[str, Any]:
+    """
+    Collect and bulk-insert metrics for one shard of containers.
+
+    Never raises: a failed shard reports an error summary so the chord
+    callback still runs for the rest of the cycle.
+
+    Args:
+        container_ids: ContainerInstance IDs in this shard
+
+    Returns:
+        MetricsCollectionCycle summary dict (plus "status")
+    """
+    task_id = self.request.id
+
+    async def run_shard() -> Dict[str, Any]:
+        try:
+            async with AsyncSessionLocal() as db:
+                service = ContainerMonitoringService(db)
+                cycle = await service.run_collection_cycle(container_ids=container_ids)
+                return cycle.to_dict()
+        finally:
+            # Pooled asyncpg connections are bound to this event loop; the next
+            # shard in this worker runs under a new one
+            await async_engine.dispose()
+
+    try:
+        summary = asyncio.run(run_shard())
+        summary["status"] = "success"
+        return summary
+
+    except Exception as e:
+        logger.error(f"[Task {task_id}] Metrics shard of {len(container_ids)} containers failed: {e}")
+        return {
+            "status": "error",
+            "error": str(e),
+            "total": len(container_ids),
+            "failed": len(container_ids),
+        }
+
+
+@celery_app.task(name="hosting.summarize_metrics_cycle")
+def summarize_metrics_cycle_task(shard_results: List[Dict[str, Any]], started_at: str) -> Dict[str, Any]:
+    """
+    Chord callback: aggregate shard summaries into one collection cycle summary.
+
+    Args:
+        shard_results: Return values of collect_metrics_shard_task
+        started_at: ISO timestamp of when the cycle was dispatched
+
+    Returns:
+        Fleet-wide cycle summary
+    """
+    summary: Dict[str, Any] = {
+        "started_at": started_at,
+        "shards": len(shard_results),
+        "failed_shards": 0,
+    }
+    for key in ("total", "collected", "skipped", "timed_out", "failed"):
+        summary[key] = sum(result.get(key, 0) for result in shard_results)
+
+    summary["failed_shards"] = sum(1 for result in shard_results if result.get("status") != "success")
+    summary["slowest_shard_seconds"] = max(
+        (result.get("duration_seconds", 0.0) for result in shard_results), default=0.0
+    )
+    summary["duration_seconds"] = round(
+        (datetime.utcnow() - datetime.fromisoformat(started_at)).total_seconds(), 2
+    )
+    summary["status"] = "success" if summary["failed_shards"] == 0 else "partial"
+    METRICS_CYCLE_DURATION.labels("fleet").observe(summary["duration_seconds"])
+
+    logger.info(
+        f"Metrics collection cycle: {summary['collected']}/{summary['total']} collected, "
+        f"{summary['skipped']} skipped, {summary['timed_out']} timed out, {summary['failed']} failed "
+        f"across {summary['shards']} shards ({summary['failed_shards']} failed) "
+        f"in {summary['duration_seconds']}s"
+    )
+    return summary
+
+
 @celery_app.task(name="hosting.generate_recurring_invoices", bind=True)
 def generate_recurring_invoices_task(self) -> Dict[str, Any]:
     """
@@ -1469,12 +1550,96 @@ def check_overdue_invoices_task(self) -> Dict[str, Any]:
         }
 
 
+@celery_app.task(name="hosting.rollup_metrics", bind=True)
+def rollup_metrics_task(self) -> Dict[str, Any]:
+    """
+    Scheduled task: Downsample raw metrics into hourly and daily rollups.
+
+    Runs hourly. Only complete buckets newer than the latest rollup are
+    processed, so each run touches about one hour of raw rows.
+
+    Returns:
+        Dict with status and number of rollup rows written per resolution
+    """
+    task_id = self.request.id
+    logger.info(f"[Task {task_id}] Starting metrics rollup")
+
+    try:
+        with SyncSessionLocal() as db:
+            rollup_service = MetricsRollupService(db)
+            now = datetime.utcnow()
+            hourly = rollup_service.rollup(MetricsResolution.HOUR, now=now)
+            daily = rollup_service.rollup(MetricsResolution.DAY, now=now)
+
+            logger.info(
+                f"[Task {task_id}] Metrics rollup completed: {hourly} hourly, {daily} daily rows"
+            )
+
+            return {
+                "status": "success",
+                "hourly_rows": hourly,
+                "daily_rows": daily,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
+    except Exception as e:
+        logger.error(f"[Task {task_id}] Metrics rollup failed: {e}")
+        logger.error(f"[Task {task_id}] Traceback: {traceback.format_exc()}")
+        return {
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+
+@celery_app.task(name="hosting.maintain_metrics_partitions", bind=True)
+def maintain_metrics_partitions_task(self) -> Dict[str, Any]:
+    """
+    Scheduled task: Create container_metrics partitions ahead of time.
+
+    Runs daily. Keeps METRICS_PARTITION_PREMAKE_DAYS of future partitions so
+    metrics inserts never hit a missing range.
+
+    Returns:
+        Dict with status and created partition names
+    """
+    task_id = self.request.id
+    logger.info(f"[Task {task_id}] Starting metrics partition maintenance")
+
+    try:
+        with SyncSessionLocal() as db:
+            created = MetricsPartitionService(db).ensure_partitions()
+
+            logger.info(
+                f"[Task {task_id}] Metrics partition maintenance completed: {len(created)} partitions created"
+            )
+
+            return {
+                "status": "success",
+                "created_partitions": created,
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+
+    except Exception as e:
+        logger.error(f"[Task {task_id}] Metrics partition maintenance failed: {e}")
+        logger.error(f"[Task {task_id}] Traceback: {traceback.format_exc()}")
+        return {
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+
 @celery_app.task(name="hosting.cleanup_old_metrics", bind=True)
 def cleanup_old_metrics_task(self) -> Dict[str, Any]:
     """
-    Scheduled task: Delete metrics older than 30 days.
+    Scheduled task: Delete raw metrics and rollups past their retention.
 
-    Runs weekly on Sunday at 03:00 UTC.
+    Raw rows are kept METRICS_RAW_RETENTION_DAYS (history beyond that is served
+    from rollups) and removed by dropping whole partitions; rollups are kept per
+    METRICS_*_RETENTION_DAYS.
+
+    Runs weekly on Sunday at 04:00 UTC.
 
     Returns:
         Dict with status and count of deleted records
@@ -1484,23 +1649,19 @@ def cleanup_old_metrics_task(self) -> Dict[str, Any]:
 
     try:
         with SyncSessionLocal() as db:
-            # Delete metrics older than 30 days
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
-            stmt = delete(ContainerMetrics).where(
-                ContainerMetrics.collected_at < cutoff_date
-            )
-            result = db.execute(stmt)
-            db.commit()
-
-            deleted_count = result.rowcount
+            # Detaches and drops expired partitions (bulk DELETE if not partitioned)
+            deleted_count = MetricsPartitionService(db).drop_expired()
+            deleted_rollups = MetricsRollupService(db).delete_expired()
 
             logger.info(
-                f"[Task {task_id}] Metrics cleanup completed: {deleted_count} records deleted"
+                f"[Task {task_id}] Metrics cleanup completed: {deleted_count} records deleted, "
+                f"rollups deleted: {deleted_rollups}"
             )
 
             return {
                 "status": "success",
                 "deleted_count": deleted_count,
+                "deleted_rollups": deleted_rollups,
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
@@ -1600,6 +1761,90 @@ def build_docker_image_task(self, image_id: str) -> Dict[str, Any]:
             raise
 
 
+@celery_app.task(name="hosting.build_docker_ready_image", bind=True)
+def build_docker_ready_image_task(self, base_image: str) -> Dict[str, Any]:
+    """
+    Build the docker-ready derivative of a VPS OS image.
+
+    Queued on a provisioning cache miss and by the daily warm-up. The build
+    claim taken when queueing is released when the build ends, so a failed
+    build is retried on the next miss.
+
+    Args:
+        base_image: OS image to derive from (e.g. ubuntu:22.04)
+
+    Returns:
+        Dict with build status and the derivative tag
+    """
+    task_id = self.request.id
+    logger.info(f"[Task {task_id}] Building docker-ready image for {base_image}")
+
+    async def run_build() -> Tuple[bool, str]:
+        try:
+            async with AsyncSessionLocal() as db:
+                return await build_docker_ready_image(DockerImageBuildService(db), base_image)
+        finally:
+            await async_engine.dispose()
+
+    try:
+        success, result = asyncio.run(run_build())
+    except Exception as e:
+        success, result = False, str(e)
+    finally:
+        release_docker_ready_build(base_image)
+
+    if not success:
+        logger.error(f"[Task {task_id}] Docker-ready image build for {base_image} failed: {result}")
+        return {"status": "error", "base_image": base_image, "error": result}
+
+    logger.info(f"[Task {task_id}] Docker-ready image {result} built for {base_image}")
+    return {
+        "status": "success",
+        "base_image": base_image,
+        "image": result,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@celery_app.task(name="hosting.warm_docker_ready_images", bind=True)
+def warm_docker_ready_images_task(self) -> Dict[str, Any]:
+    """
+    Queue builds for OS images whose docker-ready derivative is missing.
+
+    Covers the curated distros and the images of active plans, so new
+    recipes and new plans are built before the first VPS needs them.
+    """
+    task_id = self.request.id
+    if docker is None:
+        return {"status": "skipped", "reason": "Docker SDK not installed"}
+    if not settings.VPS_DOCKER_READY_IMAGES_ENABLED:
+        return {"status": "skipped", "reason": "Docker-ready images disabled"}
+
+    with SyncSessionLocal() as db:
+        plan_images = db.execute(
+            select(VPSPlan.docker_image).where(VPSPlan.is_active == True).distinct()  # noqa: E712
+        ).scalars().all()
+    base_images = sorted(
+        {d["docker_image"] for d in SUPPORTED_DISTROS} | {image for image in plan_images if image}
+    )
+
+    docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+    client = docker.DockerClient(base_url=docker_host)
+
+    cached: List[str] = []
+    queued: List[str] = []
+    for base_image in base_images:
+        if not supports_docker_ready(base_image):
+            continue
+        if find_docker_ready_image(client, base_image):
+            cached.append(base_image)
+        elif _queue_docker_ready_build(base_image):
+            queued.append(base_image)
+
+    logger.info(f"[Task {task_id}] Docker-ready images: {len(cached)} cached, {len(queued)} builds queued")
+    return {"status": "success", "cached": cached, "queued": queued}
+
+
 @celery_app.task(name="hosting.backup_all_vps", bind=True)
 def backup_all_vps_task(self) -> Dict[str, Any]:
     """
@@ -1613,32 +1858,32 @@ def backup_all_vps_task(self) -> Dict[str, Any]:
     task_id = self.request.id
     logger.info(f"[Task {task_id}] Starting daily VPS backup")
 
-    try:
-        with SyncSessionLocal() as db:
-            # Get all running containers that need backup
-            stmt = select(ContainerInstance).where(
-                ContainerInstance.status == ContainerStatus.RUNNING
-            )
-            containers = db.execute(stmt).scalars().all()
+    async def run_backups() -> Dict[str, Any]:
+        try:
+            async with AsyncSessionLocal() as db:
+                return await VPSBackupService(db).backup_all_containers(backup_type="daily")
+        finally:
+            await async_engine.dispose()
 
-            # TODO: Implement backup logic
-            # This would require:
-            # 1. Create container snapshots using Docker SDK
-            # 2. Upload to S3/backup storage
-            # 3. Update backup records in database
+    try:
+        results = asyncio.run(run_backups())
 
-            logger.info(
-                f"[Task {task_id}] VPS backup completed (placeholder): "
-                f"{len(containers)} containers found"
-            )
+        logger.info(
+            f"[Task {task_id}] VPS backup completed: "
+            f"{results['successful']}/{results['total']} successful "
+            f"in {results['wall_clock_seconds']:.1f}s"
+        )
 
-            return {
-                "status": "success",
-                "total_containers": len(containers),
-                "successful_backups": 0,
-                "failed_backups": 0,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
+        return {
+            "status": "success" if results["failed"] == 0 else "partial",
+            "total_containers": results["total"],
+            "successful_backups": results["successful"],
+            "failed_backups": results["failed"],
+            "total_size_mb": results["total_size_mb"],
+            "duration_seconds": results["wall_clock_seconds"],
+            "errors": results["errors"],
+            "timestamp": datetime.utcnow().isoformat(),
+        }
 
     except Exception as e:
         logger.error(f"[Task {task_id}] VPS backup failed: {e}")
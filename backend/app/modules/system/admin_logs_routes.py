@@ -28,6 +28,7 @@ async def admin_get_system_logs(
     end_date: Optional[datetime] = Query(None, description="End date"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
     current_user: User = Depends(require_permission(Permission.SYSTEM_LOGS)),
     db: AsyncSession = Depends(get_db)
 ):
@@ -40,6 +41,7 @@ async def admin_get_system_logs(
         end_date=end_date,
         page=page,
         page_size=page_size,
+        cursor=cursor,
         current_user=current_user
     )
 
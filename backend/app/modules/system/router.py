@@ -17,6 +17,7 @@ from app.config.database import get_db
 from app.config.redis import get_redis
 from app.core.dependencies import get_current_user, require_permission
 from app.core.permissions import Permission
+from app.core.request_metrics import RequestMetrics, LatencyHistogram, UNMATCHED_ROUTE
 from app.modules.auth.models import User
 from app.modules.customers.models import Customer
 from app.modules.audit.models import AuditLog, AuditAction
@@ -72,6 +73,7 @@ class PerformanceMetrics(BaseModel):
     """Performance metrics response."""
     system_uptime: float
     average_response_time: float
+    response_time_percentiles: Optional[dict] = None
     database_performance: dict
     api_performance: List[dict]
     resource_usage: dict  # May contain None values for unavailable metrics
@@ -97,6 +99,8 @@ class SystemLogsResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 
 @router.get("/stats")
@@ -177,7 +181,7 @@ async def get_system_stats(
     system_uptime = await _calculate_system_uptime(db)
 
     # Calculate average API response time from recent requests
-    api_response_time = await _calculate_avg_response_time(db)
+    api_response_time = await _calculate_avg_response_time()
 
     # Test database health
     try:
@@ -218,46 +222,17 @@ async def _calculate_system_uptime(db: AsyncSession) -> float:
     return 100.0
 
 
-async def _calculate_avg_response_time(db: AsyncSession) -> float:
-    """Calculate average response time from recent audit logs."""
-    # Get recent requests (last hour)
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent_requests_query = (
-        select(func.count(AuditLog.id))
-        .where(
-            and_(
-                AuditLog.created_at >= one_hour_ago,
-                AuditLog.request_path.isnot(None)
-            )
-        )
-    )
-    recent_requests_result = await db.execute(recent_requests_query)
-    request_count = recent_requests_result.scalar() or 0
-    
-    # Calculate response time estimate from request patterns
-    # Note: Actual response times are not stored, so we estimate from error rates
-    if request_count > 0:
-        # Count errors in recent requests
-        error_query = (
-            select(func.count(AuditLog.id))
-            .where(
-                and_(
-                    AuditLog.created_at >= one_hour_ago,
-                    AuditLog.request_path.isnot(None),
-                    AuditLog.success == False
-                )
-            )
-        )
-        error_result = await db.execute(error_query)
-        error_count = error_result.scalar() or 0
-        error_rate = (error_count / request_count * 100) if request_count > 0 else 0.0
-        
-        # Estimate: base time + error penalty - volume bonus
-        base_time = 50.0
-        error_penalty = error_rate * 2
-        volume_bonus = min(20.0, request_count / 50)
-        return max(10.0, base_time + error_penalty - volume_bonus)
-    return 0.0
+async def _calculate_avg_response_time() -> float:
+    """Average API response time (ms) over the last hour, from the request latency histograms."""
+    end = datetime.utcnow()
+    try:
+        routes = await RequestMetrics.get_instance().by_route(end - timedelta(hours=1), end)
+    except Exception:
+        return 0.0
+    total = LatencyHistogram()
+    for histogram in routes.values():
+        total.merge(histogram)
+    return total.average_ms
 
 
 @router.get("/health/detailed")
@@ -332,7 +307,7 @@ async def get_detailed_health(
     recent_requests_result = await db.execute(recent_requests_query)
     recent_request_count = recent_requests_result.scalar() or 0
     
-    api_response_time = await _calculate_avg_response_time(db)
+    api_response_time = await _calculate_avg_response_time()
     api_uptime = await _calculate_system_uptime(db)
 
     # Get real CPU and memory usage using psutil
@@ -485,62 +460,24 @@ async def get_performance_metrics(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Calculate real API endpoint performance from audit logs
-    # Group by request_path to get endpoint statistics
-    api_perf_query = (
-        select(
-            AuditLog.request_path,
-            func.count(AuditLog.id).label("request_count"),
-            func.sum(func.cast(AuditLog.success == False, int)).label("error_count")
-        )
-        .where(
-            and_(
-                AuditLog.created_at >= start_date,
-                AuditLog.created_at <= end_date,
-                AuditLog.request_path.isnot(None),
-                AuditLog.request_path.like("/api/v1/%")
-            )
+    # API endpoint latency from the request histograms, busiest routes first
+    try:
+        routes, trend_steps = await RequestMetrics.get_instance().window(
+            start_date, end_date, step_seconds=86400
         )
-        .group_by(AuditLog.request_path)
-        .order_by(func.count(AuditLog.id).desc())
-        .limit(20)
-    )
-    
-    api_perf_result = await db.execute(api_perf_query)
-    api_perf_rows = api_perf_result.all()
-    
-    # Calculate total requests and errors for average
-    total_requests = sum(row.request_count for row in api_perf_rows)
-    total_errors = sum(row.error_count for row in api_perf_rows)
-    
-    # Calculate average response time from actual request patterns
-    # Note: Actual response times are not stored in audit logs
-    # This calculates an estimate based on request volume and error rates
-    # In production, you'd track actual response times in extra_data or separate table
-    avg_response_time = 0.0
-    if total_requests > 0:
-        # Calculate based on error rate (higher errors = slower responses)
-        error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0.0
-        # Estimate: lower error rate and higher volume = better performance
-        base_time = 50.0
-        error_penalty = error_rate * 2  # Each % error adds 2ms
-        volume_bonus = min(20.0, total_requests / 100)  # High volume = better caching
-        avg_response_time = max(10.0, base_time + error_penalty - volume_bonus)
-    
-    # Build API performance list
-    api_performance = []
-    for row in api_perf_rows:
-        endpoint = row.request_path or "unknown"
-        request_count = row.request_count or 0
-        error_count = row.error_count or 0
-        error_rate = (error_count / request_count * 100) if request_count > 0 else 0.0
-        
-        api_performance.append({
-            "endpoint": endpoint,
-            "average_response_time": round(avg_response_time, 2),  # Would use real data if available
-            "request_count": request_count,
-            "error_rate": round(error_rate, 2)
-        })
+    except Exception:
+        routes, trend_steps = {}, []
+
+    overall = LatencyHistogram()
+    for histogram in routes.values():
+        overall.merge(histogram)
+    avg_response_time = overall.average_ms
+
+    api_performance = [
+        {"endpoint": route, **histogram.summary()}
+        for route, histogram in sorted(routes.items(), key=lambda item: item[1].count, reverse=True)
+        if not route.endswith(UNMATCHED_ROUTE)
+    ][:20]
 
     # Get database performance from actual queries
     # Count total database operations (queries that hit database)
@@ -659,63 +596,34 @@ async def get_performance_metrics(
         "network_usage": network_usage
     }
 
-    # Performance trend from actual audit log activity
+    # Daily response time trend from the request histograms
+    trend_by_day = {
+        datetime.utcfromtimestamp(step).strftime("%Y-%m-%d"): histogram
+        for step, histogram in trend_steps
+    }
     performance_trend = []
     current_date = start_date
     while current_date <= end_date and len(performance_trend) < 30:
-        next_date = current_date + timedelta(days=1)
-        
-        # Count requests for this day
-        day_requests_query = (
-            select(func.count(AuditLog.id))
-            .where(
-                and_(
-                    AuditLog.created_at >= current_date,
-                    AuditLog.created_at < next_date,
-                    AuditLog.request_path.isnot(None)
-                )
-            )
-        )
-        day_requests_result = await db.execute(day_requests_query)
-        day_request_count = day_requests_result.scalar() or 0
-        
-        # Calculate response time estimate for this day
-        # Count errors for this day to estimate performance
-        day_errors_query = (
-            select(func.count(AuditLog.id))
-            .where(
-                and_(
-                    AuditLog.created_at >= current_date,
-                    AuditLog.created_at < next_date,
-                    AuditLog.success == False,
-                    AuditLog.request_path.isnot(None)
-                )
-            )
-        )
-        day_errors_result = await db.execute(day_errors_query)
-        day_error_count = day_errors_result.scalar() or 0
-        
-        if day_request_count > 0:
-            error_rate = (day_error_count / day_request_count * 100)
-            base_time = 50.0
-            error_penalty = error_rate * 2
-            volume_bonus = min(20.0, day_request_count / 50)
-            estimated_response_time = max(10.0, base_time + error_penalty - volume_bonus)
-        else:
-            estimated_response_time = 0.0
-        
+        day = current_date.strftime("%Y-%m-%d")
+        histogram = trend_by_day.get(day)
         performance_trend.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "response_time": round(estimated_response_time, 2),
+            "date": day,
+            "response_time": round(histogram.average_ms, 2) if histogram else 0.0,
+            "p95": round(histogram.percentile(95), 2) if histogram else None,
+            "request_count": histogram.count if histogram else 0,
             "cpu_usage": None,  # Would need system monitoring
             "memory_usage": None  # Would need system monitoring
         })
-        
-        current_date = next_date
+        current_date += timedelta(days=1)
 
     return PerformanceMetrics(
         system_uptime=round(system_uptime, 2),
         average_response_time=round(avg_response_time, 2),
+        response_time_percentiles={
+            "p50": round(overall.percentile(50), 2),
+            "p95": round(overall.percentile(95), 2),
+            "p99": round(overall.percentile(99), 2),
+        },
         database_performance=database_performance,
         api_performance=api_performance,
         resource_usage=resource_usage,
@@ -723,6 +631,53 @@ async def get_performance_metrics(
     )
 
 
+LATENCY_WINDOWS = {
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "6h": timedelta(hours=6),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+
+@router.get("/performance/endpoints")
+async def get_endpoint_latency(
+    window: str = Query("1h", description="Time window: 5m, 1h, 6h, 24h, 7d or 30d"),
+    endpoint: Optional[str] = Query(None, description="Route template filter, e.g. 'GET /api/v1/users/{user_id}'"),
+    current_user: User = Depends(require_permission(Permission.SYSTEM_PERFORMANCE)),
+):
+    """
+    Get per-endpoint latency percentiles for a time window.
+
+    Returns:
+        Request count, average, p50/p95/p99 (ms) and error rate per route template.
+    """
+    if window not in LATENCY_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid window. Valid windows: {', '.join(LATENCY_WINDOWS)}",
+        )
+
+    end = datetime.utcnow()
+    routes = await RequestMetrics.get_instance().by_route(end - LATENCY_WINDOWS[window], end)
+    if endpoint:
+        routes = {route: histogram for route, histogram in routes.items() if route == endpoint}
+
+    overall = LatencyHistogram()
+    for histogram in routes.values():
+        overall.merge(histogram)
+
+    return {
+        "window": window,
+        "overall": overall.summary(),
+        "endpoints": [
+            {"endpoint": route, **histogram.summary()}
+            for route, histogram in sorted(routes.items(), key=lambda item: item[1].count, reverse=True)
+        ],
+    }
+
+
 # ============================================================================
 # System Alerts Endpoints
 # ============================================================================
@@ -867,118 +822,48 @@ async def get_system_logs(
     end_date: Optional[datetime] = Query(None, description="End date"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
     current_user: User = Depends(require_permission(Permission.SYSTEM_LOGS)),
 ):
     """
     Get system logs.
 
+    System logs are the audit entries classified as such when they were
+    written (see classify_system_log); level and component filters run in
+    SQL on their indexed columns.
+
     Returns:
         List of system logs with pagination.
     """
-
-    # Use audit logs with system-related actions as system logs
-    # Include SYSTEM_ERROR, CONFIG_CHANGE, and other system actions
-    system_actions = [
-        AuditAction.SYSTEM_ERROR,
-        AuditAction.CONFIG_CHANGE,
-        AuditAction.SECURITY_ALERT,
-    ]
-    
-    # Also include logs where resource_type indicates system components
-    from sqlalchemy import or_
-    query = select(AuditLog).where(
-        or_(
-            AuditLog.action.in_(system_actions),
-            AuditLog.resource_type.in_(["system", "database", "cache", "email", "api"]),
-            AuditLog.description.like("%system%"),
-            AuditLog.description.like("%error%"),
-            AuditLog.description.like("%warning%"),
-        )
+    from app.modules.audit.repository import AuditRepository
+
+    audit_logs, total, next_cursor, total_is_estimate = await AuditRepository(db).get_system_logs(
+        limit=page_size,
+        level=level,
+        component=component,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor,
+        skip=(page - 1) * page_size,
     )
 
-    if start_date:
-        query = query.where(AuditLog.created_at >= start_date)
-    if end_date:
-        query = query.where(AuditLog.created_at <= end_date)
-    
-    # Filter by level if provided (check in extra_data)
-    if level:
-        # For PostgreSQL, we can use JSONB operations
-        # For now, we'll filter after fetching (less efficient but works)
-        pass  # Will filter in Python after fetching
-
-    # Apply pagination - fetch more than needed to account for filtering
-    offset = (page - 1) * page_size
-    # Fetch more records to account for post-filtering
-    fetch_limit = page_size * 3 if (level or component) else page_size
-    query = query.order_by(AuditLog.created_at.desc()).limit(fetch_limit).offset(offset)
-
-    result = await db.execute(query)
-    audit_logs = result.scalars().all()
-
-    # Convert to system logs and apply filters
-    logs = []
-    for log in audit_logs:
-        extra_data = log.extra_data or {}
-        
-        # Determine log level from action or extra_data
-        log_level = extra_data.get("level", "info")
-        if not log_level or log_level == "info":
-            if log.action == AuditAction.SYSTEM_ERROR:
-                log_level = "error"
-            elif "error" in (log.description or "").lower() or "failed" in (log.description or "").lower():
-                log_level = "error"
-            elif "warning" in (log.description or "").lower() or "warn" in (log.description or "").lower():
-                log_level = "warning"
-            else:
-                log_level = "info"
-        
-        # Determine component from resource_type or extra_data
-        component = extra_data.get("component") or log.resource_type or "system"
-        
-        # Filter by level if provided
-        if level and log_level.lower() != level.lower():
-            continue
-            
-        # Filter by component if provided
-        if component_filter and component.lower() != component_filter.lower():
-            continue
-        
-        logs.append(SystemLog(
+    logs = [
+        SystemLog(
             id=log.id,
-            level=log_level,
-            component=component,
+            level=log.level,
+            component=log.component,
             message=log.description or "No message",
             timestamp=log.created_at,
-            stack_trace=extra_data.get("stack_trace")
-        ))
-        
-        # Stop if we have enough logs after filtering
-        if len(logs) >= page_size:
-            break
-
-    # Get total count (approximate - for exact count, would need to filter all records)
-    # For now, use a simpler approach: get count of all matching records
-    count_query = select(func.count(AuditLog.id)).where(
-        or_(
-            AuditLog.action.in_(system_actions),
-            AuditLog.resource_type.in_(["system", "database", "cache", "email", "api"]),
-            AuditLog.description.like("%system%"),
-            AuditLog.description.like("%error%"),
-            AuditLog.description.like("%warning%"),
+            stack_trace=(log.extra_data or {}).get("stack_trace"),
         )
-    )
-    if start_date:
-        count_query = count_query.where(AuditLog.created_at >= start_date)
-    if end_date:
-        count_query = count_query.where(AuditLog.created_at <= end_date)
-    
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+        for log in audit_logs
+    ]
 
     return SystemLogsResponse(
-        logs=logs[:page_size],  # Ensure we only return page_size items
+        logs=logs,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor,
+        total_is_estimate=total_is_estimate,
     )
@@ -9,7 +9,7 @@ from math import ceil
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from app.modules.auth.repository import UserRepository
 from app.modules.auth.models import User
 from app.modules.users.schemas import (
@@ -114,7 +114,7 @@ class UserManagementService:
             )
 
         # Hash password
-        password_hash = get_password_hash(user_data.password)
+        password_hash = await get_password_hash_async(user_data.password)
 
         # Create user (we'll need to modify repository.create to accept more fields)
         from app.modules.auth.schemas import UserCreate
@@ -4,6 +4,7 @@ Shared pytest fixtures for all tests.
 Provides database sessions, test users, test data, and mocks for Docker and Celery.
 """
 import os
+import asyncio
 import pytest
 import uuid
 from datetime import datetime, date, timedelta
@@ -18,6 +19,7 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.pool import StaticPool
 
+import app.main  # noqa: F401 - imports every module's models so all mappers can be configured
 from app.config.database import Base
 from app.modules.auth.models import User
 from app.modules.hosting.models import (
@@ -497,3 +499,205 @@ def mock_email_service():
 
 
 
+
+
+# ============================================================================
+# Redis Fake
+# ============================================================================
+
+class FakeRedis:
+    """
+    In-memory Redis for unit tests, shared by the services under test.
+
+    Covers the strings, hashes, streams and pub/sub commands the app issues,
+    with the blocking redis.Redis interface (decode_responses=True); the
+    `asyncio` attribute exposes the same data through the redis.asyncio
+    interface. While `down` is set every command and pipeline raises
+    ConnectionError.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.streams = {}
+        self.published = []
+        self.subscribers = {}
+        self.down = False
+        self._next_id = 0
+        self._locks = {}
+        self.asyncio = AsyncFakeRedis(self)
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis down")
+
+    def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        self._check()
+        if nx and key in self.values:
+            return None
+        self.values[key] = value if isinstance(value, str) else str(value)
+        return True
+
+    def delete(self, *keys):
+        self._check()
+        return sum(
+            1 for key in keys
+            if any(store.pop(key, None) is not None for store in (self.values, self.hashes, self.streams))
+        )
+
+    def incr(self, key):
+        self._check()
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value)
+        return value
+
+    def expire(self, key, ttl):
+        self._check()
+        return key in self.values or key in self.hashes or key in self.streams
+
+    def hincrby(self, key, field, amount=1):
+        self._check()
+        row = self.hashes.setdefault(key, {})
+        row[field] = row.get(field, 0) + int(amount)
+        return row[field]
+
+    def hincrbyfloat(self, key, field, amount=1.0):
+        self._check()
+        row = self.hashes.setdefault(key, {})
+        row[field] = row.get(field, 0) + float(amount)
+        return row[field]
+
+    def hgetall(self, key):
+        self._check()
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self._check()
+        self._next_id += 1
+        entry_id = f"{self._next_id}-0"
+        entries = self.streams.setdefault(stream, [])
+        entries.append((entry_id, dict(fields)))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        return entry_id
+
+    def xrange(self, stream, min="-", max="+", count=None):
+        self._check()
+        return list(self.streams.get(stream, []))[:count]
+
+    def xdel(self, stream, *entry_ids):
+        self._check()
+        entries = self.streams.get(stream, [])
+        self.streams[stream] = [entry for entry in entries if entry[0] not in entry_ids]
+        return len(entries) - len(self.streams[stream])
+
+    def publish(self, channel, message):
+        self._check()
+        self.published.append((channel, message))
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(queues)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them on execute(), like redis.client.Pipeline"""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        self.redis._check()
+        commands, self.commands = self.commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class AsyncFakePipeline(FakePipeline):
+    async def execute(self):
+        return super().execute()
+
+
+class FakePubSub:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.redis.subscribers[channel].remove(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        pass
+
+
+class FakeLock:
+    def __init__(self, lock: asyncio.Lock):
+        self._lock = lock
+
+    async def acquire(self):
+        await self._lock.acquire()
+        return True
+
+    async def release(self):
+        self._lock.release()
+
+
+class AsyncFakeRedis:
+    """The redis.asyncio interface over a FakeRedis"""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return call
+
+    def pipeline(self, transaction=True):
+        return AsyncFakePipeline(self.redis)
+
+    def pubsub(self):
+        return FakePubSub(self.redis)
+
+    def lock(self, key, timeout=None, blocking_timeout=None):
+        return FakeLock(self.redis._locks.setdefault(key, asyncio.Lock()))
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    """In-memory Redis with the blocking client interface."""
+    return FakeRedis()
+
+
+@pytest.fixture
+def fake_async_redis(fake_redis: FakeRedis) -> AsyncFakeRedis:
+    """Async client over the same data as fake_redis."""
+    return fake_redis.asyncio
@@ -0,0 +1 @@
+"""Audit module tests."""
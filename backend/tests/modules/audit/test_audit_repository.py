@@ -0,0 +1,181 @@
+"""
+Unit tests for audit log pagination and system log classification.
+
+A recording stand-in for the async session captures the statements the
+repository issues, which are compiled for PostgreSQL to check that pages are
+keyset queries and that totals come from planner statistics when they can.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.exceptions import ValidationException
+from app.modules.audit.models import AuditAction, AuditLog
+from app.modules.audit.repository import (
+    EXACT_COUNT_BELOW,
+    SYSTEM_LOG_INDEX,
+    AuditRepository,
+    classify_system_log,
+    decode_cursor,
+    encode_cursor,
+)
+from app.modules.audit.schemas import AuditLogCreate, AuditLogFilter
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.value
+
+
+class FakeBind:
+    class dialect:
+        name = "postgresql"
+
+
+class FakeSession:
+    """Answers page queries with rows, counts with count and pg_class with reltuples"""
+
+    def __init__(self, rows=(), count=0, reltuples=None):
+        self.rows = list(rows)
+        self.count = count
+        self.reltuples = reltuples
+        self.statements = []
+
+    def get_bind(self):
+        return FakeBind
+
+    async def execute(self, statement, params=None):
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.statements.append((sql, params))
+        if "pg_class" in sql:
+            return FakeResult(self.reltuples)
+        if "count(*)" in sql:
+            return FakeResult(self.count)
+        limit = statement._limit
+        return FakeResult(self.rows[:limit])
+
+
+def _log(n):
+    return AuditLog(
+        id=f"id-{n:03d}",
+        action=AuditAction.UPDATE,
+        resource_type="customer",
+        description="Updated customer",
+        created_at=datetime(2026, 10, 16, 12, 0, n),
+    )
+
+
+def test_cursor_round_trip():
+    log = _log(3)
+    assert decode_cursor(encode_cursor(log)) == (log.created_at, log.id)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValidationException):
+        decode_cursor("not-a-cursor")
+
+
+async def test_cursor_page_is_a_keyset_query_with_next_cursor():
+    rows = [_log(n) for n in range(4)]
+    db = FakeSession(rows=rows, count=42)
+    repository = AuditRepository(db)
+
+    logs, total, next_cursor, is_estimate = await repository.get_all(
+        limit=3, cursor=encode_cursor(_log(9)), filters=AuditLogFilter(user_id="user-1")
+    )
+
+    page_sql = db.statements[0][0]
+    assert "(audit_logs.created_at, audit_logs.id) < (" in page_sql
+    assert "OFFSET" not in page_sql
+    assert "ORDER BY audit_logs.created_at DESC, audit_logs.id DESC" in page_sql
+    assert logs == rows[:3]
+    assert decode_cursor(next_cursor) == (rows[2].created_at, rows[2].id)
+    # Filtered totals are always exact
+    assert (total, is_estimate) == (42, False)
+
+
+async def test_last_page_has_no_next_cursor():
+    db = FakeSession(rows=[_log(1), _log(2)])
+    logs, _, next_cursor, _ = await AuditRepository(db).get_all(limit=3)
+    assert len(logs) == 2
+    assert next_cursor is None
+
+
+async def test_unfiltered_total_uses_planner_statistics():
+    db = FakeSession(reltuples=float(EXACT_COUNT_BELOW * 30))
+    _, total, _, is_estimate = await AuditRepository(db).get_all(limit=20, estimate_total=True)
+
+    assert (total, is_estimate) == (EXACT_COUNT_BELOW * 30, True)
+    assert db.statements[-1][1] == {"relation": "audit_logs"}
+    assert not any("count(*)" in sql for sql, _ in db.statements)
+
+
+@pytest.mark.parametrize("reltuples", [None, -1.0, float(EXACT_COUNT_BELOW - 1)])
+async def test_small_or_unanalyzed_tables_are_counted_exactly(reltuples):
+    db = FakeSession(count=7, reltuples=reltuples)
+    _, total, _, is_estimate = await AuditRepository(db).get_all(limit=20, estimate_total=True)
+    assert (total, is_estimate) == (7, False)
+
+
+async def test_system_logs_filter_on_indexed_columns():
+    db = FakeSession(count=3, reltuples=float(EXACT_COUNT_BELOW * 2))
+    repository = AuditRepository(db)
+
+    await repository.get_system_logs(limit=50, level="ERROR", component="Database")
+    page_sql = db.statements[0][0]
+    assert "audit_logs.level IS NOT NULL" in page_sql
+    assert "audit_logs.level = %(level_1)s" in page_sql
+    assert "audit_logs.component = %(component_1)s" in page_sql
+    assert "LIKE" not in page_sql
+    # Filtered: exact count, no statistics lookup
+    assert not any("pg_class" in sql for sql, _ in db.statements)
+
+    db.statements.clear()
+    _, total, _, is_estimate = await repository.get_system_logs(limit=50)
+    assert (total, is_estimate) == (EXACT_COUNT_BELOW * 2, True)
+    assert db.statements[-1][1] == {"relation": SYSTEM_LOG_INDEX}
+
+
+@pytest.mark.parametrize("action, resource_type, description, extra_data, expected", [
+    (AuditAction.UPDATE, "customer", "Updated customer", None, (None, None)),
+    (AuditAction.SYSTEM_ERROR, "worker", "Task crashed", None, ("error", "worker")),
+    (AuditAction.CONFIG_CHANGE, "settings", "Changed SMTP host", None, ("info", "settings")),
+    (AuditAction.UPDATE, "database", "Backup failed", None, ("error", "database")),
+    (AuditAction.UPDATE, "cache", "Eviction warning", None, ("warning", "cache")),
+    (AuditAction.UPDATE, "customer", "system sync", {"level": "DEBUG", "component": "Sync"}, ("debug", "sync")),
+])
+def test_classify_system_log(action, resource_type, description, extra_data, expected):
+    assert classify_system_log(action, resource_type, description, extra_data) == expected
+
+
+async def test_create_classifies_system_logs():
+    class RecordingSession:
+        def __init__(self):
+            self.added = []
+
+        def add(self, audit_log):
+            self.added.append(audit_log)
+
+        async def commit(self):
+            pass
+
+        async def refresh(self, audit_log):
+            pass
+
+    db = RecordingSession()
+    repository = AuditRepository(db)
+
+    await repository.create(AuditLogCreate(action=AuditAction.UPDATE, resource_type="database", description="Backup failed"))
+    await repository.create(AuditLogCreate(action=AuditAction.UPDATE, resource_type="customer", description="Updated"))
+
+    assert [(log.level, log.component) for log in db.added] == [("error", "database"), (None, None)]
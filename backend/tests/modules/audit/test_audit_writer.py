@@ -0,0 +1,238 @@
+"""
+Unit tests for the batched audit log writer.
+
+Inserts go to a recording stand-in for the async session, and the spool to
+the shared in-memory Redis fake, so batching, retries and the shutdown
+spool can be checked without Postgres.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+
+from app.modules.audit.models import AuditAction
+from app.modules.audit.schemas import AuditLogCreate
+from app.modules.audit.writer import DEAD_LETTER_STREAM, SPOOL_STREAM, AuditWriter, build_insert
+
+
+class FakeSession:
+    def __init__(self, database):
+        self.database = database
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        if self.database.down:
+            raise ConnectionError("database down")
+        rows = [row for row in statement._multi_values[0] if any(
+            column.key == "user_id" and value in self.database.deleted_users for column, value in row.items()
+        )]
+        if rows:
+            raise IntegrityError("INSERT INTO audit_logs", {}, Exception("violates foreign key constraint"))
+        self.pending.append(statement)
+
+    async def commit(self):
+        self.database.statements.extend(self.pending)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.statements = []
+        self.down = False
+        self.deleted_users = set()
+
+    def session(self):
+        return FakeSession(self)
+
+    @property
+    def rows(self):
+        return [
+            {column.key: value for column, value in row.items()}
+            for statement in self.statements
+            for row in statement._multi_values[0]
+        ]
+
+
+def _entry(n=0, user_id=None):
+    return AuditLogCreate(
+        action=AuditAction.UPDATE,
+        resource_type="customer",
+        resource_id=f"customer-{n}",
+        description=f"Updated customer {n}",
+        user_id=user_id,
+        new_values={"n": n},
+    )
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def writer(database, fake_async_redis, tmp_path):
+    return AuditWriter(
+        session_factory=database.session,
+        redis_client=fake_async_redis,
+        batch_size=3,
+        flush_seconds=60,
+        max_buffer=5,
+        spool_path=str(tmp_path / "audit_spool.jsonl"),
+    )
+
+
+def test_insert_is_multi_row_and_skips_written_ids(writer):
+    for n in range(2):
+        writer.submit(_entry(n))
+    with writer._lock:
+        rows = list(writer._buffer)
+    sql = str(build_insert(rows).compile(dialect=postgresql.dialect()))
+
+    assert "%(id_m0)s" in sql and "%(id_m1)s" in sql
+    assert "ON CONFLICT (id) DO NOTHING" in sql
+
+
+def test_submit_classifies_system_logs(writer):
+    log = writer.submit(AuditLogCreate(action=AuditAction.SYSTEM_ERROR, resource_type="cache", description="Eviction"))
+    other = writer.submit(_entry(1))
+    with writer._lock:
+        rows = list(writer._buffer)
+
+    assert (log.level, log.component) == ("error", "cache")
+    assert (rows[0]["level"], rows[0]["component"]) == ("error", "cache")
+    assert (other.level, rows[1]["level"]) == (None, None)
+
+
+async def test_submit_returns_transient_entry_and_flush_inserts_in_batches(writer, database):
+    logs = [writer.submit(_entry(n)) for n in range(7)]
+
+    assert all(log.id and log.created_at for log in logs)
+    assert database.statements == []
+
+    assert await writer.flush() == 7
+    assert [len(statement._multi_values[0]) for statement in database.statements] == [3, 3, 1]
+    assert [row["id"] for row in database.rows] == [log.id for log in logs]
+    assert writer.pending == 0
+
+
+async def test_full_batch_wakes_the_flush_loop(writer, database):
+    writer.start()
+    try:
+        for n in range(3):
+            writer.submit(_entry(n))
+        for _ in range(50):
+            if database.rows:
+                break
+            await asyncio.sleep(0.01)
+        assert len(database.rows) == 3
+    finally:
+        await writer.stop()
+
+
+async def test_failed_flush_keeps_entries_and_spools_overflow(writer, database, fake_redis):
+    database.down = True
+    for n in range(4):
+        writer.submit(_entry(n))
+    assert await writer.flush() == 0
+    assert writer.pending == 4
+
+    for n in range(4, 7):
+        writer.submit(_entry(n))
+    assert await writer.flush() == 0
+    # The two oldest went to the spool, the newest five stay queued
+    assert writer.pending == 5
+    assert len(fake_redis.streams[SPOOL_STREAM]) == 2
+
+    database.down = False
+    assert await writer.flush() == 5
+    assert await writer.replay_spool() == 2
+    assert sorted(row["resource_id"] for row in database.rows) == [f"customer-{n}" for n in range(7)]
+    assert fake_redis.streams[SPOOL_STREAM] == []
+
+
+async def test_rejected_row_is_dead_lettered_and_the_rest_inserted(writer, database, fake_redis):
+    database.deleted_users.add("deleted-user")
+    for n in range(7):
+        writer.submit(_entry(n, user_id="deleted-user" if n == 4 else None))
+
+    assert await writer.flush() == 6
+    assert writer.pending == 0
+    assert sorted(row["resource_id"] for row in database.rows) == [f"customer-{n}" for n in range(7) if n != 4]
+    [(_, dead)] = fake_redis.streams[DEAD_LETTER_STREAM]
+    assert '"customer-4"' in dead["entry"]
+    assert "foreign key" in dead["error"]
+
+    # The same applies to spooled entries, which no longer block replay
+    database.down = True
+    writer.submit(_entry(7, user_id="deleted-user"))
+    writer.submit(_entry(8))
+    await writer.stop()
+    database.down = False
+    await writer.replay_spool()
+
+    assert fake_redis.streams[SPOOL_STREAM] == []
+    assert len(fake_redis.streams[DEAD_LETTER_STREAM]) == 2
+    assert "customer-8" in [row["resource_id"] for row in database.rows]
+
+
+async def test_stop_spools_to_redis_and_replay_restores_entries(writer, database, fake_redis):
+    database.down = True
+    logs = [writer.submit(_entry(n)) for n in range(2)]
+    await writer.stop()
+
+    assert writer.pending == 0
+    assert len(fake_redis.streams[SPOOL_STREAM]) == 2
+
+    database.down = False
+    assert await writer.replay_spool() == 2
+    assert [row["id"] for row in database.rows] == [log.id for log in logs]
+    assert database.rows[0]["created_at"] == logs[0].created_at
+    assert database.rows[0]["action"] == AuditAction.UPDATE.value
+
+
+async def test_spool_falls_back_to_local_file(writer, database, fake_redis, tmp_path):
+    database.down = True
+    fake_redis.down = True
+    writer.submit(_entry(1))
+    await writer.stop()
+
+    assert (tmp_path / "audit_spool.jsonl").exists()
+
+    database.down = False
+    fake_redis.down = False
+    assert await writer.replay_spool() == 1
+    assert database.rows[0]["new_values"] == {"n": 1}
+    assert not (tmp_path / "audit_spool.jsonl").exists()
+    assert not (tmp_path / "audit_spool.jsonl.replay").exists()
+
+
+async def test_log_action_inserts_security_actions_inline(writer, monkeypatch):
+    from app.modules.audit import service as service_module
+
+    created = []
+
+    class FakeRepository:
+        async def create(self, audit_data):
+            created.append(audit_data.action)
+            return audit_data
+
+    monkeypatch.setattr(service_module.AuditWriter, "get_instance", classmethod(lambda cls: writer))
+    audit_service = service_module.AuditService.__new__(service_module.AuditService)
+    audit_service.repository = FakeRepository()
+
+    writer.start()
+    try:
+        await audit_service.log_action(AuditAction.LOGIN_FAILED, "auth", "Failed login")
+        await audit_service.log_action(AuditAction.UPDATE, "customer", "Updated customer")
+        await audit_service.log_action(AuditAction.UPDATE, "customer", "Updated customer", sync=True)
+
+        assert created == [AuditAction.LOGIN_FAILED, AuditAction.UPDATE]
+        assert writer.pending == 1
+    finally:
+        await writer.stop()
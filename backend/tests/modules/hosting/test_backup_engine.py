@@ -0,0 +1,149 @@
+"""
+Unit tests for the streaming VPS backup engine.
+
+Archives are streamed into an in-memory stand-in for the S3 multipart API
+(the same calls moto or MinIO would serve) and extracted back.
+"""
+import io
+import os
+import tarfile
+
+import pytest
+
+from app.modules.hosting.services.backup_engine import (
+    BackupJob,
+    S3MultipartWriter,
+    extract_archive,
+    resolve_codec,
+    run_backup_job,
+)
+from app.modules.hosting.services.backup_service import VPSBackupService
+
+
+class FakeS3:
+    """Minimal multipart-upload implementation of the boto3 S3 client."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.create_args = {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        self.create_args[Key] = kwargs
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        self.objects[(Bucket, Key)] = b"".join(parts[number] for number in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(Key)
+
+
+@pytest.fixture
+def volume(tmp_path):
+    source = tmp_path / "volume"
+    (source / "etc").mkdir(parents=True)
+    (source / "etc" / "hostname").write_text("vps-1\n")
+    (source / "data.bin").write_bytes(os.urandom(256 * 1024))
+    return source
+
+
+def _job(volume, codec, **kwargs) -> BackupJob:
+    return BackupJob(
+        source_path=str(volume),
+        arcname="vps-1",
+        filename=f"vps-1-daily-20260101-030000.tar.{'zst' if codec == 'zstd' else 'gz'}",
+        codec=codec,
+        **kwargs
+    )
+
+
+def test_multipart_writer_splits_parts():
+    """Test data is uploaded in part-size chunks plus a short final part."""
+    s3 = FakeS3()
+    writer = S3MultipartWriter(s3, "bucket", "key", part_size=5 * 1024 * 1024)
+
+    payload = os.urandom(11 * 1024 * 1024)
+    for offset in range(0, len(payload), 1024 * 1024):
+        writer.write(payload[offset:offset + 1024 * 1024])
+    writer.close()
+
+    assert s3.objects[("bucket", "key")] == payload
+    assert writer.bytes_written == len(payload)
+
+
+def test_backup_streams_to_s3(volume, tmp_path):
+    """Test a gzip archive is streamed into S3 without a local file."""
+    s3 = FakeS3()
+    job = _job(volume, "gzip", s3_bucket="backups", s3_key="c/1/archive.tar.gz",
+               s3_extra_args={"ServerSideEncryption": "AES256"}, local_dir=str(tmp_path / "staging"))
+
+    result = run_backup_job(job, s3_client=s3)
+
+    assert result["backup_path"] is None
+    assert result["s3_key"] == "c/1/archive.tar.gz"
+    assert result["source_bytes"] == 256 * 1024 + len("vps-1\n")
+    assert not (tmp_path / "staging").exists()
+    assert s3.create_args["c/1/archive.tar.gz"] == {"ServerSideEncryption": "AES256"}
+
+    body = s3.objects[("backups", "c/1/archive.tar.gz")]
+    assert result["bytes_written"] == len(body)
+    with tarfile.open(fileobj=io.BytesIO(body), mode="r:gz") as tar:
+        assert tar.extractfile("vps-1/etc/hostname").read() == b"vps-1\n"
+
+
+def test_failed_backup_aborts_upload(tmp_path):
+    """Test a failing archive aborts the multipart upload."""
+    s3 = FakeS3()
+    job = _job(tmp_path / "missing", "gzip", s3_bucket="backups", s3_key="k")
+
+    with pytest.raises(FileNotFoundError):
+        run_backup_job(job, s3_client=s3)
+
+    assert s3.aborted == ["k"]
+    assert s3.objects == {}
+
+
+def test_backup_past_deadline_aborts_upload(volume, monkeypatch):
+    """Test a job that outlives its timeout stops and aborts the multipart upload."""
+    s3 = FakeS3()
+    job = _job(volume, "gzip", s3_bucket="backups", s3_key="k", timeout_seconds=60)
+    clock = iter([0.0])  # the job starts at 0s, every later reading is 61s
+    monkeypatch.setattr("app.modules.hosting.services.backup_engine.time.monotonic", lambda: next(clock, 61.0))
+
+    with pytest.raises(TimeoutError):
+        run_backup_job(job, s3_client=s3)
+
+    assert s3.aborted == ["k"]
+    assert s3.objects == {}
+    assert s3.uploads == {}
+
+
+@pytest.mark.skipif(resolve_codec("zstd") != "zstd", reason="zstd not available")
+def test_zstd_local_roundtrip(volume, tmp_path):
+    """Test a zstd archive written locally extracts to the original tree."""
+    job = _job(volume, "zstd", compression_threads=2, local_dir=str(tmp_path / "backups"))
+
+    result = run_backup_job(job)
+
+    assert os.listdir(tmp_path / "backups") == [job.filename]
+    restored = tmp_path / "restored"
+    extract_archive(result["backup_path"], str(restored))
+    assert (restored / "vps-1" / "data.bin").read_bytes() == (volume / "data.bin").read_bytes()
+
+
+def test_parse_backup_filename():
+    """Test container name and type are recovered for every codec extension."""
+    assert VPSBackupService._parse_backup_filename("vps-web-1-daily-20260101-030000.tar.zst") == ("vps-web-1", "daily")
+    assert VPSBackupService._parse_backup_filename("vps-web-1-weekly-20260101-030000.tar.gz") == ("vps-web-1", "weekly")
+    assert VPSBackupService._parse_backup_filename("notes.txt") is None
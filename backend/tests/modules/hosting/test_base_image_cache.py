@@ -0,0 +1,102 @@
+"""
+Unit tests for docker-ready VPS base images.
+
+Covers tag versioning, cache hits and misses at provisioning time, and
+queueing each derivative build only once.
+"""
+import pytest
+from docker.errors import ImageNotFound
+
+from app.modules.hosting import tasks
+from app.modules.hosting.services import base_image_cache
+from app.modules.hosting.services.base_image_cache import (
+    build_docker_ready_image,
+    docker_ready_tag,
+    find_docker_ready_image,
+    render_dockerfile,
+    supports_docker_ready,
+)
+
+
+class FakeImages:
+    def __init__(self, present=()):
+        self.present = set(present)
+        self.pulled = []
+
+    def get(self, name):
+        if name not in self.present:
+            raise ImageNotFound(name)
+        return name
+
+    def pull(self, name):
+        self.pulled.append(name)
+
+
+class FakeClient:
+    def __init__(self, present=()):
+        self.images = FakeImages(present)
+
+
+class FakeBuildService:
+    def __init__(self):
+        self.builds = []
+
+    async def build_derivative_image(self, tag, dockerfile_content, labels=None, timeout_seconds=None):
+        self.builds.append((tag, dockerfile_content, labels))
+        return True, "sha256:abc"
+
+
+def test_tags_are_versioned_by_base_image_and_recipe():
+    """Test each OS image gets its own stable tag that changes with the recipe."""
+    tag = docker_ready_tag("ubuntu:22.04")
+
+    assert tag.startswith("cloudmanager/docker-ready:ubuntu-22.04-")
+    assert tag == docker_ready_tag("ubuntu:22.04")
+    assert tag != docker_ready_tag("ubuntu:24.04")
+    assert render_dockerfile("ubuntu:22.04").startswith("FROM ubuntu:22.04\n")
+
+    assert supports_docker_ready("registry.local:5000/library/debian:12")
+    assert not supports_docker_ready("almalinux:9")
+
+
+def test_provisioning_uses_cached_derivative_without_pulling(monkeypatch):
+    """Test a cache hit skips the pull and reports Docker as preinstalled."""
+    tag = docker_ready_tag("ubuntu:22.04")
+    client = FakeClient(present=[tag])
+    monkeypatch.setattr(tasks, "_queue_docker_ready_build", lambda base_image: pytest.fail("unexpected build"))
+
+    assert tasks._resolve_vps_image(client, "ubuntu:22.04") == (tag, True)
+    assert client.images.pulled == []
+
+
+def test_cache_miss_falls_back_and_queues_one_build(monkeypatch, fake_redis):
+    """Test a miss pulls the base image and queues the derivative build once."""
+    queued = []
+    monkeypatch.setattr(base_image_cache, "get_sync_redis", lambda: fake_redis)
+    monkeypatch.setattr(tasks.build_docker_ready_image_task, "delay", queued.append)
+    client = FakeClient()
+
+    assert tasks._resolve_vps_image(client, "ubuntu:22.04") == ("ubuntu:22.04", False)
+    assert tasks._resolve_vps_image(client, "ubuntu:22.04") == ("ubuntu:22.04", False)
+    assert tasks._resolve_vps_image(client, "almalinux:9") == ("almalinux:9", False)
+
+    assert client.images.pulled == ["ubuntu:22.04", "ubuntu:22.04", "almalinux:9"]
+    assert queued == ["ubuntu:22.04"]
+    assert find_docker_ready_image(client, "ubuntu:22.04") is None
+
+
+@pytest.mark.asyncio
+async def test_build_goes_through_image_build_service():
+    """Test the derivative is built from the generated Dockerfile with labels."""
+    service = FakeBuildService()
+
+    success, tag = await build_docker_ready_image(service, "debian:12")
+
+    assert success
+    assert tag == docker_ready_tag("debian:12")
+    built_tag, dockerfile, labels = service.builds[0]
+    assert built_tag == tag
+    assert "docker-ce" in dockerfile and "openssh-server" in dockerfile
+    assert labels["org.cloudmanager.docker-ready.base"] == "debian:12"
+
+    assert await build_docker_ready_image(service, "almalinux:9") == (False, "No docker-ready recipe for almalinux:9")
@@ -0,0 +1,106 @@
+"""
+Unit tests for the cgroup reader.
+
+Tests stat parsing, path caching, descriptor reuse and the fleet scan against
+a fake cgroup v2 tree.
+"""
+import os
+from collections import OrderedDict
+
+import pytest
+
+from app.modules.hosting.services.cgroup_service import (
+    CgroupMonitoringService,
+    parse_cpu_stat,
+    parse_oom_kill,
+    parse_pressure,
+)
+
+CONTAINER_A = "a" * 64
+CONTAINER_B = "b" * 64
+
+
+def _write_cgroup(directory, throttled=3, throttled_usec=1500, oom=1):
+    directory.mkdir(parents=True)
+    (directory / "cpu.stat").write_text(
+        f"usage_usec 100\nnr_periods 10\nnr_throttled {throttled}\nthrottled_usec {throttled_usec}\n"
+    )
+    (directory / "memory.pressure").write_text(
+        "some avg10=1.50 avg60=0.50 avg300=0.00 total=10\n"
+        "full avg10=0.25 avg60=0.00 avg300=0.00 total=2\n"
+    )
+    (directory / "memory.events").write_text(f"low 0\nhigh 0\nmax 0\noom 2\noom_kill {oom}\n")
+
+
+@pytest.fixture
+def cgroup_root(tmp_path, monkeypatch):
+    """Point the service at an empty fake cgroup v2 hierarchy with fresh caches."""
+    monkeypatch.setattr(CgroupMonitoringService, "CGROUP_V2_BASE", tmp_path)
+    monkeypatch.setattr(CgroupMonitoringService, "_cgroup_version", 2)
+    monkeypatch.setattr(CgroupMonitoringService, "_path_cache", {})
+    monkeypatch.setattr(CgroupMonitoringService, "_fd_cache", OrderedDict())
+    yield tmp_path
+    for fd in CgroupMonitoringService._fd_cache.values():
+        os.close(fd)
+
+
+def test_parse_stat_files():
+    """Test v1/v2 cpu.stat, PSI and OOM counters are parsed."""
+    assert parse_cpu_stat("nr_periods 5\nnr_throttled 2\nthrottled_usec 7\n") == {
+        "nr_periods": 5, "nr_throttled": 2, "throttled_time": 7000
+    }
+    assert parse_cpu_stat("nr_throttled 2\nthrottled_time 99\n")["throttled_time"] == 99
+    pressure = parse_pressure("some avg10=1.00 avg60=2.00 avg300=0.00 total=1\n")
+    assert pressure["some_avg10"] == 1.0 and pressure["full_avg10"] is None
+    assert parse_oom_kill("oom_kill_disable 0\nunder_oom 0\noom_kill 4\n") == 4
+
+
+def test_get_all_metrics_caches_paths_and_descriptors(cgroup_root):
+    """Test one sample resolves the directory once and reuses open descriptors."""
+    _write_cgroup(cgroup_root / "system.slice" / f"docker-{CONTAINER_A}.scope")
+    service = CgroupMonitoringService()
+
+    metrics = service.get_all_metrics(CONTAINER_A)
+
+    assert metrics.cpu_throttle_periods == 3
+    assert metrics.cpu_throttled_time_ns == 1_500_000
+    assert metrics.memory_pressure_some_avg10 == 1.5
+    assert metrics.memory_pressure_full_avg10 == 0.25
+    assert metrics.oom_kill_count == 1
+    assert CONTAINER_A in CgroupMonitoringService._path_cache
+    fds = dict(CgroupMonitoringService._fd_cache)
+    assert len(fds) == 3
+
+    # Content changes are picked up through the same descriptors
+    (cgroup_root / "system.slice" / f"docker-{CONTAINER_A}.scope" / "memory.events").write_text("oom_kill 5\n")
+    assert service.get_all_metrics(CONTAINER_A).oom_kill_count == 5
+    assert dict(CgroupMonitoringService._fd_cache) == fds
+
+
+def test_missing_container_returns_empty_metrics(cgroup_root):
+    """Test containers without a cgroup yield defaults and are not cached."""
+    service = CgroupMonitoringService()
+
+    metrics = service.get_all_metrics(CONTAINER_A)
+
+    assert metrics.cpu_throttle_periods == 0
+    assert metrics.memory_pressure_some_avg10 is None
+    assert CONTAINER_A not in CgroupMonitoringService._path_cache
+
+
+def test_scan_fleet_reads_every_container_once(cgroup_root):
+    """Test the fleet scan finds both cgroup layouts and reads each container."""
+    _write_cgroup(cgroup_root / "docker" / CONTAINER_A, throttled=1)
+    _write_cgroup(cgroup_root / "system.slice" / f"docker-{CONTAINER_B}.scope", throttled=2)
+    (cgroup_root / "system.slice" / "cron.service").mkdir()
+    service = CgroupMonitoringService()
+
+    results = service.scan_fleet()
+
+    assert set(results) == {CONTAINER_A, CONTAINER_B}
+    assert results[CONTAINER_A].cpu_throttle_periods == 1
+    assert results[CONTAINER_B].cpu_throttle_periods == 2
+
+    # Nothing is kept from the scan; later reads see the current files
+    (cgroup_root / "docker" / CONTAINER_A / "cpu.stat").write_text("nr_throttled 9\n")
+    assert service.get_all_metrics(CONTAINER_A).cpu_throttle_periods == 9
@@ -0,0 +1,116 @@
+"""
+Unit tests for the container events watcher.
+
+Docker events are fed in directly; applying to the database is replaced by a
+recorder, so these cover folding, settling, status rules and the lease.
+"""
+from app.modules.hosting.models import ContainerStatus, TimelineEventType
+from app.modules.hosting.services import container_events_service
+from app.modules.hosting.services.container_events_service import (
+    ContainerEventsWatcher,
+    ContainerObservation,
+    decide_transition,
+    observation_from_summary,
+)
+
+
+def _event(action, container_id="c1", name="vps-abc", **attributes):
+    return {
+        "Type": "container",
+        "Action": action,
+        "id": container_id,
+        "time": 1760000000,
+        "Actor": {"ID": container_id, "Attributes": {"name": name, **attributes}},
+    }
+
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _watcher(monkeypatch, applied, missing=()):
+    def fake_apply(db, observations):
+        applied.append(dict(observations))
+        return {"changed": len(observations), "missing_running": list(missing)}
+
+    monkeypatch.setattr(container_events_service, "apply_observations", fake_apply)
+    return ContainerEventsWatcher(client=object(), session_factory=FakeSession, settle_seconds=3)
+
+
+def test_status_rules():
+    """Test which Docker states change which recorded statuses."""
+    exited_ok = ContainerObservation("c1", "exited", exit_code=0)
+    crashed = ContainerObservation("c1", "exited", exit_code=1)
+    oom = ContainerObservation("c1", "exited", exit_code=137, oom_killed=True)
+    running = ContainerObservation("c1", "running")
+
+    assert decide_transition(ContainerStatus.RUNNING, exited_ok).status == ContainerStatus.STOPPED
+    assert decide_transition(ContainerStatus.RUNNING, crashed).status == ContainerStatus.ERROR
+    assert decide_transition(ContainerStatus.RUNNING, oom).metadata == {"exit_code": 137, "reason": "oom"}
+    assert decide_transition(ContainerStatus.STOPPED, running).event_type == TimelineEventType.STARTED
+    assert decide_transition(ContainerStatus.REBOOTING, running).event_type is None
+    assert decide_transition(ContainerStatus.REBOOTING, crashed) is None
+    assert decide_transition(ContainerStatus.CREATING, crashed) is None
+    assert decide_transition(ContainerStatus.RUNNING, running) is None
+
+
+def test_events_settle_and_fold_per_container(monkeypatch):
+    """Test a quick restart is folded into one running observation after the settle time."""
+    applied = []
+    watcher = _watcher(monkeypatch, applied)
+
+    watcher.handle_event(_event("die", exitCode="1"), now=100.0)
+    watcher.handle_event(_event("start"), now=101.0)
+    watcher.handle_event(_event("die", container_id="other", name="postgres", exitCode="1"), now=101.0)
+
+    watcher.flush(now=103.0)
+    assert applied == []
+
+    watcher.flush(now=104.0)
+    assert list(applied[0]) == ["c1"]
+    assert applied[0]["c1"].state == "running"
+
+
+def test_oom_then_die_is_reported_as_oom(monkeypatch):
+    """Test an OOM kill is kept on the exit it caused."""
+    applied = []
+    watcher = _watcher(monkeypatch, applied)
+
+    watcher.handle_event(_event("oom"), now=0.0)
+    watcher.handle_event(_event("die", exitCode="137"), now=0.1)
+    watcher.handle_event(_event("health_status: unhealthy", container_id="c2"), now=0.1)
+    watcher.flush(force=True)
+
+    observation = applied[0]["c1"]
+    assert (observation.state, observation.exit_code, observation.oom_killed) == ("exited", 137, True)
+    assert applied[0]["c2"].docker_state == "running (unhealthy)"
+
+
+def test_removed_running_container_triggers_reconcile(monkeypatch):
+    """Test a destroyed container of a running VPS queues the sweep at once."""
+    triggered = []
+    watcher = _watcher(monkeypatch, [], missing=["sub-1"])
+    monkeypatch.setattr(watcher, "_trigger_reconcile", triggered.append)
+
+    watcher.handle_event(_event("destroy"), now=0.0)
+    watcher.flush(force=True)
+
+    assert triggered == [["sub-1"]]
+
+
+def test_list_summary_and_leader_lease(fake_redis):
+    """Test the sweep's list entries parse and only one watcher holds the lease."""
+    exited = observation_from_summary({"Id": "c1", "State": "exited", "Status": "Exited (137) 2 minutes ago"})
+    assert (exited.state, exited.exit_code) == ("exited", 137)
+    assert observation_from_summary({"Id": "c1", "State": "running", "Status": "Up 1 hour (healthy)"}).health == "healthy"
+    assert observation_from_summary({"Id": "c1", "State": "created", "Status": "Created"}) is None
+
+    first = ContainerEventsWatcher(client=object(), redis_client=fake_redis)
+    second = ContainerEventsWatcher(client=object(), redis_client=fake_redis)
+    assert first._acquire_lease()
+    assert not second._acquire_lease()
+    assert first._acquire_lease()
@@ -0,0 +1,166 @@
+"""
+Unit tests for incremental CoreDNS zone sync.
+
+Covers content-hash skipping, atomic writes, parallel full regeneration
+and coalescing of reloads requested within one debounce window.
+"""
+import asyncio
+
+import pytest
+
+from app.modules.hosting.models import DNSSyncLog, DNSZone, DNSZoneStatus
+from app.modules.hosting.services.coredns_config_service import (
+    CoreDNSConfigService,
+    CoreDNSReloadCoalescer,
+)
+
+
+class FakeSyncLogRepo:
+    def __init__(self):
+        self.logs = []
+
+    async def create(self, log: DNSSyncLog) -> DNSSyncLog:
+        self.logs.append(log)
+        return log
+
+    async def update(self, log: DNSSyncLog) -> DNSSyncLog:
+        return log
+
+
+class FakeZoneRepo:
+    def __init__(self, zones):
+        self.zones = zones
+
+    async def get_active_zones_for_coredns(self):
+        return self.zones
+
+    async def get_by_id(self, zone_id, load_records=False):
+        return next(zone for zone in self.zones if zone.id == zone_id)
+
+
+class FakeDB:
+    async def commit(self):
+        pass
+
+
+def _zone(name: str, serial: int = 1) -> DNSZone:
+    zone = DNSZone(
+        zone_name=name,
+        ttl_default=3600,
+        soa_record={},
+        nameservers=["ns1.cloudmanager.local"],
+        last_updated_serial=serial,
+        status=DNSZoneStatus.ACTIVE,
+    )
+    zone.records = []
+    return zone
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(CoreDNSConfigService, "COREDNS_ZONES_DIR", str(tmp_path))
+    monkeypatch.setattr(CoreDNSConfigService, "_content_hashes", {})
+    monkeypatch.setattr(CoreDNSConfigService, "_reload_failed", {})
+    svc = CoreDNSConfigService(FakeDB())
+    svc.sync_log_repo = FakeSyncLogRepo()
+    svc.reloads = 0
+    svc.reload_succeeds = True
+
+    async def reload():
+        svc.reloads += 1
+        if svc.reload_succeeds:
+            return {"success": True}
+        return {"success": False, "error": "connection refused"}
+
+    coalescer = CoreDNSReloadCoalescer(reload, debounce_seconds=0)
+    monkeypatch.setattr(CoreDNSReloadCoalescer, "get_instance", classmethod(lambda cls, url: coalescer))
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_unchanged_zone_is_not_rewritten(service, tmp_path):
+    """Test a zone is written once and skipped while its content is the same."""
+    zone = _zone("example.com")
+
+    assert await service.write_zone(zone) is True
+    mtime = (tmp_path / "example.com.zone").stat().st_mtime_ns
+    assert await service.write_zone(zone) is False
+    assert (tmp_path / "example.com.zone").stat().st_mtime_ns == mtime
+
+    zone.last_updated_serial = 2
+    assert await service.write_zone(zone) is True
+    assert "2 ; Serial" in (tmp_path / "example.com.zone").read_text()
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+@pytest.mark.asyncio
+async def test_external_edit_is_detected(service, tmp_path):
+    """Test a file changed behind our back is rewritten."""
+    zone = _zone("example.com")
+    await service.write_zone(zone)
+
+    (tmp_path / "example.com.zone").write_text("; drifted\n")
+
+    assert await service.write_zone(zone) is True
+    assert "$ORIGIN example.com." in (tmp_path / "example.com.zone").read_text()
+
+
+@pytest.mark.asyncio
+async def test_regenerate_counts_written_and_skipped(service):
+    """Test full regeneration writes only changed zones, logs the counts and always reloads."""
+    zones = [_zone(f"zone{i}.com") for i in range(5)]
+    service.zone_repo = FakeZoneRepo(zones)
+
+    first = await service.regenerate_all_zones()
+    assert (first["zones_written"], first["zones_skipped"]) == (5, 0)
+    assert service.reloads == 1
+
+    zones[0].last_updated_serial = 2
+    second = await service.regenerate_all_zones()
+    assert (second["zones_written"], second["zones_skipped"]) == (1, 4)
+    assert service.reloads == 2
+
+    third = await service.regenerate_all_zones()
+    assert (third["zones_written"], third["zones_skipped"]) == (0, 5)
+    assert service.reloads == 3
+
+    log = service.sync_log_repo.logs[-1]
+    assert (log.zones_written, log.zones_skipped) == (0, 5)
+
+
+@pytest.mark.asyncio
+async def test_zone_sync_reloads_again_after_a_failed_reload(service):
+    """Test an unchanged zone still reloads CoreDNS when the last reload failed."""
+    zone = _zone("example.com")
+    zone.id = "zone-1"
+    service.zone_repo = FakeZoneRepo([zone])
+
+    service.reload_succeeds = False
+    failed = await service.sync_zone_to_coredns("zone-1")
+    assert (failed["changed"], failed["success"]) == (True, False)
+
+    service.reload_succeeds = True
+    retried = await service.sync_zone_to_coredns("zone-1")
+    assert (retried["changed"], retried["success"]) == (False, True)
+    assert service.reloads == 2
+
+    unchanged = await service.sync_zone_to_coredns("zone-1")
+    assert unchanged["reload_result"]["skipped"] is True
+    assert service.reloads == 2
+
+
+@pytest.mark.asyncio
+async def test_reload_requests_in_window_are_coalesced():
+    """Test concurrent reload requests share a single CoreDNS reload."""
+    calls = 0
+
+    async def reload_fn():
+        nonlocal calls
+        calls += 1
+        return {"success": True}
+
+    coalescer = CoreDNSReloadCoalescer(reload_fn, debounce_seconds=0.05)
+    results = await asyncio.gather(*(coalescer.request_reload() for _ in range(8)))
+
+    assert calls == 1
+    assert all(r["success"] and r["coalesced_requests"] == 8 for r in results)
@@ -0,0 +1,57 @@
+"""
+Unit tests for the Docker executor.
+
+Tests off-loop execution, timeouts and per-operation latency statistics.
+"""
+import time
+import threading
+import pytest
+
+from app.modules.hosting.services.docker_executor import DockerExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = DockerExecutor(max_workers=4, default_timeout=5)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_loop(executor):
+    """Test blocking calls run on a docker-api worker thread."""
+    def call(a, b=0):
+        return threading.current_thread().name, a + b
+
+    thread_name, result = await executor.run("add", call, 1, b=2)
+
+    assert result == 3
+    assert thread_name.startswith("docker-api")
+    assert executor.snapshot()["add"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_timeout(executor):
+    """Test a slow call raises TimeoutError and is counted."""
+    with pytest.raises(TimeoutError):
+        await executor.run("slow", time.sleep, 0.5, timeout=0.05)
+
+    stats = executor.snapshot()["slow"]
+    assert stats["timeouts"] == 1
+    assert stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_error_is_recorded(executor):
+    """Test exceptions propagate and are counted per operation."""
+    def fail():
+        raise RuntimeError("daemon unavailable")
+
+    with pytest.raises(RuntimeError):
+        await executor.run("inspect", fail)
+    await executor.run("inspect", lambda: {})
+
+    stats = executor.snapshot()["inspect"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 1
+    assert stats["max_ms"] >= stats["avg_ms"]
@@ -0,0 +1,107 @@
+"""
+Unit tests for the fleet health monitor.
+
+A fake Docker API counts list and inspect calls to check that a refresh costs
+one list call plus inspects of unhealthy/starting containers only, and that
+snapshots are cached and shared.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.hosting.services.fleet_health_service import FleetHealthMonitor
+
+
+class FakeAPI:
+    def __init__(self, summaries, inspects):
+        self.summaries = summaries
+        self.inspects = inspects
+        self.list_calls = 0
+        self.inspected = []
+
+    def containers(self, all=False, filters=None):
+        self.list_calls += 1
+        return self.summaries
+
+    def inspect_container(self, container_id):
+        self.inspected.append(container_id)
+        return self.inspects[container_id]
+
+
+def _instance(container_id):
+    return SimpleNamespace(
+        container_id=container_id,
+        container_name=f"vps-{container_id}",
+        subscription_id=f"sub-{container_id}",
+    )
+
+
+def _summary(container_id, state, status):
+    return {"Id": container_id, "Names": [f"/vps-{container_id}"], "State": state, "Status": status}
+
+
+def _client():
+    summaries = [
+        _summary("a", "running", "Up 3 hours (healthy)"),
+        _summary("b", "running", "Up 3 hours (unhealthy)"),
+        _summary("c", "running", "Up 5 seconds (health: starting)"),
+        _summary("d", "running", "Up 2 days"),
+        _summary("e", "exited", "Exited (1) 2 minutes ago"),
+    ]
+    inspects = {
+        "b": {"State": {"Health": {"Status": "unhealthy", "FailingStreak": 4,
+                                   "Log": [{"End": "t", "Output": "curl: (7) refused\n"}]}}},
+        "c": {"State": {"Health": {"Status": "starting", "FailingStreak": 0, "Log": []}}},
+    }
+    return SimpleNamespace(api=FakeAPI(summaries, inspects))
+
+
+@pytest.mark.asyncio
+async def test_refresh_lists_once_and_inspects_only_unhealthy_or_starting():
+    """Test health comes from the list call except where details are needed."""
+    client = _client()
+    monitor = FleetHealthMonitor(ttl_seconds=60, inspect_concurrency=4)
+    instances = [_instance(i) for i in "abcdef"]
+
+    snapshot = await monitor.snapshot(client, instances)
+
+    assert client.api.list_calls == 1
+    assert sorted(client.api.inspected) == ["b", "c"]
+    assert (snapshot["healthy"], snapshot["unhealthy"], snapshot["starting"]) == (1, 1, 1)
+    assert (snapshot["no_healthcheck"], snapshot["not_running"]) == (1, 2)
+    assert snapshot["unhealthy_containers"] == [{
+        "container_id": "b", "container_name": "vps-b", "subscription_id": "sub-b",
+        "failing_streak": 4, "last_output": "curl: (7) refused",
+    }]
+    assert monitor.cached("b")["needs_attention"] is True
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_cached_and_shared():
+    """Test concurrent and repeated callers within the TTL share one refresh."""
+    client = _client()
+    monitor = FleetHealthMonitor(ttl_seconds=60)
+    instances = [_instance("a")]
+
+    first, second = await asyncio.gather(
+        monitor.snapshot(client, instances), monitor.snapshot(client, instances)
+    )
+    third = await monitor.snapshot(client, instances)
+    assert first is second is third
+    assert client.api.list_calls == 1
+
+    await monitor.snapshot(client, instances, force=True)
+    assert client.api.list_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_snapshot_is_not_served_per_container():
+    """Test single-container lookups fall back once the snapshot is stale."""
+    client = _client()
+    monitor = FleetHealthMonitor(ttl_seconds=0)
+
+    await monitor.snapshot(client, [_instance("a")])
+    await asyncio.sleep(0.01)
+
+    assert monitor.cached("a") is None
@@ -0,0 +1,121 @@
+"""
+Unit tests for the image vulnerability scanner.
+
+Trivy and the Docker CLI are replaced by small local scripts that answer
+from JSON files and record their invocations, so the real asyncio
+subprocess path is exercised without either tool installed.
+"""
+import sys
+import json
+import asyncio
+
+import pytest
+
+from app.modules.hosting.services.image_scanner import ImageScanner, ImageScanError, chain_id
+
+STUB = """\
+import json, sys, time, pathlib
+root = pathlib.Path(__file__).parent
+with open(root / "calls.log", "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+if "{tool}" == "docker":
+    print(json.dumps(json.loads((root / "images.json").read_text())[sys.argv[-1]]))
+else:
+    time.sleep(float((root / "delay").read_text() or 0))
+    if (root / "fail").exists():
+        sys.stderr.write("scanner exploded")
+        sys.exit(1)
+    print((root / "report.json").read_text())
+"""
+
+
+def _vuln(vuln_id, severity, diff_id):
+    return {"VulnerabilityID": vuln_id, "PkgName": "openssl", "Severity": severity, "Layer": {"DiffID": diff_id}}
+
+
+@pytest.fixture
+def stubs(tmp_path):
+    for tool in ("docker", "trivy"):
+        (tmp_path / f"{tool}.py").write_text(STUB.replace("{tool}", tool))
+    (tmp_path / "delay").write_text("0")
+    (tmp_path / "images.json").write_text(json.dumps({
+        "app:1": {"Id": "sha256:img1", "RootFS": {"Layers": ["sha256:base", "sha256:app"]}},
+        "app:2": {"Id": "sha256:img2", "RootFS": {"Layers": ["sha256:base", "sha256:app"]}},
+        "other:1": {"Id": "sha256:img3", "RootFS": {"Layers": ["sha256:base", "sha256:new"]}},
+        "base:1": {"Id": "sha256:img4", "RootFS": {"Layers": ["sha256:base"]}},
+    }))
+    (tmp_path / "report.json").write_text(json.dumps({"Results": [{"Vulnerabilities": [
+        _vuln("CVE-1", "CRITICAL", "sha256:base"),
+        _vuln("CVE-2", "LOW", "sha256:app"),
+    ]}]}))
+    return tmp_path
+
+
+def _scanner(stubs, redis, **kwargs):
+    return ImageScanner(
+        command=[sys.executable, str(stubs / "trivy.py")],
+        docker_command=[sys.executable, str(stubs / "docker.py")],
+        redis_client=redis,
+        **kwargs,
+    )
+
+
+def _scans(stubs):
+    return [line for line in (stubs / "calls.log").read_text().splitlines() if line.startswith("image --format json")]
+
+
+@pytest.mark.asyncio
+async def test_scan_counts_findings_and_caches_by_image_and_layer_stack(stubs, fake_redis):
+    """Test a rebuilt image with unchanged layers is answered from the layer stack cache."""
+    scanner = _scanner(stubs, fake_redis)
+
+    first = await scanner.scan("app:1")
+    assert first["cache"] == "miss"
+    assert first["vulnerabilities_by_severity"] == {"CRITICAL": 1, "HIGH": 0, "MEDIUM": 0, "LOW": 1}
+
+    assert (await scanner.scan("app:1"))["cache"] == "image"
+    rebuilt = await scanner.scan("app:2")
+    assert rebuilt["cache"] == "stack"
+    assert rebuilt["total_vulnerabilities"] == 2
+
+    # A new layer, or only part of a scanned stack, needs a real scan: the
+    # findings of shared layers depend on the layers around them
+    assert (await scanner.scan("other:1"))["cache"] == "miss"
+    assert (await scanner.scan("base:1"))["cache"] == "miss"
+    assert len(_scans(stubs)) == 3
+
+
+def test_chain_id_depends_on_every_layer_and_its_order():
+    assert chain_id([]) is None
+    assert chain_id(["sha256:base"]) == "sha256:base"
+    stack = chain_id(["sha256:base", "sha256:app"])
+    assert stack.startswith("sha256:") and stack not in ("sha256:base", "sha256:app")
+    assert stack != chain_id(["sha256:app", "sha256:base"])
+    assert stack != chain_id(["sha256:base", "sha256:app", "sha256:extra"])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_scans_share_one_run_and_respect_the_limit(stubs, fake_redis):
+    """Test the same image is scanned once and distinct images queue on the semaphore."""
+    (stubs / "delay").write_text("0.2")
+    scanner = _scanner(stubs, fake_redis, concurrency=1)
+
+    results = await asyncio.gather(scanner.scan("app:1"), scanner.scan("app:1"), scanner.scan("other:1"))
+
+    assert [r["total_vulnerabilities"] for r in results] == [2, 2, 2]
+    assert len(_scans(stubs)) == 2
+
+
+@pytest.mark.asyncio
+async def test_scanner_failure_and_timeout(stubs, fake_redis):
+    """Test a failing scanner raises ImageScanError and a slow one times out."""
+    (stubs / "fail").write_text("1")
+    with pytest.raises(ImageScanError, match="scanner exploded"):
+        await _scanner(stubs, fake_redis).scan("app:1")
+
+    (stubs / "fail").unlink()
+    (stubs / "delay").write_text("5")
+    scanner = _scanner(stubs, fake_redis, timeout_seconds=0.2)
+    scanner.TIMEOUT_GRACE_SECONDS = 0
+    with pytest.raises(asyncio.TimeoutError):
+        await scanner.scan("app:1")
@@ -0,0 +1,136 @@
+"""
+Unit tests for the container log broker.
+
+Uses a fake Docker client whose follow stream is fed from the test, to check
+that viewers share one upstream follower, replay the ring buffer, survive a
+slow viewer and close the upstream when the last viewer leaves.
+"""
+import asyncio
+import queue
+
+import pytest
+
+from app.modules.hosting.services.log_stream_broker import ContainerLogBroker, LogSubscription
+
+
+def _line(second: int, text: str) -> str:
+    return f"2026-10-16T12:00:{second:02d}.000000000Z {text}"
+
+
+class FakeStream:
+    def __init__(self):
+        self.chunks = queue.Queue()
+        self.closed = False
+
+    def __iter__(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None or self.closed:
+                return
+            yield chunk
+
+    def close(self):
+        self.closed = True
+        self.chunks.put(None)
+
+
+class FakeContainer:
+    def __init__(self, backlog):
+        self.backlog = backlog
+        self.streams = []
+
+    def logs(self, stream=False, follow=False, tail=None, since=None, timestamps=False):
+        if not stream:
+            return "".join(f"{line}\n" for line in self.backlog[-tail:]).encode()
+        self.streams.append(FakeStream())
+        return self.streams[-1]
+
+
+class FakeClient:
+    def __init__(self, container):
+        self.containers = self
+        self.container = container
+
+    def get(self, container_id):
+        return self.container
+
+
+async def _next_lines(subscription: LogSubscription, count: int):
+    events = []
+    for _ in range(count):
+        events.append(await asyncio.wait_for(subscription.get(), timeout=2))
+    return events
+
+
+async def _wait_for_stream(container: FakeContainer) -> FakeStream:
+    for _ in range(200):
+        if container.streams:
+            return container.streams[-1]
+        await asyncio.sleep(0.01)
+    raise AssertionError("follower never opened a stream")
+
+
+@pytest.mark.asyncio
+async def test_viewers_share_one_follower():
+    """Test two viewers get the backlog tail and live lines from one stream."""
+    container = FakeContainer([_line(i, f"old {i}") for i in range(5)])
+    broker = ContainerLogBroker(client=FakeClient(container), buffer_size=10, queue_size=100)
+
+    first = broker.subscribe("abc", tail=2)
+    second = broker.subscribe("abc", tail=1)
+    stream = await _wait_for_stream(container)
+    # Overlap with the backlog is filtered by timestamp
+    stream.chunks.put(f"{_line(4, 'old 4')}\n{_line(10, 'new')}\n".encode())
+
+    assert [e[1] for e in await _next_lines(first, 3)] == [_line(3, "old 3"), _line(4, "old 4"), _line(10, "new")]
+    assert [e[1] for e in await _next_lines(second, 2)] == [_line(4, "old 4"), _line(10, "new")]
+    assert len(container.streams) == 1
+
+    broker.unsubscribe(first)
+    broker.unsubscribe(second)
+
+
+@pytest.mark.asyncio
+async def test_late_viewer_replays_ring_buffer():
+    """Test a viewer joining later gets recent lines without a new follower."""
+    container = FakeContainer([_line(1, "a")])
+    broker = ContainerLogBroker(client=FakeClient(container), buffer_size=10, queue_size=100)
+
+    first = broker.subscribe("abc", tail=10)
+    stream = await _wait_for_stream(container)
+    stream.chunks.put(f"{_line(2, 'b')}\n{_line(3, 'c')}\n".encode())
+    await _next_lines(first, 3)
+
+    late = broker.subscribe("abc", tail=2)
+    assert [e[1] for e in await _next_lines(late, 2)] == [_line(2, "b"), _line(3, "c")]
+    assert broker.snapshot()["abc"] == {"subscribers": 2, "buffered_lines": 3}
+
+    broker.unsubscribe(first)
+    broker.unsubscribe(late)
+
+
+@pytest.mark.asyncio
+async def test_slow_viewer_drops_oldest_lines():
+    """Test a full viewer queue drops old lines and reports how many."""
+    subscription = LogSubscription("abc", tail=0, queue_size=2)
+    for i in range(5):
+        subscription.offer(("line", str(i)))
+
+    assert await _next_lines(subscription, 3) == [("dropped", 3), ("line", "3"), ("line", "4")]
+
+
+@pytest.mark.asyncio
+async def test_last_viewer_leaving_closes_upstream():
+    """Test the upstream stream is closed once nobody is watching."""
+    container = FakeContainer([])
+    broker = ContainerLogBroker(client=FakeClient(container), buffer_size=10, queue_size=10)
+
+    first = broker.subscribe("abc")
+    second = broker.subscribe("abc")
+    stream = await _wait_for_stream(container)
+
+    broker.unsubscribe(first)
+    assert not stream.closed
+    broker.unsubscribe(second)
+    assert stream.closed
+    assert broker.snapshot() == {}
@@ -0,0 +1,108 @@
+"""
+Unit tests for container_metrics partition maintenance.
+
+Tests partition creation ahead of time and partition-drop retention.
+"""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from app.modules.hosting.services.metrics_partition_service import (
+    MetricsPartition,
+    MetricsPartitionService,
+    partition_name,
+)
+
+
+def _executed_sql(db) -> list:
+    return [str(call.args[0]) for call in db.execute.call_args_list]
+
+
+def test_partition_name():
+    """Test partitions are named after their lower bound."""
+    assert partition_name(datetime(2026, 10, 17)) == "container_metrics_p20261017"
+
+
+def test_ensure_partitions_continues_after_last_partition():
+    """Test new partitions are contiguous with the highest existing bound."""
+    db = MagicMock()
+    service = MetricsPartitionService(db)
+    existing = [
+        MetricsPartition("container_metrics_legacy", None, datetime(2026, 10, 17)),
+        MetricsPartition("container_metrics_p20261017", datetime(2026, 10, 17), datetime(2026, 10, 18)),
+    ]
+
+    with patch.object(MetricsPartitionService, "is_partitioned", return_value=True), \
+            patch.object(MetricsPartitionService, "has_default_partition", return_value=False), \
+            patch.object(MetricsPartitionService, "list_partitions", return_value=existing):
+        created = service.ensure_partitions(days_ahead=2, now=datetime(2026, 10, 17, 9, 30))
+
+    assert created == [
+        "container_metrics_p20261018",
+        "container_metrics_p20261019",
+    ]
+    sql = _executed_sql(db)
+    assert "FROM ('2026-10-18 00:00:00') TO ('2026-10-19 00:00:00')" in sql[0]
+    db.commit.assert_called_once()
+
+
+def test_ensure_partitions_moves_rows_out_of_default_partition():
+    """Test rows caught by the DEFAULT partition are moved into the new partition."""
+    db = MagicMock()
+    service = MetricsPartitionService(db)
+    existing = [MetricsPartition("container_metrics_legacy", None, datetime(2026, 10, 17))]
+
+    with patch.object(MetricsPartitionService, "is_partitioned", return_value=True), \
+            patch.object(MetricsPartitionService, "has_default_partition", return_value=True), \
+            patch.object(MetricsPartitionService, "_default_has_rows", side_effect=[True, False]), \
+            patch.object(MetricsPartitionService, "list_partitions", return_value=existing):
+        created = service.ensure_partitions(days_ahead=1, now=datetime(2026, 10, 17, 9, 30))
+
+    assert created == ["container_metrics_p20261017", "container_metrics_p20261018"]
+    sql = _executed_sql(db)
+    assert sql[0].startswith('CREATE TABLE "container_metrics_p20261017" (LIKE container_metrics')
+    assert sql[1].startswith("WITH moved AS (DELETE FROM container_metrics_default")
+    assert sql[2] == (
+        'ALTER TABLE container_metrics ATTACH PARTITION "container_metrics_p20261017" '
+        "FOR VALUES FROM ('2026-10-17 00:00:00') TO ('2026-10-18 00:00:00')"
+    )
+    assert sql[3].startswith('CREATE TABLE IF NOT EXISTS "container_metrics_p20261018" PARTITION OF')
+
+
+def test_drop_expired_drops_whole_partitions_only():
+    """Test only partitions entirely older than the cutoff are detached and dropped."""
+    db = MagicMock()
+    service = MetricsPartitionService(db)
+    partitions = [
+        MetricsPartition("container_metrics_legacy", None, datetime(2026, 9, 1), estimated_rows=1000),
+        MetricsPartition("container_metrics_p20260901", datetime(2026, 9, 1), datetime(2026, 9, 2), estimated_rows=50),
+        MetricsPartition("container_metrics_p20260902", datetime(2026, 9, 2), datetime(2026, 9, 3), estimated_rows=50),
+    ]
+
+    db.execute.return_value.rowcount = 7
+
+    with patch.object(MetricsPartitionService, "is_partitioned", return_value=True), \
+            patch.object(MetricsPartitionService, "has_default_partition", return_value=True), \
+            patch.object(MetricsPartitionService, "list_partitions", return_value=partitions):
+        removed = service.drop_expired(retention_days=30, now=datetime(2026, 10, 2, 12, 0))
+
+    # Cutoff is 2026-09-02 12:00: the 09-02 partition still holds unexpired rows
+    assert removed == 1057
+    sql = _executed_sql(db)
+    assert sql == [
+        "DELETE FROM container_metrics_default WHERE recorded_at < :cutoff",
+        'ALTER TABLE container_metrics DETACH PARTITION "container_metrics_legacy"',
+        'DROP TABLE "container_metrics_legacy"',
+        'ALTER TABLE container_metrics DETACH PARTITION "container_metrics_p20260901"',
+        'DROP TABLE "container_metrics_p20260901"',
+    ]
+
+
+def test_not_partitioned_on_sqlite():
+    """Test non-PostgreSQL databases are treated as unpartitioned."""
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "sqlite"
+
+    service = MetricsPartitionService(db)
+
+    assert service.is_partitioned() is False
+    assert service.ensure_partitions() == []
@@ -0,0 +1,82 @@
+"""
+Unit tests for metrics rollups.
+
+Tests bucket statistics, bucket alignment and history resolution selection.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.modules.hosting.models import MetricsResolution
+from app.modules.hosting.services.metrics_rollup_service import (
+    aggregate_samples,
+    bucket_floor,
+    summarize,
+)
+from app.modules.hosting.services.monitoring_service import ContainerMonitoringService
+
+
+def _sample(cpu: float, minute: int, rx_rate=None, processes=None):
+    """Build a raw metrics row with the attributes the rollup reads."""
+    return SimpleNamespace(
+        cpu_usage_percent=cpu,
+        memory_usage_mb=512,
+        memory_usage_percent=50.0,
+        network_rx_bytes_per_sec=rx_rate,
+        network_tx_bytes_per_sec=None,
+        block_read_bytes_per_sec=None,
+        block_write_bytes_per_sec=None,
+        storage_usage_mb=1000 + minute,
+        storage_usage_percent=10.0,
+        network_rx_bytes=minute * 100,
+        network_tx_bytes=minute * 50,
+        block_read_bytes=0,
+        block_write_bytes=0,
+        process_count=processes,
+        recorded_at=datetime(2026, 1, 1, 10, minute),
+    )
+
+
+def test_summarize():
+    """Test min/avg/max/p95 with nearest-rank p95 and missing values."""
+    assert summarize(range(1, 101)) == (1.0, 50.5, 100.0, 95.0)
+    assert summarize([3.0, None, 1.0]) == (1.0, 2.0, 3.0, 3.0)
+    assert summarize([None, None]) is None
+
+
+def test_bucket_floor():
+    """Test timestamps are aligned to hour and day buckets."""
+    moment = datetime(2026, 3, 14, 15, 9, 26, 535)
+
+    assert bucket_floor(moment, MetricsResolution.HOUR) == datetime(2026, 3, 14, 15)
+    assert bucket_floor(moment, MetricsResolution.DAY) == datetime(2026, 3, 14)
+
+
+def test_aggregate_samples():
+    """Test one container's samples collapse into a single rollup row."""
+    samples = [
+        _sample(10.0, 0, rx_rate=100, processes=5),
+        _sample(30.0, 5, rx_rate=300),
+        _sample(20.0, 10, processes=9),
+    ]
+
+    values = aggregate_samples(samples)
+
+    assert values["sample_count"] == 3
+    assert values["cpu_usage_percent_min"] == 10.0
+    assert values["cpu_usage_percent_avg"] == 20.0
+    assert values["cpu_usage_percent_max"] == 30.0
+    assert values["cpu_usage_percent_p95"] == 30.0
+    assert values["network_rx_bytes_per_sec_avg"] == 200.0
+    assert values["block_read_bytes_per_sec_avg"] is None
+    # Point-in-time values come from the last sample
+    assert values["storage_usage_mb"] == 1010
+    assert values["network_rx_bytes"] == 1000
+    assert values["process_count"] == 9
+
+
+def test_resolution_for_window():
+    """Test history windows map to raw, hourly and daily resolution."""
+    assert ContainerMonitoringService.resolution_for_window(24) == MetricsResolution.RAW
+    assert ContainerMonitoringService.resolution_for_window(48) == MetricsResolution.RAW
+    assert ContainerMonitoringService.resolution_for_window(168) == MetricsResolution.HOUR
+    assert ContainerMonitoringService.resolution_for_window(24 * 90) == MetricsResolution.DAY
@@ -4,12 +4,17 @@ Unit tests for ContainerMonitoringService.
 Tests all monitoring service methods including metrics collection,
 alert detection, historical queries, and cleanup operations.
 """
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
-from app.modules.hosting.services.monitoring_service import ContainerMonitoringService
+from app.modules.hosting.services.cgroup_service import CgroupMetrics
+from app.modules.hosting.services.monitoring_service import (
+    ContainerMonitoringService,
+    ContainerSample
+)
 from app.modules.hosting.models import (
     ContainerInstance,
     ContainerMetrics,
@@ -211,6 +216,26 @@ async def test_collect_metrics_docker_stats_failure(
     assert result is None
 
 
+def _sample_for(container, cgroup_metrics=None):
+    """Build a ContainerSample with fixed Docker stats."""
+    return ContainerSample(
+        stats={
+            'cpu_usage_percent': 30.0,
+            'memory_usage_mb': 512.0,
+            'memory_usage_percent': 25.0,
+            'network_rx_bytes': 500000,
+            'network_tx_bytes': 250000,
+            'block_read_bytes': 1000000,
+            'block_write_bytes': 500000,
+            'process_count': 5
+        },
+        cgroup_metrics=None,
+        storage_used_mb=2560.0,
+        storage_percent=10.0,
+        sampled_at=datetime.utcnow()
+    )
+
+
 @pytest.mark.asyncio
 async def test_collect_all_metrics_success(
     mock_db, mock_container_repo, mock_metrics_repo, mock_docker_service,
@@ -222,6 +247,10 @@ async def test_collect_all_metrics_success(
     service.container_repo = mock_container_repo
     service.metrics_repo = mock_metrics_repo
     service.docker_service = mock_docker_service
+    fleet_metrics = CgroupMetrics(cpu_throttle_periods=3)
+    service.cgroup_service = MagicMock()
+    service.cgroup_service.is_available.return_value = True
+    service.cgroup_service.scan_fleet.return_value = {sample_container.container_id: fleet_metrics}
 
     # Mock database query result
     containers = [sample_container]
@@ -229,26 +258,39 @@ async def test_collect_all_metrics_success(
     mock_result.scalars.return_value.all.return_value = containers
     mock_db.execute = AsyncMock(return_value=mock_result)
 
-    # Mock collect_metrics for each container
-    with patch.object(service, 'collect_metrics', new_callable=AsyncMock) as mock_collect:
-        mock_collect.return_value = MagicMock(spec=ContainerMetrics)
+    mock_metrics_repo.get_latest_metrics_by_container = AsyncMock(return_value={})
+
+    with patch.object(service, '_build_metrics', return_value=MagicMock(spec=ContainerMetrics)), \
+            patch.object(service, '_sample_container', new_callable=AsyncMock) as mock_sample:
+        mock_sample.side_effect = _sample_for
 
         # Execute
         count = await service.collect_all_metrics()
 
         # Assert
         assert count == 1
-        mock_collect.assert_called_once_with(sample_container.id)
+        service.cgroup_service.scan_fleet.assert_called_once_with([sample_container.container_id])
+        mock_sample.assert_called_once_with(sample_container, fleet_metrics)
+        mock_metrics_repo.get_latest_metrics_by_container.assert_called_once()
+        container_ids = mock_metrics_repo.get_latest_metrics_by_container.call_args.args[0]
+        since = mock_metrics_repo.get_latest_metrics_by_container.call_args.kwargs["since"]
+        assert container_ids == [sample_container.id]
+        assert since == service.last_cycle.started_at - timedelta(minutes=60)
+        mock_metrics_repo.bulk_create.assert_called_once()
+        mock_db.commit.assert_called_once()
+        assert service.last_cycle.total == 1
+        assert service.last_cycle.collected == 1
 
 
 @pytest.mark.asyncio
 async def test_collect_all_metrics_with_failures(
-    mock_db, mock_container_repo, sample_container
+    mock_db, mock_container_repo, mock_metrics_repo, sample_container
 ):
     """Test batch collection handles individual container failures."""
     # Setup
     service = ContainerMonitoringService(mock_db)
     service.container_repo = mock_container_repo
+    service.metrics_repo = mock_metrics_repo
 
     containers = [sample_container, MagicMock(spec=ContainerInstance)]
     containers[1].id = str(uuid4())
@@ -256,19 +298,100 @@ async def test_collect_all_metrics_with_failures(
     mock_result.scalars.return_value.all.return_value = containers
     mock_db.execute = AsyncMock(return_value=mock_result)
 
-    # Mock collect_metrics - first succeeds, second fails
-    with patch.object(service, 'collect_metrics', new_callable=AsyncMock) as mock_collect:
-        mock_collect.side_effect = [
-            MagicMock(spec=ContainerMetrics),  # First succeeds
-            Exception("Docker error")  # Second fails
-        ]
+    async def sample(container, cgroup_metrics=None):
+        if container is containers[1]:
+            raise Exception("Docker error")
+        return _sample_for(container)
+
+    mock_metrics_repo.get_latest_metrics_by_container = AsyncMock(return_value={})
 
+    with patch.object(service, '_build_metrics', return_value=MagicMock(spec=ContainerMetrics)), \
+            patch.object(service, '_sample_container', side_effect=sample) as mock_sample:
         # Execute
         count = await service.collect_all_metrics()
 
         # Assert - should still return count of successful collections
         assert count == 1
-        assert mock_collect.call_count == 2
+        assert mock_sample.call_count == 2
+        assert service.last_cycle.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_run_collection_cycle_timeout_and_skip(
+    mock_db, mock_metrics_repo, sample_container
+):
+    """Test slow containers time out and containers without stats are skipped."""
+    # Setup
+    service = ContainerMonitoringService(mock_db)
+    service.metrics_repo = mock_metrics_repo
+
+    slow = MagicMock(spec=ContainerInstance)
+    slow.id = str(uuid4())
+    missing = MagicMock(spec=ContainerInstance)
+    missing.id = str(uuid4())
+
+    async def sample(container, cgroup_metrics=None):
+        if container is slow:
+            await asyncio.sleep(5)
+        if container is missing:
+            return None
+        return _sample_for(container)
+
+    mock_metrics_repo.get_latest_metrics_by_container = AsyncMock(return_value={})
+
+    with patch.object(service, '_build_metrics', return_value=MagicMock(spec=ContainerMetrics)), \
+            patch.object(service, '_sample_container', side_effect=sample):
+        # Execute
+        cycle = await service.run_collection_cycle(
+            containers=[sample_container, slow, missing],
+            concurrency=3,
+            timeout_seconds=0.1
+        )
+
+    # Assert
+    assert cycle.total == 3
+    assert cycle.collected == 1
+    assert cycle.timed_out == 1
+    assert cycle.skipped == 1
+    assert cycle.duration_seconds < 5
+
+
+@pytest.mark.asyncio
+async def test_run_collection_cycle_respects_concurrency(
+    mock_db, mock_metrics_repo, sample_container
+):
+    """Test no more than `concurrency` containers are sampled at once."""
+    # Setup
+    service = ContainerMonitoringService(mock_db)
+    service.metrics_repo = mock_metrics_repo
+
+    containers = []
+    for _ in range(10):
+        container = MagicMock(spec=ContainerInstance)
+        container.id = str(uuid4())
+        containers.append(container)
+
+    in_flight = 0
+    peak = 0
+
+    async def sample(container, cgroup_metrics=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _sample_for(container)
+
+    mock_metrics_repo.get_latest_metrics_by_container = AsyncMock(return_value={})
+
+    with patch.object(service, '_build_metrics', return_value=MagicMock(spec=ContainerMetrics)), \
+            patch.object(service, '_sample_container', side_effect=sample):
+        # Execute
+        cycle = await service.run_collection_cycle(containers=containers, concurrency=3)
+
+    # Assert
+    assert cycle.collected == 10
+    assert peak == 3
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,96 @@
+"""
+Unit tests for the network resource allocator.
+
+Runs against an in-memory SQLite pool seeded with the SSH port and subnet
+ranges: allocation, idempotent retries, exhaustion and reuse after release.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.modules.hosting.models import ContainerInstance, NetworkResource, NetworkResourceKind
+from app.modules.hosting.services import network_allocator
+from app.modules.hosting.services.network_allocator import (
+    NetworkResourceAllocator,
+    ResourceExhaustedError,
+    ip_to_value,
+    value_to_ip,
+)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(network_allocator.settings, "VPS_SSH_PORT_RANGE_START", 2222)
+    monkeypatch.setattr(network_allocator.settings, "VPS_SSH_PORT_RANGE_END", 2224)
+    engine = create_engine("sqlite://")
+    tables = [NetworkResource.__table__, ContainerInstance.__table__]
+    NetworkResource.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        NetworkResourceAllocator(session).seed([NetworkResourceKind.SSH_PORT, NetworkResourceKind.SUBNET])
+        yield session
+    engine.dispose()
+
+
+def test_ip_value_roundtrip():
+    """Test IPs map to a compact integer and back."""
+    assert ip_to_value("172.20.3.17") == 3 * 256 + 17
+    assert value_to_ip(3 * 256 + 17) == "172.20.3.17"
+
+
+def test_allocate_is_idempotent(db):
+    """Test retries reuse the subscription's lease."""
+    allocator = NetworkResourceAllocator(db)
+
+    assert allocator.allocate_ssh_port("sub-1") == 2222
+    assert allocator.allocate_ssh_port("sub-1") == 2222
+    assert allocator.allocate_ssh_port("sub-2") == 2223
+    assert allocator.free_counts()[NetworkResourceKind.SSH_PORT.value] == 1
+
+
+def test_allocate_does_not_seed_an_empty_pool(db):
+    """Test allocation only leases rows; filling the pool is seed()'s job."""
+    allocator = NetworkResourceAllocator(db)
+
+    with pytest.raises(ResourceExhaustedError):
+        allocator.allocate_http_port("sub-1")
+    assert NetworkResourceKind.HTTP_PORT.value not in allocator.free_counts()
+
+
+def test_exhaustion_and_reuse_after_release(db):
+    """Test released ports are handed out again once the range is used up."""
+    allocator = NetworkResourceAllocator(db)
+    for index in range(3):
+        allocator.allocate_ssh_port(f"sub-{index}")
+
+    with pytest.raises(ResourceExhaustedError):
+        allocator.allocate_ssh_port("sub-new")
+
+    assert allocator.release("sub-1") == 1
+    assert allocator.allocate_ssh_port("sub-new") == 2223
+
+
+def test_subnet_without_reuse_takes_another_octet(db):
+    """Test a subscription can lease an extra subnet when its first one is taken."""
+    allocator = NetworkResourceAllocator(db)
+
+    first = allocator.allocate_subnet("sub-1")
+    second = allocator.allocate_subnet("sub-1", reuse=False)
+
+    assert (first, second) == (1, 2)
+    assert allocator.allocate_subnet("sub-1") == 1
+    assert allocator.release("sub-1", [NetworkResourceKind.SUBNET]) == 2
+
+
+def test_blocked_subnet_is_not_returned_as_the_subscription_subnet(db):
+    """Test an overlapping octet stays leased but reuse returns the one in use."""
+    allocator = NetworkResourceAllocator(db)
+
+    first = allocator.allocate_subnet("sub-1")
+    allocator.block_subnet("sub-1", first)
+    second = allocator.allocate_subnet("sub-1")
+
+    assert (first, second) == (1, 2)
+    assert allocator.allocate_subnet("sub-1") == 2
+    assert allocator.allocate_subnet("sub-2") == 3
+    assert allocator.release("sub-1", [NetworkResourceKind.SUBNET]) == 2
+    assert allocator.allocate_subnet("sub-3") == 1
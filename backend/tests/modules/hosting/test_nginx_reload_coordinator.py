@@ -0,0 +1,91 @@
+"""
+Unit tests for the nginx reload coordinator.
+
+Tests debouncing within one process and cross-worker deduplication through
+the shared in-memory Redis fake.
+"""
+import asyncio
+
+import pytest
+
+from app.modules.hosting.services.nginx_reload_coordinator import NginxReloadCoordinator
+
+
+class CountingReload:
+    def __init__(self, ok=True):
+        self.calls = 0
+        self.ok = ok
+
+    def __call__(self):
+        self.calls += 1
+        return self.ok, "" if self.ok else "nginx: [emerg] unknown directive"
+
+
+def _coordinator(reload_fn, redis=None, name="test-nginx"):
+    async def redis_factory():
+        return redis
+
+    return NginxReloadCoordinator(
+        container_name=name,
+        debounce_seconds=0.05,
+        reload_fn=reload_fn,
+        redis_factory=redis_factory if redis is not None else None,
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    NginxReloadCoordinator._stats.pop("test-nginx", None)
+
+
+@pytest.mark.asyncio
+async def test_requests_in_window_share_one_reload():
+    """Test ten concurrent changes cause a single nginx reload."""
+    reload_fn = CountingReload()
+    coordinator = _coordinator(reload_fn)
+
+    results = await asyncio.gather(*(coordinator.request_reload(f"domain {i}") for i in range(10)))
+
+    assert results == [True] * 10
+    assert reload_fn.calls == 1
+    stats = NginxReloadCoordinator.snapshot()["test-nginx"]
+    assert stats["requests"] == 10
+    assert stats["reloads"] == 1
+    assert stats["avg_latency_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_validation_is_reported_to_every_caller():
+    """Test a failing nginx -t fails the whole batch."""
+    reload_fn = CountingReload(ok=False)
+    coordinator = _coordinator(reload_fn)
+
+    results = await asyncio.gather(coordinator.request_reload(), coordinator.request_reload())
+
+    assert results == [False, False]
+    assert NginxReloadCoordinator.snapshot()["test-nginx"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_after_window_triggers_new_reload():
+    """Test requests arriving after a reload are not lost."""
+    reload_fn = CountingReload()
+    coordinator = _coordinator(reload_fn)
+
+    assert await coordinator.request_reload() is True
+    assert await coordinator.request_reload() is True
+    assert reload_fn.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_skip_reload_already_applied_by_another(fake_async_redis):
+    """Test two workers with changes in the same window reload nginx once."""
+    reload_fn = CountingReload()
+    worker_a = _coordinator(reload_fn, fake_async_redis)
+    worker_b = _coordinator(reload_fn, fake_async_redis)
+
+    results = await asyncio.gather(worker_a.request_reload(), worker_b.request_reload())
+
+    assert results == [True, True]
+    assert reload_fn.calls == 1
+    assert NginxReloadCoordinator.snapshot()["test-nginx"]["skipped"] == 1
@@ -0,0 +1,59 @@
+"""
+Unit tests for subscription progress events.
+
+The shared in-memory Redis fake connects the synchronous publisher (Celery
+side) to the SSE stream (API side).
+"""
+import json
+
+import pytest
+
+from app.modules.hosting.services.progress_events import ProgressPublisher, progress_sse_stream
+
+
+def test_routine_updates_are_throttled(fake_redis):
+    """Test byte-level updates are folded into few events without losing log lines."""
+    publisher = ProgressPublisher("sub-1", "image_pull", redis_client=fake_redis, min_interval_seconds=60)
+
+    publisher.update("DOWNLOADING", 0, "Pulling ubuntu:22.04")
+    for percent in range(1, 50):
+        publisher.update("DOWNLOADING", percent)
+    publisher.update("DOWNLOADING", 50, "abc123: Pull complete")
+    publisher.finish("COMPLETED", 100)
+
+    events = [json.loads(message) for _, message in fake_redis.published]
+    assert [e["status"] for e in events] == ["DOWNLOADING", "COMPLETED"]
+    assert events[-1]["lines"] == ["abc123: Pull complete"]
+    state = json.loads(fake_redis.values["hosting:progress:sub-1:state"])
+    assert state["progress"] == 100
+    assert state["logs"] == "Pulling ubuntu:22.04\nabc123: Pull complete"
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_sends_snapshot_then_progress_until_done(fake_redis, fake_async_redis):
+    """Test a viewer gets the current state, live events, and a close."""
+    publisher = ProgressPublisher("sub-1", "image_pull", redis_client=fake_redis, min_interval_seconds=0)
+    publisher.update("DOWNLOADING", 10, "Pulling fs layer")
+
+    stream = progress_sse_stream("sub-1", {"status": "QUEUED", "progress": 0}, redis=fake_async_redis)
+    snapshot = await stream.__anext__()
+    assert snapshot.startswith("event: snapshot")
+    assert json.loads(snapshot.split("data: ", 1)[1])["progress"] == 10
+
+    publisher.update("DOWNLOADING", 60)
+    publisher.finish("COMPLETED", 100)
+    frames = [frame async for frame in stream]
+
+    assert [f.split("\n", 1)[0] for f in frames] == ["event: progress", "event: progress", "event: close"]
+    assert fake_redis.subscribers["hosting:progress:sub-1"] == []
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_closes_immediately_for_finished_work(fake_async_redis):
+    """Test a viewer arriving after completion only gets the final snapshot."""
+    frames = [
+        frame async for frame in
+        progress_sse_stream("sub-1", {"status": "COMPLETED", "progress": 100}, redis=fake_async_redis)
+    ]
+
+    assert [f.split("\n", 1)[0] for f in frames] == ["event: snapshot", "event: close"]
@@ -0,0 +1,131 @@
+"""
+Unit tests for the streaming Docker stats hub.
+
+Tests stats parsing, ring buffer bounds, freshness and subscription sync.
+"""
+import time
+import threading
+from unittest.mock import MagicMock
+
+from app.modules.hosting.services.stats_stream_service import (
+    DockerStatsStream,
+    parse_docker_stats,
+)
+
+
+def _raw_stats(total_usage: int, system_usage: int, rx: int = 1000):
+    """Build a raw Docker stats payload."""
+    return {
+        'cpu_stats': {
+            'cpu_usage': {'total_usage': total_usage},
+            'system_cpu_usage': system_usage,
+            'online_cpus': 2,
+        },
+        'precpu_stats': {
+            'cpu_usage': {'total_usage': total_usage - 100},
+            'system_cpu_usage': system_usage - 1000,
+        },
+        'memory_stats': {'usage': 512 * 1024 * 1024, 'limit': 1024 * 1024 * 1024},
+        'networks': {'eth0': {'rx_bytes': rx, 'tx_bytes': 500}},
+        'blkio_stats': {'io_service_bytes_recursive': [
+            {'op': 'read', 'value': 4096},
+            {'op': 'Write', 'value': 8192},
+        ]},
+        'pids_stats': {'current': 7},
+    }
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parse_docker_stats():
+    """Test a raw payload is flattened into the hosting stats dict."""
+    parsed = parse_docker_stats(_raw_stats(10_000, 100_000))
+
+    assert parsed['cpu_usage_percent'] == 20.0
+    assert parsed['memory_usage_mb'] == 512.0
+    assert parsed['memory_usage_percent'] == 50.0
+    assert parsed['network_rx_bytes'] == 1000
+    assert parsed['block_read_bytes'] == 4096
+    assert parsed['block_write_bytes'] == 8192
+    assert parsed['process_count'] == 7
+
+
+def test_parse_docker_stats_first_sample_and_stopped():
+    """Test the first streamed sample (no precpu) and empty payloads."""
+    raw = _raw_stats(10_000, 100_000)
+    raw['precpu_stats'] = {}
+
+    assert parse_docker_stats(raw)['cpu_usage_percent'] == 0.0
+    assert parse_docker_stats({'cpu_stats': {}}) is None
+
+
+def test_subscription_ends_with_stream():
+    """Test a subscription is removed when Docker closes the stream (container stopped)."""
+    client = MagicMock()
+    client.api.stats.return_value = iter(
+        [_raw_stats(10_000 * i, 100_000 * i, rx=i) for i in range(1, 11)]
+    )
+    stream = DockerStatsStream(client=client, buffer_size=3, max_age_seconds=60, sync_interval_seconds=60)
+
+    stream.subscribe("abc123def456")
+
+    # Stream ends after 10 samples, which removes the subscription
+    assert _wait_for(lambda: not stream.is_streaming("abc123def456"))
+    client.api.stats.assert_called_once_with("abc123def456", stream=True, decode=True)
+
+
+def test_latest_respects_max_age():
+    """Test stale samples are not served."""
+    release = threading.Event()
+
+    def stats_stream(*args, **kwargs):
+        for i in range(1, 6):
+            yield _raw_stats(10_000 * i, 100_000 * i, rx=i)
+        release.wait(2)
+
+    client = MagicMock()
+    client.api.stats.side_effect = stats_stream
+    stream = DockerStatsStream(client=client, buffer_size=3, max_age_seconds=60, sync_interval_seconds=60)
+
+    stream.subscribe("abc123def456")
+    assert _wait_for(lambda: len(stream.history("abc123def456")) == 3)
+
+    assert stream.latest("abc123def456")['network_rx_bytes'] == 5
+    assert [s['network_rx_bytes'] for s in stream.history("abc123def456")] == [3, 4, 5]
+    time.sleep(0.01)
+    assert stream.latest("abc123def456", max_age_seconds=0.001) is None
+    assert stream.latest("unknown") is None
+
+    stream.unsubscribe("abc123def456")
+    release.set()
+    assert not stream.is_streaming("abc123def456")
+
+
+def test_sync_drops_stopped_containers():
+    """Test sync subscribes new containers and unsubscribes missing ones."""
+    release = threading.Event()
+
+    def stats_stream(*args, **kwargs):
+        release.wait(2)
+        return iter(())
+
+    client = MagicMock()
+    client.api.stats.side_effect = stats_stream
+    stream = DockerStatsStream(client=client, sync_interval_seconds=60)
+
+    stream.sync(["c1", "c2"])
+    assert stream.is_streaming("c1") and stream.is_streaming("c2")
+
+    stream.sync(["c2", "c3"])
+    assert not stream.is_streaming("c1")
+    assert stream.is_streaming("c2") and stream.is_streaming("c3")
+
+    release.set()
+    stream.stop()
@@ -0,0 +1,116 @@
+"""
+Unit tests for StorageUsageService.
+
+Tests host-side disk usage measurement, caching and fallback behaviour.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.modules.hosting.services.storage_usage_service import StorageUsageService
+from app.modules.hosting.models import ContainerInstance
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Caches are class-level; isolate each test."""
+    StorageUsageService._usage_cache.clear()
+    StorageUsageService._path_cache.clear()
+    yield
+    StorageUsageService._usage_cache.clear()
+    StorageUsageService._path_cache.clear()
+
+
+@pytest.fixture
+def volume_container(tmp_path):
+    """Container whose data volume is a temporary directory with some files."""
+    (tmp_path / "a.bin").write_bytes(b"x" * 8192)
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "b.bin").write_bytes(b"y" * 8192)
+
+    container = MagicMock(spec=ContainerInstance)
+    container.id = str(uuid4())
+    container.container_id = "abc123def456"
+    container.data_volume_path = str(tmp_path)
+    return container
+
+
+@pytest.fixture
+def mock_docker_service():
+    """Docker service with no overlay layer information."""
+    service = AsyncMock()
+    service.inspect_container = AsyncMock(return_value={})
+    return service
+
+
+@pytest.mark.asyncio
+async def test_get_usage_walks_data_volume(mock_docker_service, volume_container):
+    """Test usage is measured from the host data volume."""
+    service = StorageUsageService(mock_docker_service, refresh_seconds=600)
+
+    with patch.object(StorageUsageService, '_quota_usage', return_value=None):
+        usage = await service.get_usage(volume_container)
+
+    assert usage is not None
+    assert usage.source == "host_walk"
+    assert usage.used_bytes >= 16384
+    assert usage.age_seconds == 0
+
+
+@pytest.mark.asyncio
+async def test_get_usage_is_cached(mock_docker_service, volume_container):
+    """Test repeated calls within the refresh interval do not re-measure."""
+    service = StorageUsageService(mock_docker_service, refresh_seconds=600)
+
+    with patch.object(StorageUsageService, '_measure', wraps=service._measure) as mock_measure:
+        first = await service.get_usage(volume_container)
+        second = await service.get_usage(volume_container)
+
+    assert first is second
+    assert mock_measure.call_count == 1
+    mock_docker_service.inspect_container.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_usage_prefers_quota(mock_docker_service, volume_container):
+    """Test statvfs-based quota usage is used when available."""
+    service = StorageUsageService(mock_docker_service, refresh_seconds=600)
+
+    with patch.object(StorageUsageService, '_quota_usage', return_value=5 * 1024 * 1024), \
+            patch.object(StorageUsageService, '_walk_usage') as mock_walk:
+        usage = await service.get_usage(volume_container)
+
+    assert usage.source == "quota"
+    assert usage.used_mb == 5.0
+    mock_walk.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_usage_no_host_source(mock_docker_service, volume_container):
+    """Test None is returned when no host path is reachable."""
+    volume_container.data_volume_path = "/nonexistent/vps-volume"
+    service = StorageUsageService(mock_docker_service, refresh_seconds=600)
+
+    usage = await service.get_usage(volume_container)
+
+    assert usage is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_paths_retries_until_upper_dir_resolved(mock_docker_service, volume_container, tmp_path_factory):
+    """Test paths are only cached once the overlay layer has been resolved."""
+    upper_dir = tmp_path_factory.mktemp("upper")
+    mock_docker_service.inspect_container = AsyncMock(side_effect=[
+        Exception("docker unavailable"),
+        {"GraphDriver": {"Data": {"UpperDir": str(upper_dir)}}},
+    ])
+    service = StorageUsageService(mock_docker_service, refresh_seconds=600)
+
+    first = await service._resolve_paths(volume_container)
+    second = await service._resolve_paths(volume_container)
+    third = await service._resolve_paths(volume_container)
+
+    assert first == [volume_container.data_volume_path]
+    assert second == [str(upper_dir), volume_container.data_volume_path]
+    assert third == second
+    assert mock_docker_service.inspect_container.call_count == 2
@@ -10,9 +10,12 @@ from datetime import datetime, date
 from unittest.mock import AsyncMock, MagicMock, patch, Mock
 from uuid import uuid4
 
+from app.modules.hosting import tasks as tasks_module
 from app.modules.hosting.tasks import (
     provision_vps_async,
     collect_all_metrics_task,
+    collect_metrics_shard_task,
+    summarize_metrics_cycle_task,
     generate_recurring_invoices_task,
     check_overdue_invoices_task,
     cleanup_old_metrics_task
@@ -136,63 +139,100 @@ async def test_provision_vps_async_retry_on_failure(
             )
 
 
-@pytest.mark.asyncio
-@patch('app.modules.hosting.tasks.AsyncSessionLocal')
-@patch('app.modules.hosting.tasks.ContainerMonitoringService')
-async def test_collect_all_metrics_task_success(
-    mock_service_class,
-    mock_session_local
+@patch('app.modules.hosting.tasks.chord')
+@patch('app.modules.hosting.tasks._get_collectable_container_ids')
+@patch('app.modules.hosting.tasks.SyncSessionLocal')
+def test_collect_all_metrics_task_success(
+    mock_session_local,
+    mock_get_ids,
+    mock_chord
 ):
-    """Test successful metrics collection task."""
-    # Setup mocks
-    mock_session = AsyncMock()
-    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
-    mock_session.__aexit__ = AsyncMock(return_value=None)
-    mock_session_local.return_value = mock_session
-    
-    mock_service = AsyncMock()
-    mock_service.collect_all_metrics = AsyncMock(return_value=5)
-    mock_service_class.return_value = mock_service
-    
-    # Mock task with bind=True
-    task = MagicMock()
-    task.request.id = str(uuid4())
-    
-    # Execute task
-    result = collect_all_metrics_task.apply()
-    
+    """Test the running fleet is split into shards and dispatched as a chord."""
+    mock_session_local.return_value = MagicMock()
+    mock_get_ids.return_value = [str(uuid4()) for _ in range(120)]
+
+    with patch.object(tasks_module.settings, 'METRICS_COLLECTION_SHARD_SIZE', 50):
+        result = collect_all_metrics_task.apply()
+
     assert result.successful()
     data = result.result
     assert data["status"] == "success"
-    assert data["containers_collected"] == 5
+    assert data["containers_dispatched"] == 120
+    assert data["shards"] == 3
     assert "timestamp" in data
 
+    header = list(mock_chord.call_args.args[0].tasks)
+    assert [len(sig.args[0]) for sig in header] == [50, 50, 20]
+    mock_chord.return_value.apply_async.assert_called_once()
 
-@pytest.mark.asyncio
+
+@patch('app.modules.hosting.tasks.chord')
+@patch('app.modules.hosting.tasks._get_collectable_container_ids')
+@patch('app.modules.hosting.tasks.SyncSessionLocal')
+def test_collect_all_metrics_task_failure(
+    mock_session_local,
+    mock_get_ids,
+    mock_chord
+):
+    """Test metrics collection task handles failures gracefully."""
+    mock_session_local.return_value = MagicMock()
+    mock_get_ids.side_effect = Exception("Database error")
+
+    # Execute task
+    result = collect_all_metrics_task.apply()
+
+    assert result.successful()  # Task completes but returns error status
+    data = result.result
+    assert data["status"] == "error"
+    assert "error" in data
+    mock_chord.assert_not_called()
+
+
+@patch('app.modules.hosting.tasks.async_engine')
 @patch('app.modules.hosting.tasks.AsyncSessionLocal')
 @patch('app.modules.hosting.tasks.ContainerMonitoringService')
-async def test_collect_all_metrics_task_failure(
+def test_collect_metrics_shard_task(
     mock_service_class,
-    mock_session_local
+    mock_session_local,
+    mock_engine
 ):
-    """Test metrics collection task handles failures gracefully."""
-    # Setup mocks
+    """Test a shard collects its containers through the monitoring service."""
     mock_session = AsyncMock()
     mock_session.__aenter__ = AsyncMock(return_value=mock_session)
     mock_session.__aexit__ = AsyncMock(return_value=None)
     mock_session_local.return_value = mock_session
-    
+    mock_engine.dispose = AsyncMock()
+
+    cycle = MagicMock()
+    cycle.to_dict.return_value = {"total": 2, "collected": 2, "skipped": 0, "timed_out": 0, "failed": 0}
     mock_service = AsyncMock()
-    mock_service.collect_all_metrics = AsyncMock(side_effect=Exception("Docker error"))
+    mock_service.run_collection_cycle = AsyncMock(return_value=cycle)
     mock_service_class.return_value = mock_service
-    
-    # Execute task
-    result = collect_all_metrics_task.apply()
-    
-    assert result.successful()  # Task completes but returns error status
-    data = result.result
-    assert data["status"] == "error"
-    assert "error" in data
+
+    result = collect_metrics_shard_task.apply(args=[["c1", "c2"]])
+
+    assert result.result["status"] == "success"
+    assert result.result["collected"] == 2
+    mock_service.run_collection_cycle.assert_called_once_with(container_ids=["c1", "c2"])
+    mock_engine.dispose.assert_awaited_once()
+
+
+def test_summarize_metrics_cycle_task():
+    """Test shard summaries are aggregated, counting failed shards."""
+    summary = summarize_metrics_cycle_task(
+        [
+            {"status": "success", "total": 50, "collected": 48, "skipped": 1, "timed_out": 1, "failed": 0, "duration_seconds": 12.5},
+            {"status": "error", "error": "boom", "total": 20, "failed": 20},
+        ],
+        started_at=datetime.utcnow().isoformat(),
+    )
+
+    assert summary["status"] == "partial"
+    assert summary["total"] == 70
+    assert summary["collected"] == 48
+    assert summary["failed"] == 20
+    assert summary["failed_shards"] == 1
+    assert summary["slowest_shard_seconds"] == 12.5
 
 
 @pytest.mark.asyncio
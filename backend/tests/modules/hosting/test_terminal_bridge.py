@@ -0,0 +1,100 @@
+"""
+Unit tests for the terminal bridge.
+
+A socketpair stands in for the Docker exec socket and a small fake for the
+WebSocket, so the bridge runs entirely on the event loop.
+"""
+import json
+import asyncio
+import socket
+
+import pytest
+
+from app.modules.hosting.services.terminal_bridge import TerminalSession
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    def type(self, text):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps({"type": "input", "data": text})})
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect"})
+
+
+@pytest.fixture
+def sockets():
+    shell_side, bridge_side = socket.socketpair()
+    yield shell_side, bridge_side
+    shell_side.close()
+
+
+async def _recv_exactly(sock, size):
+    loop = asyncio.get_running_loop()
+    data = b""
+    while len(data) < size:
+        data += await asyncio.wait_for(loop.sock_recv(sock, size - len(data)), timeout=2)
+    return data
+
+
+@pytest.mark.asyncio
+async def test_input_reaches_shell_and_session_ends_on_disconnect(sockets):
+    """Test keystrokes are forwarded and a browser disconnect closes the exec socket."""
+    shell_side, bridge_side = sockets
+    shell_side.setblocking(False)
+    websocket = FakeWebSocket()
+    session = TerminalSession(websocket, container_id="abc")
+    await session.attach(bridge_side)
+
+    run = asyncio.create_task(session.run())
+    for key in "ls\n":
+        websocket.type(key)
+
+    assert await _recv_exactly(shell_side, 3) == b"ls\n"
+
+    websocket.disconnect()
+    await asyncio.wait_for(run, timeout=2)
+    assert await asyncio.get_running_loop().sock_recv(shell_side, 10) == b""
+
+
+@pytest.mark.asyncio
+async def test_output_is_batched_into_one_frame(sockets):
+    """Test output written in quick succession is sent as a single message."""
+    shell_side, bridge_side = sockets
+    websocket = FakeWebSocket()
+    session = TerminalSession(websocket, container_id="abc")
+    await session.attach(bridge_side)
+
+    run = asyncio.create_task(session.run())
+    for part in (b"total 0\r\n", b"drwxr-xr-x ", "été".encode()[:1]):
+        shell_side.sendall(part)
+    shell_side.sendall("été".encode()[1:])
+    shell_side.shutdown(socket.SHUT_WR)
+
+    await asyncio.wait_for(run, timeout=2)
+    assert websocket.sent == [{"type": "output", "data": "total 0\r\ndrwxr-xr-x été"}]
+
+
+@pytest.mark.asyncio
+async def test_non_json_message_is_raw_input(sockets):
+    """Test plain text messages are passed through as input."""
+    shell_side, bridge_side = sockets
+    shell_side.setblocking(False)
+    session = TerminalSession(FakeWebSocket(), container_id="abc")
+    await session.attach(bridge_side)
+
+    await session.handle_message("whoami\n")
+    run = asyncio.create_task(session._pump_input())
+
+    assert await _recv_exactly(shell_side, 7) == b"whoami\n"
+    run.cancel()
+    await session.close()
@@ -0,0 +1,79 @@
+"""
+Unit tests for the Prometheus metrics.
+
+Checks the scrape endpoint, the timed connection pool, and that samples
+written by separate processes are merged in multiprocess mode.
+"""
+import os
+import sys
+import subprocess
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import prometheus_metrics
+from app.core.prometheus_metrics import DB_POOL_CHECKOUT_WAIT, LATENCY_BUCKETS, TimedQueuePool
+from app.core.request_metrics import BUCKETS_MS
+
+
+def _sample(metric, suffix, **labels):
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix) and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0.0
+
+
+def test_timed_pool_observes_checkout_wait(tmp_path):
+    """Test every pool checkout is timed."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1)
+    before = _sample(DB_POOL_CHECKOUT_WAIT, "_count", pool="sync")
+
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+
+    assert _sample(DB_POOL_CHECKOUT_WAIT, "_count", pool="sync") == before + 3
+    engine.dispose()
+
+
+def test_latency_buckets_match_request_histograms():
+    """Test Prometheus latency buckets keep the /system histogram layout."""
+    assert LATENCY_BUCKETS == tuple(bound / 1000 for bound in BUCKETS_MS)
+
+
+def test_metrics_endpoint_exposes_request_latency_by_route(monkeypatch):
+    """Test /metrics serves route-template latency and honours the token."""
+    from app.main import app, settings
+
+    async def no_scrape_sampling():
+        return None
+
+    monkeypatch.setattr(prometheus_metrics, "sample_scrape_metrics", no_scrape_sampling)
+    client = TestClient(app)
+    client.get("/health")
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "docker_api_call_seconds" in body
+
+    monkeypatch.setattr(settings, "PROMETHEUS_METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+def test_multiprocess_samples_are_merged(tmp_path):
+    """Test observations from several worker processes add up on scrape."""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    observe = (
+        "from app.core.prometheus_metrics import DOCKER_API_DURATION; "
+        "DOCKER_API_DURATION.labels('stats', 'ok').observe(0.02)"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", observe], env=env, check=True, cwd=os.getcwd())
+
+    render = "from app.core.prometheus_metrics import render_latest; print(render_latest().decode())"
+    output = subprocess.run(
+        [sys.executable, "-c", render], env=env, check=True, capture_output=True, text=True, cwd=os.getcwd()
+    ).stdout
+    assert 'docker_api_call_seconds_count{operation="stats",outcome="ok"} 2.0' in output
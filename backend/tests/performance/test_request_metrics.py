@@ -0,0 +1,89 @@
+"""
+Unit tests for the per-route request latency histograms.
+
+The shared in-memory Redis fake checks that histograms
+from several processes add up in Redis and that windows read back the
+right percentiles.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.request_metrics import LatencyHistogram, RequestMetrics, route_template
+
+
+def test_percentiles_interpolate_within_buckets():
+    """Test percentiles land inside the bucket that holds them."""
+    histogram = LatencyHistogram()
+    for duration in [3] * 90 + [40] * 9 + [20000]:
+        histogram.observe(duration)
+
+    assert histogram.count == 100
+    assert 0 < histogram.percentile(50) <= 5
+    assert 25 < histogram.percentile(95) <= 50
+    assert histogram.percentile(99.5) == 10000
+
+
+@pytest.mark.asyncio
+async def test_workers_flush_into_shared_keys_and_windows_read_back(fake_async_redis):
+    """Test two processes' histograms add up and are read per route."""
+    now = time.time()
+    workers = [RequestMetrics(redis_client=fake_async_redis), RequestMetrics(redis_client=fake_async_redis)]
+    for worker in workers:
+        for _ in range(50):
+            worker.record("GET /api/v1/users/{user_id}", 8, 200, now=now)
+        worker.record("POST /api/v1/orders", 700, 500, now=now)
+        assert await worker.flush() == 2
+
+    end = datetime.utcnow() + timedelta(minutes=1)
+    routes = await workers[0].by_route(end - timedelta(hours=1), end)
+
+    users = routes["GET /api/v1/users/{user_id}"]
+    assert users.count == 100 and users.errors == 0
+    assert 5 < users.percentile(99) <= 10
+    orders = routes["POST /api/v1/orders"].summary()
+    assert orders["request_count"] == 2 and orders["error_rate"] == 100.0
+
+    # Long windows come from the hourly keys with the same totals
+    long_routes, steps = await workers[0].window(end - timedelta(days=7), end, step_seconds=86400)
+    assert long_routes["GET /api/v1/users/{user_id}"].count == 100
+    assert sum(histogram.count for _, histogram in steps) == 102
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried(fake_redis, fake_async_redis):
+    """Test histograms survive a Redis outage until the next flush."""
+    metrics = RequestMetrics(redis_client=fake_async_redis)
+    metrics.record("GET /api/v1/health", 4, 200)
+
+    fake_redis.down = True
+    assert await metrics.flush() == 0
+    fake_redis.down = False
+    assert await metrics.flush() == 1
+    assert any(key.startswith("metrics:requests:60:") for key in fake_redis.hashes)
+
+
+def test_route_template_uses_the_matched_route():
+    """Test requests are keyed by path template, not raw path."""
+    app = FastAPI()
+    seen = []
+
+    @app.get("/api/v1/users/{user_id}")
+    async def get_user(user_id: int):
+        return {}
+
+    @app.middleware("http")
+    async def capture(request, call_next):
+        response = await call_next(request)
+        seen.append(route_template(request))
+        return response
+
+    client = TestClient(app)
+    client.get("/api/v1/users/1")
+    client.get("/api/v1/users/2")
+    client.get("/nope")
+
+    assert seen == ["GET /api/v1/users/{user_id}"] * 2 + ["GET <unmatched>"]
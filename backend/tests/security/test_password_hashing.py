@@ -0,0 +1,63 @@
+"""
+Security tests for the password hashing pool.
+
+Tests:
+- Hashes made in the worker processes verify like inline ones
+- A saturated pool rejects with 503 instead of queueing
+- Batch verification runs in parallel and keeps input order
+"""
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.password_hashing import PasswordHasher
+from app.core.security import get_password_hash, verify_password
+
+
+@pytest.mark.asyncio
+@pytest.mark.security
+async def test_process_pool_hashes_and_verifies():
+    """Test the process pool produces hashes compatible with the inline context."""
+    hasher = PasswordHasher(workers=1, use_processes=True)
+    try:
+        hashed = await hasher.hash("correct horse")
+        assert verify_password("correct horse", hashed)
+        assert await hasher.verify("correct horse", get_password_hash("correct horse"))
+        assert await hasher.verify_and_update("wrong", hashed) == (False, None)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.security
+async def test_saturated_pool_rejects_with_503():
+    """Test requests beyond max_pending fail fast with Retry-After."""
+    hasher = PasswordHasher(workers=1, max_pending=1, use_processes=False)
+
+    first = asyncio.ensure_future(hasher.hash("first"))
+    await asyncio.sleep(0)
+    with pytest.raises(ServiceUnavailableException) as excinfo:
+        await hasher.hash("second")
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+
+    # The slot is released once the running hash finishes
+    assert verify_password("first", await first)
+    assert verify_password("third", await hasher.hash("third"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.security
+async def test_batch_verification_keeps_order_and_bypasses_admission():
+    """Test batch jobs run alongside the admission limit and report per pair."""
+    hasher = PasswordHasher(workers=2, max_pending=1, use_processes=False)
+    hashed = get_password_hash("secret")
+
+    results = await hasher.verify_and_update_many(
+        [("secret", hashed), ("nope", hashed), ("secret", "not-a-hash"), ("secret", hashed)]
+    )
+
+    assert results[0] == (True, None) and results[3] == (True, None)
+    assert results[1] == (False, None)
+    assert isinstance(results[2], ValueError)
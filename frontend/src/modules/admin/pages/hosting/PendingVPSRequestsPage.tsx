@@ -12,6 +12,7 @@ import {
   useRejectVPSRequest,
 } from "@/modules/hosting/hooks";
 import { vpsService } from "@/modules/hosting/services";
+import { streamSSE } from "@/shared/utils/sse";
 import {
   Table,
   TableBody,
@@ -99,30 +100,37 @@ export const PendingVPSRequestsPage: React.FC = () => {
   useEffect(() => {
     if (!showDownloadDialog || !downloadSubscriptionId) return;
 
-    let stopped = false;
-    const interval = setInterval(async () => {
-      try {
-        const status = await vpsService.getImageDownloadStatusAdmin(downloadSubscriptionId);
-        if (stopped) return;
-        setDownloadProgress(status.progress ?? 0);
-        setDownloadStatus(status.download_status ?? null);
-        setDownloadLogs(status.logs ?? "");
+    const token = sessionStorage.getItem("access_token") || localStorage.getItem("access_token");
+    const controller = new AbortController();
 
+    // Progress is pushed by the download task; no polling
+    streamSSE(vpsService.getImageDownloadStreamUrlAdmin(downloadSubscriptionId), {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal: controller.signal,
+      onMessage: (msg) => {
+        if (msg.event !== "snapshot" && msg.event !== "progress") return;
+        const event = JSON.parse(msg.data);
+        setDownloadProgress(event.progress ?? 0);
+        setDownloadStatus(event.status ?? null);
+        if (msg.event === "snapshot") {
+          setDownloadLogs(event.logs ?? "");
+        } else if (event.lines?.length) {
+          setDownloadLogs((prev) => (prev ? `${prev}\n` : "") + event.lines.join("\n"));
+        }
         // Close when download finished and provisioning started
-        if (status.status !== "DOWNLOADING_IMAGE" && (status.download_status === "COMPLETED" || status.progress >= 100)) {
+        if (event.status === "COMPLETED") {
+          controller.abort();
           setShowDownloadDialog(false);
           setDownloadSubscriptionId(null);
-          clearInterval(interval);
           refetch();
         }
-      } catch {
-        // ignore transient errors while polling
-      }
-    }, 1000);
+      },
+    }).catch(() => {
+      // stream errors leave the dialog open with the last known state
+    });
 
     return () => {
-      stopped = true;
-      clearInterval(interval);
+      controller.abort();
     };
   }, [showDownloadDialog, downloadSubscriptionId, refetch]);
 
@@ -502,6 +502,14 @@ export const vpsService = {
     return response.data;
   },
 
+  /**
+   * SSE URL streaming image download progress (admin)
+   */
+  getImageDownloadStreamUrlAdmin(subscriptionId: string): string {
+    const base = (apiClient.defaults.baseURL || "").replace(/\/$/, "");
+    return `${base}/hosting/admin/subscriptions/${subscriptionId}/download-status/stream`;
+  },
+
   /**
    * Suspend subscription (admin action)
    */